@@ -7,6 +7,7 @@ from django.conf import settings
 from django.db.models.fields import CharField, EmailField, BooleanField, DateTimeField, DecimalField, TextField, \
     URLField
 from django.db.models.fields.related import ForeignKey, OneToOneField
+from django.utils.functional import cached_property
 from django_countries.fields import CountryField
 
 from inventorum.ebay.apps.core_api.clients import UserScopedCoreAPIClient
@@ -191,7 +192,7 @@ class EbayUserModel(MappedInventorumModel, AuthenticableModelMixin):
     """ Represents an inventorum user in the ebay context """
     account = ForeignKey(EbayAccountModel, related_name="users", verbose_name="Account")
 
-    @property
+    @cached_property
     def core_api(self):
         """
         :return: User-scoped core api client
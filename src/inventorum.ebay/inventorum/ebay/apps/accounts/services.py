@@ -2,9 +2,12 @@
 from __future__ import absolute_import, unicode_literals
 from collections import defaultdict
 from django.utils.functional import cached_property
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.apps.fingerprints.services import is_redundant, remember_sent
 from inventorum.ebay.lib.ebay import EbayConnectionException
 from inventorum.ebay.lib.ebay.data.inventorymanagement import EbayDay, EbayInterval
 from inventorum.ebay.lib.ebay.inventorymanagement import EbayInventoryManagement
+from inventorum.ebay.lib.ebay.scheduler import EbayCallBudgetExceeded
 from requests.exceptions import HTTPError
 
 
@@ -39,12 +42,20 @@ class EbayLocationUpdateService(object):
         return self.user.account.location.get_ebay_location_object(self._get_days_as_ebay_objects())
 
     def update(self):
+        location = self.location_ebay_object
+        # the location is added to the ebay user of the token, re-authenticating may change it
+        payload = {'token': self.user.account.token_id, 'location': location.dict()}
+        if is_redundant(PayloadFingerprintTarget.EBAY_LOCATION, self.user.account.id, payload):
+            return
+
         ebay_api = EbayInventoryManagement(self.user.account.token.ebay_object)
         try:
-            ebay_api.add_location(self.location_ebay_object)
-        except EbayConnectionException as e:
+            ebay_api.add_location(location)
+        except (EbayConnectionException, EbayCallBudgetExceeded) as e:
             raise EbayLocationUpdateServiceException(e.message)
 
+        remember_sent(PayloadFingerprintTarget.EBAY_LOCATION, self.user.account.id, payload)
+
     def _get_days_as_ebay_objects(self):
         opening_hours = self.core_account.opening_hours
         opening_hours_by_day = defaultdict(list)
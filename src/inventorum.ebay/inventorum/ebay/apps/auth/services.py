@@ -33,6 +33,7 @@ class AuthorizationService(object):
         country = self.core_info.account.country
         site_id = settings.EBAY_SUPPORTED_SITES.get(country, None)
         if site_id is None:
+            self.user.core_api.invalidate_account_info()
             raise AuthorizationServiceException(ugettext('Country %(country)s not supported') % {'country': country})
 
         auth = EbayAuthentication(default_site_id=site_id)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import datetime
+import django_countries.fields
+from django.utils.timezone import utc
+import django.utils.timezone
+import inventorum.util.django.db.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0007_categoryfeaturesmodel_variations_enabled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryVersionModel',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('time_added', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('time_modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last change', auto_now=True)),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('deleted_at', models.DateTimeField(default=datetime.datetime(1970, 1, 1, 0, 0, tzinfo=utc), verbose_name='Time of deletion')),
+                ('country', django_countries.fields.CountryField(max_length=2)),
+                ('scraper', models.CharField(max_length=255)),
+                ('version', models.CharField(max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(inventorum.util.django.db.models.ModelMixins, models.Model),
+        ),
+        migrations.AlterUniqueTogether(
+            name='categoryversionmodel',
+            unique_together=set([('country', 'scraper', 'deleted_at')]),
+        ),
+    ]
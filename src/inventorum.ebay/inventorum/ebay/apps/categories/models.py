@@ -227,4 +227,37 @@ class SpecificValueModel(BaseModel):
     specific = ForeignKey(CategorySpecificModel, related_name="values")
 
     class Meta:
-        ordering = ('time_added', 'pk')
\ No newline at end of file
+        ordering = ('time_added', 'pk')
+
+
+class CategoryVersionModel(BaseModel):
+    """ Version of the ebay category tree per country that was scraped last, to skip scraping an unchanged tree """
+    country = CountryField()
+    scraper = CharField(max_length=255)
+    version = CharField(max_length=255)
+
+    class Meta:
+        unique_together = ('country', 'scraper', 'deleted_at')
+
+    @classmethod
+    def is_scraped(cls, country_code, scraper, version):
+        """
+        :type country_code: unicode
+        :type scraper: unicode
+        :type version: unicode | None
+        :rtype: bool
+        """
+        if version is None:
+            return False
+        return cls.objects.filter(country=country_code, scraper=scraper, version=version).exists()
+
+    @classmethod
+    def mark_scraped(cls, country_code, scraper, version):
+        """
+        :type country_code: unicode
+        :type scraper: unicode
+        :type version: unicode | None
+        """
+        if version is None:
+            return
+        cls.objects.update_or_create(country=country_code, scraper=scraper, defaults=dict(version=version))
@@ -0,0 +1,193 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from inventorum.ebay.apps.categories.models import CategorySpecificModel, SpecificValueModel
+from inventorum.ebay.lib.cache import ExpiringLRUCache, ProcessWideInstance
+
+
+log = logging.getLogger(__name__)
+
+
+class CategorySpecificRule(object):
+    """ Validation rules of one specific, see `CategorySpecificModel` """
+
+    def __init__(self, id, name, min_values, max_values, can_use_own_values, can_use_in_variations, allowed_values):
+        """
+        :type id: int
+        :type name: unicode
+        :type min_values: int
+        :type max_values: int
+        :type can_use_own_values: bool
+        :type can_use_in_variations: bool
+        :type allowed_values: frozenset[unicode]
+        """
+        self.id = id
+        self.name = name
+        self.min_values = min_values
+        self.max_values = max_values
+        self.can_use_own_values = can_use_own_values
+        self.can_use_in_variations = can_use_in_variations
+        self.allowed_values = allowed_values
+
+    @property
+    def is_required(self):
+        return self.min_values > 0
+
+    def is_allowed_value(self, value):
+        """
+        :type value: unicode
+        :rtype: bool
+        """
+        return self.can_use_own_values or value in self.allowed_values
+
+
+class CategorySpecificsRules(object):
+    """
+    Validation rules of all specifics of a category, compiled with two queries so that validating products of the
+    category needs no further queries
+    """
+
+    def __init__(self, category_id, rules):
+        """
+        :type category_id: int
+        :type rules: list[CategorySpecificRule]
+        """
+        self.category_id = category_id
+        self.rules_by_id = {rule.id: rule for rule in rules}
+
+        # ordered by id like the former `dict(values_list(...))` lookups, which messages list ids in
+        self.required = OrderedDict((rule.id, rule) for rule in sorted(rules, key=lambda r: r.id) if rule.is_required)
+        self.required_ids = frozenset(self.required.keys())
+
+    @classmethod
+    def compile(cls, category_id):
+        """
+        :type category_id: int
+        :rtype: CategorySpecificsRules
+        """
+        allowed_values = defaultdict(set)
+        values = SpecificValueModel.objects.filter(specific__category_id=category_id)
+        for specific_id, value in values.values_list("specific_id", "value"):
+            allowed_values[specific_id].add(value)
+
+        specifics = CategorySpecificModel.objects.filter(category_id=category_id)
+        rules = [CategorySpecificRule(id=specific.id,
+                                      name=specific.name,
+                                      min_values=specific.min_values,
+                                      max_values=specific.max_values,
+                                      can_use_own_values=specific.can_use_own_values,
+                                      can_use_in_variations=specific.can_use_in_variations,
+                                      allowed_values=frozenset(allowed_values[specific.id]))
+                 for specific in specifics]
+
+        return cls(category_id, rules)
+
+    def knows(self, specific_ids):
+        """
+        :type specific_ids: collections.Iterable[int]
+        :rtype: bool
+        """
+        return all(specific_id in self.rules_by_id for specific_id in specific_ids)
+
+    def is_allowed_value(self, specific_id, value):
+        """
+        :type specific_id: int
+        :type value: unicode
+        :rtype: bool
+        """
+        return self.rules_by_id[specific_id].is_allowed_value(value)
+
+
+class CategorySpecificsRulesCache(object):
+    """
+    Process-wide cache of the compiled specifics rules per category. Specifics only change when they are scraped from
+    ebay, the scraper invalidates the categories it updated, other processes see the changes after `ttl`.
+
+    Rules that do not know a requested specific are compiled again, as the specific was added after the compilation.
+    """
+
+    def __init__(self, ttl, max_size, clock=time.time):
+        """
+        :param ttl: Seconds the rules of a category are cached, nothing is cached with 0
+        :param max_size: Maximum number of cached categories
+
+        :type ttl: int | float
+        :type max_size: int
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries = ExpiringLRUCache(max_size=max_size, clock=clock)
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, category_id, specific_ids=()):
+        """
+        :param specific_ids: Specifics the rules have to know
+
+        :type category_id: int
+        :type specific_ids: collections.Iterable[int]
+        :rtype: CategorySpecificsRules
+        """
+        if not self.enabled:
+            return CategorySpecificsRules.compile(category_id)
+
+        with self._lock:
+            rules = self._entries.get(category_id)
+            if rules is not None and rules.knows(specific_ids):
+                return rules
+            # rules compiled before an invalidation of the category are not cached
+            generation = self._entries.generation(category_id)
+
+        rules = CategorySpecificsRules.compile(category_id)
+
+        with self._lock:
+            self._entries.set(category_id, rules, self.ttl, generation=generation)
+        return rules
+
+    def invalidate(self, category_id):
+        """
+        :type category_id: int
+        """
+        with self._lock:
+            self._entries.invalidate(category_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _create_rules_cache():
+    return CategorySpecificsRulesCache(ttl=settings.EBAY_CATEGORY_SPECIFICS_RULES_TTL,
+                                       max_size=settings.EBAY_CATEGORY_SPECIFICS_RULES_MAX_SIZE)
+
+
+_rules_cache = ProcessWideInstance(_create_rules_cache)
+
+
+def get_category_specifics_rules_cache():
+    """
+    :return: The process-wide rules cache configured via the `EBAY_CATEGORY_SPECIFICS_RULES_*` settings
+    :rtype: CategorySpecificsRulesCache
+    """
+    return _rules_cache.get()
+
+
+def get_category_specifics_rules(category_id, specific_ids=()):
+    """
+    :type category_id: int
+    :type specific_ids: collections.Iterable[int]
+    :rtype: CategorySpecificsRules
+    """
+    return get_category_specifics_rules_cache().get(category_id, specific_ids=specific_ids)
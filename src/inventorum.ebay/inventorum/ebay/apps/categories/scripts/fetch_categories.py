@@ -11,24 +11,26 @@ log = logging.getLogger(__name__)
 
 def run(*args):
     token = EbayToken(settings.EBAY_LIVE_TOKEN, expiration_time=settings.EBAY_LIVE_TOKEN_EXPIRATION_DATE)
+    # Countries with an unchanged category version are skipped, unless called with `--script-args=force`
+    skip_unchanged = 'force' not in args
 
     log.info('Fetching ebay categories...')
     try:
-        service = EbayCategoriesScraper(ebay_token=token)
+        service = EbayCategoriesScraper(ebay_token=token, skip_unchanged=skip_unchanged)
         service.fetch_all()
     except EbayConnectionException as e:
         log.exception("Got exception from ebay when getting categories")
 
     log.info('Fetching ebay features...')
     try:
-        features_service = EbayFeaturesScraper(ebay_token=token)
+        features_service = EbayFeaturesScraper(ebay_token=token, skip_unchanged=skip_unchanged)
         features_service.fetch_all()
     except EbayConnectionException as e:
         log.exception("Got exception from ebay when getting features")
 
     log.info('Fetching ebay specifics per category...')
     try:
-        specifics_service = EbaySpecificsScraper(ebay_token=token)
+        specifics_service = EbaySpecificsScraper(ebay_token=token, skip_unchanged=skip_unchanged)
         specifics_service.fetch_all()
     except EbayConnectionException as e:
         log.exception("Got exception from ebay when getting specifics")
\ No newline at end of file
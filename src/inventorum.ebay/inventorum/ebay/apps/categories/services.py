@@ -3,7 +3,9 @@ from __future__ import absolute_import, unicode_literals
 import logging
 from django.db.transaction import atomic
 from django.utils.functional import cached_property
-from inventorum.ebay.apps.categories.models import CategoryModel, CategoryFeaturesModel, CategorySpecificModel
+from inventorum.ebay.apps.categories.models import CategoryModel, CategoryFeaturesModel, CategorySpecificModel, \
+    CategoryVersionModel
+from inventorum.ebay.apps.categories.rules import get_category_specifics_rules_cache
 from inventorum.ebay.lib.db.utils import batch_queryset
 from inventorum.ebay.lib.ebay.categories import EbayCategories
 from django.conf import settings
@@ -11,31 +13,79 @@ from django.conf import settings
 log = logging.getLogger(__name__)
 
 
-class EbayCategoriesScraper(object):
+class CategoryVersionCheckMixin(object):
+    """
+    Skips countries whose ebay category tree did not change since the scraper finished them the last time
+    """
+    scraper_name = None
+    skip_unchanged = False
+    _category_versions = None
+
+    def _is_category_version_scraped(self, country_code):
+        """
+        :type country_code: unicode
+        :rtype: bool
+        """
+        if not self.skip_unchanged:
+            return False
+
+        scraped = CategoryVersionModel.is_scraped(country_code, self.scraper_name,
+                                                  self._get_category_version(country_code))
+        if scraped:
+            log.info('Skipping %s of %s, category version did not change', self.scraper_name, country_code)
+        return scraped
+
+    def _mark_category_version_scraped(self, country_code):
+        """
+        :type country_code: unicode
+        """
+        if not self.skip_unchanged:
+            return
+
+        CategoryVersionModel.mark_scraped(country_code, self.scraper_name, self._get_category_version(country_code))
+
+    def _get_category_version(self, country_code):
+        # The version is remembered from before scraping, so changes during scraping are picked up next time
+        if self._category_versions is None:
+            self._category_versions = {}
+
+        if country_code not in self._category_versions:
+            token = self.ebay_token
+            token.site_id = settings.EBAY_SUPPORTED_SITES[country_code]
+            self._category_versions[country_code] = EbayCategories(token).get_category_version()
+        return self._category_versions[country_code]
+
+
+class EbayCategoriesScraper(CategoryVersionCheckMixin):
+    scraper_name = 'categories'
     limit_root_nodes = None
     count_root_nodes_by_country = {}
     count_nodes_by_country = {}
 
     limit_nodes_level = None
 
-    def __init__(self, ebay_token, limit_root_nodes=None, limit_nodes_level=None, only_leaf=False, limit=None):
+    def __init__(self, ebay_token, limit_root_nodes=None, limit_nodes_level=None, only_leaf=False, limit=None,
+                 skip_unchanged=False):
         """
         Scraping categories from ebay and saving them to database
         :param ebay_token: Ebay token
         :param limit_root_nodes: Limit of how many root nodes we should scrap
         :param only_leaf: If true, it will get only leaf categories
         :param limit: How many categories to download
+        :param skip_unchanged: If true, countries whose category version did not change are not scraped again
         :return:
         :type ebay_token: inventorum.ebay.lib.ebay.data.EbayToken
         :type limit_root_nodes: int | None
         :type only_leaf: bool
         :type limit: int
+        :type skip_unchanged: bool
         """
         self.limit_nodes_level = limit_nodes_level
         self.limit_root_nodes = limit_root_nodes
         self.only_leaf = only_leaf
         self.ebay_token = ebay_token
         self.limit = limit
+        self.skip_unchanged = skip_unchanged
 
     def fetch_all(self):
         """
@@ -47,11 +97,17 @@ class EbayCategoriesScraper(object):
             with CategoryModel.objects.disable_mptt_updates():
                 imported_ids = []
                 for country_code in settings.EBAY_SUPPORTED_SITES.keys():
+                    if self._is_category_version_scraped(country_code):
+                        imported_ids += CategoryModel.objects.filter(country=country_code)\
+                            .values_list('pk', flat=True)
+                        continue
+
                     self.count_root_nodes_by_country[country_code] = 0
                     self.count_nodes_by_country[country_code] = 0
                     imported_ids += self._scrap_all_categories(country_code)
 
                     self._convert_children_and_parents(country_code)
+                    self._mark_category_version_scraped(country_code)
 
                 self._remove_all_categories_except_these_ids(imported_ids)
             CategoryModel.objects.rebuild()
@@ -126,11 +182,16 @@ class EbayCategoriesScraper(object):
             category.save()
 
 
-class EbayBatchScraper(object):
+class EbayBatchScraper(CategoryVersionCheckMixin):
     batch_size = 20
 
-    def __init__(self, ebay_token):
+    def __init__(self, ebay_token, skip_unchanged=False):
+        """
+        :type ebay_token: inventorum.ebay.lib.ebay.data.EbayToken
+        :type skip_unchanged: bool
+        """
         self.ebay_token = ebay_token
+        self.skip_unchanged = skip_unchanged
 
     def get_queryset_with_country(self, country_code):
         raise NotImplementedError
@@ -141,7 +202,11 @@ class EbayBatchScraper(object):
     def fetch_all(self):
         with atomic():
             for country_code in settings.EBAY_SUPPORTED_SITES.keys():
+                if self._is_category_version_scraped(country_code):
+                    continue
+
                 self._fetch_in_batches(country_code)
+                self._mark_category_version_scraped(country_code)
 
     def _fetch_in_batches(self, country_code):
         queryset = self.get_queryset_with_country(country_code)
@@ -151,6 +216,8 @@ class EbayBatchScraper(object):
 
 
 class EbayFeaturesScraper(EbayBatchScraper):
+    scraper_name = 'features'
+
     def get_queryset_with_country(self, country_code):
         return CategoryModel.objects.filter(ebay_leaf=True, country=country_code)
 
@@ -159,12 +226,15 @@ class EbayFeaturesScraper(EbayBatchScraper):
         token.site_id = settings.EBAY_SUPPORTED_SITES[country_code]
 
         ebay = EbayCategories(token)
-        for category in limited_qs:
-            feature = ebay.get_features_for_category(category.external_id)
-            CategoryFeaturesModel.create_or_update_from_ebay_data_for_category(feature, category)
+        categories = {category.external_id: category for category in limited_qs}
+        for feature in ebay.iter_features_for_categories(categories.keys()):
+            CategoryFeaturesModel.create_or_update_from_ebay_data_for_category(feature,
+                                                                               categories[feature.details.category_id])
 
 
 class EbaySpecificsScraper(EbayBatchScraper):
+    scraper_name = 'specifics'
+
     def get_queryset_with_country(self, country_code):
         return CategoryModel.objects.filter(ebay_leaf=True, features__item_specifics_enabled=True, country=country_code)
 
@@ -175,8 +245,10 @@ class EbaySpecificsScraper(EbayBatchScraper):
         ebay = EbayCategories(token)
         categories_ids = {category.external_id: category for category in limited_qs}
         specifics = ebay.get_specifics_for_categories(categories_ids.keys())
+        rules_cache = get_category_specifics_rules_cache()
         for category_id, specific in specifics.iteritems():
-            CategorySpecificModel.create_or_update_from_ebay_data_for_category(specific,
-                                                                               categories_ids[specific.category_id])
+            category = categories_ids[specific.category_id]
+            CategorySpecificModel.create_or_update_from_ebay_data_for_category(specific, category)
+            rules_cache.invalidate(category.id)
 
 
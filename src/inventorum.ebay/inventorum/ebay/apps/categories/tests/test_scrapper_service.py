@@ -5,12 +5,14 @@ import logging
 import unittest
 
 from inventorum.ebay.apps.categories.models import CategoryModel, CategoryFeaturesModel, PaymentMethodModel, \
-    DurationModel, CategorySpecificModel
+    DurationModel, CategorySpecificModel, CategoryVersionModel
 from inventorum.ebay.apps.categories.services import EbayCategoriesScraper, EbayFeaturesScraper, EbaySpecificsScraper
+from inventorum.ebay.apps.categories.tests.factories import CategoryFactory
 from inventorum.ebay.apps.core_api.tests import EbayTest
 from inventorum.ebay.apps.products.models import EbayProductModel
 from inventorum.ebay.apps.products.tests.factories import EbayProductFactory
 from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
+from inventorum.ebay.tests.utils import PatchMixin
 
 log = logging.getLogger(__name__)
 
@@ -156,3 +158,50 @@ class TestScrappingCategories(EbayAuthenticatedAPITestCase):
 
         values_values = [v.value for v in values]
         self.assertEqual(values_values, ['kg', '100 g', '10 g', 'L', '100 ml', '10 ml', 'm³', 'm', 'm²', 'Einheit'])
+
+
+class TestScrapingUnchangedCategoryVersions(EbayAuthenticatedAPITestCase, PatchMixin):
+
+    def setUp(self):
+        super(TestScrapingUnchangedCategoryVersions, self).setUp()
+
+        self.ebay_categories_mock = self.patch('inventorum.ebay.apps.categories.services.EbayCategories')
+        self.ebay_categories = self.ebay_categories_mock.return_value
+        self.ebay_categories.get_category_version.return_value = '113'
+        self.ebay_categories.get_categories.return_value = []
+        self.ebay_categories.iter_features_for_categories.return_value = []
+        self.patch('inventorum.ebay.apps.categories.services.CategoryFeaturesModel'
+                   '.create_or_update_from_ebay_data_for_category')
+
+        self.category = CategoryFactory.create(ebay_leaf=True, country='DE')
+
+    def test_features_are_only_scraped_for_changed_versions(self):
+        EbayFeaturesScraper(self.ebay_token, skip_unchanged=True).fetch_all()
+        self.assertEqual(self.ebay_categories.iter_features_for_categories.call_count, 1)
+        self.assertEqual(CategoryVersionModel.objects.filter(scraper='features').count(), 2)
+
+        self.ebay_categories.iter_features_for_categories.reset_mock()
+        EbayFeaturesScraper(self.ebay_token, skip_unchanged=True).fetch_all()
+        self.assertFalse(self.ebay_categories.iter_features_for_categories.called)
+
+        self.ebay_categories.get_category_version.return_value = '114'
+        EbayFeaturesScraper(self.ebay_token, skip_unchanged=True).fetch_all()
+        self.assertEqual(self.ebay_categories.iter_features_for_categories.call_count, 1)
+
+    def test_skipped_countries_keep_their_categories(self):
+        CategoryVersionModel.mark_scraped('DE', 'categories', '113')
+
+        EbayCategoriesScraper(self.ebay_token, skip_unchanged=True).fetch_all()
+
+        self.assertEqual(self.ebay_categories.get_categories.call_count, 1)
+        self.assertTrue(CategoryModel.objects.filter(pk=self.category.pk).exists())
+        self.assertTrue(CategoryVersionModel.is_scraped('AT', 'categories', '113'))
+
+    def test_versions_are_ignored_by_default(self):
+        CategoryVersionModel.mark_scraped('DE', 'features', '113')
+        CategoryVersionModel.mark_scraped('AT', 'features', '113')
+
+        EbayFeaturesScraper(self.ebay_token).fetch_all()
+
+        self.assertEqual(self.ebay_categories.iter_features_for_categories.call_count, 1)
+        self.assertFalse(self.ebay_categories.get_category_version.called)
@@ -0,0 +1,133 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from django.core.exceptions import ValidationError
+from django.test.utils import override_settings
+from inventorum.ebay.apps.categories.models import CategoryModel
+from inventorum.ebay.apps.categories.rules import CategorySpecificsRules, CategorySpecificsRulesCache, \
+    get_category_specifics_rules_cache, _create_rules_cache
+from inventorum.ebay.apps.categories.services import EbaySpecificsScraper
+from inventorum.ebay.apps.categories.tests.factories import CategoryFactory, CategorySpecificFactory
+from inventorum.ebay.apps.products.serializers import EbayProductSpecificSerializer
+from inventorum.ebay.apps.products.validators import CategorySpecificsValidator
+from inventorum.ebay.lib.cache import ProcessWideInstance
+from inventorum.ebay.tests.testcases import UnitTestCase
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestCategorySpecificsRules(UnitTestCase):
+
+    def setUp(self):
+        super(TestCategorySpecificsRules, self).setUp()
+
+        self.category = CategoryFactory.create()
+        self.optional = CategorySpecificFactory.create(category=self.category)
+        self.required = CategorySpecificFactory.create_required(category=self.category, max_values=2,
+                                                                selection_mode="SelectionOnly",
+                                                                can_use_in_variations=False)
+
+        self.now = 1000.0
+        self.subject = CategorySpecificsRulesCache(ttl=60, max_size=2, clock=lambda: self.now)
+
+    def test_compile(self):
+        with self.assertNumQueries(2):
+            rules = CategorySpecificsRules.compile(self.category.id)
+
+        self.assertEqual(rules.required_ids, {self.required.id})
+        self.assertEqual(rules.required[self.required.id].max_values, 2)
+        self.assertFalse(rules.rules_by_id[self.required.id].can_use_in_variations)
+
+        required_value = self.required.values.first().value
+        self.assertTrue(rules.is_allowed_value(self.required.id, required_value))
+        self.assertFalse(rules.is_allowed_value(self.required.id, "Own value"))
+        self.assertTrue(rules.is_allowed_value(self.optional.id, "Own value"))
+
+    def test_ttl_and_invalidation(self):
+        rules = self.subject.get(self.category.id)
+        with self.assertNumQueries(0):
+            self.assertIs(self.subject.get(self.category.id), rules)
+
+        self.now += 60
+        rules = self.subject.get(self.category.id)
+        self.assertIsNot(rules, None)
+
+        self.subject.invalidate(self.category.id)
+        self.assertIsNot(self.subject.get(self.category.id), rules)
+
+    def test_unknown_specifics_are_compiled_again(self):
+        rules = self.subject.get(self.category.id)
+        specific = CategorySpecificFactory.create_required(category=self.category)
+
+        self.assertIs(self.subject.get(self.category.id), rules)
+        self.assertIn(specific.id, self.subject.get(self.category.id, specific_ids=[specific.id]).required_ids)
+
+    def test_eviction(self):
+        categories = [self.category.id] + [CategoryFactory.create().id for _ in range(2)]
+        for category_id in categories:
+            self.subject.get(category_id)
+
+        self.assertEqual(len(self.subject), 2)
+        with self.assertNumQueries(2):
+            self.subject.get(categories[0])
+
+    def test_disabled(self):
+        subject = CategorySpecificsRulesCache(ttl=0, max_size=2)
+        subject.get(self.category.id)
+
+        with self.assertNumQueries(2):
+            subject.get(self.category.id)
+        self.assertEqual(len(subject), 0)
+
+
+class TestCachedSpecificsValidation(UnitTestCase):
+
+    def setUp(self):
+        super(TestCachedSpecificsValidation, self).setUp()
+
+        self.patch('inventorum.ebay.apps.categories.rules._rules_cache', ProcessWideInstance(_create_rules_cache))
+        settings_override = override_settings(EBAY_CATEGORY_SPECIFICS_RULES_TTL=60)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.category = CategoryFactory.create()
+        self.specifics = [CategorySpecificFactory.create_required(category=self.category, max_values=2),
+                          CategorySpecificFactory.create_required(category=self.category,
+                                                                  selection_mode="SelectionOnly")]
+
+    def test_validation_needs_no_queries(self):
+        validator = CategorySpecificsValidator(category=self.category, specifics=self.specifics[:1])
+        validator.validate()
+
+        with self.assertNumQueries(0):
+            validator = CategorySpecificsValidator(category=self.category,
+                                                   specifics=[self.specifics[0]] * 3)
+            validator.validate()
+        self.assertEqual(validator.errors, [
+            'You send too many values for one specific (specific_ids: [%s])!' % self.specifics[0].id,
+            'You need to pass all required specifics (missing: [%s])!' % self.specifics[1].id
+        ])
+
+        serializer = EbayProductSpecificSerializer()
+        allowed_value = self.specifics[1].values.first().value
+        with self.assertNumQueries(0):
+            serializer._validate_value(self.specifics[1], allowed_value)
+            self.assertRaises(ValidationError, serializer._validate_value, self.specifics[1], "Own value")
+
+    def test_scraper_invalidates_rules(self):
+        rules = get_category_specifics_rules_cache().get(self.category.id)
+
+        ebay_categories = self.patch("inventorum.ebay.apps.categories.services.EbayCategories")
+        ebay_categories.return_value.get_specifics_for_categories.return_value = {
+            self.category.external_id: Mock(category_id=self.category.external_id)
+        }
+        self.patch("inventorum.ebay.apps.categories.models.CategorySpecificModel"
+                   ".create_or_update_from_ebay_data_for_category")
+
+        scraper = EbaySpecificsScraper(ebay_token=Mock())
+        scraper.fetch(CategoryModel.objects.filter(id=self.category.id), "DE")
+
+        self.assertIsNot(get_category_specifics_rules_cache().get(self.category.id), rules)
@@ -0,0 +1,125 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from inventorum.ebay.lib.cache import CacheStats, ExpiringLRUCache, ProcessWideInstance
+
+
+log = logging.getLogger(__name__)
+
+
+class CoreInfoCacheStats(CacheStats):
+    COUNTERS = CacheStats.COUNTERS + ('coalesced',)
+
+
+class CoreInfoCache(object):
+    """
+    Process-wide cache of the core account info (`/api/info/`) per account, which is needed by every publishing,
+    location update and authorization but rarely changes.
+
+    Only one request per account is sent at once: concurrent misses of the same account wait for the running request
+    instead of sending their own. The least recently used accounts are evicted once `max_size` is reached.
+
+    Every web and worker process has its own cache, invalidations are not shared: other processes see a changed info
+    after `ttl` at the latest, which bounds how long they may act on stale info.
+    """
+
+    def __init__(self, ttl, max_size, clock=time.time):
+        """
+        :param ttl: Seconds the info of an account is cached, nothing is cached with 0
+        :param max_size: Maximum number of cached accounts
+
+        :type ttl: int | float
+        :type max_size: int
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self.stats = CoreInfoCacheStats()
+
+        self._lock = threading.Lock()
+        self._entries = ExpiringLRUCache(max_size=max_size, clock=clock, stats=self.stats)
+        # account id -> event that is set once the running request of the account is done
+        self._requests = {}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get_or_fetch(self, account_id, fetch):
+        """
+        :param fetch: Requests the info of the account from the core api if it is not cached
+
+        :type account_id: int
+        :type fetch: () -> inventorum.ebay.apps.core_api.models.CoreInfo
+        :return: Copy of the cached or freshly requested info
+        :rtype: inventorum.ebay.apps.core_api.models.CoreInfo
+        """
+        if not self.enabled:
+            return fetch()
+
+        while True:
+            with self._lock:
+                core_info = self._entries.get(account_id)
+                if core_info is not None:
+                    return copy.deepcopy(core_info)
+
+                running_request = self._requests.get(account_id)
+                if running_request is None:
+                    self.stats.misses += 1
+                    running_request = self._requests[account_id] = threading.Event()
+                    # info requested before an invalidation of the account is not cached
+                    generation = self._entries.generation(account_id)
+                    break
+
+                self.stats.coalesced += 1
+
+            # if the running request fails, the next waiting caller sends its own
+            running_request.wait()
+
+        try:
+            core_info = fetch()
+            with self._lock:
+                self._entries.set(account_id, copy.deepcopy(core_info), self.ttl, generation=generation)
+            return copy.deepcopy(core_info)
+        finally:
+            with self._lock:
+                del self._requests[account_id]
+            running_request.set()
+
+    def invalidate(self, account_id):
+        """
+        Drops the info of the account, e.g. when it is known to have changed in the core api. Only the cache of
+        this process is invalidated, other processes keep their info until it expires after `ttl`.
+
+        :type account_id: int
+        """
+        with self._lock:
+            self._entries.invalidate(account_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _create_core_info_cache():
+    return CoreInfoCache(ttl=settings.INV_CORE_INFO_CACHE_TTL,
+                         max_size=settings.INV_CORE_INFO_CACHE_MAX_SIZE)
+
+
+_core_info_cache = ProcessWideInstance(_create_core_info_cache)
+
+
+def get_core_info_cache():
+    """
+    :return: The process-wide core info cache configured via the `INV_CORE_INFO_CACHE_*` settings
+    :rtype: CoreInfoCache
+    """
+    return _core_info_cache.get()
@@ -2,13 +2,17 @@
 from __future__ import absolute_import, unicode_literals
 import json
 import logging
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from inventorum.ebay.apps.core_api.cache import get_core_info_cache
 from inventorum.ebay.apps.core_api.models import CoreProductDeserializer, CoreInfoDeserializer, \
-    CoreProductDeltaDeserializer
+    CoreProductDeltaDeserializer, CoreProductBatch
 from inventorum.ebay.apps.core_api.pager import Pager
-import requests
+from inventorum.ebay.apps.core_api.session import get_core_api_session
 
 from django.conf import settings
 from inventorum.ebay.apps.inventory.serializers import QuantityCoreApiResponseDeserializer
+from inventorum.ebay.lib.rest.serializers import compile_deserializer
 
 log = logging.getLogger(__name__)
 
@@ -51,18 +55,21 @@ class CoreAPIClient(object):
         protocol = 'https' if settings.INV_CORE_API_SECURE else 'http'
         return "{protocol}://{host}{path}".format(protocol=protocol, host=settings.INV_CORE_API_HOST, path=path)
 
-    def get(self, path, params=None, custom_headers=None):
+    def get(self, path, params=None, custom_headers=None, stream=False):
         """
         Performs a get request to the given core api path with the given params/headers
 
         :param path: The core api request path
         :param params: Optional URL params
         :param custom_headers: Optional custom HTTP headers (default header can be overwritten)
+        :param stream: If set, only the headers are read, the body has to be consumed (or the response closed) by the
+            caller
         :return: The HTTP response
 
         :type path: str | unicode
         :type params: dict
         :type custom_headers: dict
+        :type stream: bool
 
         :rtype: requests.models.Response
 
@@ -74,7 +81,7 @@ class CoreAPIClient(object):
         headers = self.default_headers
         headers.update(custom_headers)
 
-        response = requests.get(self.url_for(path), params=params, headers=headers)
+        response = self._request('GET', path, params=params, headers=headers, stream=stream)
         if not response.ok:
             response.raise_for_status()
 
@@ -111,7 +118,7 @@ class CoreAPIClient(object):
         headers = self.default_headers
         headers.update(custom_headers)
 
-        response = requests.post(self.url_for(path), json=data, params=params, headers=headers)
+        response = self._request('POST', path, json=data, params=params, headers=headers)
 
         if not response.ok:
             log.error(response.content)
@@ -140,7 +147,7 @@ class CoreAPIClient(object):
         """
         headers = self._get_request_headers(custom_headers)
 
-        response = requests.put(self.url_for(path), json=data, params=params, headers=headers)
+        response = self._request('PUT', path, json=data, params=params, headers=headers)
 
         if not response.ok:
             response.raise_for_status()
@@ -167,14 +174,14 @@ class CoreAPIClient(object):
         """
         headers = self._get_request_headers(custom_headers)
 
-        response = requests.delete(self.url_for(path), params=params, headers=headers)
+        response = self._request('DELETE', path, params=params, headers=headers)
 
         if not response.ok:
             response.raise_for_status()
 
         return response
 
-    def paginated_get(self, path, limit_per_page, params=None, custom_headers=None):
+    def paginated_get(self, path, limit_per_page, params=None, custom_headers=None, prefetch=0, stream=False):
         """
         Returns a pager that paginates the given paginated core api path with the given limit per page.
 
@@ -184,19 +191,35 @@ class CoreAPIClient(object):
         :param limit_per_page: The limit of items per page
         :param params: Optional URL params
         :param custom_headers: Optional custom HTTP headers (default header can be overwritten)
+        :param prefetch: Number of upcoming pages requested concurrently while iterating, excludes `stream` (see
+            `Pager`)
+        :param stream: Whether the items of the pages are decoded one by one while they are downloaded, excludes
+            `prefetch` (see `Pager`)
         :return: The pager instance
 
         :type path: str | unicode
         :type limit_per_page: int
         :type params: dict
         :type custom_headers: dict
+        :type prefetch: int
+        :type stream: bool
 
         :rtype: Pager
 
         :raises requests.exceptions.HTTPError, inventorum.ebay.apps.core_api.pager.PagerException
         """
         return Pager(client=self, path=path, limit_per_page=limit_per_page,
-                     params=params, custom_headers=custom_headers)
+                     params=params, custom_headers=custom_headers, prefetch=prefetch, stream=stream)
+
+    def _request(self, method, path, **kwargs):
+        """
+        Sends the request through the process-wide keep-alive session
+
+        :type method: unicode
+        :type path: str | unicode
+        :rtype: requests.models.Response
+        """
+        return get_core_api_session().request(method, self.url_for(path), path, **kwargs)
 
     def _encode_request_data(self, payload):
         return json.dumps(payload)
@@ -218,6 +241,11 @@ class CoreAPIClient(object):
 
 
 class UserScopedCoreAPIClient(CoreAPIClient):
+    # ids per request of `get_products`, bounded by the maximum url length
+    PRODUCTS_CHUNK_SIZE = 50
+    # chunks of `get_products` that are requested at once
+    PRODUCTS_MAX_CONCURRENCY = 4
+
     def __init__(self, user_id, account_id):
         """
         :param user_id: The global inventorum user id that is used for the api scope
@@ -258,12 +286,70 @@ class UserScopedCoreAPIClient(CoreAPIClient):
         serializer = CoreProductDeserializer(data=json)
         return serializer.build()
 
-    def get_account_info(self):
+    def get_products(self, product_ids):
+        """
+        Fetches many products with one request per chunk of ids, up to `PRODUCTS_MAX_CONCURRENCY` chunks are
+        requested concurrently and all products are deserialized at once.
+
+        :param product_ids: Global inventorum product ids
+
+        :type product_ids: collections.Iterable[int]
+        :rtype: inventorum.ebay.apps.core_api.models.CoreProductBatch
+        :raises requests.exceptions.RequestException
+                rest_framework.exceptions.ValidationError
+        """
+        product_ids = list(OrderedDict.fromkeys(product_ids))
+        if not product_ids:
+            return CoreProductBatch(products={}, missing_ids=[])
+
+        chunks = [product_ids[i:i + self.PRODUCTS_CHUNK_SIZE]
+                  for i in range(0, len(product_ids), self.PRODUCTS_CHUNK_SIZE)]
+
+        pool = ThreadPool(min(self.PRODUCTS_MAX_CONCURRENCY, len(chunks)))
+        try:
+            # the first failed chunk is raised
+            pages = pool.map(self._get_products_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+
+        deserializer = compile_deserializer(CoreProductDeserializer)
+        products = {product.id: product
+                    for product in deserializer.build([data for page in pages for data in page], many=True)}
+
+        missing_ids = [product_id for product_id in product_ids if product_id not in products]
+        if missing_ids:
+            log.debug('Core api did not return products %s', missing_ids)
+
+        return CoreProductBatch(products=products, missing_ids=missing_ids)
+
+    def _get_products_chunk(self, product_ids):
+        """
+        :type product_ids: list[int]
+        :rtype: list[dict]
         """
+        response = self.get("/api/products/", params={"id": product_ids, "limit": len(product_ids)})
+        return response.json()["data"]
+
+    def get_account_info(self, use_cache=True):
+        """
+        :param use_cache: Whether the info may be served from the process-wide core info cache
+
+        :type use_cache: bool
         :rtype: inventorum.ebay.apps.core_api.models.CoreInfo
         :raises requests.exceptions.RequestException
                 rest_framework.exceptions.ValidationError
         """
+        if not use_cache:
+            return self._fetch_account_info()
+
+        return get_core_info_cache().get_or_fetch(self.account_id, self._fetch_account_info)
+
+    def invalidate_account_info(self):
+        """ Drops the cached account info, the next `get_account_info` requests it from the core api again """
+        get_core_info_cache().invalidate(self.account_id)
+
+    def _fetch_account_info(self):
         response = self.get("/api/info/")
         json = response.json()
         serializer = CoreInfoDeserializer(data=json)
@@ -288,7 +374,8 @@ class UserScopedCoreAPIClient(CoreAPIClient):
         :type start_date: datetime.datetime
         :type limit_per_page: int
 
-        :rtype: collections.Iterable[list of inventorum.ebay.apps.core_api.models.CoreProductDelta]
+        :return: Pages of deltas, the deltas of a page are decoded lazily while the page is downloaded
+        :rtype: collections.Iterable[collections.Iterable[inventorum.ebay.apps.core_api.models.CoreProductDelta]]
         :raises requests.exceptions.RequestException
                 rest_framework.exceptions.ValidationError
         """
@@ -298,26 +385,29 @@ class UserScopedCoreAPIClient(CoreAPIClient):
             "start_date": self._encode_datetime(start_date)
         }
 
-        pager = self.paginated_get("/api/products/delta/modified/", limit_per_page=limit_per_page, params=params)
+        # verbose products are too large to hold several pages in memory, so they are streamed and not prefetched
+        pager = self.paginated_get("/api/products/delta/modified/", limit_per_page=limit_per_page, params=params,
+                                   stream=True)
+        deserializer = compile_deserializer(CoreProductDeltaDeserializer)
         for page in pager.pages:
-            serializer = CoreProductDeltaDeserializer(data=page.data, many=True)
-            # TODO jm: Exception: ListSerializer has no method build, save works here but its ugly :-x
-            serializer.is_valid(raise_exception=True)
-            yield serializer.save()
+            yield (deserializer.build(data) for data in page.data)
 
     def get_paginated_product_delta_deleted(self, start_date, limit_per_page=10000):
         """
         :type start_date: datetime.datetime
         :type limit_per_page: int
 
-        :rtype: collections.Iterable[list of int]
+        :return: Pages of ids
+        :rtype: collections.Iterable[collections.Iterable[int]]
         :raises requests.exceptions.RequestException
                 rest_framework.exceptions.ValidationError
         """
         params = {
             "start_date": self._encode_datetime(start_date)
         }
-        pager = self.paginated_get("/api/products/delta/deleted/", limit_per_page=limit_per_page, params=params)
+        # pages of ids are small, they are read completely and requested ahead
+        pager = self.paginated_get("/api/products/delta/deleted/", limit_per_page=limit_per_page, params=params,
+                                   prefetch=settings.INV_CORE_API_PAGER_PREFETCH)
         for page in pager.pages:
             yield page.data
 
@@ -71,6 +71,21 @@ class CoreProduct(object):
         return len(self.variations) > 0
 
 
+class CoreProductBatch(object):
+    """ Products fetched at once from the inventorum api """
+
+    def __init__(self, products, missing_ids):
+        """
+        :param products: Products by id
+        :param missing_ids: Requested ids the api did not return, e.g. of deleted products
+
+        :type products: dict[int, CoreProduct]
+        :type missing_ids: list[int]
+        """
+        self.products = products
+        self.missing_ids = missing_ids
+
+
 class CoreProductImage(object):
     """ Represents a product image embedded in a core product"""
 
@@ -144,9 +159,8 @@ class CoreBasicProductDeserializer(POPOSerializer, CoreProductMetaOverrideMixin)
     # meta will be removed after meta overwrites
     meta = serializers.DictField(child=MetaDeserializer())
 
-    def create(self, validated_data):
+    def process_validated_data(self, validated_data):
         self.overwrite_attrs_from_meta(validated_data, remove_meta=True)
-        return super(CoreBasicProductDeserializer, self).create(validated_data)
 
 
 class CoreProductDeserializer(CoreBasicProductDeserializer):
@@ -310,8 +324,7 @@ class CoreProductDeltaDeserializer(POPOSerializer, CoreProductMetaOverrideMixin)
     # meta will be removed after meta overwrites
     meta = serializers.DictField(required=False, child=MetaDeserializer())
 
-    def create(self, validated_data):
+    def process_validated_data(self, validated_data):
         self.overwrite_attrs_from_meta(validated_data, remove_meta=True)
-        return super(CoreProductDeltaDeserializer, self).create(validated_data)
 
 
@@ -2,8 +2,12 @@
 from __future__ import absolute_import, unicode_literals
 from decimal import Decimal
 import logging
+import sys
+import threading
 from math import ceil
+from django.utils import six
 from django.utils.functional import cached_property
+from inventorum.ebay.apps.core_api.streaming import CorePageStreamParser
 
 log = logging.getLogger(__name__)
 
@@ -28,20 +32,71 @@ class Page(object):
         self.data = data
 
 
+class PageFetch(threading.Thread):
+    """ Requests one page in the background, `page()` waits for it """
+
+    def __init__(self, pager, number):
+        """
+        :type pager: Pager
+        :type number: int
+        """
+        super(PageFetch, self).__init__(name='PageFetch-{}'.format(number))
+        self.daemon = True
+
+        self.pager = pager
+        self.number = number
+
+        self._page = None
+        self._exc_info = None
+
+    def run(self):
+        try:
+            self._page = self.pager._fetch_page(self.number)
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+    def page(self):
+        """
+        :rtype: Page
+        :raises requests.exceptions.HTTPError, PagerException
+        """
+        self.join()
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._page
+
+
 class Pager(object):
     TOTAL_ATTR_NAME = "total"
     DATA_ATTR_NAME = "data"
+    # Bytes read at once from streamed pages
+    STREAM_CHUNK_SIZE = 16 * 1024
 
-    def __init__(self, client, path, limit_per_page, params=None, custom_headers=None):
+    def __init__(self, client, path, limit_per_page, params=None, custom_headers=None, prefetch=0, stream=False):
         """
+        :param prefetch: Number of upcoming pages that are requested concurrently while the current page is processed,
+            at most this many pages are requested at once and held in memory besides the current page. Pages are
+            requested one after another with 0.
+        :param stream: If set, the `total` of every page is validated up front, but its `data` is a generator that
+            decodes the items one by one while the body is downloaded instead of a list of all items
+
+        Prefetching and streaming exclude each other: a prefetched page is only read up front if its body is read
+        completely, a streamed page would only have its headers read ahead while it holds a connection of the pool.
+        Prefetch pages that are small enough to be held in memory, stream pages that are not.
+
         :type client: inventorum.ebay.apps.core_api.clients.CoreAPIClient
         :type path: str | unicode
         :type limit_per_page: int
         :type params: dict
         :type custom_headers: dict
+        :type prefetch: int
+        :type stream: bool
 
         :raises requests.exceptions.HTTPError, PagerException
         """
+        if prefetch and stream:
+            raise ValueError("Streamed pages cannot be prefetched")
+
         if params is None:
             params = {}
 
@@ -50,6 +105,8 @@ class Pager(object):
         self.limit_per_page = limit_per_page
         self.params = params
         self.custom_headers = custom_headers
+        self.prefetch = prefetch
+        self.stream = stream
 
         self._init_with_initial_request()
 
@@ -77,20 +134,63 @@ class Pager(object):
 
         :raises requests.exceptions.HTTPError, PagerException
         """
-        yield Page(pager=self, number=1, response=self._initial_response,
-                   data=self._initial_json_body[self.DATA_ATTR_NAME])
+        first_page = Page(pager=self, number=1, response=self._initial_response,
+                          data=self._initial_json_body[self.DATA_ATTR_NAME])
 
+        if self.prefetch > 0:
+            for page in self._prefetched_pages(first_page):
+                yield page
+            return
+
+        yield first_page
         for i in range(2, self.total_pages + 1):
-            response = self._request_page(i)
-            json_body = self._parse_and_validate_json(response)
-            yield Page(pager=self, number=i, response=response, data=json_body[self.DATA_ATTR_NAME])
+            yield self._fetch_page(i)
+
+    def _prefetched_pages(self, first_page):
+        """
+        Yields the first page and pages 2..N in order while the `prefetch` pages after the yielded one are requested.
+        Errors are raised when the failed page is due, so the first failing page always wins, no matter in which order
+        the requests completed.
+
+        :type first_page: Page
+        :rtype: collections.Iterable[Page]
+        """
+        def request(number):
+            fetch = PageFetch(self, number)
+            fetch.start()
+            return fetch
+
+        # the first `prefetch` pages are requested at once
+        fetches = {number: request(number) for number in range(2, min(1 + self.prefetch, self.total_pages) + 1)}
+        yield first_page
+
+        for number in range(2, self.total_pages + 1):
+            # pages requested ahead are dropped if the caller stops iterating or this page failed
+            page = fetches.pop(number).page()
+
+            # keep `prefetch` pages requested while the caller processes this one
+            ahead_number = number + self.prefetch
+            if ahead_number <= self.total_pages:
+                fetches[ahead_number] = request(ahead_number)
+            yield page
+
+    def _fetch_page(self, number):
+        """
+        :type number: int
+        :rtype: Page
+
+        :raises requests.exceptions.HTTPError, PagerException
+        """
+        response = self._request_page(number)
+        json_body = self._parse_and_validate_body(response)
+        return Page(pager=self, number=number, response=response, data=json_body[self.DATA_ATTR_NAME])
 
     def _init_with_initial_request(self):
         """
         Initializes the pager by requesting the first page to determine the total number of items and pages
         """
         initial_response = self._request_page(1)
-        initial_json_body = self._parse_and_validate_json(initial_response)
+        initial_json_body = self._parse_and_validate_body(initial_response)
 
         try:
             self._total_items = int(initial_json_body[self.TOTAL_ATTR_NAME])
@@ -103,6 +203,62 @@ class Pager(object):
         self._initial_response = initial_response
         self._initial_json_body = initial_json_body
 
+    def _parse_and_validate_body(self, response):
+        """
+        :type response: requests.models.Response
+        :rtype: dict
+
+        :raises PagerException
+        """
+        if self.stream:
+            return self._parse_and_validate_stream(response)
+        return self._parse_and_validate_json(response)
+
+    def _parse_and_validate_stream(self, response):
+        """
+        Reads the body up to the data array, which is returned as generator of its items
+
+        :type response: requests.models.Response
+        :rtype: dict
+
+        :raises PagerException
+        """
+        parser = CorePageStreamParser(response.iter_content(self.STREAM_CHUNK_SIZE),
+                                      total_attr=self.TOTAL_ATTR_NAME, data_attr=self.DATA_ATTR_NAME)
+        try:
+            parser.read_header()
+        except ValueError as e:
+            response.close()
+            raise PagerException("Malformed response body: {}".format(e))
+
+        if self.TOTAL_ATTR_NAME not in parser.attrs:
+            response.close()
+            raise PagerException("Malformed response body: No `total` received in '{}'".format(parser.attrs))
+
+        if not parser.has_data:
+            response.close()
+            raise PagerException("Malformed response body: No `data` received in '{}'".format(parser.attrs))
+
+        json_body = dict(parser.attrs)
+        json_body[self.DATA_ATTR_NAME] = self._streamed_items(parser, response)
+        return json_body
+
+    def _streamed_items(self, parser, response):
+        """
+        :type parser: CorePageStreamParser
+        :type response: requests.models.Response
+        :rtype: collections.Iterable[dict]
+
+        :raises PagerException
+        """
+        try:
+            for item in parser.items():
+                yield item
+        except ValueError as e:
+            raise PagerException("Malformed response body: {}".format(e))
+        finally:
+            response.close()
+
     def _parse_and_validate_json(self, response):
         """
         :type response: requests.models.Response
@@ -136,4 +292,6 @@ class Pager(object):
         params["page"] = page
         params["limit"] = self.limit_per_page
 
+        if self.stream:
+            return self.client.get(self.path, params, self.custom_headers, stream=True)
         return self.client.get(self.path, params, self.custom_headers)
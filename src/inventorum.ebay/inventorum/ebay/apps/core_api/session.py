@@ -0,0 +1,190 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+
+log = logging.getLogger(__name__)
+
+
+class CoreAPIEndpointStats(object):
+    """ Timing counters of the calls to one core api endpoint """
+
+    def __init__(self):
+        self.calls = 0
+        self.failed = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def mean_time(self):
+        if not self.calls:
+            return 0.0
+        return self.total_time / self.calls
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'calls': self.calls,
+            'failed': self.failed,
+            'total_time': self.total_time,
+            'mean_time': self.mean_time,
+            'max_time': self.max_time
+        }
+
+
+class CoreAPISession(object):
+    """
+    Process-wide keep-alive session to the core api, shared by all (user-scoped) clients. User specific headers are
+    sent per request, so one session serves all users.
+
+    Calls that failed to connect are always retried, read errors and 502/503/504 responses only for idempotent
+    verbs, with exponential backoff between the attempts. If the core api still answers with one of these status codes
+    after the last retry, that response is returned, so callers handle it like any other error response.
+    """
+    IDEMPOTENT_METHODS = frozenset(['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS'])
+    RETRY_STATUS_CODES = (502, 503, 504)
+
+    # ids in paths are replaced, so calls are counted per endpoint and not per product
+    ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+    def __init__(self, max_connections, max_retries, retry_backoff, timeout, clock=time.time, sleep=time.sleep):
+        """
+        :param max_connections: Maximum number of keep-alive connections to the core api host
+        :param max_retries: Maximum number of retries of a single call
+        :param retry_backoff: Backoff factor of the retries, urllib3 waits `retry_backoff * 2^(retry - 1)` seconds
+        :param timeout: Seconds to wait for the connection and for the response
+
+        :type max_connections: int
+        :type max_retries: int
+        :type retry_backoff: float
+        :type timeout: int | float
+        """
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._session = self._create_session()
+        self._stats = defaultdict(CoreAPIEndpointStats)
+        self._pid = os.getpid()
+
+    def request(self, method, url, path, **kwargs):
+        """
+        :param path: Relative core api path the url was built from, used to count the calls per endpoint
+
+        :type method: unicode
+        :type url: unicode
+        :type path: unicode
+        :rtype: requests.models.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+
+        started_at = self.clock()
+        failed = True
+        try:
+            response = self._request(method, url, **kwargs)
+            failed = not response.ok
+            return response
+        finally:
+            self._count(method, path, self.clock() - started_at, failed)
+
+    def _request(self, method, url, **kwargs):
+        """
+        Retries idempotent calls answered with one of the `RETRY_STATUS_CODES`, connection and read errors are
+        retried by urllib3
+
+        :rtype: requests.models.Response
+        """
+        max_retries = self.max_retries if method in self.IDEMPOTENT_METHODS else 0
+
+        retry = 0
+        while True:
+            response = self._get_session().request(method, url, **kwargs)
+            if response.status_code not in self.RETRY_STATUS_CODES or retry >= max_retries:
+                return response
+
+            retry += 1
+            response.close()
+            log.warn('Core api answered %s %s with %s, retrying (%d/%d)', method, url, response.status_code, retry,
+                     max_retries)
+            self.sleep(self.retry_backoff * 2 ** (retry - 1))
+
+    def stats(self):
+        """
+        :return: Copy of the timing counters by (method, endpoint)
+        :rtype: dict[(unicode, unicode), dict]
+        """
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self._stats.iteritems()}
+
+    def close(self):
+        with self._lock:
+            self._session.close()
+
+    def _get_session(self):
+        with self._lock:
+            # Sockets must not be shared between celery's prefork children and their parent
+            if self._pid != os.getpid():
+                log.debug('Process was forked, dropping inherited core api connections')
+                self._reset()
+            return self._session
+
+    def _count(self, method, path, duration, failed):
+        endpoint = self.ID_SEGMENT.sub('/{id}', path)
+
+        with self._lock:
+            stats = self._stats[(method, endpoint)]
+            stats.calls += 1
+            stats.failed += int(failed)
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+
+    def _create_session(self):
+        # no status_forcelist, urllib3 would raise a RetryError instead of returning the last response
+        retries = Retry(total=self.max_retries, connect=self.max_retries, read=self.max_retries,
+                        method_whitelist=self.IDEMPOTENT_METHODS, backoff_factor=self.retry_backoff)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections, max_retries=retries)
+
+        session = Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+_core_api_session = None
+_core_api_session_lock = threading.Lock()
+
+
+def get_core_api_session():
+    """
+    :return: The process-wide core api session configured via the `INV_CORE_API_*` settings
+    :rtype: CoreAPISession
+    """
+    global _core_api_session
+
+    if _core_api_session is None:
+        with _core_api_session_lock:
+            if _core_api_session is None:
+                _core_api_session = CoreAPISession(max_connections=settings.INV_CORE_API_MAX_CONNECTIONS,
+                                                   max_retries=settings.INV_CORE_API_MAX_RETRIES,
+                                                   retry_backoff=settings.INV_CORE_API_RETRY_BACKOFF,
+                                                   timeout=settings.INV_CORE_API_TIMEOUT)
+    return _core_api_session
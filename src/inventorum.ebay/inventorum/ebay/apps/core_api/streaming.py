@@ -0,0 +1,181 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import codecs
+import json
+import logging
+import re
+
+
+log = logging.getLogger(__name__)
+
+
+class CorePageStreamParser(object):
+    """
+    Incremental decoder for paginated core api responses (`{"total": 2, "data": [{..}, {..}]}`), which reads the
+    attributes in front of the data array first and then decodes the items of the array one by one while the body is
+    downloaded, so only one item is held in memory at once.
+
+    If the data array comes before the total, the items have to be buffered to know the total up front.
+
+    Malformed bodies raise `ValueError`.
+    """
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, chunks, total_attr, data_attr):
+        """
+        :param chunks: Raw body, e.g. `response.iter_content(chunk_size)`
+
+        :type chunks: collections.Iterable[str]
+        :type total_attr: unicode
+        :type data_attr: unicode
+        """
+        self.total_attr = total_attr
+        self.data_attr = data_attr
+
+        # attributes of the response except for the data array
+        self.attrs = {}
+        self.has_data = False
+
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        # number of characters that were dropped from the front of the buffer, for error positions in the body
+        self._offset = 0
+        self._eof = False
+
+        self._buffered_items = None
+
+    def read_header(self):
+        """
+        Reads the body up to the beginning of the data array, at least until the total is known
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+
+            if key == self.data_attr and self._peek() == '[':
+                self._pos += 1
+                self.has_data = True
+
+                if self.total_attr in self.attrs:
+                    return
+
+                log.debug('No `%s` in front of `%s` in core api response, buffering items', self.total_attr,
+                          self.data_attr)
+                self._buffered_items = list(self._array_items())
+            else:
+                self.attrs[key] = self._decode_value()
+
+            separator = self._next()
+            if separator == '}':
+                return
+            if separator != ',':
+                self._unexpected(', or }')
+
+    def items(self):
+        """
+        Yields the items of the data array, can only be iterated once
+        :rtype: collections.Iterable[dict]
+        """
+        if self._buffered_items is not None:
+            items, self._buffered_items = self._buffered_items, []
+            for item in items:
+                yield item
+            return
+
+        if self.has_data:
+            for item in self._array_items():
+                yield item
+
+    def _array_items(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self._decode_value()
+
+            separator = self._next()
+            if separator == ']':
+                return
+            if separator != ',':
+                self._unexpected(', or ]')
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # the value may only be cut off by the end of the chunk
+                if not self._fill():
+                    raise ValueError('Invalid value at position {}'.format(self._offset + self._pos))
+                continue
+
+            # numbers and literals at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._eof:
+                self._fill()
+                continue
+
+            self._pos = end
+            return value
+
+    def _expect(self, char):
+        if self._next() != char:
+            self._unexpected(char)
+
+    def _unexpected(self, expected):
+        """
+        :raises ValueError: Always, with the position of the last character that was read in the whole body
+        """
+        raise ValueError('Expected {} at position {}'.format(expected, self._offset + self._pos - 1))
+
+    def _next(self):
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _peek(self):
+        """
+        :return: Next character that is not whitespace, None at the end of the body
+        :rtype: unicode | None
+        """
+        while True:
+            self._pos = self.WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _fill(self):
+        """
+        Appends the next chunk to the buffer and drops everything that was already decoded
+        :return: False if the body was read completely
+        :rtype: bool
+        """
+        if self._eof:
+            return False
+
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._drop_decoded()
+            self._buffer += self._utf8.decode(b'', final=True)
+            return False
+
+        self._drop_decoded()
+        self._buffer += self._utf8.decode(chunk)
+        return True
+
+    def _drop_decoded(self):
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
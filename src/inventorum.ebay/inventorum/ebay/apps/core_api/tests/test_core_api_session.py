@@ -0,0 +1,123 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import threading
+from wsgiref.simple_server import make_server
+
+from inventorum.ebay.apps.core_api.clients import UserScopedCoreAPIClient
+from inventorum.ebay.apps.core_api.session import CoreAPISession
+from inventorum.ebay.lib.ebay.tests import QuietRequestHandler
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import PatchMixin
+from mock import Mock
+from requests.exceptions import HTTPError
+
+
+log = logging.getLogger(__name__)
+
+
+class FlakyCoreAPI(object):
+    """ Answers the first `failures` requests of every path with 503 """
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.requests = []
+
+    def __call__(self, environ, start_response):
+        path = environ['PATH_INFO']
+        self.requests.append((environ['REQUEST_METHOD'], path))
+
+        if len([p for _, p in self.requests if p == path]) <= self.failures:
+            start_response(b'503 Service Unavailable', [(b'Content-Type', b'application/json')])
+            return [b'{}']
+
+        start_response(b'200 OK', [(b'Content-Type', b'application/json')])
+        return [b'{"id": 1}']
+
+
+class TestCoreAPISession(UnitTestCase, PatchMixin):
+
+    def start_server(self, app):
+        server = make_server('127.0.0.1', 0, app, handler_class=QuietRequestHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return 'http://127.0.0.1:{}'.format(server.server_port)
+
+    def test_idempotent_calls_are_retried(self):
+        app = FlakyCoreAPI(failures=2)
+        url = self.start_server(app)
+        session = CoreAPISession(max_connections=2, max_retries=3, retry_backoff=0, timeout=5)
+
+        response = session.request('GET', url + '/api/products/1', '/api/products/1')
+        self.assertEqual(response.json(), {'id': 1})
+        self.assertEqual(len(app.requests), 3)
+
+        # posts are not idempotent, the failed response is returned as it is
+        response = session.request('POST', url + '/api/orders', '/api/orders', json={})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(app.requests[3:], [('POST', '/api/orders')])
+
+    def test_exhausted_retries(self):
+        app = FlakyCoreAPI(failures=5)
+        url = self.start_server(app)
+        session = CoreAPISession(max_connections=2, max_retries=1, retry_backoff=0, timeout=5)
+
+        response = session.request('GET', url + '/api/info/', '/api/info/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(app.requests), 2)
+
+        self.assertEqual(session.stats()[('GET', '/api/info/')]['failed'], 1)
+
+    def test_unavailable_core_api_raises_http_error(self):
+        app = FlakyCoreAPI(failures=5)
+        url = self.start_server(app)
+        self.patch('inventorum.ebay.apps.core_api.clients.get_core_api_session',
+                   return_value=CoreAPISession(max_connections=2, max_retries=2, retry_backoff=0, timeout=5))
+        self.patch('inventorum.ebay.apps.core_api.clients.CoreAPIClient.url_for', side_effect=lambda path: url + path)
+
+        with self.assertRaises(HTTPError) as context:
+            UserScopedCoreAPIClient(user_id=1, account_id=2).get('/api/info/')
+
+        self.assertEqual(context.exception.response.status_code, 503)
+        self.assertEqual(len(app.requests), 3)
+
+    def test_stats_per_endpoint(self):
+        session = CoreAPISession(max_connections=2, max_retries=0, retry_backoff=0, timeout=5,
+                                 clock=Mock(side_effect=[0, 1, 0, 3, 0, 1]))
+        session._session = Mock()
+        session._session.request.side_effect = [Mock(ok=True), Mock(ok=False), Mock(ok=True)]
+
+        session.request('GET', 'http://core/api/products/1', '/api/products/1')
+        session.request('GET', 'http://core/api/products/2', '/api/products/2')
+        session.request('POST', 'http://core/api/products/2/state/', '/api/products/2/state/')
+
+        stats = session.stats()
+        self.assertEqual(sorted(stats.keys()), [('GET', '/api/products/{id}'),
+                                                ('POST', '/api/products/{id}/state/')])
+        self.assertEqual(stats[('GET', '/api/products/{id}')]['calls'], 2)
+        self.assertEqual(stats[('GET', '/api/products/{id}')]['failed'], 1)
+        self.assertEqual(stats[('GET', '/api/products/{id}')]['mean_time'], 2.0)
+        self.assertEqual(stats[('GET', '/api/products/{id}')]['max_time'], 3)
+
+        session._session.request.assert_called_with('POST', 'http://core/api/products/2/state/', timeout=5)
+
+    def test_session_is_replaced_after_fork(self):
+        session = CoreAPISession(max_connections=2, max_retries=0, retry_backoff=0, timeout=5)
+        inherited = session._get_session()
+        self.assertIs(session._get_session(), inherited)
+
+        self.patch('inventorum.ebay.apps.core_api.session.os.getpid', return_value=-1)
+        self.assertIsNot(session._get_session(), inherited)
+
+    def test_user_headers_are_sent_per_request(self):
+        core_api_session = self.patch('inventorum.ebay.apps.core_api.clients.get_core_api_session').return_value
+        core_api_session.request.return_value = Mock(ok=True)
+
+        UserScopedCoreAPIClient(user_id=1, account_id=2).get('/api/info/')
+        UserScopedCoreAPIClient(user_id=3, account_id=4).get('/api/info/')
+
+        headers = [call[1]['headers'] for call in core_api_session.request.call_args_list]
+        self.assertEqual([(h['X-Inv-User'], h['X-Inv-Account']) for h in headers], [('1', '2'), ('3', '4')])
@@ -0,0 +1,140 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import threading
+import time
+
+from django.test.utils import override_settings
+from inventorum.ebay.apps.core_api import cache
+from inventorum.ebay.apps.core_api.cache import CoreInfoCache, _create_core_info_cache
+from inventorum.ebay.apps.core_api.clients import UserScopedCoreAPIClient
+from inventorum.ebay.apps.core_api.models import CoreInfo, CoreAccount, CoreAccountSettings
+from inventorum.ebay.lib.cache import ProcessWideInstance
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import PatchMixin
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+def make_core_info(country='DE'):
+    return CoreInfo(account=CoreAccount(country=country, settings=CoreAccountSettings()))
+
+
+class TestCoreInfoCache(UnitTestCase):
+
+    def setUp(self):
+        super(TestCoreInfoCache, self).setUp()
+
+        self.now = 1000.0
+        self.subject = CoreInfoCache(ttl=60, max_size=2, clock=lambda: self.now)
+
+    def test_ttl_and_stats(self):
+        fetch = Mock(side_effect=[make_core_info('DE'), make_core_info('AT')])
+
+        self.assertEqual(self.subject.get_or_fetch(1, fetch).account.country, 'DE')
+        self.assertEqual(self.subject.get_or_fetch(1, fetch).account.country, 'DE')
+        self.assertEqual(fetch.call_count, 1)
+
+        self.now += 60
+        self.assertEqual(self.subject.get_or_fetch(1, fetch).account.country, 'AT')
+        self.assertEqual(fetch.call_count, 2)
+
+        self.assertEqual(self.subject.stats.hits, 1)
+        self.assertEqual(self.subject.stats.misses, 2)
+
+    def test_copies_are_returned(self):
+        self.subject.get_or_fetch(1, lambda: make_core_info()).account.country = 'AT'
+        self.assertEqual(self.subject.get_or_fetch(1, Mock()).account.country, 'DE')
+
+    def test_invalidation(self):
+        self.subject.get_or_fetch(1, lambda: make_core_info('DE'))
+        self.subject.invalidate(1)
+
+        self.assertEqual(self.subject.get_or_fetch(1, lambda: make_core_info('AT')).account.country, 'AT')
+        self.assertEqual(self.subject.stats.invalidated, 1)
+
+        # info requested before an invalidation must not be cached
+        def fetch_and_invalidate():
+            self.subject.invalidate(1)
+            return make_core_info('CH')
+
+        self.subject.invalidate(1)
+        self.assertEqual(self.subject.get_or_fetch(1, fetch_and_invalidate).account.country, 'CH')
+        self.assertEqual(len(self.subject), 0)
+
+    def test_eviction(self):
+        for account_id in (1, 2, 1, 3):
+            self.subject.get_or_fetch(account_id, make_core_info)
+
+        self.assertEqual(len(self.subject), 2)
+        self.assertEqual(self.subject.stats.evicted, 1)
+        self.assertEqual(self.subject.stats.hits, 1)
+
+        fetch = Mock(return_value=make_core_info())
+        self.subject.get_or_fetch(2, fetch)
+        self.assertTrue(fetch.called)
+
+    def test_concurrent_misses_send_one_request(self):
+        fetched = []
+
+        def fetch():
+            fetched.append(1)
+            time.sleep(0.05)
+            return make_core_info()
+
+        threads = [threading.Thread(target=self.subject.get_or_fetch, args=(1, fetch)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(self.subject.stats.misses, 1)
+        self.assertEqual(self.subject.stats.hits, 4)
+
+    def test_failed_request_is_not_cached(self):
+        self.assertRaises(ValueError, self.subject.get_or_fetch, 1, Mock(side_effect=ValueError))
+        self.assertEqual(self.subject.get_or_fetch(1, make_core_info).account.country, 'DE')
+
+    def test_disabled(self):
+        subject = CoreInfoCache(ttl=0, max_size=2)
+        fetch = Mock(return_value=make_core_info())
+
+        subject.get_or_fetch(1, fetch)
+        subject.get_or_fetch(1, fetch)
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(len(subject), 0)
+
+
+class TestCachedAccountInfo(UnitTestCase, PatchMixin):
+
+    def setUp(self):
+        super(TestCachedAccountInfo, self).setUp()
+
+        self.patch('inventorum.ebay.apps.core_api.cache._core_info_cache', ProcessWideInstance(_create_core_info_cache))
+        settings_override = override_settings(INV_CORE_INFO_CACHE_TTL=60)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.fetch_mock = self.patch('inventorum.ebay.apps.core_api.clients.UserScopedCoreAPIClient'
+                                     '._fetch_account_info', side_effect=lambda: make_core_info())
+
+    def test_account_info_is_cached_per_account(self):
+        UserScopedCoreAPIClient(user_id=1, account_id=10).get_account_info()
+        UserScopedCoreAPIClient(user_id=2, account_id=10).get_account_info()
+        self.assertEqual(self.fetch_mock.call_count, 1)
+
+        UserScopedCoreAPIClient(user_id=3, account_id=20).get_account_info()
+        self.assertEqual(self.fetch_mock.call_count, 2)
+
+        client = UserScopedCoreAPIClient(user_id=1, account_id=10)
+        client.get_account_info(use_cache=False)
+        self.assertEqual(self.fetch_mock.call_count, 3)
+
+        client.invalidate_account_info()
+        client.get_account_info()
+        self.assertEqual(self.fetch_mock.call_count, 4)
+        self.assertEqual(cache.get_core_info_cache().stats.hits, 1)
@@ -0,0 +1,149 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import json
+import logging
+
+from inventorum.ebay.apps.core_api.pager import Pager, PagerException
+from inventorum.ebay.apps.core_api.streaming import CorePageStreamParser
+from inventorum.ebay.tests.testcases import UnitTestCase
+
+
+log = logging.getLogger(__name__)
+
+
+def chunked(body, size):
+    body = body.encode('utf-8')
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class StreamedFakeCoreAPIResponse(object):
+    """ Fake for a streamed `requests.models.Response`, which only returns its body through `iter_content` """
+
+    def __init__(self, body, chunk_size=7):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.closed = False
+        self.read_chunks = 0
+
+    def iter_content(self, chunk_size):
+        for chunk in chunked(self.body, self.chunk_size):
+            self.read_chunks += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class TestCorePageStreamParser(UnitTestCase):
+
+    def parse(self, body, chunk_size=1):
+        parser = CorePageStreamParser(chunked(body, chunk_size), total_attr='total', data_attr='data')
+        parser.read_header()
+        return parser
+
+    def test_items_are_decoded_one_by_one(self):
+        data = [{"id": 1, "name": "Fahrrad \xfc€", "quantity": 12345, "gross_price": "1.99"},
+                {"id": 2, "name": None, "quantity": -1.5e3, "active": True, "tags": [1, [2], {"x": "]}"}]}]
+        body = ' { "total" : 123 , "version": "9", "data" : [ %s , %s ] , "next": null } ' % (
+            json.dumps(data[0]), json.dumps(data[1]))
+
+        for chunk_size in (1, 2, 5, 1024):
+            parser = self.parse(body, chunk_size)
+            self.assertEqual(parser.attrs, {"total": 123, "version": "9"})
+            self.assertEqual(list(parser.items()), data)
+
+    def test_numbers_cut_off_by_chunks(self):
+        parser = self.parse('{"total": 10, "data": [12345, 67890]}', chunk_size=3)
+        self.assertEqual(parser.attrs["total"], 10)
+        self.assertEqual(list(parser.items()), [12345, 67890])
+
+    def test_data_in_front_of_total_is_buffered(self):
+        parser = self.parse('{"data": [1, 2, 3], "total": 3}')
+        self.assertEqual(parser.attrs, {"total": 3})
+        self.assertEqual(list(parser.items()), [1, 2, 3])
+
+    def test_empty_and_missing_data(self):
+        parser = self.parse('{"total": 0, "data": []}')
+        self.assertTrue(parser.has_data)
+        self.assertEqual(list(parser.items()), [])
+
+        parser = self.parse('{"total": 0}')
+        self.assertFalse(parser.has_data)
+        self.assertEqual(list(parser.items()), [])
+
+    def test_malformed_bodies(self):
+        self.assertRaises(ValueError, self.parse, '[1, 2]')
+        self.assertRaises(ValueError, self.parse, '{"total": 1 "data": []}')
+
+        parser = self.parse('{"total": 2, "data": [{"id": 1}, {"id": ')
+        items = parser.items()
+        self.assertEqual(next(items), {"id": 1})
+        self.assertRaises(ValueError, next, items)
+
+    def test_error_positions_are_offsets_in_the_body(self):
+        for chunk_size in (1, 4, 1024):
+            with self.assertRaisesRegexp(ValueError, r'^Expected , or \} at position 11$'):
+                self.parse('{"total":1 "data":[]}', chunk_size)
+
+            parser = self.parse('{"total": 2, "data": [1 2]}', chunk_size)
+            with self.assertRaisesRegexp(ValueError, r'^Expected , or \] at position 24$'):
+                list(parser.items())
+
+
+class TestStreamedPager(UnitTestCase):
+
+    class FakeCoreAPIClient(object):
+
+        def __init__(self, bodies_by_page_number):
+            self.responses = {}
+            self._bodies_by_page_number = bodies_by_page_number
+
+        def get(self, path, params=None, custom_headers=None, stream=False):
+            assert stream
+            page_number = params["page"]
+            self.responses[page_number] = StreamedFakeCoreAPIResponse(self._bodies_by_page_number[page_number])
+            return self.responses[page_number]
+
+    def test_streamed_pages(self):
+        fake_client = self.FakeCoreAPIClient({
+            1: json.dumps({"total": 3, "data": [{"id": 1}, {"id": 2}]}),
+            2: json.dumps({"total": 3, "data": [{"id": 3}]})
+        })
+
+        subject = Pager(client=fake_client, path="/api/products/delta/modified/", limit_per_page=2, stream=True)
+        self.assertEqual(subject.total_pages, 2)
+
+        pages = subject.pages
+        first_page = next(pages)
+        items = first_page.data
+
+        self.assertEqual(next(items), {"id": 1})
+        self.assertFalse(fake_client.responses[1].closed)
+        self.assertEqual(list(items), [{"id": 2}])
+        self.assertTrue(fake_client.responses[1].closed)
+
+        self.assertEqual(list(next(pages).data), [{"id": 3}])
+        self.assertTrue(fake_client.responses[2].closed)
+
+    def test_body_is_read_lazily(self):
+        items = [{"id": i, "name": "Product {}".format(i)} for i in range(100)]
+        fake_client = self.FakeCoreAPIClient({1: json.dumps({"total": 100, "data": items})})
+
+        subject = Pager(client=fake_client, path="/api/products/delta/modified/", limit_per_page=100, stream=True)
+        data = next(subject.pages).data
+        self.assertEqual(next(data), items[0])
+
+        response = fake_client.responses[1]
+        self.assertLess(response.read_chunks, len(chunked(response.body, response.chunk_size)) / 10)
+
+    def test_malformed_pages(self):
+        fake_client = self.FakeCoreAPIClient({1: json.dumps({"data": []})})
+        with self.assertRaises(PagerException):
+            Pager(client=fake_client, path="/api/products", limit_per_page=2, stream=True)
+        self.assertTrue(fake_client.responses[1].closed)
+
+        fake_client = self.FakeCoreAPIClient({1: '{"total": 1, "data": [{"id": '})
+        subject = Pager(client=fake_client, path="/api/products", limit_per_page=2, stream=True)
+        with self.assertRaises(PagerException):
+            list(next(subject.pages).data)
+        self.assertTrue(fake_client.responses[1].closed)
@@ -1,8 +1,11 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
 import logging
+import threading
+import time
 from inventorum.ebay.apps.core_api import FakeCoreAPIResponse, PaginatedFakeCoreAPIResponse
-from inventorum.ebay.apps.core_api.pager import Pager
+from inventorum.ebay.apps.core_api.pager import Pager, PagerException
+from requests.exceptions import HTTPError
 
 from inventorum.ebay.tests.testcases import UnitTestCase
 
@@ -139,6 +142,87 @@ class TestPager(UnitTestCase):
             self.assert_page(page, expected_number=page_number, expected_response=fake_responses_by_page[page_number],
                              expected_data=fake_responses_by_page[page_number].json().get("data"))
 
+    def test_prefetching(self):
+        fake_responses_by_page = {p: self.make_valid_response(total=10, data=[{"id": p}]) for p in range(1, 10 + 1)}
+
+        class SlowFakeCoreAPIClient(self.FakeCoreAPIClient):
+            lock = threading.Lock()
+            in_flight = max_in_flight = 0
+
+            def get(self, path, params=None, custom_headers=None):
+                with self.lock:
+                    self.in_flight += 1
+                    self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+                # later pages answer faster, they must still be yielded in order
+                time.sleep(0.001 * (10 - params["page"]))
+
+                with self.lock:
+                    self.in_flight -= 1
+                return super(SlowFakeCoreAPIClient, self).get(path, params, custom_headers)
+
+        fake_client = SlowFakeCoreAPIClient(fake_responses_by_page)
+        subject = Pager(client=fake_client, path="/api/products", limit_per_page=1, prefetch=3)
+
+        pages = list(subject.pages)
+        self.assertEqual([page.number for page in pages], range(1, 10 + 1))
+        for page in pages:
+            self.assert_page(page, expected_number=page.number, expected_response=fake_responses_by_page[page.number],
+                             expected_data=[{"id": page.number}])
+
+        self.assertLessEqual(fake_client.max_in_flight, 3)
+        self.assertGreater(fake_client.max_in_flight, 1)
+
+    def test_prefetching_one_page(self):
+        fake_responses_by_page = {p: self.make_valid_response(total=4, data=[{"id": p}]) for p in range(1, 4 + 1)}
+
+        class RecordingFakeCoreAPIClient(self.FakeCoreAPIClient):
+            requested = {p: threading.Event() for p in range(1, 4 + 1)}
+
+            def get(self, path, params=None, custom_headers=None):
+                self.requested[params["page"]].set()
+                return super(RecordingFakeCoreAPIClient, self).get(path, params, custom_headers)
+
+        fake_client = RecordingFakeCoreAPIClient(fake_responses_by_page)
+        subject = Pager(client=fake_client, path="/api/products", limit_per_page=1, prefetch=1)
+        pages = subject.pages
+
+        # the next page is requested while the caller processes the current one, but not the page after it
+        self.assertEqual(next(pages).number, 1)
+        self.assertTrue(fake_client.requested[2].wait(1))
+        self.assertFalse(fake_client.requested[3].is_set())
+
+        self.assertEqual(next(pages).number, 2)
+        self.assertTrue(fake_client.requested[3].wait(1))
+        self.assertFalse(fake_client.requested[4].is_set())
+
+        self.assertEqual([page.number for page in pages], [3, 4])
+
+    def test_prefetching_raises_first_error(self):
+        class FailingFakeResponse(FakeCoreAPIResponse):
+            def json(self):
+                raise HTTPError("Page failed")
+
+        fake_responses_by_page = {
+            1: self.make_valid_response(total=4, data=[{"id": 1}]),
+            2: self.make_valid_response(total=4, data=[{"id": 2}]),
+            3: FakeCoreAPIResponse(json={"total": 4}),
+            4: FailingFakeResponse()
+        }
+
+        subject = Pager(client=self.FakeCoreAPIClient(fake_responses_by_page), path="/api/products",
+                        limit_per_page=1, prefetch=3)
+
+        pages = subject.pages
+        self.assertEqual(next(pages).number, 1)
+        self.assertEqual(next(pages).number, 2)
+        # page 4 may have failed before, but page 3 is the first one that failed
+        self.assertRaises(PagerException, next, pages)
+
+    def test_streamed_pages_are_not_prefetched(self):
+        with self.assertRaises(ValueError):
+            Pager(client=self.FakeCoreAPIClient({}), path="/api/products", limit_per_page=1, prefetch=3, stream=True)
+
     def make_valid_response(self, total, data):
         return PaginatedFakeCoreAPIResponse(total=total, data=data)
 
@@ -5,12 +5,13 @@ import logging
 from inventorum.ebay.apps.core_api.models import CoreProductDeserializer, CoreProductDeltaDeserializer
 
 from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import CompiledDeserializerParityMixin
 
 
 log = logging.getLogger(__name__)
 
 
-class TestCoreProductDeserializer(UnitTestCase):
+class TestCoreProductDeserializer(UnitTestCase, CompiledDeserializerParityMixin):
 
     def test_meta_overwrite(self):
         minimal_core_product_json = {
@@ -67,8 +68,48 @@ class TestCoreProductDeserializer(UnitTestCase):
         self.assertEqual(len(core_product.images), 1)
         self.assertEqual(core_product.images[0].id, 9999)
 
+    def test_compiled_parity(self):
+        product_json = {
+            "id": 330857,
+            "name": "Felt Brougham",
+            "gross_price": "448.68",
+            "quantity": 90,
+            "images": [{"id": 2915, "ipad_retina": "http://image/ipad_retina"}],
+            "attributes": {"size": ["M", "L"]},
+            "meta": {
+                "ebay": {
+                    "images": [{"id": 9999, "ipad_retina": "http://image/ebay"}],
+                    "gross_price": "500.00",
+                    "name": "Some ebay name",
+                    "description": ""
+                }
+            },
+            "variation_count": 1,
+            "description": "Marvellous bike",
+            "variations": [{
+                "id": 330858,
+                "name": "Felt Brougham M",
+                "gross_price": "448.68",
+                "quantity": 10,
+                "images": [],
+                "attributes": {"size": ["M"]},
+                "meta": {}
+            }]
+        }
+
+        core_product = self.assertCompiledParity(CoreProductDeserializer, product_json)
+        self.assertEqual(core_product.name, "Some ebay name")
+        self.assertEqual(core_product.images[0].id, 9999)
+        self.assertEqual(core_product.variations[0].attributes[0].values, ["M"])
 
-class TestCoreProductDeltaDeserializer(UnitTestCase):
+        products = self.assertCompiledParity(CoreProductDeserializer, [product_json, product_json], many=True)
+        self.assertEqual(len(products), 2)
+
+        product_json["attributes"] = []
+        self.assertIsNone(self.assertCompiledParity(CoreProductDeserializer, product_json))
+
+
+class TestCoreProductDeltaDeserializer(UnitTestCase, CompiledDeserializerParityMixin):
 
     def test_meta_overwrite(self):
         minimal_core_delta_product_json = {
@@ -97,3 +138,23 @@ class TestCoreProductDeltaDeserializer(UnitTestCase):
 
         core_delta_product = subject.build()
         self.assertEqual(core_delta_product.gross_price, Decimal("500.00"))
+
+    def test_compiled_parity(self):
+        delta_json = {
+            "id": 1,
+            "parent": None,
+            "name": "Some product",
+            "state": "updated",
+            "gross_price": "449.99",
+            "quantity": "1337.00",
+            "meta": {"ebay": {"gross_price": "500.00"}}
+        }
+
+        core_delta_product = self.assertCompiledParity(CoreProductDeltaDeserializer, delta_json)
+        self.assertEqual(core_delta_product.gross_price, Decimal("500.00"))
+
+        del delta_json["meta"]
+        self.assertCompiledParity(CoreProductDeltaDeserializer, delta_json)
+
+        delta_json["quantity"] = "a lot"
+        self.assertIsNone(self.assertCompiledParity(CoreProductDeltaDeserializer, delta_json))
@@ -242,3 +242,39 @@ class UnitTestUserScopedCoreAPIClient(UnitTestCase):
         self.client_post_mock.assert_called_once_with("/api/orders?channel=ebay", data=data)
 
         self.assertEqual(inv_id, created_order_id)
+
+    def test_get_products(self):
+        def core_product_json(product_id):
+            return {
+                "id": product_id,
+                "name": "Product {}".format(product_id),
+                "gross_price": "1.99",
+                "quantity": 5,
+                "images": [],
+                "meta": {},
+                "variation_count": 0,
+                "attributes": {},
+                "description": ""
+            }
+
+        def get(path, params=None, custom_headers=None):
+            # product 4 was deleted in the core api
+            return FakeCoreAPIResponse(json={"total": len(params["id"]),
+                                             "data": [core_product_json(i) for i in params["id"] if i != 4]})
+
+        self.client_get_mock.side_effect = get
+        self.subject.PRODUCTS_CHUNK_SIZE = 2
+
+        batch = self.subject.get_products([1, 2, 3, 4, 5, 1])
+
+        self.assertEqual(sorted(batch.products.keys()), [1, 2, 3, 5])
+        self.assertEqual(batch.products[3].name, "Product 3")
+        self.assertEqual(batch.products[3].gross_price, D("1.99"))
+        self.assertEqual(batch.missing_ids, [4])
+
+        requested_ids = sorted(call[1]["params"]["id"] for call in self.client_get_mock.call_args_list)
+        self.assertEqual(requested_ids, [[1, 2], [3, 4], [5]])
+
+        self.client_get_mock.reset_mock()
+        self.assertEqual(self.subject.get_products([]).products, {})
+        self.assertFalse(self.client_get_mock.called)
@@ -0,0 +1,26 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+class PayloadFingerprintTarget(object):
+    """
+    Outbound writes whose payloads are fingerprinted to skip sending the same payload twice
+    """
+    # `ReviseFixedPriceItem` and `ReviseInventoryStatus` calls, by ebay item id
+    EBAY_ITEM_REVISION = "ebay_item_revision"
+    # `AddInventoryLocation` calls, by account id
+    EBAY_LOCATION = "ebay_location"
+    # Publishing states posted to the core api, by product inv_id
+    CORE_PUBLISHING_STATE = "core_publishing_state"
+
+    CHOICES = (
+        (EBAY_ITEM_REVISION, "eBay item revision"),
+        (EBAY_LOCATION, "eBay location"),
+        (CORE_PUBLISHING_STATE, "Core publishing state")
+    )
+
+    ALL = tuple(target for target, label in CHOICES)
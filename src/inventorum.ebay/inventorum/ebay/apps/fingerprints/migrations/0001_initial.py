@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import datetime
+from django.utils.timezone import utc
+import django.utils.timezone
+import inventorum.util.django.db.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayloadFingerprintModel',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('time_added', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('time_modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last change', auto_now=True)),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('deleted_at', models.DateTimeField(default=datetime.datetime(1970, 1, 1, 0, 0, tzinfo=utc), verbose_name='Time of deletion')),
+                ('target', models.CharField(max_length=255, choices=[('ebay_item_revision', 'eBay item revision'), ('ebay_location', 'eBay location'), ('core_publishing_state', 'Core publishing state')])),
+                ('entity', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('suppressed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+            },
+            bases=(inventorum.util.django.db.models.ModelMixins, models.Model),
+        ),
+        migrations.AlterUniqueTogether(
+            name='payloadfingerprintmodel',
+            unique_together=set([('target', 'entity')]),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from django.db import models
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.lib.db.models import BaseModel, BaseQuerySet
+from inventorum.util.django.model_utils import PassThroughManager
+
+
+log = logging.getLogger(__name__)
+
+
+class PayloadFingerprintQuerySet(BaseQuerySet):
+
+    def by_target(self, target):
+        return self.filter(target=target)
+
+    def by_entity(self, target, entity):
+        return self.filter(target=target, entity=unicode(entity))
+
+
+class PayloadFingerprintModel(BaseModel):
+    """
+    Hash of the payload that was last sent successfully to a target for one entity, with the number of calls that
+    were skipped since because they would have sent the same payload again
+    """
+    target = models.CharField(max_length=255, choices=PayloadFingerprintTarget.CHOICES)
+    entity = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=40)
+    suppressed = models.PositiveIntegerField(default=0)
+
+    objects = PassThroughManager.for_queryset_class(PayloadFingerprintQuerySet)()
+
+    class Meta:
+        unique_together = ('target', 'entity')
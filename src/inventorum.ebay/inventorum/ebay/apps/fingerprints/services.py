@@ -0,0 +1,82 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import hashlib
+import json
+import logging
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.apps.fingerprints.models import PayloadFingerprintModel
+
+
+log = logging.getLogger(__name__)
+
+
+def fingerprint(payload):
+    """
+    :param payload: Anything json serializable, values of other types (e.g. decimals, dates) are taken as unicode
+    :rtype: unicode
+    """
+    serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=unicode)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def is_redundant(target, entity, payload):
+    """
+    Tells whether the given payload was the last one sent successfully to the target for this entity, in which case
+    the call is counted as suppressed
+
+    :type target: unicode
+    :type entity: unicode | int
+    :rtype: bool
+    """
+    suppressed = PayloadFingerprintModel.objects.by_entity(target, entity) \
+        .filter(fingerprint=fingerprint(payload)) \
+        .update(suppressed=F('suppressed') + 1)
+
+    if suppressed:
+        log.info('Suppressed %s call for %s, the same payload was already sent', target, entity)
+    return bool(suppressed)
+
+
+def remember_sent(target, entity, payload):
+    """
+    Has to be called after the payload was sent successfully
+
+    :type target: unicode
+    :type entity: unicode | int
+    """
+    value = fingerprint(payload)
+
+    if PayloadFingerprintModel.objects.by_entity(target, entity).update(fingerprint=value):
+        return
+
+    try:
+        with transaction.atomic():
+            PayloadFingerprintModel.objects.create(target=target, entity=unicode(entity), fingerprint=value)
+    except IntegrityError:
+        # remembered concurrently
+        PayloadFingerprintModel.objects.by_entity(target, entity).update(fingerprint=value)
+
+
+def forget_sent(target, entity):
+    """
+    Has to be called if the state of the entity at the target changed by other means than the fingerprinted calls,
+    so that the next payload is sent even if it equals the last one
+
+    :type target: unicode
+    :type entity: unicode | int
+    """
+    PayloadFingerprintModel.objects.by_entity(target, entity).update(fingerprint='')
+
+
+def get_suppressed_counts():
+    """
+    :return: Number of suppressed calls per target
+    :rtype: dict[unicode, int]
+    """
+    counts = dict.fromkeys(PayloadFingerprintTarget.ALL, 0)
+    for row in PayloadFingerprintModel.objects.order_by().values('target').annotate(total=Sum('suppressed')):
+        counts[row['target']] = row['total']
+    return counts
@@ -0,0 +1,2 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
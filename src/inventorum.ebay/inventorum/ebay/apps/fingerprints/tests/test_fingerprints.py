@@ -0,0 +1,84 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from decimal import Decimal as D
+
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.apps.fingerprints.services import is_redundant, remember_sent, forget_sent, \
+    get_suppressed_counts
+from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayItemUpdateStatus
+from inventorum.ebay.apps.products.services import PublishingService, InventoryStatusUpdateService
+from inventorum.ebay.apps.products.tests.factories import PublishedEbayItemFactory, EbayItemUpdateFactory
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
+from inventorum.ebay.tests.testcases import UnitTestCase, EbayAuthenticatedAPITestCase
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestPayloadFingerprints(UnitTestCase):
+
+    def test_only_the_last_sent_payload_is_redundant(self):
+        target = PayloadFingerprintTarget.EBAY_LOCATION
+        self.assertFalse(is_redundant(target, 1, {"name": "Store"}))
+
+        remember_sent(target, 1, {"name": "Store", "price": D("1.50")})
+        self.assertTrue(is_redundant(target, 1, {"price": D("1.50"), "name": "Store"}))
+        self.assertTrue(is_redundant(target, "1", {"price": D("1.50"), "name": "Store"}))
+        self.assertFalse(is_redundant(target, 1, {"name": "Store", "price": D("1.60")}))
+        self.assertFalse(is_redundant(target, 2, {"name": "Store", "price": D("1.50")}))
+        self.assertFalse(is_redundant(PayloadFingerprintTarget.CORE_PUBLISHING_STATE, 1,
+                                      {"name": "Store", "price": D("1.50")}))
+
+        remember_sent(target, 1, {"name": "Other store"})
+        self.assertFalse(is_redundant(target, 1, {"name": "Store", "price": D("1.50")}))
+        self.assertTrue(is_redundant(target, 1, {"name": "Other store"}))
+
+        forget_sent(target, 1)
+        self.assertFalse(is_redundant(target, 1, {"name": "Other store"}))
+
+        self.assertEqual(get_suppressed_counts(), {
+            PayloadFingerprintTarget.EBAY_LOCATION: 3,
+            PayloadFingerprintTarget.EBAY_ITEM_REVISION: 0,
+            PayloadFingerprintTarget.CORE_PUBLISHING_STATE: 0
+        })
+
+    def test_repeated_publishing_states_are_not_sent(self):
+        user = Mock()
+        post_mock = user.core_api.post_product_publishing_state
+        service = PublishingService(PublishedEbayItemFactory.create(), user)
+
+        service.send_publishing_status_to_core_api(EbayItemPublishingStatus.PUBLISHED, details=["a"])
+        service.send_publishing_status_to_core_api(EbayItemPublishingStatus.PUBLISHED, details=["a"])
+        self.assertEqual(post_mock.call_count, 1)
+
+        service.send_publishing_status_to_core_api(EbayItemPublishingStatus.PUBLISHED, details=["b"])
+        self.assertEqual(post_mock.call_count, 2)
+
+
+class TestRedundantItemRevisions(EbayAuthenticatedAPITestCase, EbaySimulatorTestMixin):
+
+    def setUp(self):
+        super(TestRedundantItemRevisions, self).setUp()
+        self.simulator = self.start_simulator()
+
+    def test_repeated_revisions_are_not_sent(self):
+        item = PublishedEbayItemFactory.create(account=self.account, external_id="3001", quantity=10)
+        self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name, 'quantity': item.quantity,
+                                                  'price': unicode(item.gross_price), 'active': True}
+
+        def update(quantity):
+            item_update = EbayItemUpdateFactory.create(item=item, quantity=quantity, gross_price=None)
+            self.assertEqual(InventoryStatusUpdateService([item_update], user=self.user).update(), [])
+            self.assertEqual(item_update.reload().status, EbayItemUpdateStatus.SUCCEEDED)
+
+        update(5)
+        update(5)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'ReviseInventoryStatus': 1})
+
+        # e.g. after a sale the quantity on ebay is not the one that was sent last
+        forget_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item.external_id)
+        update(5)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'ReviseInventoryStatus': 2})
+        self.assertEqual(get_suppressed_counts()[PayloadFingerprintTarget.EBAY_ITEM_REVISION], 1)
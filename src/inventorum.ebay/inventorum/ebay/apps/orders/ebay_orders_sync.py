@@ -6,6 +6,8 @@ from datetime import datetime
 from django.db import transaction
 from django.utils.functional import cached_property
 from inventorum.ebay.apps.accounts.models import AddressModel
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.apps.fingerprints.services import forget_sent
 
 from inventorum.ebay.apps.orders import tasks, CorePaymentMethod
 from inventorum.ebay.apps.orders.models import OrderModel, OrderLineItemModel
@@ -215,6 +217,8 @@ class IncomingEbayOrderSyncer(object):
         """
         # The existence of the ebay item has already been confirmed in `_skip_incoming_order`
         item_model = EbayItemModel.objects.by_account(self.account).by_ebay_id(ebay_transaction.item.item_id).get()
+        # the sale changed the quantity on ebay, the next revision has to be sent even if it repeats the last one
+        forget_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_model.external_id)
 
         orderable_item, orderable_name = None, None
         if item_model.has_variations and ebay_transaction.variation:
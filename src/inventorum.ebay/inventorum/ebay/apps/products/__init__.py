@@ -36,18 +36,62 @@ class EbayItemPublishingStatus(object):
         return cls.CORE_API_MAP.get(state, None)
 
 
+class EbayItemPublishingStep(object):
+    """
+    Checkpoints of a publishing or unpublishing attempt, the step stored on the item is the next one to run
+    """
+    INITIALIZE = 'initialize'
+    EBAY_CALL = 'ebay_call'
+    FINALIZE = 'finalize'
+
+    CHOICES = (
+        (INITIALIZE, "Initialize"),
+        (EBAY_CALL, "Ebay call"),
+        (FINALIZE, "Finalize"),
+    )
+
+    ORDER = (INITIALIZE, EBAY_CALL, FINALIZE)
+
+    @classmethod
+    def next(cls, step):
+        """
+        :type step: unicode
+        :return: The step after the given one, None after the last step
+        :rtype: unicode | None
+        """
+        index = cls.ORDER.index(step) + 1
+        return cls.ORDER[index] if index < len(cls.ORDER) else None
+
+
+class EbayPublishJobStatus(object):
+    PENDING = 'pending'
+    PREPARING = 'preparing'
+    PUBLISHING = 'publishing'
+    FAILED = 'failed'
+
+    CHOICES = (
+        (PENDING, "Pending"),
+        (PREPARING, "Preparing"),
+        (PUBLISHING, "Publishing"),
+        (FAILED, "Failed"),
+    )
+
+
 # TODO jm: Change to string
 class EbayItemUpdateStatus(object):
     DRAFT = "draft"
     IN_PROGRESS = "in_progress"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
+    # Merged into a later update of the same item before being revised, see `products.coalescing`
+    SUPERSEDED = "superseded"
 
     CHOICES = (
         (DRAFT, "DRAFT"),
         (IN_PROGRESS, "IN_PROGRESS"),
         (SUCCEEDED, "SUCCEEDED"),
         (FAILED, "FAILED"),
+        (SUPERSEDED, "SUPERSEDED"),
     )
 
 
@@ -0,0 +1,241 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import atexit
+import logging
+import os
+import random
+import threading
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from inventorum.ebay.apps.products.models import EbayApiAttempt, EbayApiAttemptRequest, EbayApiAttemptResponse
+from inventorum.ebay.lib.ebay.data import EbayParser
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayApiAttemptEntry(object):
+    """
+    One attempt to be logged. Only references the request and response, decoding, clearing credentials and
+    compressing their bodies is left to the writer.
+    """
+
+    def __init__(self, type, request, response, success, item=None, item_update=None):
+        """
+        :type type: unicode
+        :type request: requests.models.PreparedRequest
+        :type response: requests.models.Response
+        :type success: bool
+        :type item: inventorum.ebay.apps.products.models.EbayItemModel | None
+        :type item_update: inventorum.ebay.apps.products.models.EbayItemUpdateModel | None
+        """
+        self.type = type
+        self.request = request
+        self.response = response
+        self.success = success
+        self.item_id = item.id if item is not None else None
+        self.item_update_id = item_update.id if item_update is not None else None
+
+    def build_request(self):
+        """
+        :rtype: EbayApiAttemptRequest
+        """
+        return EbayApiAttemptRequest(body=EbayParser.make_body_secure(self.request.body.decode('utf-8')),
+                                     headers=dict(self.request.headers),
+                                     url=self.request.url,
+                                     method=self.request.method)
+
+    def build_response(self):
+        """
+        :rtype: EbayApiAttemptResponse
+        """
+        return EbayApiAttemptResponse(content=self.response.text,
+                                      headers=dict(self.response.headers),
+                                      url=self.response.url,
+                                      status_code=self.response.status_code)
+
+
+class EbayApiAttemptWriter(object):
+    """
+    Writes logged attempts in batches from a background thread of the current process, every `flush_interval`
+    seconds or as soon as `batch_size` attempts are pending. With a `flush_interval` of 0 every attempt is written
+    right away by the caller.
+
+    Successful attempts are only logged with a probability of `success_sample_rate`, failed attempts always.
+    """
+
+    def __init__(self, flush_interval, batch_size, max_pending, success_sample_rate, random=random.random):
+        """
+        :param max_pending: Callers write the pending attempts themselves beyond this, bounds the memory if the
+            database falls behind
+
+        :type flush_interval: int | float
+        :type batch_size: int
+        :type max_pending: int
+        :type success_sample_rate: float
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.success_sample_rate = success_sample_rate
+        self.random = random
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._thread = None
+        self._pid = None
+
+    @property
+    def background(self):
+        return self.flush_interval > 0
+
+    def log(self, entry):
+        """
+        :type entry: EbayApiAttemptEntry
+        """
+        if entry.success and self.random() >= self.success_sample_rate:
+            return
+
+        if not self.background:
+            self.write([entry])
+            return
+
+        with self._lock:
+            self._ensure_thread()
+            self._pending.append(entry)
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            log.warn('%s ebay api attempts are pending, writing them in the calling thread', pending)
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """ Writes all pending attempts """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for start in range(0, len(pending), self.batch_size):
+            self.write(pending[start:start + self.batch_size])
+
+    def write(self, entries):
+        """
+        Writes the given attempts in one transaction, attempts that cannot be written are dropped
+
+        :type entries: list[EbayApiAttemptEntry]
+        """
+        if not entries:
+            return
+
+        try:
+            with self._write_lock, transaction.atomic():
+                # requests and responses have to be inserted one by one to get their ids
+                attempts = []
+                for entry in entries:
+                    request = entry.build_request()
+                    request.save()
+                    response = entry.build_response()
+                    response.save()
+                    attempts.append(EbayApiAttempt(type=entry.type, request=request, response=response,
+                                                   success=entry.success, item_id=entry.item_id,
+                                                   item_update_id=entry.item_update_id))
+                EbayApiAttempt.objects.bulk_create(attempts)
+        except Exception:
+            log.exception('Could not write %s ebay api attempts', len(entries))
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # forked, the attempts of the parent are written by the parent
+            self._pid = os.getpid()
+            self._pending = []
+            self._thread = None
+
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ebay-api-attempt-writer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            close_old_connections()
+            self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_api_attempt_writer():
+    """
+    :return: The process-wide writer configured via the `EBAY_API_ATTEMPT_LOG_*` settings
+    :rtype: EbayApiAttemptWriter
+    """
+    global _writer
+
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = EbayApiAttemptWriter(flush_interval=settings.EBAY_API_ATTEMPT_LOG_FLUSH_INTERVAL,
+                                               batch_size=settings.EBAY_API_ATTEMPT_LOG_BATCH_SIZE,
+                                               max_pending=settings.EBAY_API_ATTEMPT_LOG_MAX_PENDING,
+                                               success_sample_rate=settings.EBAY_API_ATTEMPT_LOG_SUCCESS_SAMPLE_RATE)
+                atexit.register(_writer.flush)
+    return _writer
+
+
+@worker_process_shutdown.connect
+def flush_api_attempts(**kwargs):
+    """ Writes the pending attempts of celery worker processes, which do not run `atexit` handlers """
+    if _writer is not None:
+        _writer.flush()
+
+
+def log_api_attempt(type, request, response, success, item=None, item_update=None):
+    """
+    :type type: unicode
+    :type request: requests.models.PreparedRequest
+    :type response: requests.models.Response
+    :type success: bool
+    :type item: inventorum.ebay.apps.products.models.EbayItemModel | None
+    :type item_update: inventorum.ebay.apps.products.models.EbayItemUpdateModel | None
+    """
+    entry = EbayApiAttemptEntry(type=type, request=request, response=response, success=success, item=item,
+                                item_update=item_update)
+    get_api_attempt_writer().log(entry)
+
+
+def prune_api_attempts(before, chunk_size):
+    """
+    Deletes the attempts logged before the given time with their requests and responses, in chunks of one transaction
+    each to keep locks short
+
+    :type before: datetime.datetime
+    :type chunk_size: int
+    :return: Number of deleted attempts
+    :rtype: int
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(EbayApiAttempt.objects.filter(time_added__lt=before).order_by("id")
+                         .values_list("id", "request_id", "response_id")[:chunk_size])
+            if not chunk:
+                break
+
+            attempt_ids, request_ids, response_ids = zip(*chunk)
+            EbayApiAttempt.objects.filter(id__in=attempt_ids).delete()
+            EbayApiAttemptRequest.objects.filter(id__in=request_ids).delete()
+            EbayApiAttemptResponse.objects.filter(id__in=response_ids).delete()
+
+        deleted += len(chunk)
+        if len(chunk) < chunk_size:
+            break
+    return deleted
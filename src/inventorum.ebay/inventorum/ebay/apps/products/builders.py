@@ -0,0 +1,125 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from collections import OrderedDict
+
+from inventorum.ebay.lib.ebay.data.items import EbayFixedPriceItem, EbayItemShippingService, EbayPicture, \
+    EbayItemSpecific, EbayVariation, EbayReviseFixedPriceItem, EbayReviseFixedPriceVariation
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayItemPayloadBuilder(object):
+    """
+    Assembles the ebay data objects of items, variations and updates from their models.
+
+    Relations are only accessed with `.all()`, so items and updates loaded with the `*_PREFETCH_RELATED` lookups
+    (see `EbayItemModelQuerySet.for_publishing` and `EbayItemUpdateModelQuerySet.for_revision`) are built from memory
+    with a fixed number of queries, no matter how many variations, images and specifics they have.
+    """
+    ITEM_SELECT_RELATED = ("product", "category")
+    ITEM_PREFETCH_RELATED = ("payment_methods", "shipping", "images", "specific_values__specific",
+                             "variations__images", "variations__specifics__values")
+
+    ITEM_UPDATE_SELECT_RELATED = ("item",)
+    ITEM_UPDATE_PREFETCH_RELATED = ("variations__variation__images", "variations__variation__specifics__values")
+
+    def build_item(self, item):
+        """
+        :type item: inventorum.ebay.apps.products.models.EbayItemModel
+        :rtype: EbayFixedPriceItem
+        """
+        return EbayFixedPriceItem(
+            title=item.name,
+            sku=item.sku,
+            description=item.description,
+            listing_duration=item.listing_duration,
+            country=unicode(item.country),
+            postal_code=item.postal_code,
+            quantity=item.quantity,
+            start_price=item.gross_price,
+            paypal_email_address=item.paypal_email_address,
+            payment_methods=[payment_method.external_id for payment_method in item.payment_methods.all()],
+            category_id=item.category.external_id,
+            shipping_services=[self.build_shipping_service(shipping) for shipping in item.shipping.all()],
+            pictures=[self.build_picture(image) for image in item.images.all()],
+            item_specifics=self.build_item_specifics(item),
+            variations=[self.build_variation(variation) for variation in item.variations.all()],
+            is_click_and_collect=item.is_click_and_collect
+        )
+
+    def build_item_specifics(self, item):
+        """
+        Groups the values of the item by specific
+        :type item: inventorum.ebay.apps.products.models.EbayItemModel
+        :rtype: list[EbayItemSpecific]
+        """
+        values_by_name = OrderedDict()
+        for specific_value in item.specific_values.all():
+            values_by_name.setdefault(specific_value.specific.name, []).append(specific_value.value)
+
+        return [EbayItemSpecific(name=name, values=values) for name, values in values_by_name.iteritems()]
+
+    def build_variation(self, variation):
+        """
+        :type variation: inventorum.ebay.apps.products.models.EbayItemVariationModel
+        :rtype: EbayVariation
+        """
+        return EbayVariation(
+            sku=variation.sku,
+            gross_price=variation.gross_price,
+            quantity=variation.quantity,
+            specifics=[self.build_variation_specific(specific) for specific in variation.specifics.all()],
+            images=[self.build_picture(image) for image in variation.images.all()]
+        )
+
+    def build_variation_specific(self, specific):
+        """
+        :type specific: inventorum.ebay.apps.products.models.EbayItemVariationSpecificModel
+        :rtype: EbayItemSpecific
+        """
+        return EbayItemSpecific(specific.name, [value.value for value in specific.values.all()])
+
+    def build_item_update(self, item_update):
+        """
+        :type item_update: inventorum.ebay.apps.products.models.EbayItemUpdateModel
+        :rtype: EbayReviseFixedPriceItem
+        """
+        return EbayReviseFixedPriceItem(
+            item_id=item_update.item.external_id,
+            quantity=item_update.quantity,
+            start_price=item_update.gross_price,
+            variations=[self.build_variation_update(variation_update)
+                        for variation_update in item_update.variations.all()]
+        )
+
+    def build_variation_update(self, variation_update):
+        """
+        :type variation_update: inventorum.ebay.apps.products.models.EbayItemVariationUpdateModel
+        :rtype: EbayReviseFixedPriceVariation
+        """
+        return EbayReviseFixedPriceVariation(
+            original_variation=self.build_variation(variation_update.variation),
+            new_quantity=variation_update.quantity,
+            new_start_price=variation_update.gross_price,
+            is_deleted=variation_update.is_deleted
+        )
+
+    def build_shipping_service(self, shipping):
+        """
+        :type shipping: inventorum.ebay.apps.products.models.EbayItemShippingDetails
+        :rtype: EbayItemShippingService
+        """
+        return EbayItemShippingService(
+            id=shipping.external_id,
+            cost=shipping.cost,
+            additional_cost=shipping.additional_cost
+        )
+
+    def build_picture(self, image):
+        """
+        :type image: inventorum.ebay.apps.products.models.EbayItemImageModel
+        :rtype: EbayPicture
+        """
+        return EbayPicture(image.url.replace('https://', 'http://'))
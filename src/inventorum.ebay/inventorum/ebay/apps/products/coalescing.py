@@ -0,0 +1,115 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from inventorum.ebay.apps.products import EbayItemUpdateStatus
+from inventorum.ebay.apps.products.models import EbayItemModel, EbayItemUpdateModel
+
+
+log = logging.getLogger(__name__)
+
+
+def claim_item_updates(item_update_ids, in_flight_timeout):
+    """
+    Merges the pending updates of the items of the given updates into one update per item with the latest values and
+    claims it for revision by setting it in progress. Merged updates are superseded by the claimed one.
+
+    Items with a revision in flight are not claimed, their updates have to be claimed again later. Updates that have
+    been in progress for longer than `in_flight_timeout` are not considered in flight anymore (e.g. the worker died),
+    they are merged and claimed again like pending updates, so their values are not lost.
+
+    :type item_update_ids: list[int]
+    :type in_flight_timeout: datetime.timedelta
+    :return: Ids of the claimed updates, ids of updates whose item has a revision in flight
+    :rtype: (list[int], list[int])
+    """
+    item_ids = EbayItemUpdateModel.objects.filter(id__in=item_update_ids).values_list("item_id", flat=True)
+
+    claimed_ids, deferred_ids = [], []
+    for item_id in sorted(set(item_ids)):
+        with transaction.atomic():
+            # serializes claims of the same item across workers
+            EbayItemModel.objects.select_for_update().filter(id=item_id).exists()
+
+            pending_updates = list(EbayItemUpdateModel.objects.filter(item_id=item_id, status__in=[
+                EbayItemUpdateStatus.DRAFT, EbayItemUpdateStatus.IN_PROGRESS
+            ]).order_by("id"))
+
+            if not pending_updates:
+                # already revised
+                continue
+
+            in_flight_since = timezone.now() - in_flight_timeout
+            if any(u.status == EbayItemUpdateStatus.IN_PROGRESS and u.time_modified > in_flight_since
+                   for u in pending_updates):
+                drafts = [u for u in pending_updates if u.status == EbayItemUpdateStatus.DRAFT]
+                if drafts:
+                    deferred_ids.append(drafts[-1].id)
+                # otherwise already claimed by another task
+                continue
+
+            # includes the abandoned updates, their values are overridden by the ones of later updates
+            item_update = _merge_item_updates(pending_updates)
+            item_update.set_status(EbayItemUpdateStatus.IN_PROGRESS)
+            claimed_ids.append(item_update.id)
+
+    return claimed_ids, deferred_ids
+
+
+def release_item_updates(item_update_ids):
+    """
+    Hands the given claimed updates that have not been revised (e.g. because the ebay call budget ran out) back, so
+    they are claimed again by the next claim of their items
+
+    :type item_update_ids: list[int]
+    """
+    EbayItemUpdateModel.objects.filter(id__in=item_update_ids, status=EbayItemUpdateStatus.IN_PROGRESS) \
+        .update(status=EbayItemUpdateStatus.DRAFT)
+
+
+def _merge_item_updates(item_updates):
+    """
+    Merges the given updates of one item into the latest of them, the values of later updates win
+
+    :type item_updates: list[EbayItemUpdateModel]
+    :rtype: EbayItemUpdateModel
+    """
+    latest = item_updates[-1]
+    if len(item_updates) == 1:
+        return latest
+
+    variation_updates = {v.variation_id: v for v in latest.variations.all()}
+    for item_update in reversed(item_updates[:-1]):
+        _merge_values(latest, item_update)
+
+        for variation_update in item_update.variations.all():
+            merged_variation_update = variation_updates.get(variation_update.variation_id)
+            if merged_variation_update is None:
+                variation_update.update_item = latest
+                variation_update.save()
+                variation_updates[variation_update.variation_id] = variation_update
+            else:
+                _merge_values(merged_variation_update, variation_update)
+                merged_variation_update.is_deleted |= variation_update.is_deleted
+                merged_variation_update.save()
+                variation_update.set_status(EbayItemUpdateStatus.SUPERSEDED)
+
+        item_update.superseded_by = latest
+        item_update.set_status(EbayItemUpdateStatus.SUPERSEDED)
+
+    latest.save()
+    log.info("Merged %s updates of item %s into update %s", len(item_updates), latest.item_id, latest.id)
+    return latest
+
+
+def _merge_values(update, earlier_update):
+    """
+    :type update: inventorum.ebay.apps.products.models.EbayUpdateModel
+    :type earlier_update: inventorum.ebay.apps.products.models.EbayUpdateModel
+    """
+    if not update.has_updated_quantity:
+        update.quantity = earlier_update.quantity
+    if not update.has_updated_gross_price:
+        update.gross_price = earlier_update.gross_price
@@ -22,6 +22,7 @@ class CoreAPISyncService(object):
         """
         self.account = account
         self.item_update_for_variations = {}
+        self.item_update_ids = []
 
     def run(self):
         current_sync_start = datetime.utcnow()
@@ -31,6 +32,7 @@ class CoreAPISyncService(object):
         self._sync_core_modifications(modified_since=last_sync_start)
         self._sync_core_deletions(deleted_since=last_sync_start)
         self._sync_variations_modifications()
+        self._schedule_item_updates()
 
         self.account.last_core_api_sync = current_sync_start
         self.account.save()
@@ -51,7 +53,7 @@ class CoreAPISyncService(object):
     def _sync_ebay_item(self, ebay_item, core_product_delta):
         ebay_item_update = self._create_item_update_from_diff(ebay_item, core_product_delta)
         if ebay_item_update:
-            tasks.schedule_ebay_item_update(ebay_item_update.id, context=self.get_task_execution_context())
+            self.item_update_ids.append(ebay_item_update.id)
 
     def _sync_ebay_variation(self, ebay_variation, core_product_delta):
         self._create_variation_update_from_diff(ebay_variation, core_product_delta)
@@ -121,11 +123,15 @@ class CoreAPISyncService(object):
         """
         deletions_ids = self._get_deletions_ids_of_ebay_products(deleted_since=deleted_since)
 
+        deleted_product_ids = []
         for ebay_product in EbayProductModel.objects.by_account(self.account).filter(inv_id__in=deletions_ids):
             ebay_product.deleted_in_core_api = True
             ebay_product.save()
+            deleted_product_ids.append(ebay_product.id)
 
-            tasks.schedule_ebay_product_deletion(ebay_product.id, context=self.get_task_execution_context())
+        if deleted_product_ids:
+            # all at once, so the listings of the deleted products are ended in batches
+            tasks.schedule_ebay_products_deletion(deleted_product_ids, context=self.get_task_execution_context())
 
         deleted_variations = EbayItemVariationModel.objects.filter(inv_product_id__in=deletions_ids)
         for deleted_variation in deleted_variations:
@@ -188,4 +194,13 @@ class CoreAPISyncService(object):
             return
 
         for item_update in self.item_update_for_variations.values():
-            tasks.schedule_ebay_item_update(item_update.id, context=self.get_task_execution_context())
+            self.item_update_ids.append(item_update.id)
+
+    def _schedule_item_updates(self):
+        """
+        Schedules all updates of this sync at once, so quantity and price changes can be sent to ebay in batches
+        """
+        if not self.item_update_ids:
+            return
+
+        tasks.schedule_ebay_item_updates(self.item_update_ids, context=self.get_task_execution_context())
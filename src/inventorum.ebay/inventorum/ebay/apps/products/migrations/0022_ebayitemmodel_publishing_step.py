@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_auto_20150505_1702'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebayitemmodel',
+            name='publishing_step',
+            field=models.CharField(blank=True, max_length=255, null=True, choices=[('initialize', 'Initialize'), ('ebay_call', 'Ebay call'), ('finalize', 'Finalize')]),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import datetime
+from django.utils.timezone import utc
+import django.utils.timezone
+import inventorum.util.django.db.models
+import django_extensions.db.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_auto_20150505_1531'),
+        ('products', '0022_ebayitemmodel_publishing_step'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EbayPublishJobModel',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('time_added', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('time_modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last change', auto_now=True)),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('deleted_at', models.DateTimeField(default=datetime.datetime(1970, 1, 1, 0, 0, tzinfo=utc), verbose_name='Time of deletion')),
+                ('validation_errors', django_extensions.db.fields.json.JSONField(null=True, blank=True)),
+                ('account', models.ForeignKey(related_name='publish_jobs', to='accounts.EbayAccountModel')),
+                ('items', models.ManyToManyField(related_name='publish_jobs', to='products.EbayItemModel')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(inventorum.util.django.db.models.ModelMixins, models.Model),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django_extensions.db.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_ebaypublishjobmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebaypublishjobmodel',
+            name='inv_product_ids',
+            field=django_extensions.db.fields.json.JSONField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='ebaypublishjobmodel',
+            name='status',
+            field=models.CharField(default='publishing', max_length=255, choices=[('pending', 'Pending'), ('preparing', 'Preparing'), ('publishing', 'Publishing'), ('failed', 'Failed')]),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='ebaypublishjobmodel',
+            name='status',
+            field=models.CharField(default='pending', max_length=255, choices=[('pending', 'Pending'), ('preparing', 'Preparing'), ('publishing', 'Publishing'), ('failed', 'Failed')]),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='ebaypublishjobmodel',
+            name='status_details',
+            field=django_extensions.db.fields.json.JSONField(null=True, blank=True),
+            preserve_default=True,
+        ),
+    ]
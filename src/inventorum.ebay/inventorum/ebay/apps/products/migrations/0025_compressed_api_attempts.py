@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import inventorum.ebay.lib.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_publish_job_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ebayapiattemptrequest',
+            name='body',
+            field=inventorum.ebay.lib.db.fields.CompressedTextField(),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='ebayapiattemptresponse',
+            name='content',
+            field=inventorum.ebay.lib.db.fields.CompressedTextField(),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0025_compressed_api_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebayitemupdatemodel',
+            name='superseded_by',
+            field=models.ForeignKey(related_name='superseded_updates', blank=True, to='products.EbayItemUpdateModel', null=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='ebayitemupdatemodel',
+            name='status',
+            field=models.CharField(default='draft', max_length=255, choices=[('draft', 'DRAFT'), ('in_progress', 'IN_PROGRESS'), ('succeeded', 'SUCCEEDED'), ('failed', 'FAILED'), ('superseded', 'SUPERSEDED')]),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='ebayitemvariationupdatemodel',
+            name='status',
+            field=models.CharField(default='draft', max_length=255, choices=[('draft', 'DRAFT'), ('in_progress', 'IN_PROGRESS'), ('succeeded', 'SUCCEEDED'), ('failed', 'FAILED'), ('superseded', 'SUPERSEDED')]),
+            preserve_default=True,
+        ),
+    ]
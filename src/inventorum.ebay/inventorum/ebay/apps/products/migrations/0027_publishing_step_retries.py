@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_item_update_coalescing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebayitemmodel',
+            name='publishing_step_retries',
+            field=models.PositiveSmallIntegerField(default=0),
+            preserve_default=True,
+        ),
+    ]
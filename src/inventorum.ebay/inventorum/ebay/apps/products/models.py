@@ -1,6 +1,5 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
-from collections import defaultdict
 import logging
 
 from django.db import models
@@ -10,12 +9,13 @@ from inventorum.ebay import settings
 from inventorum.ebay.apps.orders.models import OrderableItemModel
 
 from inventorum.ebay.apps.shipping.models import ShippingServiceConfigurable
-from inventorum.ebay.apps.products import EbayItemUpdateStatus, EbayApiAttemptType, EbayItemPublishingStatus
+from inventorum.ebay.apps.products import EbayItemUpdateStatus, EbayApiAttemptType, EbayItemPublishingStatus, \
+    EbayItemPublishingStep, EbayPublishJobStatus
+from inventorum.ebay.apps.products.builders import EbayItemPayloadBuilder
+from inventorum.ebay.lib.db.fields import CompressedTextField
 from inventorum.ebay.lib.db.models import MappedInventorumModel, BaseModel, BaseQuerySet, MappedInventorumModelQuerySet
-from inventorum.ebay.lib.ebay.data import EbayParser
 
-from inventorum.ebay.lib.ebay.data.items import EbayItemShippingService, EbayFixedPriceItem, EbayPicture,\
-    EbayItemSpecific, EbayVariation, EbayReviseFixedPriceItem, EbayReviseFixedPriceVariation
+from inventorum.ebay.lib.ebay.data.items import EbayItemSpecific, EbayInventoryStatus
 from inventorum.util.django.model_utils import PassThroughManager
 
 
@@ -94,7 +94,7 @@ class EbayItemImageModel(BaseModel):
 
     @property
     def ebay_object(self):
-        return EbayPicture(self.url.replace('https://', 'http://'))
+        return EbayItemPayloadBuilder().build_picture(self)
 
 
 class EbayItemShippingDetails(BaseModel):
@@ -105,11 +105,7 @@ class EbayItemShippingDetails(BaseModel):
 
     @property
     def ebay_object(self):
-        return EbayItemShippingService(
-            id=self.external_id,
-            cost=self.cost,
-            additional_cost=self.additional_cost
-        )
+        return EbayItemPayloadBuilder().build_shipping_service(self)
 
 
 class EbayItemPaymentMethod(BaseModel):
@@ -119,11 +115,26 @@ class EbayItemPaymentMethod(BaseModel):
 
 class EbayItemModelQuerySet(BaseQuerySet):
 
-    def get_for_publishing(self, **kwargs):
+    def for_publishing(self):
         """
+        Loads the items with everything needed to build their `ebay_object` with a fixed number of queries
         :rtype: EbayItemModelQuerySet
         """
-        return self.select_related("product", "shipping", "images", "specific_values").get(**kwargs)
+        return self.select_related(*EbayItemPayloadBuilder.ITEM_SELECT_RELATED) \
+            .prefetch_related(*EbayItemPayloadBuilder.ITEM_PREFETCH_RELATED)
+
+    def start_publishing_attempt(self):
+        """
+        Checkpoints the items at the first step of a new publishing or unpublishing attempt
+        :rtype: int
+        """
+        return self.update(publishing_step=EbayItemPublishingStep.INITIALIZE, publishing_step_retries=0)
+
+    def get_for_publishing(self, **kwargs):
+        """
+        :rtype: EbayItemModel
+        """
+        return self.for_publishing().get(**kwargs)
 
     def by_ebay_id(self, ebay_id):
         """
@@ -170,6 +181,9 @@ class EbayItemModel(OrderableItemModel, BaseModel):
     publishing_status = models.CharField(max_length=255, choices=EbayItemPublishingStatus.CHOICES,
                                          default=EbayItemPublishingStatus.DRAFT)
     publishing_status_details = JSONField(null=True, blank=True)
+    publishing_step = models.CharField(max_length=255, choices=EbayItemPublishingStep.CHOICES, null=True, blank=True)
+    # retries of the current step, every step is retried at most `EBAY_PUBLISHING_STEP_MAX_RETRIES` times
+    publishing_step_retries = models.PositiveSmallIntegerField(default=0)
 
     published_at = models.DateTimeField(null=True, blank=True)
     unpublished_at = models.DateTimeField(null=True, blank=True)
@@ -188,33 +202,10 @@ class EbayItemModel(OrderableItemModel, BaseModel):
 
     @property
     def ebay_object(self):
-        payment_methods = list(self.payment_methods.all().values_list('external_id', flat=True))
-        return EbayFixedPriceItem(
-            title=self.name,
-            sku=self.sku,
-            description=self.description,
-            listing_duration=self.listing_duration,
-            country=unicode(self.country),
-            postal_code=self.postal_code,
-            quantity=self.quantity,
-            start_price=self.gross_price,
-            paypal_email_address=self.paypal_email_address,
-            payment_methods=payment_methods,
-            category_id=self.category.external_id,
-            shipping_services=[s.ebay_object for s in self.shipping.all()],
-            pictures=[i.ebay_object for i in self.images.all()],
-            item_specifics=self._build_item_specifics(),
-            variations=[v.ebay_object for v in self.variations.all()],
-            is_click_and_collect=self.is_click_and_collect
-        )
-
-    def _build_item_specifics(self):
-        specifics = self.specific_values.all()
-        specific_dict = defaultdict(list)
-        for specific in specifics:
-            specific_dict[specific.specific.name].append(specific.value)
-
-        return [EbayItemSpecific(name=key, values=values) for key, values in specific_dict.iteritems()]
+        """
+        :rtype: inventorum.ebay.lib.ebay.data.items.EbayFixedPriceItem
+        """
+        return EbayItemPayloadBuilder().build_item(self)
 
     def set_publishing_status(self, publishing_status, details=None, save=True):
         """
@@ -228,6 +219,19 @@ class EbayItemModel(OrderableItemModel, BaseModel):
         if save:
             self.save()
 
+    def set_publishing_step(self, publishing_step):
+        """
+        Persists the checkpoint of the current publishing or unpublishing attempt
+        :type publishing_step: unicode | None
+        """
+        self.publishing_step = publishing_step
+        self.publishing_step_retries = 0
+        self.save(update_fields=["publishing_step", "publishing_step_retries"])
+
+    def add_publishing_step_retry(self):
+        self.publishing_step_retries += 1
+        self.save(update_fields=["publishing_step_retries"])
+
     @property
     def has_variations(self):
         return self.variations.exists()
@@ -258,13 +262,10 @@ class EbayItemVariationModel(OrderableItemModel, BaseModel):
 
     @property
     def ebay_object(self):
-        return EbayVariation(
-            sku=self.sku,
-            gross_price=self.gross_price,
-            quantity=self.quantity,
-            specifics=[s.ebay_object for s in self.specifics.all()],
-            images=[i.ebay_object for i in self.images.all()]
-        )
+        """
+        :rtype: inventorum.ebay.lib.ebay.data.items.EbayVariation
+        """
+        return EbayItemPayloadBuilder().build_variation(self)
 
     @property
     def sku(self):
@@ -277,7 +278,7 @@ class EbayItemVariationSpecificModel(BaseModel):
 
     @property
     def ebay_object(self):
-        return EbayItemSpecific(self.name, list(self.values.all().values_list('value', flat=True)))
+        return EbayItemPayloadBuilder().build_variation_specific(self)
 
 
 class EbayItemVariationSpecificValueModel(BaseModel):
@@ -318,21 +319,55 @@ class EbayUpdateModel(BaseModel):
             self.save()
 
 
+class EbayItemUpdateModelQuerySet(BaseQuerySet):
+
+    def for_revision(self):
+        """
+        Loads the updates with everything needed to build their `ebay_object` with a fixed number of queries
+        :rtype: EbayItemUpdateModelQuerySet
+        """
+        return self.select_related(*EbayItemPayloadBuilder.ITEM_UPDATE_SELECT_RELATED) \
+            .prefetch_related(*EbayItemPayloadBuilder.ITEM_UPDATE_PREFETCH_RELATED)
+
+
 class EbayItemUpdateModel(EbayUpdateModel):
     item = models.ForeignKey("products.EbayItemModel", related_name="updates")
+    superseded_by = models.ForeignKey("self", null=True, blank=True, related_name="superseded_updates")
+
+    objects = PassThroughManager.for_queryset_class(EbayItemUpdateModelQuerySet)()
 
     @property
     def has_variation_updates(self):
         return self.variations.exists()
 
+    @property
+    def is_inventory_status_update(self):
+        """
+        True if only quantities and prices change, which can be revised in batches via `ReviseInventoryStatus`
+        :rtype: bool
+        """
+        return not any(variation.is_deleted for variation in self.variations.all())
+
     @property
     def ebay_object(self):
-        return EbayReviseFixedPriceItem(
-            item_id=self.item.external_id,
-            quantity=self.quantity,
-            start_price=self.gross_price,
-            variations=[v.ebay_object for v in self.variations.all()]
-        )
+        """
+        :rtype: inventorum.ebay.lib.ebay.data.items.EbayReviseFixedPriceItem
+        """
+        return EbayItemPayloadBuilder().build_item_update(self)
+
+    @property
+    def inventory_statuses(self):
+        """
+        :rtype: list[EbayInventoryStatus]
+        """
+        # uses the variations prefetched by `for_revision`
+        variations = self.variations.all()
+        if not variations:
+            return [EbayInventoryStatus(item_id=self.item.external_id, quantity=self.quantity,
+                                        start_price=self.gross_price)]
+
+        return [EbayInventoryStatus(item_id=self.item.external_id, sku=v.variation.sku, quantity=v.quantity,
+                                    start_price=v.gross_price) for v in variations]
 
 
 class EbayItemVariationUpdateModel(EbayUpdateModel):
@@ -349,12 +384,7 @@ class EbayItemVariationUpdateModel(EbayUpdateModel):
         super(EbayItemVariationUpdateModel, self).save(*args, **kwargs)
     @property
     def ebay_object(self):
-        return EbayReviseFixedPriceVariation(
-            original_variation=self.variation.ebay_object,
-            new_quantity=self.quantity,
-            new_start_price=self.gross_price,
-            is_deleted=self.is_deleted
-        )
+        return EbayItemPayloadBuilder().build_variation_update(self)
 
 
 class EbayItemSpecificModel(BaseModel):
@@ -373,44 +403,81 @@ class EbayProductSpecificModel(BaseModel):
     value = models.CharField(max_length=255)
 
 
+class EbayPublishJobModel(BaseModel):
+    """
+    Products of an account published at once, the job is prepared (validation and creation of the items) by a worker
+    and the progress of the publishing is the publishing status of its items
+    """
+    account = models.ForeignKey("accounts.EbayAccountModel", related_name="publish_jobs")
+    inv_product_ids = JSONField(null=True, blank=True)
+    items = models.ManyToManyField(EbayItemModel, related_name="publish_jobs")
+
+    status = models.CharField(max_length=255, choices=EbayPublishJobStatus.CHOICES,
+                              default=EbayPublishJobStatus.PENDING)
+    status_details = JSONField(null=True, blank=True)
+    # inv product id -> reason why the product was not published
+    validation_errors = JSONField(null=True, blank=True)
+
+    objects = PassThroughManager.for_queryset_class(BaseQuerySet)()
+
+    def set_status(self, status, details=None, save=True):
+        """
+        :type status: unicode
+        :type details:
+        :type save: bool
+        """
+        self.status = status
+        self.status_details = details
+
+        if save:
+            self.save()
+
+    @property
+    def progress(self):
+        """
+        :return: Number of items of the job by publishing status
+        :rtype: dict[unicode, int]
+        """
+        counts = dict.fromkeys([status for status, _ in EbayItemPublishingStatus.CHOICES], 0)
+        counts.update(self.items.order_by().values_list("publishing_status").annotate(count=models.Count("id")))
+        return counts
+
+    @property
+    def steps(self):
+        """
+        :return: Number of items of the job by the publishing step they are at, items that ran all steps are not counted
+        :rtype: dict[unicode, int]
+        """
+        counts = dict.fromkeys([step for step, _ in EbayItemPublishingStep.CHOICES], 0)
+        counts.update(self.items.filter(publishing_step__isnull=False).order_by().values_list("publishing_step")
+                      .annotate(count=models.Count("id")))
+        return counts
+
+    @property
+    def is_finished(self):
+        """
+        :rtype: bool
+        """
+        if self.status == EbayPublishJobStatus.FAILED:
+            return True
+        if self.status != EbayPublishJobStatus.PUBLISHING:
+            return False
+        return not self.items.filter(publishing_step__isnull=False).exists()
+
+
 class EbayApiAttemptRequest(BaseModel):
-    body = models.TextField()
+    body = CompressedTextField()
     headers = JSONField()
     url = models.TextField()
     method = models.TextField()
 
-    @classmethod
-    def create_from_ebay_request(cls, request):
-        """
-        :type request: requests.models.PreparedRequest
-        """
-        body = EbayParser.make_body_secure(request.body.decode('utf-8'))
-        return cls.objects.create(
-            body=body,
-            headers=dict(request.headers),
-            url=request.url,
-            method=request.method
-        )
-
 
 class EbayApiAttemptResponse(BaseModel):
-    content = models.TextField()
+    content = CompressedTextField()
     headers = JSONField()
     url = models.TextField()
     status_code = models.IntegerField()
 
-    @classmethod
-    def create_from_response(cls, response):
-        """
-        :type response: requests.models.Response
-        """
-        return cls.objects.create(
-            content=response.text,
-            headers=dict(response.headers),
-            url=response.url,
-            status_code=response.status_code
-        )
-
 
 class EbayApiAttempt(BaseModel):
     type = models.CharField(max_length=255, choices=EbayApiAttemptType.CHOICES)
@@ -421,81 +488,3 @@ class EbayApiAttempt(BaseModel):
     item = models.ForeignKey(EbayItemModel, null=True, blank=True, related_name="attempts")
     item_update = models.ForeignKey(EbayItemUpdateModel, null=True, blank=True, related_name="attempts")
 
-    @classmethod
-    def create_from_ebay_exception_for_item_and_type(cls, exception, item, type):
-        """
-        :type exception: inventorum.ebay.lib.ebay.EbayConnectionException
-        :type item: EbayItemModel
-        :param type: unicode
-        :return: EbayApiAttempt
-        """
-        return cls.objects.create(
-            type=type,
-            request=EbayApiAttemptRequest.create_from_ebay_request(exception.response.request),
-            response=EbayApiAttemptResponse.create_from_response(exception.response),
-            success=False,
-            item=item
-        )
-
-    @classmethod
-    def create_from_service_for_item_and_type(cls, service, item, type):
-        """
-        Create Model with success true as there was no exception!
-        :type service: inventorum.ebay.lib.ebay.items.EbayItems
-        :type item: EbayItemModel
-        :param type: unicode
-        :return: EbayApiAttempt
-        """
-        return cls.objects.create(
-            type=type,
-            request=EbayApiAttemptRequest.create_from_ebay_request(service.api.request),
-            response=EbayApiAttemptResponse.create_from_response(service.api.response),
-            success=True,
-            item=item
-        )
-
-    @classmethod
-    def _create_update_attempt(cls, item_update, request, response, success):
-        """
-        :type item_update: EbayItemUpdateModel
-        :type request: EbayApiAttemptRequest
-        :type response: EbayApiAttemptResponse
-        :type success: bool
-        :rtype: EbayApiAttempt
-        """
-        return cls.objects.create(
-            type=EbayApiAttemptType.UPDATE,
-            request=request,
-            response=response,
-            success=success,
-            item=item_update.item,
-            item_update=item_update
-        )
-
-    @classmethod
-    def create_failed_update_attempt(cls, item_update, exception):
-        """
-        :type item_update: EbayItemUpdateModel
-        :type exception: inventorum.ebay.lib.ebay.EbayConnectionException
-        :return: EbayApiAttempt
-        """
-        return cls._create_update_attempt(
-            item_update=item_update,
-            request=EbayApiAttemptRequest.create_from_ebay_request(exception.response.request),
-            response=EbayApiAttemptResponse.create_from_response(exception.response),
-            success=False,
-        )
-
-    @classmethod
-    def create_succeeded_update_attempt(cls, item_update, ebay):
-        """
-        :type item_update: EbayItemUpdateModel
-        :type ebay_api: inventorum.ebay.lib.ebay.EbayTrading
-        :return: EbayApiAttempt
-        """
-        return cls._create_update_attempt(
-            item_update=item_update,
-            request=EbayApiAttemptRequest.create_from_ebay_request(ebay.api.request),
-            response=EbayApiAttemptResponse.create_from_response(ebay.api.response),
-            success=True
-        )
@@ -2,16 +2,18 @@
 from __future__ import absolute_import, unicode_literals
 import logging
 from django.utils.translation import ugettext
-from inventorum.ebay.apps.products.tasks import schedule_ebay_item_publish, schedule_ebay_item_unpublish
+from inventorum.ebay.apps.products.tasks import schedule_ebay_item_publish, schedule_ebay_item_unpublish, \
+    schedule_ebay_publish_job, schedule_ebay_items_unpublish
 
 from rest_framework import exceptions, mixins
 from rest_framework.response import Response
 from rest_framework import status
 
-from inventorum.ebay.apps.products.models import EbayProductModel
-from inventorum.ebay.apps.products.serializers import EbayProductSerializer
+from inventorum.ebay.apps.products.models import EbayProductModel, EbayPublishJobModel
+from inventorum.ebay.apps.products.serializers import EbayProductSerializer, BulkPublishSerializer, \
+    EbayPublishJobSerializer, BulkUnpublishSerializer
 from inventorum.ebay.apps.products.services import PublishingValidationException, \
-    PublishingCouldNotGetDataFromCoreAPI, PublishingPreparationService
+    PublishingCouldNotGetDataFromCoreAPI, PublishingPreparationService, BulkPublishingPreparationService
 from inventorum.ebay.lib.rest.exceptions import ApiException, BadRequest
 
 from inventorum.ebay.lib.rest.resources import APIResource
@@ -51,10 +53,36 @@ class EbayProductResource(APIResource, ProductResourceMixin, mixins.RetrieveMode
         return self.update(request, *args, **kwargs)
 
 
-class PublishResource(APIResource, ProductResourceMixin):
+class PublishJobResourceMixin(object):
+
+    def is_async_request(self):
+        """
+        :rtype: bool
+        """
+        return self.request.query_params.get("async", "").lower() in ("1", "true")
+
+    def schedule_publish_job(self, inv_product_ids):
+        """
+        Records a publish job for the given products and leaves validation, creation of the items and publishing to
+        a worker
+
+        :type inv_product_ids: list[int]
+        :rtype: Response
+        """
+        preparation_service = BulkPublishingPreparationService(inv_product_ids, user=self.request.user)
+        job = preparation_service.create_publish_job()
+        schedule_ebay_publish_job(job.id, context=self.get_task_execution_context())
+
+        return Response(data=EbayPublishJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class PublishResource(APIResource, ProductResourceMixin, PublishJobResourceMixin):
     serializer_class = EbayProductSerializer
 
     def post(self, request, inv_product_id):
+        if self.is_async_request():
+            return self.schedule_publish_job([int(inv_product_id)])
+
         product = self.get_or_create_product(inv_product_id, request.user.account)
 
         preparation_service = PublishingPreparationService(product, user=request.user)
@@ -74,6 +102,27 @@ class PublishResource(APIResource, ProductResourceMixin):
         return Response(data=serializer.data)
 
 
+class BulkPublishResource(APIResource, PublishJobResourceMixin):
+    serializer_class = BulkPublishSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return self.schedule_publish_job(serializer.validated_data["inv_product_ids"])
+
+
+class PublishJobResource(APIResource, mixins.RetrieveModelMixin):
+    serializer_class = EbayPublishJobSerializer
+    lookup_url_kwarg = 'job_id'
+
+    def get_queryset(self):
+        return EbayPublishJobModel.objects.filter(account=self.request.user.account)
+
+    def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
+
+
 class UnpublishResource(APIResource, ProductResourceMixin):
     serializer_class = EbayProductSerializer
     lookup_url_kwarg = 'inv_product_id'
@@ -92,3 +141,22 @@ class UnpublishResource(APIResource, ProductResourceMixin):
 
         serializer = self.get_serializer(product)
         return Response(data=serializer.data)
+
+
+class BulkUnpublishResource(APIResource):
+    serializer_class = BulkUnpublishSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        products = EbayProductModel.objects.filter(account=request.user.account,
+                                                   inv_id__in=serializer.validated_data["inv_product_ids"])
+        published_products = [product for product in products if product.is_published]
+        if not published_products:
+            raise BadRequest(ugettext('None of the products is published'))
+
+        schedule_ebay_items_unpublish([product.published_item.id for product in published_products],
+                                      context=self.get_task_execution_context())
+
+        return Response(data=EbayProductSerializer(published_products, many=True).data)
@@ -6,10 +6,11 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext
 
 from inventorum.ebay.apps.categories.models import CategoryModel
+from inventorum.ebay.apps.categories.rules import get_category_specifics_rules
 
 from inventorum.ebay.apps.categories.serializers import CategorySerializer, CategoryBreadcrumbSerializer, \
     CategorySpecificsSerializer
-from inventorum.ebay.apps.products.models import EbayProductModel, EbayProductSpecificModel
+from inventorum.ebay.apps.products.models import EbayProductModel, EbayProductSpecificModel, EbayPublishJobModel
 from inventorum.ebay.apps.shipping.serializers import ShippingServiceConfigurableSerializer
 from inventorum.ebay.apps.products.validators import CategorySpecificsValidator
 from inventorum.ebay.lib.rest.fields import RelatedModelByIdField
@@ -29,11 +30,8 @@ class EbayProductSpecificSerializer(serializers.ModelSerializer):
         return attrs
 
     def _validate_value(self, specific, value):
-        if specific.can_use_own_values:
-            return
-
-        values = specific.values.all().values_list('value', flat=True)
-        if value not in values:
+        rules = get_category_specifics_rules(specific.category_id, specific_ids=[specific.id])
+        if not rules.is_allowed_value(specific.id, value):
             raise ValidationError(ugettext('This item specific does not accept custom values (wrong: `%(value)s`)')
                                   % {'value': value})
 
@@ -120,3 +118,29 @@ class EbayProductSerializer(ShippingServiceConfigurableSerializer, serializers.M
         to_be_deleted = current_specific_values - set(new_specific_values)
         if to_be_deleted:
             instance.specific_values.filter(id__in=to_be_deleted).delete()
+
+
+class BulkPublishSerializer(serializers.Serializer):
+    inv_product_ids = serializers.ListField(child=serializers.IntegerField(min_value=1))
+
+    def validate_inv_product_ids(self, inv_product_ids):
+        if not inv_product_ids:
+            raise ValidationError(ugettext("You need to pass at least one product"))
+        return inv_product_ids
+
+
+class BulkUnpublishSerializer(BulkPublishSerializer):
+    pass
+
+
+class EbayPublishJobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = EbayPublishJobModel
+        fields = ('id', 'inv_product_ids', 'status', 'status_details', 'items', 'validation_errors', 'progress',
+                  'steps', 'is_finished')
+
+    items = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    progress = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    steps = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    is_finished = serializers.BooleanField(read_only=True)
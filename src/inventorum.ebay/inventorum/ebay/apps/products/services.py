@@ -1,24 +1,34 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 import logging
 from decimal import Decimal
 
+from django.conf import settings
+from django.db import transaction
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext
+from inventorum.ebay.apps.categories.rules import get_category_specifics_rules
+from inventorum.ebay.apps.fingerprints import PayloadFingerprintTarget
+from inventorum.ebay.apps.fingerprints.services import is_redundant, remember_sent, forget_sent
 from inventorum.ebay.apps.products.validators import CategorySpecificsValidator
 from inventorum.ebay.lib.ebay.data import BuyerPaymentMethodCodeType
 from inventorum.ebay.lib.ebay.data.inventorymanagement import EbayLocationAvailability, EbayAvailability
 from inventorum.ebay.lib.ebay.inventorymanagement import EbayInventoryManagement
 from requests.exceptions import HTTPError
 
-from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayApiAttemptType, EbayItemUpdateStatus
+from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayApiAttemptType, EbayItemUpdateStatus, \
+    EbayItemPublishingStep, EbayPublishJobStatus
+from inventorum.ebay.apps.products.attempts import log_api_attempt
 from inventorum.ebay.apps.products.models import EbayProductModel, EbayItemModel, EbayItemImageModel, \
-    EbayItemShippingDetails, EbayItemPaymentMethod, EbayItemSpecificModel, EbayApiAttempt, EbayItemVariationModel, \
-    EbayItemVariationSpecificModel, EbayItemVariationSpecificValueModel
+    EbayItemShippingDetails, EbayItemPaymentMethod, EbayItemSpecificModel, EbayItemVariationModel, \
+    EbayItemVariationSpecificModel, EbayItemVariationSpecificValueModel, EbayPublishJobModel
 from inventorum.ebay.lib.ebay import EbayConnectionException
+from inventorum.ebay.lib.ebay.data.errors import EbayError
+from inventorum.ebay.lib.ebay.data.items import EbayReviseInventoryStatusResponse
 from inventorum.ebay.lib.ebay.items import EbayItems
+from inventorum.ebay.lib.ebay.scheduler import EbayCallPriority, EbayCallBudgetExceeded
 
 log = logging.getLogger(__name__)
 
@@ -82,6 +92,14 @@ class PublishingPreparationService(object):
     def core_account(self):
         return self.core_info.account
 
+    @cached_property
+    def account_has_shipping_services(self):
+        return self.account.shipping_services.exists()
+
+    @cached_property
+    def required_specific_ids(self):
+        return get_category_specifics_rules(self.product.category_id).required_ids
+
     def validate(self):
         """
         Validates account and product before publishing to ebay
@@ -93,9 +111,11 @@ class PublishingPreparationService(object):
             raise PublishingValidationException(ugettext('Product was already published'))
 
         if not self.core_account.billing_address:
+            # the user is about to add it, the next attempt must not see the cached info without it
+            self.user.core_api.invalidate_account_info()
             raise PublishingValidationException(ugettext('To publish product we need your billing address'))
 
-        if not (self.product.shipping_services.exists() or self.account.shipping_services.exists()):
+        if not (self.product.shipping_services.exists() or self.account_has_shipping_services):
             raise PublishingValidationException(ugettext('Neither product or account have configured shipping services'))
 
         self._validate_prices()
@@ -105,7 +125,7 @@ class PublishingPreparationService(object):
             raise PublishingValidationException(ugettext('You need to select category'))
 
         specific_values_ids = set(sv.specific.pk for sv in self.product.specific_values.all())
-        required_ones = set(self.product.category.specifics.required().values_list('id', flat=True))
+        required_ones = self.required_specific_ids
 
         missing_ids = (required_ones - specific_values_ids)
         if missing_ids:
@@ -161,84 +181,224 @@ class PublishingPreparationService(object):
 
     def create_ebay_item(self):
         """
+        Creates the snapshot of the product that is published, with a fixed number of queries regardless of the
+        number of images, variations and their specifics
+
         :rtype: EbayItemModel
         """
         product = EbayProductModel.objects.get(inv_id=self.core_product.id)
 
-        item = EbayItemModel.objects.create(
-            listing_duration=product.category.features.max_listing_duration,
-            product=product,
-            account=product.account,
-            name=self.core_product.name,
-            description=self.core_product.description,
-            gross_price=self.core_product.gross_price,
-            category=product.category,
-            country=self.core_account.country,
-            quantity=self.core_product.quantity,
-            paypal_email_address=self.account.payment_method_paypal_email_address,
-            postal_code=self.core_account.billing_address.zipcode,
-            is_click_and_collect=self.product.is_click_and_collect
-        )
-
-        for image in self.core_product.images:
-            EbayItemImageModel.objects.create(
-                inv_image_id=image.id,
-                url=image.url,
-                item=item
+        with transaction.atomic():
+            item = EbayItemModel.objects.create(
+                listing_duration=product.category.features.max_listing_duration,
+                product=product,
+                account=product.account,
+                name=self.core_product.name,
+                description=self.core_product.description,
+                gross_price=self.core_product.gross_price,
+                category=product.category,
+                country=self.core_account.country,
+                quantity=self.core_product.quantity,
+                paypal_email_address=self.account.payment_method_paypal_email_address,
+                postal_code=self.core_account.billing_address.zipcode,
+                is_click_and_collect=self.product.is_click_and_collect
             )
 
-        shipping_services = self.product.shipping_services.all() if self.product.shipping_services.exists() \
-            else self.account.shipping_services.all()
+            shipping_services = self.product.shipping_services if self.product.shipping_services.exists() \
+                else self.account.shipping_services
+
+            EbayItemShippingDetails.objects.bulk_create([
+                EbayItemShippingDetails(
+                    additional_cost=service_config.additional_cost,
+                    cost=service_config.cost,
+                    external_id=service_config.service.external_id,
+                    item=item
+                ) for service_config in shipping_services.select_related("service")
+            ])
+
+            EbayItemPaymentMethod.objects.bulk_create([
+                EbayItemPaymentMethod(
+                    external_id=payment,
+                    item=item
+                ) for payment in self.account.ebay_payment_methods
+            ])
+
+            EbayItemSpecificModel.objects.bulk_create([
+                EbayItemSpecificModel(
+                    specific_id=specific.specific_id,
+                    value=specific.value,
+                    item=item
+                ) for specific in product.specific_values.all()
+            ])
+
+            images = [EbayItemImageModel(inv_image_id=image.id, url=image.url, item=item)
+                      for image in self.core_product.images]
+
+            if self.core_product.variations:
+                images.extend(self._create_variations(item))
+
+            EbayItemImageModel.objects.bulk_create(images)
 
-        for service_config in shipping_services:
-            EbayItemShippingDetails.objects.create(
-                additional_cost=service_config.additional_cost,
-                cost=service_config.cost,
-                external_id=service_config.service.external_id,
-                item=item
-            )
+        return item
 
-        for payment in self.account.ebay_payment_methods:
-            EbayItemPaymentMethod.objects.create(
-                external_id=payment,
-                item=item
-            )
+    def _create_variations(self, item):
+        """
+        Creates the variations of the item with their specifics and values, bulk inserts do not return primary keys,
+        so the variations and specifics are read back once in creation order to reference them. Attributes are matched
+        by position, as the keys of the attributes of a variation are not necessarily unique.
 
-        for specific in product.specific_values.all():
-            EbayItemSpecificModel.objects.create(
-                specific=specific.specific,
-                value=specific.value,
-                item=item
-            )
+        :type item: EbayItemModel
+        :return: Unsaved images of the variations
+        :rtype: list[EbayItemImageModel]
+        """
+        core_variations = self.core_product.variations
 
-        for product in self.core_product.variations:
-            variation_obj = EbayItemVariationModel.objects.create(
-                quantity=product.quantity,
-                gross_price=product.gross_price,
+        EbayItemVariationModel.objects.bulk_create([
+            EbayItemVariationModel(
+                quantity=core_variation.quantity,
+                gross_price=core_variation.gross_price,
                 item=item,
-                inv_product_id=product.id
-            )
-            for image in product.images:
-                EbayItemImageModel.objects.create(
-                    inv_image_id=image.id,
-                    url=image.url,
-                    variation=variation_obj
-                )
-            for attribute in product.attributes:
-                specific_obj = EbayItemVariationSpecificModel.objects.create(
-                    name=attribute.key,
-                    variation=variation_obj
-                )
-                for value in attribute.values:
-                    EbayItemVariationSpecificValueModel.objects.create(
-                        specific=specific_obj,
-                        value=value
-                    )
+                inv_product_id=core_variation.id
+            ) for core_variation in core_variations
+        ])
+        variations = item.variations.order_by("id")
+
+        images = []
+        specifics = []
+        for core_variation, variation in zip(core_variations, variations):
+            images.extend(EbayItemImageModel(inv_image_id=image.id, url=image.url, variation=variation)
+                          for image in core_variation.images)
+            specifics.extend(EbayItemVariationSpecificModel(name=attribute.key, variation=variation)
+                             for attribute in core_variation.attributes)
+
+        EbayItemVariationSpecificModel.objects.bulk_create(specifics)
+        specific_ids = EbayItemVariationSpecificModel.objects.filter(variation__item=item).order_by("id")\
+            .values_list("id", flat=True)
+        attributes = [attribute for core_variation in core_variations for attribute in core_variation.attributes]
+
+        EbayItemVariationSpecificValueModel.objects.bulk_create([
+            EbayItemVariationSpecificValueModel(specific_id=specific_id, value=value)
+            for specific_id, attribute in zip(specific_ids, attributes) for value in attribute.values
+        ])
+
+        return images
+
+
+class BulkPublishingPreparationService(object):
+    def __init__(self, inv_product_ids, user):
+        """
+        Validates many products of an account and creates their items. The core products are fetched at once, the
+        account info, the shipping configuration of the account and the required specifics of each category are
+        shared by all products.
 
-        return item
+        :type inv_product_ids: list[int]
+        :type user: inventorum.ebay.apps.accounts.models.EbayUserModel
+        """
+        self.inv_product_ids = list(OrderedDict.fromkeys(inv_product_ids))
+        self.user = user
+        self.account = user.account
+
+        # inv product id -> reason why the product cannot be published
+        self.errors = OrderedDict()
+
+    def prepare(self):
+        """
+        Validates all products and creates the items of the valid ones in one transaction, the reasons why the other
+        products cannot be published are collected in `errors`
+
+        :rtype: list[EbayItemModel]
+        :raises PublishingCouldNotGetDataFromCoreAPI
+        """
+        try:
+            core_products = self.user.core_api.get_products(self.inv_product_ids)
+            core_info = self.user.core_api.get_account_info()
+        except HTTPError as e:
+            raise PublishingCouldNotGetDataFromCoreAPI(response=e.response)
+
+        for inv_product_id in core_products.missing_ids:
+            self.errors[inv_product_id] = ugettext('Product does not exist')
+
+        account_has_shipping_services = self.account.shipping_services.exists()
+        required_specific_ids_by_category = {}
+
+        valid_services = []
+        for product in self._get_or_create_products(core_products.products.keys()):
+            service = PublishingPreparationService(product, self.user)
+            service.core_product = core_products.products[product.inv_id]
+            service.core_info = core_info
+            service.account_has_shipping_services = account_has_shipping_services
+
+            if product.category_id is not None:
+                if product.category_id not in required_specific_ids_by_category:
+                    required_specific_ids_by_category[product.category_id] = service.required_specific_ids
+                service.required_specific_ids = required_specific_ids_by_category[product.category_id]
+
+            try:
+                service.validate()
+            except PublishingValidationException as e:
+                self.errors[product.inv_id] = e.message
+            else:
+                valid_services.append(service)
+
+        with transaction.atomic():
+            return [service.create_ebay_item() for service in valid_services]
+
+    def create_publish_job(self):
+        """
+        Creates the job for the products, without preparing it yet
+        :rtype: EbayPublishJobModel
+        """
+        return EbayPublishJobModel.objects.create(account=self.account, inv_product_ids=self.inv_product_ids)
+
+    def prepare_publish_job(self, job):
+        """
+        Prepares the products of the job and records the created items and validation errors on it
+
+        :type job: EbayPublishJobModel
+        :raises PublishingCouldNotGetDataFromCoreAPI
+        """
+        job.set_status(EbayPublishJobStatus.PREPARING)
+
+        try:
+            items = self.prepare()
+        except PublishingCouldNotGetDataFromCoreAPI as e:
+            job.set_status(EbayPublishJobStatus.FAILED, details={"core_api_status_code": e.response.status_code})
+            raise
+
+        # the job is only finished once its items ran all publishing steps, so they must have their first step as soon
+        # as the job is publishing
+        with transaction.atomic():
+            EbayItemModel.objects.filter(id__in=[item.id for item in items]).start_publishing_attempt()
+            job.items.add(*items)
+            job.validation_errors = self.errors
+            job.set_status(EbayPublishJobStatus.PUBLISHING)
+
+    def _get_or_create_products(self, inv_product_ids):
+        """
+        :type inv_product_ids: list[int]
+        :return: Products in the order of the requested ids
+        :rtype: list[EbayProductModel]
+        """
+        requested_ids = set(inv_product_ids)
+        inv_product_ids = [inv_id for inv_id in self.inv_product_ids if inv_id in requested_ids]
+        products = EbayProductModel.objects.by_account(self.account).filter(inv_id__in=inv_product_ids)
+
+        missing_ids = set(inv_product_ids) - set(products.values_list("inv_id", flat=True))
+        if missing_ids:
+            EbayProductModel.objects.bulk_create([EbayProductModel(inv_id=inv_id, account=self.account)
+                                                  for inv_id in missing_ids])
+
+        products_by_inv_id = {product.inv_id: product for product in
+                              products.select_related("category").prefetch_related("specific_values__specific")}
+        return [products_by_inv_id[inv_id] for inv_id in inv_product_ids]
 
 
 class PublishingUnpublishingService(object):
+    # Reported if the ebay call step got no call budget in any of its retries
+    NO_CALL_BUDGET_ERROR = EbayError(code=None, classification='RequestError', severity_code='Error',
+                                     short_message='Ebay call limit reached',
+                                     long_message='Ebay could not be called within the call limits.')
+
     def __init__(self, item, user):
         """
         Abstract base service for publishing/unpublishing products to ebay
@@ -252,6 +412,34 @@ class PublishingUnpublishingService(object):
     def product(self):
         return self.item.product
 
+    def run(self):
+        """
+        Runs the remaining steps of the attempt (initialize -> ebay call -> finalize), starting at the step that is
+        checkpointed on the item. Every finished step is persisted, so an attempt that failed to send its state to the
+        core api is resumed at the failed step by calling `run` again.
+
+        :raises PublishingSendStateFailedException
+        :raises EbayCallBudgetExceeded: The ebay call step is resumed by calling `run` again later, after its last
+            retry the attempt fails and is finalized instead
+        """
+        while self.item.publishing_step is not None:
+            step = self.item.publishing_step
+            self._run_step(step)
+            self.item.set_publishing_step(EbayItemPublishingStep.next(step))
+
+    def _run_step(self, step):
+        """
+        :type step: unicode
+        """
+        raise NotImplementedError
+
+    def _has_call_budget_retry_left(self):
+        """
+        :return: False if the ebay call step will not be retried anymore, the attempt has to fail to be finalized
+        :rtype: bool
+        """
+        return self.item.publishing_step_retries < settings.EBAY_PUBLISHING_STEP_MAX_RETRIES
+
     def send_publishing_status_to_core_api(self, publishing_status, details=None):
         """
         :param publishing_status: see `EbayItemPublishingStatus`
@@ -260,16 +448,41 @@ class PublishingUnpublishingService(object):
         """
         core_api_state = EbayItemPublishingStatus.core_api_state(publishing_status)
         if core_api_state is not None:
+            # only consecutive repetitions of a state are suppressed, the core api keeps the last state it got
+            payload = {'state': core_api_state, 'details': details}
+            if is_redundant(PayloadFingerprintTarget.CORE_PUBLISHING_STATE, self.product.inv_id, payload):
+                return
+
             try:
                 self.user.core_api.post_product_publishing_state(self.product.inv_id, core_api_state, details=details)
             except HTTPError as e:
                 log.error(e)
                 raise PublishingSendStateFailedException()
+
+            remember_sent(PayloadFingerprintTarget.CORE_PUBLISHING_STATE, self.product.inv_id, payload)
         else:
             log.warn('Got state (%s) that cannot be mapped to core api PublishState', publishing_status)
 
 
 class PublishingService(PublishingUnpublishingService):
+    def _run_step(self, step):
+        if step == EbayItemPublishingStep.INITIALIZE:
+            self.initialize_publish_attempt()
+        elif step == EbayItemPublishingStep.EBAY_CALL:
+            try:
+                self.publish()
+            except PublishingException as e:
+                log.error("Publishing failed with ebay errors: %s", e.original_exception.errors)
+                # no retry, finalize will still be executed to finalize the failed publishing attempt
+            except EbayCallBudgetExceeded:
+                if self._has_call_budget_retry_left():
+                    raise
+                log.error("Publishing failed, no ebay call budget in %s retries", self.item.publishing_step_retries)
+                self.item.set_publishing_status(EbayItemPublishingStatus.FAILED,
+                                                details=[self.NO_CALL_BUDGET_ERROR.api_dict()])
+        elif step == EbayItemPublishingStep.FINALIZE:
+            self.finalize_publish_attempt()
+
     def initialize_publish_attempt(self):
         """
         :raises PublishingSendStateFailedException
@@ -290,11 +503,8 @@ class PublishingService(PublishingUnpublishingService):
         except EbayConnectionException as e:
             self.item.set_publishing_status(EbayItemPublishingStatus.FAILED, details=e.serialized_errors)
 
-            EbayApiAttempt.create_from_ebay_exception_for_item_and_type(
-                exception=e,
-                item=self.item,
-                type=EbayApiAttemptType.PUBLISH
-            )
+            log_api_attempt(EbayApiAttemptType.PUBLISH, request=e.response.request, response=e.response,
+                            success=False, item=self.item)
 
             raise PublishingException(e.message, original_exception=e)
 
@@ -304,11 +514,8 @@ class PublishingService(PublishingUnpublishingService):
         self.item.set_publishing_status(EbayItemPublishingStatus.PUBLISHED, save=False)
         self.item.save()
 
-        EbayApiAttempt.create_from_service_for_item_and_type(
-            service=ebay_api,
-            item=self.item,
-            type=EbayApiAttemptType.PUBLISH
-        )
+        log_api_attempt(EbayApiAttemptType.PUBLISH, request=ebay_api.api.request, response=ebay_api.api.response,
+                        success=True, item=self.item)
 
     def _add_inventory_for_click_and_collect(self):
         if not self.product.is_click_and_collect:
@@ -334,6 +541,24 @@ class PublishingService(PublishingUnpublishingService):
 
 
 class UnpublishingService(PublishingUnpublishingService):
+    def _run_step(self, step):
+        if step == EbayItemPublishingStep.INITIALIZE:
+            self.initialize_unpublish_attempt()
+        elif step == EbayItemPublishingStep.EBAY_CALL:
+            try:
+                self.unpublish()
+            except UnpublishingException as e:
+                log.error("Unpublishing failed with ebay errors: %s", e.original_exception.errors)
+                # no retry, finalize will still be executed to finalize the failed unpublishing attempt
+            except EbayCallBudgetExceeded:
+                if self._has_call_budget_retry_left():
+                    raise
+                log.error("Unpublishing failed, no ebay call budget in %s retries", self.item.publishing_step_retries)
+                self.item.set_publishing_status(EbayItemPublishingStatus.PUBLISHED,
+                                                details=[self.NO_CALL_BUDGET_ERROR.api_dict()])
+        elif step == EbayItemPublishingStep.FINALIZE:
+            self.finalize_unpublish_attempt()
+
     def initialize_unpublish_attempt(self):
         """
         :raises PublishingSendStateFailedException
@@ -351,27 +576,37 @@ class UnpublishingService(PublishingUnpublishingService):
         try:
             response = service.unpublish(self.item.external_id)
         except EbayConnectionException as e:
-            self.item.set_publishing_status(EbayItemPublishingStatus.PUBLISHED, details=e.serialized_errors)
-
-            EbayApiAttempt.create_from_ebay_exception_for_item_and_type(
-                exception=e,
-                item=self.item,
-                type=EbayApiAttemptType.UNPUBLISH
-            )
-
+            self.set_unpublishing_failed(e.serialized_errors, request=e.response.request, response=e.response)
             raise UnpublishingException(e.message, original_exception=e)
 
+        self.set_unpublished(response.end_time, request=service.api.request, response=service.api.response)
+
+    def set_unpublished(self, end_time, request, response):
+        """
+        :type end_time: datetime.datetime
+        :type request: requests.models.PreparedRequest
+        :type response: requests.models.Response
+        """
         self._delete_inventory_for_click_and_collect()
-        
-        self.item.unpublished_at = response.end_time
+
+        self.item.unpublished_at = end_time
         self.item.set_publishing_status(EbayItemPublishingStatus.UNPUBLISHED, save=False)
         self.item.save()
 
-        EbayApiAttempt.create_from_service_for_item_and_type(
-            service=service,
-            item=self.item,
-            type=EbayApiAttemptType.UNPUBLISH
-        )
+        log_api_attempt(EbayApiAttemptType.UNPUBLISH, request=request, response=response, success=True,
+                        item=self.item)
+
+    def set_unpublishing_failed(self, errors, request, response):
+        """
+        :param errors: Serialized ebay errors
+        :type errors: list[dict]
+        :type request: requests.models.PreparedRequest
+        :type response: requests.models.Response
+        """
+        self.item.set_publishing_status(EbayItemPublishingStatus.PUBLISHED, details=errors)
+
+        log_api_attempt(EbayApiAttemptType.UNPUBLISH, request=request, response=response, success=False,
+                        item=self.item)
 
     def _delete_inventory_for_click_and_collect(self):
         if not self.product.is_click_and_collect:
@@ -388,6 +623,125 @@ class UnpublishingService(PublishingUnpublishingService):
                                                 details=self.item.publishing_status_details)
 
 
+class BulkUnpublishingService(object):
+    """
+    Unpublishes many items of one account, their listings are ended in batched `EndItems` calls with up to ten
+    listings each instead of one `EndFixedPriceItem` call per item. Each item is finalized like by
+    `UnpublishingService`, which is used for the steps that are not batched.
+    """
+
+    # Reported for items that are missing in the response without any ebay error explaining why
+    NOT_ENDED_ERROR = EbayError(code=None, classification='RequestError', severity_code='Error',
+                                short_message='Listing not ended', long_message='Ebay did not end this listing.')
+
+    def __init__(self, items, user):
+        """
+        :type items: list[EbayItemModel]
+        :type user: inventorum.ebay.apps.accounts.models.EbayUserModel
+        """
+        self.user = user
+        self.services = [UnpublishingService(item, user) for item in items]
+
+    def run(self):
+        """
+        Runs the remaining steps of the attempts of all items like `UnpublishingService.run`, the ebay call step of
+        all items at once
+
+        :return: The items whose state could not be sent to the core api, `run` has to be called again for them
+        :rtype: list[EbayItemModel]
+
+        :raises EbayCallBudgetExceeded: `run` has to be called again later, the listings that have been ended are not
+            ended again
+        """
+        failed_services = []
+
+        for service in self._at_step(EbayItemPublishingStep.INITIALIZE):
+            try:
+                service.initialize_unpublish_attempt()
+            except PublishingSendStateFailedException:
+                failed_services.append(service)
+                continue
+            service.item.set_publishing_step(EbayItemPublishingStep.EBAY_CALL)
+
+        ebay_api = EbayItems(self.user.account.token.ebay_object)
+        for batch in self._get_batches(self._at_step(EbayItemPublishingStep.EBAY_CALL)):
+            self._end_batch(ebay_api, batch)
+            # checkpointed per batch, the call budget may run out before all batches are sent
+            for service in batch:
+                service.item.set_publishing_step(EbayItemPublishingStep.FINALIZE)
+
+        for service in self._at_step(EbayItemPublishingStep.FINALIZE):
+            try:
+                service.finalize_unpublish_attempt()
+            except PublishingSendStateFailedException:
+                failed_services.append(service)
+                continue
+            service.item.set_publishing_step(None)
+
+        return [service.item for service in failed_services]
+
+    def unpublish(self):
+        """
+        Ends the listings of all items without sending any state to the core api
+
+        :return: The items that could not be unpublished
+        :rtype: list[EbayItemModel]
+        """
+        return [service.item for service in self._end_items(self.services)]
+
+    def _at_step(self, step):
+        return [service for service in self.services if service.item.publishing_step == step]
+
+    def _end_items(self, services):
+        """
+        :type services: list[UnpublishingService]
+        :return: The services whose item could not be unpublished
+        :rtype: list[UnpublishingService]
+        """
+        ebay_api = EbayItems(self.user.account.token.ebay_object)
+
+        failed_services = []
+        for batch in self._get_batches(services):
+            failed_services.extend(self._end_batch(ebay_api, batch))
+        return failed_services
+
+    def _get_batches(self, services):
+        """
+        :type services: list[UnpublishingService]
+        :rtype: list[list[UnpublishingService]]
+        """
+        size = EbayItems.MAX_END_ITEMS_PER_CALL
+        return [services[i:i + size] for i in range(0, len(services), size)]
+
+    def _end_batch(self, ebay_api, services):
+        """
+        :type ebay_api: EbayItems
+        :type services: list[UnpublishingService]
+        :rtype: list[UnpublishingService]
+        """
+        try:
+            response = ebay_api.end_items([service.item.external_id for service in services])
+        except EbayConnectionException as e:
+            log.error("EndItems failed with ebay errors: %s", e.errors)
+            for service in services:
+                service.set_unpublishing_failed(e.serialized_errors, request=e.response.request, response=e.response)
+            return services
+
+        failed_services = []
+        for service in services:
+            result = response.get_result(service.item.external_id)
+            if result is not None and result.is_ended:
+                service.set_unpublished(result.end_time, request=ebay_api.api.request,
+                                        response=ebay_api.api.response)
+                continue
+
+            errors = [err.api_dict() for err in result.errors] if result is not None else []
+            service.set_unpublishing_failed(errors or [self.NOT_ENDED_ERROR.api_dict()],
+                                            request=ebay_api.api.request, response=ebay_api.api.response)
+            failed_services.append(service)
+        return failed_services
+
+
 class UpdateFailedException(EbayServiceException):
     pass
 
@@ -404,33 +758,66 @@ class UpdateService(object):
     def update(self):
         self.item_update.status = EbayItemUpdateStatus.IN_PROGRESS
 
-        ebay_api = EbayItems(self.user.account.token.ebay_object)
+        ebay_object = self.item_update.ebay_object
+        item_id = self.item_update.item.external_id
+        if is_redundant(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_id, ebay_object.dict()):
+            self.item_update.set_status(EbayItemUpdateStatus.SUCCEEDED)
+            self.update_ebay_item_model(self.item_update)
+            return
+
+        ebay_api = EbayItems(self.user.account.token.ebay_object, priority=self._get_call_priority())
 
         try:
-            response = ebay_api.revise_fixed_price_item(self.item_update.ebay_object)
+            response = ebay_api.revise_fixed_price_item(ebay_object)
         except EbayConnectionException as e:
+            forget_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_id)
             self.item_update.set_status(EbayItemUpdateStatus.FAILED, details=e.serialized_errors)
-            EbayApiAttempt.create_failed_update_attempt(self.item_update, exception=e)
+            log_api_attempt(EbayApiAttemptType.UPDATE, request=e.response.request, response=e.response,
+                            success=False, item=self.item_update.item, item_update=self.item_update)
 
             raise UpdateFailedException(e.message, original_exception=e)
 
+        remember_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_id, ebay_object.dict())
         self.item_update.set_status(EbayItemUpdateStatus.SUCCEEDED)
-        self._update_ebay_item_model()
+        self.update_ebay_item_model(self.item_update)
+
+        log_api_attempt(EbayApiAttemptType.UPDATE, request=ebay_api.api.request, response=ebay_api.api.response,
+                        success=True, item=self.item_update.item, item_update=self.item_update)
 
-        EbayApiAttempt.create_succeeded_update_attempt(item_update=self.item_update, ebay=ebay_api)
+    def _get_call_priority(self):
+        return self.get_call_priority([self.item_update])
+
+    @classmethod
+    def get_call_priority(cls, item_updates):
+        """
+        :type item_updates: list[inventorum.ebay.apps.products.models.EbayItemUpdateModel]
+        :rtype: unicode
+        """
+        # stock changes have to reach ebay before anything else to avoid overselling
+        for item_update in item_updates:
+            updates = [item_update] + list(item_update.variations.all())
+            if any(u.has_updated_quantity for u in updates):
+                return EbayCallPriority.HIGH
+        return EbayCallPriority.NORMAL
+
+    @classmethod
+    def update_ebay_item_model(cls, item_update):
+        """
+        Updates the item model after the update has been acked by ebay
 
-    def _update_ebay_item_model(self):
-        """ Updates the item model after the update has been acked by ebay """
-        ebay_item = self.item_update.item
+        :type item_update: inventorum.ebay.apps.products.models.EbayItemUpdateModel
+        """
+        ebay_item = item_update.item
 
-        if not self.item_update.has_variation_updates:
-            self._update_ebay_item_from_update_model(self.item_update, ebay_item)
+        if not item_update.has_variation_updates:
+            cls._update_ebay_item_from_update_model(item_update, ebay_item)
         else:
-            for update_variation in self.item_update.variations.all():
+            for update_variation in item_update.variations.all():
                 variation = update_variation.variation
-                self._update_ebay_item_from_update_model(update_variation, variation)
+                cls._update_ebay_item_from_update_model(update_variation, variation)
 
-    def _update_ebay_item_from_update_model(self, update_model, model):
+    @classmethod
+    def _update_ebay_item_from_update_model(cls, update_model, model):
         if update_model.has_updated_quantity:
             model.quantity = update_model.quantity
 
@@ -440,6 +827,134 @@ class UpdateService(object):
         model.save()
 
 
+class InventoryStatusUpdateService(object):
+    """
+    Revises quantity and price only updates (of listings and of variations) in batched `ReviseInventoryStatus` calls
+    with up to four inventory statuses each, instead of one `ReviseFixedPriceItem` call per update. Updates with
+    structural changes (deleted variations) are left to `UpdateService`.
+    """
+
+    # Reported for statuses that are missing in the response without any ebay error explaining why
+    NOT_REVISED_ERROR = EbayError(code=None, classification='RequestError', severity_code='Error',
+                                  short_message='Inventory status not revised',
+                                  long_message='Ebay did not revise the quantity or price of this item.')
+
+    def __init__(self, item_updates, user):
+        """
+        :type item_updates: list[inventorum.ebay.apps.products.models.EbayItemUpdateModel]
+        :type user: inventorum.ebay.apps.accounts.models.EbayUserModel
+        """
+        self.user = user
+        self.item_updates = item_updates
+
+    def update(self):
+        """
+        :return: The updates that failed
+        :rtype: list[inventorum.ebay.apps.products.models.EbayItemUpdateModel]
+
+        :raises EbayCallBudgetExceeded: The results of the batches that have been sent are stored, the updates that
+            have not been sent (completely) are left in progress
+        """
+        updates_to_send = []
+        for item_update in self.item_updates:
+            item_update.set_status(EbayItemUpdateStatus.IN_PROGRESS)
+            if not is_redundant(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_update.item.external_id,
+                                self._get_payload(item_update)):
+                updates_to_send.append(item_update)
+
+        errors_by_update = defaultdict(list)
+        budget_exceeded, unsent_updates = None, set()
+        if updates_to_send:
+            ebay_api = EbayItems(self.user.account.token.ebay_object,
+                                 priority=UpdateService.get_call_priority(updates_to_send))
+
+            batches = self._get_batches(updates_to_send)
+            for index, batch in enumerate(batches):
+                try:
+                    errors_by_batch_update = self._revise_batch(ebay_api, batch)
+                except EbayCallBudgetExceeded as e:
+                    budget_exceeded = e
+                    unsent_updates = {item_update for unsent_batch in batches[index:]
+                                      for item_update, status in unsent_batch}
+                    break
+
+                for item_update, errors in errors_by_batch_update.iteritems():
+                    errors_by_update[item_update].extend(errors)
+
+        failed_updates = []
+        for item_update in self.item_updates:
+            if item_update in unsent_updates:
+                continue
+
+            errors = errors_by_update[item_update]
+            if errors:
+                # some statuses of the update may have been revised anyway
+                forget_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_update.item.external_id)
+                item_update.set_status(EbayItemUpdateStatus.FAILED, details=errors)
+                failed_updates.append(item_update)
+            else:
+                if item_update in updates_to_send:
+                    remember_sent(PayloadFingerprintTarget.EBAY_ITEM_REVISION, item_update.item.external_id,
+                                  self._get_payload(item_update))
+                item_update.set_status(EbayItemUpdateStatus.SUCCEEDED)
+                UpdateService.update_ebay_item_model(item_update)
+
+        if budget_exceeded is not None:
+            raise budget_exceeded
+
+        return failed_updates
+
+    @staticmethod
+    def _get_payload(item_update):
+        """
+        :type item_update: inventorum.ebay.apps.products.models.EbayItemUpdateModel
+        :rtype: list[dict]
+        """
+        return [status.dict() for status in item_update.inventory_statuses]
+
+    def _get_batches(self, item_updates):
+        """
+        Splits the inventory statuses of the given updates into batches of one call each, the statuses of one update
+        end up in different batches if it changes more variations than fit into one call
+
+        :type item_updates: list[inventorum.ebay.apps.products.models.EbayItemUpdateModel]
+        :rtype: list[list[(inventorum.ebay.apps.products.models.EbayItemUpdateModel,
+            inventorum.ebay.lib.ebay.data.items.EbayInventoryStatus)]]
+        """
+        statuses = [(item_update, status) for item_update in item_updates
+                    for status in item_update.inventory_statuses]
+        size = EbayItems.MAX_INVENTORY_STATUSES_PER_CALL
+        return [statuses[i:i + size] for i in range(0, len(statuses), size)]
+
+    def _revise_batch(self, ebay_api, batch):
+        """
+        :type ebay_api: EbayItems
+        :return: Serialized errors by update of the batch, empty for updates whose statuses have all been revised
+        :rtype: collections.OrderedDict[inventorum.ebay.apps.products.models.EbayItemUpdateModel, list[dict]]
+        """
+        try:
+            response = ebay_api.revise_inventory_status([status for item_update, status in batch])
+        except EbayConnectionException as e:
+            log.error('ReviseInventoryStatus failed with ebay errors: %s', e.errors)
+            # the response still contains the statuses that have been revised
+            response = EbayReviseInventoryStatusResponse.create_from_data(e.response.dict())
+
+        call_errors = [err.api_dict() for err in response.errors if err.severity_code != 'Warning'] or \
+            [self.NOT_REVISED_ERROR.api_dict()]
+
+        errors_by_update = OrderedDict()
+        for item_update, status in batch:
+            errors = errors_by_update.setdefault(item_update, [])
+            if not response.is_revised(status) and not errors:
+                errors.extend(call_errors)
+
+        for item_update, errors in errors_by_update.iteritems():
+            log_api_attempt(EbayApiAttemptType.UPDATE, request=ebay_api.api.request, response=ebay_api.api.response,
+                            success=not errors, item=item_update.item, item_update=item_update)
+
+        return errors_by_update
+
+
 class ProductDeletionService(object):
     def __init__(self, product, user):
         """
@@ -461,3 +976,32 @@ class ProductDeletionService(object):
             service.unpublish()
 
         self.product.delete()
+
+
+class BulkProductDeletionService(object):
+    def __init__(self, products, user):
+        """
+        :type products: list[EbayProductModel]
+        :type user: inventorum.ebay.apps.accounts.models.EbayUserModel
+        """
+        self.products = products
+        self.user = user
+
+    def delete(self):
+        """
+        Unpublishes the published products in batches and deletes all products, except the ones that could not be
+        unpublished
+
+        :raises UnpublishingException
+        """
+        published_items = [product.published_item for product in self.products if product.is_published]
+        failed_items = BulkUnpublishingService(published_items, self.user).unpublish()
+
+        failed_product_ids = set(item.product_id for item in failed_items)
+        for product in self.products:
+            if product.id not in failed_product_ids:
+                product.delete()
+
+        if failed_items:
+            raise UnpublishingException("Could not unpublish {} of {} items".format(len(failed_items),
+                                                                                     len(published_items)))
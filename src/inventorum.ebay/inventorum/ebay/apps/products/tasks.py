@@ -2,11 +2,23 @@
 from __future__ import absolute_import, unicode_literals
 import logging
 
+from celery import group
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.encoding import force_text
 from inventorum.ebay.apps.accounts.models import EbayUserModel
-from inventorum.ebay.apps.products.models import EbayItemModel, EbayItemUpdateModel, EbayProductModel
+from inventorum.ebay.apps.products import EbayPublishJobStatus
+from inventorum.ebay.apps.products.attempts import prune_api_attempts
+from inventorum.ebay.apps.products.coalescing import claim_item_updates, release_item_updates
+from inventorum.ebay.apps.products.models import EbayItemModel, EbayItemUpdateModel, EbayProductModel, \
+    EbayPublishJobModel
 from inventorum.ebay.apps.products.services import PublishingService, PublishingSendStateFailedException,\
-    PublishingException, UnpublishingService, UnpublishingException, UpdateService, UpdateFailedException, \
-    ProductDeletionService
+    UnpublishingService, UpdateService, UpdateFailedException, \
+    ProductDeletionService, InventoryStatusUpdateService, BulkPublishingPreparationService, \
+    PublishingCouldNotGetDataFromCoreAPI, BulkUnpublishingService, BulkProductDeletionService
+from inventorum.ebay.lib.ebay.scheduler import EbayCallBudgetExceeded
+from inventorum.ebay.lib.queues import EbayTaskQueue, EbayTaskPriority
 
 from inventorum.util.celery import inventorum_task
 
@@ -16,8 +28,30 @@ log = logging.getLogger(__name__)
 
 # - Publishing tasks ----------------------------------------------------
 
-@inventorum_task(max_retries=5, default_retry_delay=30)
-def _initialize_ebay_item_publish(self, ebay_item_id):
+# Publishing and unpublishing run as one task, the service checkpoints every step on the item so a retry resumes at
+# the step that failed to send its state to the core api or at the ebay call that got no call budget. The retries are
+# counted per step on the item, every step is retried at most `EBAY_PUBLISHING_STEP_MAX_RETRIES` times.
+
+def _retry_publishing_step(task, ebay_item, countdown=None):
+    """
+    :type task: inventorum.util.celery.InventorumTask
+    :type ebay_item: EbayItemModel
+    :type countdown: int | None
+
+    :raises celery.exceptions.MaxRetriesExceededError: If the current step of the item has no retry left
+    """
+    if ebay_item.publishing_step_retries >= settings.EBAY_PUBLISHING_STEP_MAX_RETRIES:
+        raise task.MaxRetriesExceededError("Step {} of item {} was retried {} times"
+                                           .format(ebay_item.publishing_step, ebay_item.id,
+                                                   ebay_item.publishing_step_retries))
+
+    ebay_item.add_publishing_step_retry()
+    task.retry(countdown=countdown)
+
+
+# the total number of retries is bounded per step
+@inventorum_task(max_retries=None, default_retry_delay=30)
+def ebay_item_publish(self, ebay_item_id):
     """
     :type self: inventorum.util.celery.InventorumTask
     :type ebay_item_id: int
@@ -28,62 +62,75 @@ def _initialize_ebay_item_publish(self, ebay_item_id):
     service = PublishingService(ebay_item, user)
 
     try:
-        service.initialize_publish_attempt()
+        service.run()
     except PublishingSendStateFailedException:
-        self.retry()
+        _retry_publishing_step(self, ebay_item)
+    except EbayCallBudgetExceeded:
+        _retry_publishing_step(self, ebay_item, countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
 
 
-@inventorum_task()
-def _ebay_item_publish(self, ebay_item_id):
+def schedule_ebay_item_publish(ebay_item_id, context):
     """
-    :type self: inventorum.util.celery.InventorumTask
     :type ebay_item_id: int
+    :type context: inventorum.util.celery.TaskExecutionContext
     """
-    user = EbayUserModel.objects.get(id=self.context.user_id)
-    ebay_item = EbayItemModel.objects.get_for_publishing(id=ebay_item_id)
+    EbayItemModel.objects.filter(id=ebay_item_id).start_publishing_attempt()
+    ebay_item_publish.delay(ebay_item_id, context=context)
 
-    service = PublishingService(ebay_item, user)
 
-    try:
-        service.publish()
-    except PublishingException as e:
-        log.error("Publishing failed with ebay errors: %s", e.original_exception.errors)
-        # no retry, finalize will still be executed to finalize the failed publishing attempt
+def schedule_ebay_items_publish(ebay_item_ids, context):
+    """
+    Publishes many items in parallel, as one celery group of publishing tasks
 
+    :type ebay_item_ids: list[int]
+    :type context: inventorum.util.celery.TaskExecutionContext
 
-@inventorum_task(max_retries=5, default_retry_delay=30)
-def _finalize_ebay_item_publish(self, ebay_item_id):
-    """
-    :type self: inventorum.util.celery.InventorumTask
-    :type ebay_item_id: int
+    :rtype: celery.result.GroupResult
     """
-    user = EbayUserModel.objects.get(id=self.context.user_id)
-    ebay_item = EbayItemModel.objects.get_for_publishing(id=ebay_item_id)
+    EbayItemModel.objects.filter(id__in=ebay_item_ids).start_publishing_attempt()
+    return group(ebay_item_publish.si(ebay_item_id, context=context) for ebay_item_id in ebay_item_ids)()
 
-    service = PublishingService(ebay_item, user)
 
-    try:
-        service.finalize_publish_attempt()
-    except PublishingSendStateFailedException:
-        self.retry()
+@inventorum_task()
+def ebay_publish_job(self, publish_job_id):
+    """
+    Validates the products of the job, creates their items and publishes them
 
+    :type self: inventorum.util.celery.InventorumTask
+    :type publish_job_id: int
+    """
+    job = EbayPublishJobModel.objects.get(id=publish_job_id, account_id=self.context.account_id)
 
-def schedule_ebay_item_publish(ebay_item_id, context):
+    try:
+        user = EbayUserModel.objects.get(id=self.context.user_id)
+        service = BulkPublishingPreparationService(job.inv_product_ids, user)
+        service.prepare_publish_job(job)
+
+        item_ids = list(job.items.values_list("id", flat=True))
+        if item_ids:
+            schedule_ebay_items_publish(item_ids, context=self.context)
+    except PublishingCouldNotGetDataFromCoreAPI as e:
+        log.error("Publish job %s failed, could not get data from core api: %s", job.id, e.response)
+        return
+    except Exception as e:
+        # the job is polled until it is finished, it must not stay pending, preparing or publishing items that were
+        # never scheduled
+        job.set_status(EbayPublishJobStatus.FAILED, details={"error": force_text(e)})
+        raise
+
+
+def schedule_ebay_publish_job(publish_job_id, context):
     """
-    :type ebay_item_id: int
+    :type publish_job_id: int
     :type context: inventorum.util.celery.TaskExecutionContext
     """
-    initialize_publish = _initialize_ebay_item_publish.si(ebay_item_id, context=context)
-    publish = _ebay_item_publish.si(ebay_item_id, context=context)
-    finalize_publish = _finalize_ebay_item_publish.si(ebay_item_id, context=context)
-
-    (initialize_publish | publish | finalize_publish)()
+    ebay_publish_job.delay(publish_job_id, context=context)
 
 
 # - Unpublishing tasks --------------------------------------------------
 
-@inventorum_task(max_retries=5, default_retry_delay=30)
-def _initialize_ebay_item_unpublish(self, ebay_item_id):
+@inventorum_task(max_retries=None, default_retry_delay=30)
+def ebay_item_unpublish(self, ebay_item_id):
     """
     :type self: inventorum.util.celery.InventorumTask
     :type ebay_item_id: int
@@ -94,58 +141,57 @@ def _initialize_ebay_item_unpublish(self, ebay_item_id):
     service = UnpublishingService(ebay_item, user)
 
     try:
-        service.initialize_unpublish_attempt()
+        service.run()
     except PublishingSendStateFailedException:
-        self.retry()
+        _retry_publishing_step(self, ebay_item)
+    except EbayCallBudgetExceeded:
+        _retry_publishing_step(self, ebay_item, countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
 
 
-@inventorum_task()
-def _ebay_item_unpublish(self, ebay_item_id):
+def schedule_ebay_item_unpublish(ebay_item_id, context):
     """
-    :type self: inventorum.util.celery.InventorumTask
     :type ebay_item_id: int
-    """
-    user = EbayUserModel.objects.get(id=self.context.user_id)
-    ebay_item = EbayItemModel.objects.get_for_publishing(id=ebay_item_id)
-
-    service = UnpublishingService(ebay_item, user)
+    :type context: inventorum.util.celery.TaskExecutionContext
 
-    try:
-        service.unpublish()
-    except UnpublishingException as e:
-        log.error("Unpublishing failed with ebay errors: %s", e.original_exception.errors)
-        # no retry, finalize will still be executed to finalize the failed unpublishing attempt
+    :rtype: celery.result.AsyncResult
+    """
+    EbayItemModel.objects.filter(id=ebay_item_id).start_publishing_attempt()
+    return ebay_item_unpublish.delay(ebay_item_id, context=context)
 
 
-@inventorum_task(max_retries=5, default_retry_delay=30)
-def _finalize_ebay_item_unpublish(self, ebay_item_id):
+@inventorum_task(max_retries=10, default_retry_delay=30)
+def ebay_items_unpublish(self, ebay_item_ids):
     """
+    Unpublishes many items at once, their listings are ended in batched `EndItems` calls
+
     :type self: inventorum.util.celery.InventorumTask
-    :type ebay_item_id: int
+    :type ebay_item_ids: list[int]
     """
     user = EbayUserModel.objects.get(id=self.context.user_id)
-    ebay_item = EbayItemModel.objects.get_for_publishing(id=ebay_item_id)
+    ebay_items = list(EbayItemModel.objects.for_publishing().filter(id__in=ebay_item_ids).order_by("id"))
 
-    service = UnpublishingService(ebay_item, user)
+    service = BulkUnpublishingService(ebay_items, user)
 
+    # items that are done have no step left, a retry only runs the remaining steps of the failed ones
     try:
-        service.finalize_unpublish_attempt()
-    except PublishingSendStateFailedException:
+        failed_items = service.run()
+    except EbayCallBudgetExceeded:
+        self.retry(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+        return
+
+    if failed_items:
         self.retry()
 
 
-def schedule_ebay_item_unpublish(ebay_item_id, context):
+def schedule_ebay_items_unpublish(ebay_item_ids, context):
     """
-    :type ebay_item_id: int
+    :type ebay_item_ids: list[int]
     :type context: inventorum.util.celery.TaskExecutionContext
 
     :rtype: celery.result.AsyncResult
     """
-    initialize_unpublish = _initialize_ebay_item_unpublish.si(ebay_item_id, context=context)
-    unpublish = _ebay_item_unpublish.si(ebay_item_id, context=context)
-    finalize_unpublish = _finalize_ebay_item_unpublish.si(ebay_item_id, context=context)
-
-    return (initialize_unpublish | unpublish | finalize_unpublish)()
+    EbayItemModel.objects.filter(id__in=ebay_item_ids).start_publishing_attempt()
+    return ebay_items_unpublish.delay(ebay_item_ids, context=context)
 
 
 # - Update tasks --------------------------------------------------------
@@ -157,22 +203,119 @@ def ebay_item_update(self, ebay_item_update_id):
     :type ebay_item_update_id: int
     """
     user = EbayUserModel.objects.get(id=self.context.user_id)
-    item_update = EbayItemUpdateModel.objects.get(id=ebay_item_update_id)
+    claimed_ids, deferred_ids = claim_item_updates([ebay_item_update_id],
+                                                   in_flight_timeout=settings.EBAY_ITEM_UPDATE_IN_FLIGHT_TIMEOUT)
 
-    service = UpdateService(item_update, user=user)
+    for item_update in EbayItemUpdateModel.objects.for_revision().filter(id__in=claimed_ids):
+        service = UpdateService(item_update, user=user)
 
-    try:
-        service.update()
-    except UpdateFailedException as e:
-        log.error("Update failed with ebay errors: %s", e.original_exception.errors)
+        try:
+            service.update()
+        except UpdateFailedException as e:
+            log.error("Update failed with ebay errors: %s", e.original_exception.errors)
+        except EbayCallBudgetExceeded:
+            release_item_updates(claimed_ids)
+            self.retry(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+            return
 
+    for deferred_id in deferred_ids:
+        schedule_ebay_item_update(deferred_id, context=self.context, countdown=settings.EBAY_ITEM_UPDATE_DEFER_DELAY)
 
-def schedule_ebay_item_update(ebay_item_update_id, context):
+
+def schedule_ebay_item_update(ebay_item_update_id, context, countdown=None):
     """
     :type ebay_item_update_id: int
     :type context: inventorum.util.celery.TaskExecutionContext
+    :param countdown: Seconds until the update is revised, defaults to `EBAY_ITEM_UPDATE_DEBOUNCE`
+    :type countdown: int | None
     """
-    ebay_item_update.delay(ebay_item_update_id, context=context)
+    if countdown is None:
+        countdown = settings.EBAY_ITEM_UPDATE_DEBOUNCE
+    ebay_item_update.apply_async(args=(ebay_item_update_id,), kwargs=dict(context=context), countdown=countdown)
+
+
+@inventorum_task()
+def ebay_item_updates(self, ebay_item_update_ids):
+    """
+    Merges the pending updates of each item into one, then revises quantity and price only updates in batched
+    `ReviseInventoryStatus` calls and all other updates one by one
+
+    :type self: inventorum.util.celery.InventorumTask
+    :type ebay_item_update_ids: list[int]
+    """
+    user = EbayUserModel.objects.get(id=self.context.user_id)
+    claimed_ids, deferred_ids = claim_item_updates(ebay_item_update_ids,
+                                                   in_flight_timeout=settings.EBAY_ITEM_UPDATE_IN_FLIGHT_TIMEOUT)
+    item_updates = list(EbayItemUpdateModel.objects.for_revision().filter(id__in=claimed_ids).order_by("id"))
+
+    try:
+        _revise_item_updates(item_updates, user)
+    except EbayCallBudgetExceeded:
+        # the retry claims the released and the deferred updates again
+        release_item_updates(claimed_ids)
+        self.retry(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+        return
+
+    if deferred_ids:
+        schedule_ebay_item_updates(deferred_ids, context=self.context, countdown=settings.EBAY_ITEM_UPDATE_DEFER_DELAY)
+
+
+def _revise_item_updates(item_updates, user):
+    """
+    :type item_updates: list[inventorum.ebay.apps.products.models.EbayItemUpdateModel]
+    :type user: EbayUserModel
+
+    :raises EbayCallBudgetExceeded
+    """
+    structural_updates = [u for u in item_updates if not u.is_inventory_status_update]
+    inventory_status_updates = [u for u in item_updates if u not in structural_updates]
+
+    if inventory_status_updates:
+        service = InventoryStatusUpdateService(inventory_status_updates, user=user)
+        for failed_update in service.update():
+            log.error("Update %s failed with ebay errors: %s", failed_update.id, failed_update.status_details)
+
+    for item_update in structural_updates:
+        service = UpdateService(item_update, user=user)
+        try:
+            service.update()
+        except UpdateFailedException as e:
+            log.error("Update failed with ebay errors: %s", e.original_exception.errors)
+
+
+def schedule_ebay_item_updates(ebay_item_update_ids, context, countdown=None):
+    """
+    Updates changing quantities are revised via the stock queue ahead of all other updates, updates selling out an
+    item or one of its variations first. All other updates wait for `countdown` seconds (`EBAY_ITEM_UPDATE_DEBOUNCE`
+    by default), so that further updates of their items are merged into the same revision.
+
+    :type ebay_item_update_ids: list[int]
+    :type context: inventorum.util.celery.TaskExecutionContext
+    :type countdown: int | None
+    """
+    debounce = settings.EBAY_ITEM_UPDATE_DEBOUNCE if countdown is None else countdown
+
+    item_updates = EbayItemUpdateModel.objects.filter(id__in=ebay_item_update_ids)
+    sold_out_ids = set(item_updates.filter(Q(quantity=0) | Q(variations__quantity=0))
+                       .values_list("id", flat=True))
+    stock_ids = set(item_updates.filter(Q(quantity__isnull=False) | Q(variations__quantity__isnull=False))
+                    .values_list("id", flat=True))
+
+    sold_out_update_ids = [i for i in ebay_item_update_ids if i in sold_out_ids]
+    stock_update_ids = [i for i in ebay_item_update_ids if i in stock_ids and i not in sold_out_ids]
+    other_update_ids = [i for i in ebay_item_update_ids if i not in stock_ids]
+
+    if sold_out_update_ids:
+        # not debounced, the item must not be oversold
+        ebay_item_updates.apply_async(args=(sold_out_update_ids,), kwargs=dict(context=context),
+                                      queue=EbayTaskQueue.STOCK, priority=EbayTaskPriority.SOLD_OUT,
+                                      countdown=countdown)
+    if stock_update_ids:
+        ebay_item_updates.apply_async(args=(stock_update_ids,), kwargs=dict(context=context),
+                                      queue=EbayTaskQueue.STOCK, priority=EbayTaskPriority.NORMAL,
+                                      countdown=debounce)
+    if other_update_ids:
+        ebay_item_updates.apply_async(args=(other_update_ids,), kwargs=dict(context=context), countdown=debounce)
 
 
 @inventorum_task()
@@ -186,7 +329,10 @@ def ebay_product_deletion(self, ebay_product_id):
 
     service = ProductDeletionService(product, user=user)
     # may raise UnpublishingException in case required unpublishing failed -> this task fails as well, which is intended
-    service.delete()
+    try:
+        service.delete()
+    except EbayCallBudgetExceeded:
+        self.retry(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
 
 
 def schedule_ebay_product_deletion(ebay_product_id, context):
@@ -195,3 +341,44 @@ def schedule_ebay_product_deletion(ebay_product_id, context):
     :type context: inventorum.util.celery.TaskExecutionContext
     """
     ebay_product_deletion.delay(ebay_product_id, context=context)
+
+
+@inventorum_task()
+def ebay_products_deletion(self, ebay_product_ids):
+    """
+    :type self: inventorum.util.celery.InventorumTask
+    :type ebay_product_ids: list[int]
+    """
+    user = EbayUserModel.objects.get(id=self.context.user_id)
+    products = list(EbayProductModel.objects.filter(pk__in=ebay_product_ids, account_id=self.context.account_id)
+                    .order_by("id"))
+
+    service = BulkProductDeletionService(products, user=user)
+    # may raise UnpublishingException in case required unpublishing failed -> this task fails as well, which is intended
+    try:
+        service.delete()
+    except EbayCallBudgetExceeded:
+        # products whose listings have been ended already are only deleted by the retry
+        self.retry(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+
+
+def schedule_ebay_products_deletion(ebay_product_ids, context):
+    """
+    :type ebay_product_ids: list[int]
+    :type context: inventorum.util.celery.TaskExecutionContext
+    """
+    ebay_products_deletion.delay(ebay_product_ids, context=context)
+
+
+# - Maintenance tasks ---------------------------------------------------
+
+@inventorum_task()
+def periodic_ebay_api_attempts_pruning_task(self):
+    """
+    Deletes the logged ebay api attempts older than `EBAY_API_ATTEMPT_LOG_RETENTION`
+
+    :type self: inventorum.util.celery.InventorumTask
+    """
+    before = timezone.now() - settings.EBAY_API_ATTEMPT_LOG_RETENTION
+    deleted = prune_api_attempts(before, chunk_size=settings.EBAY_API_ATTEMPT_LOG_PRUNE_CHUNK_SIZE)
+    log.info("Deleted %s ebay api attempts logged before %s", deleted, before)
@@ -0,0 +1,103 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+from inventorum.ebay.apps.products import EbayApiAttemptType
+from inventorum.ebay.apps.products.attempts import EbayApiAttemptWriter, EbayApiAttemptEntry, prune_api_attempts
+from inventorum.ebay.apps.products.models import EbayApiAttempt, EbayApiAttemptRequest, EbayApiAttemptResponse
+from inventorum.ebay.apps.products.tests.factories import EbayItemFactory
+from inventorum.ebay.tests.testcases import UnitTestCase
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbayApiAttempts(UnitTestCase):
+
+    def setUp(self):
+        super(TestEbayApiAttempts, self).setUp()
+
+        self.item = EbayItemFactory.create()
+        # the background thread would use its own database connection
+        self.patch("inventorum.ebay.apps.products.attempts.EbayApiAttemptWriter._ensure_thread")
+
+    def _entry(self, success=True):
+        request = Mock(body=b"<AddFixedPriceItemRequest><RequesterCredentials><eBayAuthToken>secret</eBayAuthToken>"
+                            b"</RequesterCredentials><Title>Title</Title></AddFixedPriceItemRequest>",
+                       headers={"X-EBAY-API-CALL-NAME": "AddFixedPriceItem"}, url="https://api.ebay.com/ws/api.dll",
+                       method="POST")
+        response = Mock(text="<AddFixedPriceItemResponse>%s</AddFixedPriceItemResponse>" % ("<Ack>Success</Ack>" * 50),
+                        headers={}, url="https://api.ebay.com/ws/api.dll", status_code=200)
+        return EbayApiAttemptEntry(type=EbayApiAttemptType.PUBLISH, request=request, response=response,
+                                   success=success, item=self.item)
+
+    def _writer(self, **kwargs):
+        options = dict(flush_interval=60, batch_size=2, max_pending=10, success_sample_rate=1.0)
+        options.update(kwargs)
+        return EbayApiAttemptWriter(**options)
+
+    def test_bodies_are_compressed(self):
+        self._writer(flush_interval=0).log(self._entry())
+
+        attempt = EbayApiAttempt.objects.get()
+        self.assertEqual(attempt.item, self.item)
+        self.assertIn("<Title>Title</Title>", attempt.request.body)
+        self.assertNotIn("secret", attempt.request.body)
+        self.assertIn("<Ack>Success</Ack>", attempt.response.content)
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT content FROM products_ebayapiattemptresponse WHERE id = %s", [attempt.response.id])
+        stored_content = cursor.fetchone()[0]
+        self.assertTrue(stored_content.startswith("zlib:"))
+        self.assertLess(len(stored_content), len(attempt.response.content) / 4)
+
+        # attempts logged before the compression are read as they are
+        cursor.execute("UPDATE products_ebayapiattemptrequest SET body = %s WHERE id = %s",
+                       ["<Uncompressed/>", attempt.request.id])
+        self.assertEqual(EbayApiAttemptRequest.objects.get(id=attempt.request.id).body, "<Uncompressed/>")
+
+    def test_attempts_are_written_in_batches(self):
+        writer = self._writer()
+        writer.log(self._entry())
+        writer.log(self._entry(success=False))
+        writer.log(self._entry())
+        self.assertEqual(EbayApiAttempt.objects.count(), 0)
+
+        # one transaction per batch of two, requests and responses one by one, attempts at once
+        with self.assertNumQueries((2 + 4 + 1) + (2 + 2 + 1)):
+            writer.flush()
+
+        self.assertEqual([a.success for a in EbayApiAttempt.objects.order_by("id")], [True, False, True])
+
+    def test_callers_write_beyond_max_pending(self):
+        writer = self._writer(max_pending=3)
+        for _ in range(3):
+            writer.log(self._entry())
+
+        self.assertEqual(EbayApiAttempt.objects.count(), 3)
+
+    def test_successful_attempts_are_sampled(self):
+        writer = self._writer(flush_interval=0, success_sample_rate=0.1, random=Mock(return_value=0.5))
+        writer.log(self._entry())
+        writer.log(self._entry(success=False))
+
+        self.assertEqual([a.success for a in EbayApiAttempt.objects.all()], [False])
+
+    def test_pruning(self):
+        writer = self._writer(flush_interval=0)
+        for _ in range(6):
+            writer.log(self._entry())
+
+        recent_id = EbayApiAttempt.objects.order_by("id").last().id
+        EbayApiAttempt.objects.exclude(id=recent_id).update(time_added=timezone.now() - timedelta(days=31))
+
+        deleted = prune_api_attempts(before=timezone.now() - timedelta(days=30), chunk_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(EbayApiAttempt.objects.values_list("id", flat=True)), [recent_id])
+        self.assertEqual(EbayApiAttemptRequest.objects.count(), 1)
+        self.assertEqual(EbayApiAttemptResponse.objects.count(), 1)
@@ -0,0 +1,232 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from decimal import Decimal as D
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from inventorum.ebay.apps.accounts.tests.factories import EbayAccountFactory
+from inventorum.ebay.apps.core_api.models import CoreProduct, CoreProductImage, CoreInfo, CoreAccount, \
+    CoreAccountSettings, CoreAddress, CoreProductBatch
+from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayPublishJobStatus, EbayItemPublishingStep
+from inventorum.ebay.apps.products.models import EbayProductModel, EbayPublishJobModel, EbayItemModel
+from inventorum.ebay.apps.products.serializers import EbayPublishJobSerializer
+from inventorum.ebay.apps.products.services import BulkPublishingPreparationService
+from inventorum.ebay.apps.products.tasks import schedule_ebay_publish_job
+from inventorum.ebay.apps.products.tests import ProductTestMixin
+from inventorum.ebay.lib.celery import celery_test_case
+from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
+from inventorum.ebay.tests.utils import PatchMixin
+from inventorum.util.celery import TaskExecutionContext
+from mock import Mock
+from requests.exceptions import HTTPError
+
+
+log = logging.getLogger(__name__)
+
+
+class TestBulkPublish(EbayAuthenticatedAPITestCase, ProductTestMixin, PatchMixin):
+
+    def setUp(self):
+        super(TestBulkPublish, self).setUp()
+
+        self.assign_valid_shipping_services(self.account)
+
+        self.core_info = CoreInfo(account=CoreAccount(
+            country="DE", settings=CoreAccountSettings(),
+            billing_address=CoreAddress(id=1, address1="Voltastraße 5", zipcode="13355", city="Berlin", country="DE",
+                                        first_name="John", last_name="Wayne")))
+        self.get_account_info_mock = self.patch("inventorum.ebay.apps.core_api.clients.UserScopedCoreAPIClient"
+                                                ".get_account_info", return_value=self.core_info)
+        self.get_products_mock = self.patch("inventorum.ebay.apps.core_api.clients.UserScopedCoreAPIClient"
+                                            ".get_products", side_effect=self._get_core_products)
+        self.schedule_job_mock = self.patch("inventorum.ebay.apps.products.resources.schedule_ebay_publish_job")
+
+        self.core_products = {}
+
+    def _add_core_product(self, inv_id, gross_price=D("1.99")):
+        self.core_products[inv_id] = CoreProduct(id=inv_id, name="Product %s" % inv_id, gross_price=gross_price,
+                                                 quantity=10, images=[CoreProductImage(id=inv_id, url="http://image")],
+                                                 variation_count=0, variations=[], attributes=[],
+                                                 description="Description")
+
+    def _get_core_products(self, inv_ids):
+        return CoreProductBatch(products={inv_id: self.core_products[inv_id] for inv_id in inv_ids
+                                          if inv_id in self.core_products},
+                                missing_ids=[inv_id for inv_id in inv_ids if inv_id not in self.core_products])
+
+    def _create_product(self, inv_id):
+        self._add_core_product(inv_id)
+        product = EbayProductModel.objects.create(inv_id=inv_id, account=self.account)
+        self.assign_product_to_valid_category(product)
+        return product
+
+    def _run_publish_job(self, inv_ids):
+        job = BulkPublishingPreparationService(inv_ids, user=self.user).create_publish_job()
+        self.assertEqual(job.status, EbayPublishJobStatus.PENDING)
+
+        context = TaskExecutionContext(user_id=self.user.id, account_id=self.account.id, request_id=None)
+        schedule_ebay_publish_job(job.id, context=context)
+        return EbayPublishJobModel.objects.get(id=job.id)
+
+    def test_bulk_publish(self):
+        inv_ids = [1001, 1002]
+        response = self.client.post("/products/publish", data={"inv_product_ids": inv_ids}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], EbayPublishJobStatus.PENDING)
+        self.assertFalse(response.data["is_finished"])
+
+        job = EbayPublishJobModel.objects.get(id=response.data["id"])
+        self.assertEqual(job.inv_product_ids, inv_ids)
+
+        # validation is left to the worker
+        self.assertFalse(self.get_products_mock.called)
+        self.assertEqual(self.schedule_job_mock.call_count, 1)
+        self.assertEqual(self.schedule_job_mock.call_args[0][0], job.id)
+
+    def test_async_publish(self):
+        response = self.client.post("/products/1001/publish?async=true")
+        self.assertEqual(response.status_code, 202)
+
+        job = EbayPublishJobModel.objects.get(id=response.data["id"])
+        self.assertEqual(job.inv_product_ids, [1001])
+        self.assertEqual(self.schedule_job_mock.call_args[0][0], job.id)
+        self.assertFalse(self.get_products_mock.called)
+
+    @celery_test_case()
+    def test_publish_job(self):
+        schedule_items_mock = self.patch("inventorum.ebay.apps.products.tasks.schedule_ebay_items_publish")
+
+        valid_products = [self._create_product(inv_id) for inv_id in (1001, 1002, 1003)]
+        # not known in the ebay service yet, without category
+        self._add_core_product(1004)
+        self._add_core_product(1005, gross_price=D("0.50"))
+
+        job = self._run_publish_job([1001, 1004, 1002, 1005, 1006, 1003, 1001])
+
+        self.assertEqual(self.get_products_mock.call_count, 1)
+        self.assertEqual(self.get_account_info_mock.call_count, 1)
+
+        self.assertEqual(job.status, EbayPublishJobStatus.PUBLISHING)
+        items = list(job.items.order_by("id"))
+        self.assertEqual([item.product_id for item in items], [product.id for product in valid_products])
+        self.assertEqual(set(job.validation_errors.keys()), {"1004", "1005", "1006"})
+        self.assertEqual(job.validation_errors["1006"], "Product does not exist")
+        self.assertTrue(EbayProductModel.objects.filter(inv_id=1004, account=self.account).exists())
+
+        self.assertEqual(schedule_items_mock.call_count, 1)
+        self.assertEqual(sorted(schedule_items_mock.call_args[0][0]), [item.id for item in items])
+
+        # the items start at the first step with the job, before they are scheduled
+        self.assertEqual({item.publishing_step for item in items}, {EbayItemPublishingStep.INITIALIZE})
+
+        # as done by the publishing tasks
+        items[0].set_publishing_status(EbayItemPublishingStatus.PUBLISHED)
+        items[0].set_publishing_step(None)
+        items[1].set_publishing_status(EbayItemPublishingStatus.FAILED)
+        items[1].set_publishing_step(EbayItemPublishingStep.FINALIZE)
+
+        data = EbayPublishJobSerializer(job).data
+        self.assertEqual(data["progress"], {
+            EbayItemPublishingStatus.DRAFT: 1,
+            EbayItemPublishingStatus.IN_PROGRESS: 0,
+            EbayItemPublishingStatus.PUBLISHED: 1,
+            EbayItemPublishingStatus.UNPUBLISHED: 0,
+            EbayItemPublishingStatus.FAILED: 1
+        })
+        self.assertEqual(data["steps"], {
+            EbayItemPublishingStep.INITIALIZE: 1,
+            EbayItemPublishingStep.EBAY_CALL: 0,
+            EbayItemPublishingStep.FINALIZE: 1
+        })
+        self.assertFalse(data["is_finished"])
+
+        EbayItemModel.objects.update(publishing_step=None)
+        self.assertTrue(job.is_finished)
+
+    @celery_test_case()
+    def test_publish_job_without_core_api(self):
+        self.get_products_mock.side_effect = HTTPError(response=Mock(status_code=503))
+
+        job = self._run_publish_job([1001])
+        self.assertEqual(job.status, EbayPublishJobStatus.FAILED)
+        self.assertEqual(job.status_details, {"core_api_status_code": 503})
+        self.assertTrue(job.is_finished)
+
+    @celery_test_case()
+    def test_publish_job_is_not_finished_before_its_items_are_scheduled(self):
+        self._create_product(1001)
+        finished_when_scheduled = []
+
+        def schedule_items(item_ids, context):
+            finished_when_scheduled.append(EbayPublishJobModel.objects.get().is_finished)
+        self.patch("inventorum.ebay.apps.products.tasks.schedule_ebay_items_publish", side_effect=schedule_items)
+
+        job = self._run_publish_job([1001])
+        self.assertEqual(job.status, EbayPublishJobStatus.PUBLISHING)
+        self.assertEqual(finished_when_scheduled, [False])
+        self.assertFalse(job.is_finished)
+
+    @celery_test_case()
+    def test_publish_job_that_could_not_be_scheduled(self):
+        self._create_product(1001)
+        self.patch("inventorum.ebay.apps.products.tasks.schedule_ebay_items_publish",
+                   side_effect=IOError("Broker unavailable"))
+
+        with self.assertRaises(IOError):
+            self._run_publish_job([1001])
+
+        job = EbayPublishJobModel.objects.get()
+        self.assertEqual(job.status, EbayPublishJobStatus.FAILED)
+        self.assertEqual(job.status_details, {"error": "Broker unavailable"})
+        self.assertTrue(job.is_finished)
+
+    @celery_test_case()
+    def test_publish_job_with_unexpected_error(self):
+        self.get_products_mock.side_effect = ValueError("Unexpected core api payload")
+
+        with self.assertRaises(ValueError):
+            self._run_publish_job([1001])
+
+        job = EbayPublishJobModel.objects.get()
+        self.assertEqual(job.status, EbayPublishJobStatus.FAILED)
+        self.assertEqual(job.status_details, {"error": "Unexpected core api payload"})
+        self.assertTrue(job.is_finished)
+
+    def test_validation_queries_are_shared(self):
+        for inv_id in (1001, 1002, 1003):
+            self._create_product(inv_id)
+        self.patch("inventorum.ebay.apps.products.services.PublishingPreparationService.create_ebay_item")
+
+        def count_queries(inv_ids):
+            service = BulkPublishingPreparationService(inv_ids, user=self.user)
+            with CaptureQueriesContext(connection) as queries:
+                service.prepare()
+            self.assertEqual(service.errors, {})
+            return len(queries)
+
+        # content types are cached by the first run
+        count_queries([1001])
+
+        one_product = count_queries([1001])
+        two_products = count_queries([1001, 1002])
+        three_products = count_queries([1001, 1002, 1003])
+
+        # account and category lookups are only done once, only the per product validation is repeated
+        per_product = two_products - one_product
+        self.assertEqual(three_products - two_products, per_product)
+        self.assertLess(per_product, one_product)
+
+    def test_jobs_of_other_accounts(self):
+        job = EbayPublishJobModel.objects.create(account=EbayAccountFactory.create())
+
+        response = self.client.get("/products/publish/jobs/%s" % job.id)
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_requests(self):
+        response = self.client.post("/products/publish", data={"inv_product_ids": []}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/products/publish", data={"inv_product_ids": ["foo"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.get_products_mock.called)
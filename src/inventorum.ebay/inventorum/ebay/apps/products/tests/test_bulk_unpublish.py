@@ -0,0 +1,122 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayItemPublishingStep, EbayApiAttemptType
+from inventorum.ebay.apps.products.models import EbayProductModel, EbayItemModel
+from inventorum.ebay.apps.products.services import BulkUnpublishingService, BulkProductDeletionService, \
+    UnpublishingException
+from inventorum.ebay.apps.products.tasks import schedule_ebay_items_unpublish
+from inventorum.ebay.apps.products.tests.factories import EbayProductFactory, PublishedEbayItemFactory
+from inventorum.ebay.lib.celery import celery_test_case
+from inventorum.ebay.lib.ebay.simulator import EbaySimulator
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
+from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
+from inventorum.ebay.tests.utils import PatchMixin
+from inventorum.util.celery import TaskExecutionContext
+from mock import Mock
+from requests.exceptions import HTTPError
+
+
+log = logging.getLogger(__name__)
+
+
+class TestBulkUnpublish(EbayAuthenticatedAPITestCase, EbaySimulatorTestMixin, PatchMixin):
+
+    def setUp(self):
+        super(TestBulkUnpublish, self).setUp()
+        self.simulator = self.start_simulator()
+
+        self.post_state_mock = self.patch("inventorum.ebay.apps.core_api.clients.UserScopedCoreAPIClient"
+                                          ".post_product_publishing_state")
+
+    def list_item(self, external_id, listed=True):
+        product = EbayProductFactory.create(account=self.account, inv_id=int(external_id))
+        item = PublishedEbayItemFactory.create(account=self.account, product=product, external_id=external_id)
+        if listed:
+            self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name,
+                                                      'quantity': item.quantity,
+                                                      'price': unicode(item.gross_price), 'active': True}
+        return item
+
+    @celery_test_case()
+    def test_listings_are_ended_in_batches(self):
+        items = [self.list_item(unicode(5000 + i)) for i in range(11)]
+        not_listed_item = self.list_item("5100", listed=False)
+
+        context = TaskExecutionContext(user_id=self.user.id, account_id=self.account.id, request_id=None)
+        schedule_ebay_items_unpublish([i.id for i in items + [not_listed_item]], context=context)
+
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'EndItems': 2})
+
+        for item in items:
+            item = item.reload()
+            self.assertEqual(item.publishing_status, EbayItemPublishingStatus.UNPUBLISHED)
+            self.assertIsNotNone(item.unpublished_at)
+            self.assertIsNone(item.publishing_step)
+            self.assertFalse(self.simulator.items[item.external_id]['active'])
+
+            attempt = item.attempts.get()
+            self.assertEqual((attempt.type, attempt.success), (EbayApiAttemptType.UNPUBLISH, True))
+            self.assertIn("<EndItemsRequest", attempt.request.body)
+
+        not_listed_item = not_listed_item.reload()
+        self.assertEqual(not_listed_item.publishing_status, EbayItemPublishingStatus.PUBLISHED)
+        self.assertEqual(not_listed_item.publishing_status_details[0]["code"],
+                         EbaySimulator.ITEM_NOT_FOUND_ERROR_CODE)
+        self.assertIsNone(not_listed_item.publishing_step)
+        self.assertEqual([a.success for a in not_listed_item.attempts.all()], [False])
+
+        # every product got its in progress and its final state
+        self.assertEqual(self.post_state_mock.call_count, 2 * 12)
+
+    def test_items_whose_state_could_not_be_sent_are_resumed(self):
+        item = self.list_item("5200")
+        failing_item = self.list_item("5201")
+        EbayItemModel.objects.update(publishing_step=EbayItemPublishingStep.INITIALIZE)
+
+        def post_state(inv_product_id, state, details):
+            if inv_product_id == failing_item.product.inv_id:
+                raise HTTPError(response=Mock(status_code=503))
+        self.post_state_mock.side_effect = post_state
+
+        items = list(EbayItemModel.objects.order_by("id"))
+        self.assertEqual(BulkUnpublishingService(items, self.user).run(), [failing_item])
+
+        self.assertEqual(item.reload().publishing_status, EbayItemPublishingStatus.UNPUBLISHED)
+        failing_item = failing_item.reload()
+        self.assertEqual(failing_item.publishing_step, EbayItemPublishingStep.INITIALIZE)
+        self.assertTrue(self.simulator.items[failing_item.external_id]['active'])
+
+        self.post_state_mock.side_effect = None
+        self.assertEqual(BulkUnpublishingService([failing_item], self.user).run(), [])
+        self.assertEqual(failing_item.reload().publishing_status, EbayItemPublishingStatus.UNPUBLISHED)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'EndItems': 2})
+
+    def test_deletion(self):
+        items = [self.list_item("5300"), self.list_item("5301")]
+        not_listed_item = self.list_item("5302", listed=False)
+        unpublished_product = EbayProductFactory.create(account=self.account)
+
+        products = [i.product for i in items + [not_listed_item]] + [unpublished_product]
+        with self.assertRaises(UnpublishingException):
+            BulkProductDeletionService(products, user=self.user).delete()
+
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'EndItems': 1})
+        self.assertEqual(list(EbayProductModel.objects.values_list("id", flat=True)), [not_listed_item.product_id])
+        # no states are sent for products deleted in the core api
+        self.assertFalse(self.post_state_mock.called)
+
+    def test_bulk_unpublish_resource(self):
+        schedule_mock = self.patch("inventorum.ebay.apps.products.resources.schedule_ebay_items_unpublish")
+        item = self.list_item("5400")
+        EbayProductFactory.create(account=self.account, inv_id=5401)
+
+        response = self.client.post("/products/unpublish", data={"inv_product_ids": [5400, 5401, 5402]},
+                                    format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["id"] for p in response.data], [item.product.id])
+        self.assertEqual(schedule_mock.call_args[0][0], [item.id])
+
+        response = self.client.post("/products/unpublish", data={"inv_product_ids": [5401]}, format="json")
+        self.assertEqual(response.status_code, 400)
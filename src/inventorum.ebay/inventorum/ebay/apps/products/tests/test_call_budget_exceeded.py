@@ -0,0 +1,138 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from django.conf import settings
+from inventorum.ebay.apps.products import EbayItemPublishingStatus, EbayItemPublishingStep, EbayItemUpdateStatus
+from inventorum.ebay.apps.products.tasks import schedule_ebay_item_publish, ebay_item_publish, \
+    schedule_ebay_item_updates, ebay_item_updates, schedule_ebay_items_unpublish, ebay_items_unpublish
+from inventorum.ebay.apps.products.tests.factories import EbayItemFactory, PublishedEbayItemFactory, \
+    EbayItemUpdateFactory
+from inventorum.ebay.lib.celery import celery_test_case
+from inventorum.ebay.lib.ebay.scheduler import EbayCallScheduler, EbayCallBudgetExceeded
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
+from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
+from inventorum.ebay.tests.utils import PatchMixin
+from inventorum.util.celery import TaskExecutionContext
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestCallBudgetExceeded(EbayAuthenticatedAPITestCase, EbaySimulatorTestMixin, PatchMixin):
+
+    def setUp(self):
+        super(TestCallBudgetExceeded, self).setUp()
+        self.simulator = self.start_simulator()
+        self.scheduler = self.patch("inventorum.ebay.lib.ebay.get_call_scheduler",
+                                    return_value=Mock(spec=EbayCallScheduler)).return_value
+
+        self.patch("inventorum.ebay.apps.core_api.clients.UserScopedCoreAPIClient.post_product_publishing_state")
+        self.context = TaskExecutionContext(user_id=self.user.id, account_id=self.account.id, request_id=None)
+
+    def _exhaust_budget(self, calls_left=0):
+        calls = iter(range(calls_left))
+
+        def acquire(*args, **kwargs):
+            if next(calls, None) is None:
+                raise EbayCallBudgetExceeded("No budget")
+        self.scheduler.acquire.side_effect = acquire
+
+    def _refill_budget(self):
+        self.scheduler.acquire.side_effect = None
+
+    @celery_test_case()
+    def test_publish_is_retried(self):
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_item_publish.retry")
+        item = EbayItemFactory.create(account=self.account)
+        self._exhaust_budget()
+
+        schedule_ebay_item_publish(item.id, context=self.context)
+
+        retry_mock.assert_called_once_with(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+        item = item.reload()
+        self.assertEqual(item.publishing_status, EbayItemPublishingStatus.IN_PROGRESS)
+        self.assertEqual(item.publishing_step, EbayItemPublishingStep.EBAY_CALL)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {})
+
+        self._refill_budget()
+        ebay_item_publish.delay(item.id, context=self.context)
+
+        self.assertEqual(retry_mock.call_count, 1)
+        item = item.reload()
+        self.assertEqual(item.publishing_status, EbayItemPublishingStatus.PUBLISHED)
+        self.assertIsNone(item.publishing_step)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'AddFixedPriceItem': 1})
+
+    @celery_test_case()
+    def test_publish_fails_after_last_retry(self):
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_item_publish.retry")
+        item = EbayItemFactory.create(account=self.account)
+        self._exhaust_budget()
+
+        schedule_ebay_item_publish(item.id, context=self.context)
+        for _ in range(settings.EBAY_PUBLISHING_STEP_MAX_RETRIES):
+            ebay_item_publish.delay(item.id, context=self.context)
+
+        # finalized as failed instead of staying in progress at the ebay call
+        self.assertEqual(retry_mock.call_count, settings.EBAY_PUBLISHING_STEP_MAX_RETRIES)
+        item = item.reload()
+        self.assertEqual(item.publishing_status, EbayItemPublishingStatus.FAILED)
+        self.assertEqual(item.publishing_status_details[0]["short_message"], "Ebay call limit reached")
+        self.assertIsNone(item.publishing_step)
+
+    @celery_test_case()
+    def test_bulk_unpublish_is_retried(self):
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_items_unpublish.retry")
+
+        items = []
+        for i in range(11):
+            item = PublishedEbayItemFactory.create(account=self.account, external_id=unicode(4200 + i))
+            self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name, 'quantity': item.quantity,
+                                                      'price': unicode(item.gross_price), 'active': True}
+            items.append(item)
+
+        # enough budget for the first batch of ten listings
+        self._exhaust_budget(calls_left=1)
+        schedule_ebay_items_unpublish([i.id for i in items], context=self.context)
+
+        retry_mock.assert_called_once_with(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+        self.assertEqual([i.reload().publishing_step for i in items], [EbayItemPublishingStep.FINALIZE] * 10 +
+                         [EbayItemPublishingStep.EBAY_CALL])
+
+        # the ended listings are not ended again
+        self._refill_budget()
+        ebay_items_unpublish.delay([i.id for i in items], context=self.context)
+
+        self.assertEqual(retry_mock.call_count, 1)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'EndItems': 2})
+        self.assertEqual(set((i.reload().publishing_status, i.publishing_step) for i in items),
+                         {(EbayItemPublishingStatus.UNPUBLISHED, None)})
+
+    @celery_test_case()
+    def test_updates_are_retried(self):
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_item_updates.retry")
+
+        updates = []
+        for i in range(5):
+            item = PublishedEbayItemFactory.create(account=self.account, external_id=unicode(4100 + i), quantity=10)
+            self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name, 'quantity': item.quantity,
+                                                      'price': unicode(item.gross_price), 'active': True}
+            updates.append(EbayItemUpdateFactory.create(item=item, quantity=5, gross_price=None))
+
+        # enough budget for the first batch of four inventory statuses
+        self._exhaust_budget(calls_left=1)
+        schedule_ebay_item_updates([u.id for u in updates], context=self.context)
+
+        retry_mock.assert_called_once_with(countdown=settings.EBAY_CALL_SCHEDULER_RETRY_DELAY)
+        self.assertEqual([u.reload().status for u in updates], [EbayItemUpdateStatus.SUCCEEDED] * 4 +
+                         [EbayItemUpdateStatus.DRAFT])
+
+        self._refill_budget()
+        ebay_item_updates.delay([u.id for u in updates], context=self.context)
+
+        self.assertEqual(retry_mock.call_count, 1)
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'ReviseInventoryStatus': 2})
+        self.assertEqual([u.reload().status for u in updates], [EbayItemUpdateStatus.SUCCEEDED] * 5)
+        self.assertEqual(self.simulator.items[updates[-1].item.external_id]['quantity'], 5)
@@ -140,16 +140,16 @@ class UnitTestCoreAPISyncService(UnitTestCase):
         core_api = "inventorum.ebay.apps.accounts.models.EbayAccountModel.core_api"
         self.core_api_mock = self.patch(core_api, new_callable=PropertyMock(spec_set=UserScopedCoreAPIClient))
 
-        schedule_ebay_item_update = "inventorum.ebay.apps.products.tasks.schedule_ebay_item_update"
-        self.schedule_ebay_item_update_mock = self.patch(schedule_ebay_item_update)
+        schedule_ebay_item_updates = "inventorum.ebay.apps.products.tasks.schedule_ebay_item_updates"
+        self.schedule_ebay_item_updates_mock = self.patch(schedule_ebay_item_updates)
 
-        schedule_ebay_product_deletion = "inventorum.ebay.apps.products.tasks.schedule_ebay_product_deletion"
-        self.schedule_ebay_product_deletion_mock = self.patch(schedule_ebay_product_deletion)
+        schedule_ebay_products_deletion = "inventorum.ebay.apps.products.tasks.schedule_ebay_products_deletion"
+        self.schedule_ebay_products_deletion_mock = self.patch(schedule_ebay_products_deletion)
 
     def reset_mocks(self):
         self.core_api_mock.reset_mock()
-        self.schedule_ebay_item_update_mock.reset_mock()
-        self.schedule_ebay_product_deletion_mock.reset_mock()
+        self.schedule_ebay_item_updates_mock.reset_mock()
+        self.schedule_ebay_products_deletion_mock.reset_mock()
 
     def expect_modified(self, *pages):
         mock = self.core_api_mock.get_paginated_product_delta_modified
@@ -176,8 +176,8 @@ class UnitTestCoreAPISyncService(UnitTestCase):
         self.core_api_mock.get_paginated_product_delta_deleted.assert_called_once_with(
             start_date=self.account.time_added)
 
-        self.assertFalse(self.schedule_ebay_item_update_mock.called)
-        self.assertFalse(self.schedule_ebay_product_deletion_mock.called)
+        self.assertFalse(self.schedule_ebay_item_updates_mock.called)
+        self.assertFalse(self.schedule_ebay_products_deletion_mock.called)
 
         self.assertIsNotNone(self.account.last_core_api_sync)
         self.assertTrue(datetime.utcnow() - self.account.last_core_api_sync < timedelta(seconds=1))
@@ -210,8 +210,8 @@ class UnitTestCoreAPISyncService(UnitTestCase):
 
         subject.run()
 
-        self.assertFalse(self.schedule_ebay_item_update_mock.called)
-        self.assertFalse(self.schedule_ebay_product_deletion_mock.called)
+        self.assertFalse(self.schedule_ebay_item_updates_mock.called)
+        self.assertFalse(self.schedule_ebay_products_deletion_mock.called)
 
     def test_unpublished_modified_and_deleted(self):
         subject = CoreAPISyncService(account=self.account)
@@ -234,12 +234,12 @@ class UnitTestCoreAPISyncService(UnitTestCase):
 
         subject.run()
 
-        self.assertFalse(self.schedule_ebay_item_update_mock.called)
+        self.assertFalse(self.schedule_ebay_item_updates_mock.called)
 
-        self.assertEqual(self.schedule_ebay_product_deletion_mock.call_count, 3)
-
-        calls = self.schedule_ebay_product_deletion_mock.call_args_list
-        self.assertEqual([args[0] for args, kwargs in calls], [product_c.id, product_d.id, product_e.id])
+        # all deletions are scheduled at once to end the listings in batches
+        self.assertEqual(self.schedule_ebay_products_deletion_mock.call_count, 1)
+        args, kwargs = self.schedule_ebay_products_deletion_mock.call_args
+        self.assertEqual(args[0], [product_c.id, product_d.id, product_e.id])
 
     def test_published_modified_and_deleted(self):
         subject = CoreAPISyncService(account=self.account)
@@ -305,15 +305,15 @@ class UnitTestCoreAPISyncService(UnitTestCase):
         self.assertEqual(item_c_update.gross_price, D("111.11"))
         self.assertEqual(item_c_update.quantity, 22)
 
-        self.assertEqual(self.schedule_ebay_item_update_mock.call_count, 3)
-        calls = self.schedule_ebay_item_update_mock.call_args_list
-        self.assertEqual([args[0] for args, kwargs in calls], [item_a_update.id, item_b_update.id, item_c_update.id])
+        # all updates are scheduled at once to be batched
+        self.assertEqual(self.schedule_ebay_item_updates_mock.call_count, 1)
+        args, kwargs = self.schedule_ebay_item_updates_mock.call_args
+        self.assertEqual(args[0], [item_a_update.id, item_b_update.id, item_c_update.id])
 
         # assert deletions
-        self.assertEqual(self.schedule_ebay_product_deletion_mock.call_count, 2)
-
-        calls = self.schedule_ebay_product_deletion_mock.call_args_list
-        self.assertEqual([args[0] for args, kwargs in calls], [product_d.id, product_e.id])
+        self.assertEqual(self.schedule_ebay_products_deletion_mock.call_count, 1)
+        args, kwargs = self.schedule_ebay_products_deletion_mock.call_args
+        self.assertEqual(args[0], [product_d.id, product_e.id])
 
     def test_published_modified_and_deleted_variations(self):
         subject = CoreAPISyncService(account=self.account)
@@ -416,6 +416,6 @@ class UnitTestCoreAPISyncService(UnitTestCase):
         self.assertEqual(variation_e_update.quantity, 0)
         self.assertEqual(variation_e_update.is_deleted, True)
 
-        self.assertEqual(self.schedule_ebay_item_update_mock.call_count, 1)
+        self.assertEqual(self.schedule_ebay_item_updates_mock.call_count, 1)
         # assert deletions
-        self.assertEqual(self.schedule_ebay_product_deletion_mock.call_count, 0)
+        self.assertEqual(self.schedule_ebay_products_deletion_mock.call_count, 0)
@@ -0,0 +1,127 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from datetime import timedelta
+from decimal import Decimal as D
+
+from django.utils import timezone
+from inventorum.ebay.apps.products import EbayItemUpdateStatus
+from inventorum.ebay.apps.products.coalescing import claim_item_updates
+from inventorum.ebay.apps.products.models import EbayItemUpdateModel
+from inventorum.ebay.apps.products.tasks import schedule_ebay_item_updates
+from inventorum.ebay.apps.products.tests.factories import PublishedEbayItemFactory, EbayItemUpdateFactory, \
+    EbayItemVariationFactory, EbayItemVariationUpdateFactory
+from inventorum.ebay.lib.celery import celery_test_case
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
+from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
+from inventorum.util.celery import TaskExecutionContext
+
+
+log = logging.getLogger(__name__)
+
+
+class TestItemUpdateCoalescing(EbayAuthenticatedAPITestCase, EbaySimulatorTestMixin):
+
+    def setUp(self):
+        super(TestItemUpdateCoalescing, self).setUp()
+        self.simulator = self.start_simulator()
+
+    def _claim(self, item_updates, in_flight_timeout=timedelta(minutes=10)):
+        return claim_item_updates([u.id for u in item_updates], in_flight_timeout=in_flight_timeout)
+
+    def test_pending_updates_are_merged_into_the_latest(self):
+        item = PublishedEbayItemFactory.create()
+        first = EbayItemUpdateFactory.create(item=item, quantity=5, gross_price=D("2.00"))
+        second = EbayItemUpdateFactory.create(item=item, quantity=3, gross_price=None)
+        latest = EbayItemUpdateFactory.create(item=item, quantity=None, gross_price=None)
+        other_item_update = EbayItemUpdateFactory.create()
+
+        claimed_ids, deferred_ids = self._claim([first, other_item_update])
+
+        self.assertEqual(claimed_ids, [latest.id, other_item_update.id])
+        self.assertEqual(deferred_ids, [])
+
+        latest = latest.reload()
+        self.assertEqual(latest.status, EbayItemUpdateStatus.IN_PROGRESS)
+        self.assertEqual((latest.quantity, latest.gross_price), (3, D("2.00")))
+
+        for superseded in (first.reload(), second.reload()):
+            self.assertEqual(superseded.status, EbayItemUpdateStatus.SUPERSEDED)
+            self.assertEqual(superseded.superseded_by, latest)
+
+        # the tasks of the superseded updates have nothing left to claim
+        self.assertEqual(self._claim([second]), ([], []))
+
+    def test_variation_updates_are_merged(self):
+        item = PublishedEbayItemFactory.create()
+        variation_a = EbayItemVariationFactory.create(item=item)
+        variation_b = EbayItemVariationFactory.create(item=item)
+
+        first = EbayItemUpdateFactory.create(item=item, quantity=None, gross_price=None)
+        first_a = EbayItemVariationUpdateFactory.create(update_item=first, variation=variation_a, quantity=1,
+                                                        gross_price=D("3.00"))
+        first_b = EbayItemVariationUpdateFactory.create(update_item=first, variation=variation_b, quantity=2,
+                                                        gross_price=None)
+        latest = EbayItemUpdateFactory.create(item=item, quantity=None, gross_price=None)
+        latest_a = EbayItemVariationUpdateFactory.create(update_item=latest, variation=variation_a, quantity=4,
+                                                         gross_price=None)
+
+        self.assertEqual(self._claim([first]), ([latest.id], []))
+
+        self.assertEqual(set(latest.variations.all()), {latest_a, first_b})
+        latest_a = latest_a.reload()
+        self.assertEqual((latest_a.quantity, latest_a.gross_price), (4, D("3.00")))
+        self.assertEqual(first_a.reload().status, EbayItemUpdateStatus.SUPERSEDED)
+
+    def test_only_one_revision_per_item_is_in_flight(self):
+        item = PublishedEbayItemFactory.create()
+        in_flight = EbayItemUpdateFactory.create(item=item, status=EbayItemUpdateStatus.IN_PROGRESS)
+        pending = EbayItemUpdateFactory.create(item=item)
+
+        self.assertEqual(self._claim([pending]), ([], [pending.id]))
+        self.assertEqual(pending.reload().status, EbayItemUpdateStatus.DRAFT)
+
+        # e.g. the worker revising it died
+        EbayItemUpdateModel.objects.filter(id=in_flight.id) \
+            .update(time_modified=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(self._claim([pending]), ([pending.id], []))
+        self.assertEqual(in_flight.reload().superseded_by, pending)
+
+    def test_abandoned_updates_are_revised_again(self):
+        item = PublishedEbayItemFactory.create()
+        abandoned = EbayItemUpdateFactory.create(item=item, status=EbayItemUpdateStatus.IN_PROGRESS, quantity=5,
+                                                 gross_price=D("2.00"))
+        EbayItemUpdateModel.objects.filter(id=abandoned.id) \
+            .update(time_modified=timezone.now() - timedelta(minutes=11))
+        pending = EbayItemUpdateFactory.create(item=item, quantity=None, gross_price=D("3.00"))
+
+        self.assertEqual(self._claim([pending]), ([pending.id], []))
+
+        pending = pending.reload()
+        self.assertEqual((pending.quantity, pending.gross_price), (5, D("3.00")))
+        abandoned = abandoned.reload()
+        self.assertEqual(abandoned.status, EbayItemUpdateStatus.SUPERSEDED)
+        self.assertEqual(abandoned.superseded_by, pending)
+
+        # abandoned again without any later update
+        EbayItemUpdateModel.objects.filter(id=pending.id).update(time_modified=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(self._claim([pending]), ([pending.id], []))
+        self.assertEqual(pending.reload().status, EbayItemUpdateStatus.IN_PROGRESS)
+
+    @celery_test_case()
+    def test_updates_of_one_item_are_revised_once(self):
+        item = PublishedEbayItemFactory.create(account=self.account, external_id="4001", quantity=10)
+        self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name, 'quantity': item.quantity,
+                                                  'price': unicode(item.gross_price), 'active': True}
+
+        updates = [EbayItemUpdateFactory.create(item=item, quantity=quantity, gross_price=None)
+                   for quantity in (8, 6, 7)]
+
+        context = TaskExecutionContext(user_id=self.user.id, account_id=self.account.id, request_id=None)
+        schedule_ebay_item_updates([u.id for u in updates], context=context)
+
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'ReviseInventoryStatus': 1})
+        self.assertEqual(self.simulator.items[item.external_id]['quantity'], 7)
+        self.assertEqual(item.reload().quantity, 7)
+        self.assertEqual([u.reload().status for u in updates], [EbayItemUpdateStatus.SUPERSEDED] * 2 +
+                         [EbayItemUpdateStatus.SUCCEEDED])
@@ -0,0 +1,81 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from decimal import Decimal as D
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from inventorum.ebay.apps.categories.tests.factories import CategorySpecificFactory
+from inventorum.ebay.apps.products.models import EbayItemModel, EbayItemUpdateModel, EbayItemImageModel, \
+    EbayItemShippingDetails, EbayItemPaymentMethod, EbayItemSpecificModel
+from inventorum.ebay.apps.products.tests.factories import EbayItemFactory, EbayItemVariationFactory, \
+    EbayItemVariationSpecificFactory, EbayItemUpdateFactory, EbayItemVariationUpdateFactory
+from inventorum.ebay.tests.testcases import UnitTestCase
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbayItemPayloadBuilder(UnitTestCase):
+
+    def _create_item(self, variation_count):
+        item = EbayItemFactory.create()
+
+        EbayItemShippingDetails.objects.create(item=item, external_id="DE_DHLPaket", cost=D("4.50"))
+        EbayItemPaymentMethod.objects.create(item=item, external_id="PayPal")
+        EbayItemImageModel.objects.create(item=item, inv_image_id=1, url="https://image/1")
+
+        specific = CategorySpecificFactory.create(category=item.category)
+        for value in ("Test", "Test 2"):
+            EbayItemSpecificModel.objects.create(item=item, specific=specific, value=value)
+
+        for i in range(variation_count):
+            variation = EbayItemVariationFactory.create(item=item)
+            EbayItemImageModel.objects.create(variation=variation, inv_image_id=i, url="https://image/v")
+            EbayItemVariationSpecificFactory.create(variation=variation, name="size", values=["S", "M"])
+            EbayItemVariationSpecificFactory.create(variation=variation, name="color", values=["red"])
+
+        return item
+
+    def _count_queries(self, build):
+        with CaptureQueriesContext(connection) as queries:
+            build()
+        return len(queries)
+
+    def test_item_query_count_is_independent_of_variations(self):
+        small_item = self._create_item(variation_count=1)
+        big_item = self._create_item(variation_count=10)
+
+        query_count = self._count_queries(lambda: EbayItemModel.objects.get_for_publishing(id=small_item.id)
+                                          .ebay_object)
+        with self.assertNumQueries(query_count):
+            ebay_item = EbayItemModel.objects.get_for_publishing(id=big_item.id).ebay_object
+
+        # same payload as without prefetching
+        self.assertEqual(ebay_item.dict(), EbayItemModel.objects.get(id=big_item.id).ebay_object.dict())
+
+        self.assertEqual(len(ebay_item.variations), 10)
+        self.assertEqual([(s.name, s.values) for s in ebay_item.variations[0].specifics],
+                         [("size", ["S", "M"]), ("color", ["red"])])
+        self.assertEqual(ebay_item.variations[0].images[0].url, "http://image/v")
+        self.assertEqual([(s.name, s.values) for s in ebay_item.item_specifics],
+                         [(big_item.specific_values.first().specific.name,["Test", "Test 2"])])
+        self.assertEqual(ebay_item.payment_methods, ["PayPal"])
+
+    def test_update_query_count_is_independent_of_variations(self):
+        def create_update(variation_count):
+            item_update = EbayItemUpdateFactory.create(item=self._create_item(variation_count))
+            for variation in item_update.item.variations.all():
+                EbayItemVariationUpdateFactory.create(update_item=item_update, variation=variation)
+            return item_update
+
+        small_update = create_update(variation_count=1)
+        big_update = create_update(variation_count=10)
+
+        query_count = self._count_queries(lambda: EbayItemUpdateModel.objects.for_revision().get(id=small_update.id)
+                                          .ebay_object)
+        with self.assertNumQueries(query_count):
+            ebay_update = EbayItemUpdateModel.objects.for_revision().get(id=big_update.id).ebay_object
+
+        self.assertEqual(ebay_update.dict(), EbayItemUpdateModel.objects.get(id=big_update.id).ebay_object.dict())
+        self.assertEqual(len(ebay_update.variations), 10)
@@ -2,11 +2,15 @@
 from __future__ import absolute_import, unicode_literals
 import logging
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from ebaysdk.response import Response, ResponseDataObject
 from decimal import Decimal as D
 from inventorum.ebay.apps.categories.models import CategoryModel, CategoryFeaturesModel, DurationModel
 from inventorum.ebay.apps.categories.tests.factories import CategoryFactory, CategorySpecificFactory
 
+from inventorum.ebay.apps.core_api.models import CoreProduct, CoreProductImage, CoreProductAttribute, CoreInfo, \
+    CoreAccount, CoreAccountSettings, CoreAddress
 from inventorum.ebay.apps.core_api.tests import ApiTest
 from inventorum.ebay.apps.products import EbayItemPublishingStatus
 from inventorum.ebay.apps.products.models import EbayProductModel
@@ -632,3 +636,67 @@ class TestPublishingServices(EbayAuthenticatedAPITestCase, ProductTestMixin):
         self.assertIsNotNone(item.published_at)
         self.assertIsNotNone(item.ends_at)
         self.assertIsNone(item.unpublished_at)
+
+
+class TestCreateEbayItem(EbayAuthenticatedAPITestCase, ProductTestMixin):
+
+    def setUp(self):
+        super(TestCreateEbayItem, self).setUp()
+
+        self.product = EbayProductModel.objects.create(inv_id=StagingTestAccount.Products.SIMPLE_PRODUCT_ID,
+                                                       account=self.account)
+        self.assign_product_to_valid_category(self.product)
+        self.assign_valid_shipping_services(self.product)
+        EbayProductSpecificFactory.create(product=self.product,
+                                          specific=CategorySpecificFactory.create(category=self.valid_category),
+                                          value="Test")
+
+    def _get_service(self, variation_count, image_count, attributes=None):
+        if attributes is None:
+            attributes = [CoreProductAttribute(key="size", values=["S", "M"]),
+                          CoreProductAttribute(key="color", values=["red"])]
+
+        images = [CoreProductImage(id=i, url="http://image/{}".format(i)) for i in range(image_count)]
+        variations = [CoreProduct(id=1000 + i, name="Variation {}".format(i), gross_price=D("1.99"), quantity=i,
+                                  images=images, attributes=attributes)
+                      for i in range(variation_count)]
+
+        service = PublishingPreparationService(self.product, self.user)
+        service.core_product = CoreProduct(id=self.product.inv_id, name="Product", gross_price=D("1.99"), quantity=10,
+                                           images=images, variation_count=variation_count, variations=variations,
+                                           attributes=[], description="Description")
+        service.core_info = CoreInfo(account=CoreAccount(
+            country="DE", settings=CoreAccountSettings(),
+            billing_address=CoreAddress(id=1, address1="Voltastraße 5", zipcode="13355", city="Berlin", country="DE",
+                                        first_name="John", last_name="Wayne")))
+        return service
+
+    def test_query_count_is_independent_of_variations_and_images(self):
+        service = self._get_service(variation_count=1, image_count=1)
+        with CaptureQueriesContext(connection) as queries:
+            service.create_ebay_item()
+
+        service = self._get_service(variation_count=5, image_count=3)
+        with self.assertNumQueries(len(queries)):
+            item = service.create_ebay_item()
+
+        self.assertEqual(item.images.count(), 3)
+        self.assertEqual(item.shipping.count(), 2)
+        self.assertEqual(item.specific_values.count(), 1)
+        self.assertEqual(item.variations.count(), 5)
+
+        for variation in item.variations.all():
+            self.assertEqual(variation.images.count(), 3)
+            self.assertEqual({specific.name: list(specific.values.values_list("value", flat=True))
+                              for specific in variation.specifics.all()}, {"size": ["S", "M"], "color": ["red"]})
+
+    def test_values_of_attributes_with_the_same_key(self):
+        service = self._get_service(variation_count=2, image_count=0,
+                                    attributes=[CoreProductAttribute(key="size", values=["S"]),
+                                                CoreProductAttribute(key="size", values=["M", "L"])])
+        item = service.create_ebay_item()
+
+        for variation in item.variations.all():
+            self.assertEqual([(specific.name, list(specific.values.order_by("id").values_list("value", flat=True)))
+                              for specific in variation.specifics.order_by("id")],
+                             [("size", ["S"]), ("size", ["M", "L"])])
@@ -0,0 +1,168 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from inventorum.ebay.apps.accounts.tests.factories import EbayUserFactory
+from inventorum.ebay.apps.products import EbayItemPublishingStep, EbayItemPublishingStatus
+from inventorum.ebay.apps.products.models import EbayItemModel
+from inventorum.ebay.apps.products.services import PublishingService, PublishingSendStateFailedException, \
+    PublishingException
+from inventorum.ebay.apps.products.tasks import schedule_ebay_item_publish, schedule_ebay_item_unpublish, \
+    ebay_item_publish, schedule_ebay_items_publish
+from inventorum.ebay.apps.products.tests.factories import EbayItemFactory
+from inventorum.ebay.lib.celery import celery_test_case
+from inventorum.ebay.lib.ebay import EbayConnectionException
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.util.celery import TaskExecutionContext
+
+
+log = logging.getLogger(__name__)
+
+
+class TestPublishingSteps(UnitTestCase):
+
+    def setUp(self):
+        super(TestPublishingSteps, self).setUp()
+
+        self.user = EbayUserFactory.create()
+        self.item = EbayItemFactory.create(account=self.user.account)
+        self.context = TaskExecutionContext(user_id=self.user.id, account_id=self.user.account.id, request_id=None)
+
+        self.sent_states = []
+        self.failing_states = []
+        self.send_state_mock = self.patch("inventorum.ebay.apps.products.services.PublishingUnpublishingService"
+                                          ".send_publishing_status_to_core_api", autospec=True,
+                                          side_effect=self._send_state)
+
+    def _send_state(self, service, publishing_status, details=None):
+        if publishing_status in self.failing_states:
+            self.failing_states.remove(publishing_status)
+            raise PublishingSendStateFailedException()
+        self.sent_states.append(publishing_status)
+
+    def _publish(self, service):
+        service.item.set_publishing_status(EbayItemPublishingStatus.PUBLISHED)
+
+    def _reload_item(self):
+        return EbayItemModel.objects.get(id=self.item.id)
+
+    def test_step_order(self):
+        self.assertEqual(EbayItemPublishingStep.next(EbayItemPublishingStep.INITIALIZE),
+                         EbayItemPublishingStep.EBAY_CALL)
+        self.assertEqual(EbayItemPublishingStep.next(EbayItemPublishingStep.EBAY_CALL),
+                         EbayItemPublishingStep.FINALIZE)
+        self.assertIsNone(EbayItemPublishingStep.next(EbayItemPublishingStep.FINALIZE))
+
+    @celery_test_case()
+    def test_publish_runs_all_steps_in_one_task(self):
+        publish_mock = self.patch("inventorum.ebay.apps.products.services.PublishingService.publish",
+                                  autospec=True, side_effect=self._publish)
+
+        schedule_ebay_item_publish(self.item.id, context=self.context)
+
+        self.assertEqual(publish_mock.call_count, 1)
+        self.assertEqual(self.sent_states, [EbayItemPublishingStatus.IN_PROGRESS, EbayItemPublishingStatus.PUBLISHED])
+
+        item = self._reload_item()
+        self.assertEqual(item.publishing_status, EbayItemPublishingStatus.PUBLISHED)
+        self.assertIsNone(item.publishing_step)
+
+    @celery_test_case()
+    def test_publish_many_items_as_group(self):
+        publish_mock = self.patch("inventorum.ebay.apps.products.services.PublishingService.publish",
+                                  autospec=True, side_effect=self._publish)
+        items = [self.item] + EbayItemFactory.create_batch(2, account=self.user.account)
+
+        schedule_ebay_items_publish([item.id for item in items], context=self.context)
+
+        self.assertEqual(publish_mock.call_count, 3)
+        self.assertEqual(set(EbayItemModel.objects.values_list("publishing_status", "publishing_step")),
+                         {(EbayItemPublishingStatus.PUBLISHED, None)})
+
+    @celery_test_case()
+    def test_retry_resumes_at_failed_step(self):
+        publish_mock = self.patch("inventorum.ebay.apps.products.services.PublishingService.publish",
+                                  autospec=True, side_effect=self._publish)
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_item_publish.retry")
+        self.failing_states = [EbayItemPublishingStatus.PUBLISHED]
+
+        schedule_ebay_item_publish(self.item.id, context=self.context)
+        self.assertEqual(retry_mock.call_count, 1)
+        item = self._reload_item()
+        self.assertEqual((item.publishing_step, item.publishing_step_retries), (EbayItemPublishingStep.FINALIZE, 1))
+
+        # the retried task only repeats the finalize step, ebay is called once
+        ebay_item_publish.delay(self.item.id, context=self.context)
+        self.assertEqual(retry_mock.call_count, 1)
+        self.assertEqual(publish_mock.call_count, 1)
+        self.assertEqual(self.sent_states, [EbayItemPublishingStatus.IN_PROGRESS, EbayItemPublishingStatus.PUBLISHED])
+        self.assertIsNone(self._reload_item().publishing_step)
+
+    @celery_test_case()
+    def test_retries_are_limited_per_step(self):
+        self.patch("inventorum.ebay.apps.products.services.PublishingService.publish", autospec=True,
+                   side_effect=self._publish)
+        retry_mock = self.patch("inventorum.ebay.apps.products.tasks.ebay_item_publish.retry")
+
+        # the retries of the initialize step do not count for the finalize step
+        self.failing_states = [EbayItemPublishingStatus.IN_PROGRESS] * 5 + [EbayItemPublishingStatus.PUBLISHED] * 6
+        schedule_ebay_item_publish(self.item.id, context=self.context)
+        for _ in range(9):
+            ebay_item_publish.delay(self.item.id, context=self.context)
+        self.assertEqual(retry_mock.call_count, 10)
+
+        item = self._reload_item()
+        self.assertEqual((item.publishing_step, item.publishing_step_retries), (EbayItemPublishingStep.FINALIZE, 5))
+        with self.assertRaises(ebay_item_publish.MaxRetriesExceededError):
+            ebay_item_publish.delay(self.item.id, context=self.context)
+        self.assertEqual(retry_mock.call_count, 10)
+
+    def test_failed_state_post_is_checkpointed(self):
+        self.patch("inventorum.ebay.apps.products.services.PublishingService.publish", autospec=True,
+                   side_effect=self._publish)
+        self.failing_states = [EbayItemPublishingStatus.IN_PROGRESS]
+        self.item.set_publishing_step(EbayItemPublishingStep.INITIALIZE)
+
+        service = PublishingService(self.item, self.user)
+        self.assertRaises(PublishingSendStateFailedException, service.run)
+        self.assertEqual(self._reload_item().publishing_step, EbayItemPublishingStep.INITIALIZE)
+
+        self.failing_states = [EbayItemPublishingStatus.PUBLISHED]
+        self.assertRaises(PublishingSendStateFailedException, service.run)
+        self.assertEqual(self._reload_item().publishing_step, EbayItemPublishingStep.FINALIZE)
+
+        service.run()
+        self.assertIsNone(self._reload_item().publishing_step)
+
+        # finished attempts are not run again
+        service.run()
+        self.assertEqual(self.sent_states, [EbayItemPublishingStatus.IN_PROGRESS, EbayItemPublishingStatus.PUBLISHED])
+
+    @celery_test_case()
+    def test_failed_ebay_call_is_finalized(self):
+        def failing_publish(service):
+            service.item.set_publishing_status(EbayItemPublishingStatus.FAILED)
+            raise PublishingException(original_exception=EbayConnectionException("Failed", response=None))
+
+        self.patch("inventorum.ebay.apps.products.services.PublishingService.publish", autospec=True,
+                   side_effect=failing_publish)
+
+        schedule_ebay_item_publish(self.item.id, context=self.context)
+
+        self.assertEqual(self.sent_states, [EbayItemPublishingStatus.IN_PROGRESS, EbayItemPublishingStatus.FAILED])
+        self.assertIsNone(self._reload_item().publishing_step)
+
+    @celery_test_case()
+    def test_unpublish(self):
+        def unpublish(service):
+            service.item.set_publishing_status(EbayItemPublishingStatus.UNPUBLISHED)
+
+        unpublish_mock = self.patch("inventorum.ebay.apps.products.services.UnpublishingService.unpublish",
+                                    autospec=True, side_effect=unpublish)
+
+        schedule_ebay_item_unpublish(self.item.id, context=self.context)
+
+        self.assertEqual(unpublish_mock.call_count, 1)
+        self.assertEqual(self.sent_states, [EbayItemPublishingStatus.IN_PROGRESS,
+                                            EbayItemPublishingStatus.UNPUBLISHED])
+        self.assertIsNone(self._reload_item().publishing_step)
@@ -0,0 +1,126 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from celery import Celery
+from django.conf import settings
+from inventorum.ebay.apps.accounts.tests.factories import EbayUserFactory
+from inventorum.ebay.apps.products.tasks import schedule_ebay_item_updates
+from inventorum.ebay.apps.products.tests.factories import EbayItemUpdateFactory, EbayItemVariationUpdateFactory, \
+    EbayItemVariationFactory
+from inventorum.ebay.celery import app as celery_app
+from inventorum.ebay.lib.ebay.metrics import InMemoryMetricsSink
+from inventorum.ebay.lib.queues import EbayTaskQueue, EbayTaskPriority, EbayQueueMetric, stamp_published_at, \
+    record_queue_latency, record_queue_depths, PUBLISHED_AT_HEADER
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.util.celery import TaskExecutionContext
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestTaskQueues(UnitTestCase):
+
+    def setUp(self):
+        super(TestTaskQueues, self).setUp()
+
+        self.sink = InMemoryMetricsSink()
+        self.patch('inventorum.ebay.lib.ebay.metrics.get_metrics_sink', return_value=self.sink)
+        self.time_mock = self.patch('inventorum.ebay.lib.queues.time')
+
+    def _recorded(self, metric):
+        return {verb: (histogram.count, histogram.total)
+                for (verb, site_id, account, m), histogram in self.sink.histograms().iteritems() if m == metric}
+
+    def test_routes(self):
+        expected_queues = {
+            'inventorum.ebay.apps.products.tasks.ebay_item_publish': EbayTaskQueue.PUBLISH,
+            'inventorum.ebay.apps.products.tasks.ebay_publish_job': EbayTaskQueue.PUBLISH,
+            'inventorum.ebay.apps.products.tasks.ebay_item_unpublish': EbayTaskQueue.PUBLISH,
+            'inventorum.ebay.apps.products.tasks.ebay_items_unpublish': EbayTaskQueue.PUBLISH,
+            'inventorum.ebay.apps.products.tasks.ebay_item_updates': EbayTaskQueue.UPDATES,
+            'inventorum.ebay.apps.products.tasks.ebay_product_deletion': EbayTaskQueue.UPDATES,
+            'inventorum.ebay.apps.products.tasks.ebay_products_deletion': EbayTaskQueue.UPDATES,
+            'inventorum.ebay.apps.orders.tasks.periodic_ebay_orders_sync_task': EbayTaskQueue.ORDERS,
+            'inventorum.ebay.apps.orders.tasks.core_order_creation_task': EbayTaskQueue.ORDERS,
+            'inventorum.ebay.apps.unknown.tasks.task': EbayTaskQueue.DEFAULT
+        }
+
+        router = celery_app.amqp.Router()
+        for task_name, queue in expected_queues.iteritems():
+            route = router.route({}, task_name, (), {})['queue']
+            self.assertEqual(route.name, queue, task_name)
+            # every queue has its own binding, messages must not end up in other queues
+            self.assertEqual((route.exchange.name, route.routing_key), (queue, queue))
+
+        self.assertEqual(set(q.name for q in settings.CELERY_QUEUES), set(EbayTaskQueue.ALL))
+
+    def test_stock_updates_are_prioritized(self):
+        apply_async_mock = self.patch('inventorum.ebay.apps.products.tasks.ebay_item_updates.apply_async')
+
+        user = EbayUserFactory.create()
+        context = TaskExecutionContext(user_id=user.id, account_id=user.account.id, request_id=None)
+
+        price_update = EbayItemUpdateFactory.create(quantity=None)
+        stock_update = EbayItemUpdateFactory.create(quantity=5)
+        sold_out_update = EbayItemUpdateFactory.create(quantity=0)
+        sold_out_variation_update = EbayItemUpdateFactory.create(quantity=None, gross_price=None)
+        variation = EbayItemVariationFactory.create(item=sold_out_variation_update.item)
+        EbayItemVariationUpdateFactory.create(update_item=sold_out_variation_update, variation=variation, quantity=0)
+
+        update_ids = [price_update.id, sold_out_variation_update.id, stock_update.id, sold_out_update.id]
+        schedule_ebay_item_updates(update_ids, context=context)
+
+        self.assertEqual(apply_async_mock.call_count, 3)
+        sold_out_call, stock_call, price_call = [kwargs for args, kwargs in apply_async_mock.call_args_list]
+        self.assertEqual(sold_out_call["args"], ([sold_out_variation_update.id, sold_out_update.id],))
+        self.assertEqual(sold_out_call["priority"], EbayTaskPriority.SOLD_OUT)
+        self.assertEqual(stock_call["args"], ([stock_update.id],))
+        self.assertEqual(stock_call["priority"], EbayTaskPriority.NORMAL)
+        self.assertEqual({sold_out_call["queue"], stock_call["queue"]}, {EbayTaskQueue.STOCK})
+        self.assertEqual(stock_call["kwargs"], {"context": context})
+
+        self.assertEqual(price_call["args"], ([price_update.id],))
+        self.assertNotIn("queue", price_call)
+
+        # only updates selling out items are revised without waiting for further updates of their items
+        self.assertIsNone(sold_out_call["countdown"])
+        self.assertEqual([stock_call["countdown"], price_call["countdown"]], [settings.EBAY_ITEM_UPDATE_DEBOUNCE] * 2)
+
+    def test_queue_latency(self):
+        self.time_mock.time.return_value = 100.0
+        headers = {}
+        stamp_published_at(body={'eta': None}, headers=headers)
+        self.assertEqual(headers, {PUBLISHED_AT_HEADER: 100.0})
+
+        delayed_headers = {}
+        stamp_published_at(body={'eta': '2015-06-01T12:00:00'}, headers=delayed_headers)
+        self.assertEqual(delayed_headers, {})
+
+        self.time_mock.time.return_value = 102.5
+        task = Mock(request=Mock(headers=headers, delivery_info={'routing_key': EbayTaskQueue.STOCK}))
+        record_queue_latency(task=task)
+
+        # eager tasks have neither headers nor delivery info
+        record_queue_latency(task=Mock(request=Mock(headers=None, delivery_info=None)))
+
+        self.assertEqual(self._recorded(EbayQueueMetric.LATENCY), {EbayTaskQueue.STOCK: (1, 2.5)})
+
+    def test_queue_depths(self):
+        app = Celery(broker='memory://', set_as_current=False)
+        app.conf.CELERY_QUEUES = settings.CELERY_QUEUES
+
+        with app.producer_or_acquire() as producer:
+            for _ in range(2):
+                producer.publish({}, routing_key=EbayTaskQueue.STOCK, exchange=EbayTaskQueue.STOCK,
+                                 declare=[app.amqp.queues[EbayTaskQueue.STOCK]])
+
+        depths = record_queue_depths(app)
+        self.assertEqual(depths.keys(), list(EbayTaskQueue.ALL))
+        self.assertEqual(depths[EbayTaskQueue.STOCK], (2, 0))
+        self.assertEqual(depths[EbayTaskQueue.PUBLISH], (0, 0))
+
+        recorded = self._recorded(EbayQueueMetric.DEPTH)
+        self.assertEqual(recorded[EbayTaskQueue.STOCK], (1, 2))
+        self.assertEqual(len(recorded), len(EbayTaskQueue.ALL))
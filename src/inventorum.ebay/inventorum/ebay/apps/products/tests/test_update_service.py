@@ -4,9 +4,13 @@ from decimal import Decimal as D
 import logging
 from inventorum.ebay.apps.core_api.tests import ApiTest, MockedTest
 from inventorum.ebay.apps.products import EbayItemUpdateStatus
-from inventorum.ebay.apps.products.services import UpdateService, UpdateFailedException
+from inventorum.ebay.apps.products.models import EbayItemUpdateModel
+from inventorum.ebay.apps.products.services import UpdateService, UpdateFailedException, \
+    InventoryStatusUpdateService
 from inventorum.ebay.apps.products.tests.factories import EbayProductFactory, PublishedEbayItemFactory, \
     EbayItemUpdateFactory, EbayItemVariationUpdateFactory, EbayItemVariationFactory, EbayItemVariationSpecificFactory
+from inventorum.ebay.lib.ebay.simulator import EbaySimulator
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
 from inventorum.ebay.tests.testcases import EbayAuthenticatedAPITestCase
 
 from ebaysdk.response import Response as EbayResponse, ResponseDataObject
@@ -201,4 +205,83 @@ class IntegrationTestUpdateService(EbayAuthenticatedAPITestCase):
             self.assertEqual(variation_obj_first.quantity, 22)
 
             variation_obj_last = self.published_item.variations.last()
-            self.assertEqual(variation_obj_last.quantity, 0)
\ No newline at end of file
+            self.assertEqual(variation_obj_last.quantity, 0)
+
+
+class TestInventoryStatusUpdateService(EbayAuthenticatedAPITestCase, EbaySimulatorTestMixin):
+
+    def setUp(self):
+        super(TestInventoryStatusUpdateService, self).setUp()
+        self.simulator = self.start_simulator()
+
+    def list_item(self, **kwargs):
+        item = PublishedEbayItemFactory.create(account=self.account, **kwargs)
+        self.simulator.items[item.external_id] = {'sku': item.sku, 'title': item.name, 'quantity': item.quantity,
+                                                  'price': unicode(item.gross_price), 'active': True}
+        return item
+
+    def test_updates_are_batched(self):
+        item_a = self.list_item(external_id="2001", quantity=10)
+        item_b = self.list_item(external_id="2002", gross_price=D("1.99"))
+        item_c = self.list_item(external_id="2003")
+        variation_a = EbayItemVariationFactory.create(item=item_c, quantity=1)
+        variation_b = EbayItemVariationFactory.create(item=item_c, quantity=2)
+
+        update_a = EbayItemUpdateFactory.create(item=item_a, quantity=5, gross_price=None)
+        update_b = EbayItemUpdateFactory.create(item=item_b, quantity=None, gross_price=D("2.50"))
+        update_c = EbayItemUpdateFactory.create(item=item_c, quantity=None, gross_price=None)
+        EbayItemVariationUpdateFactory.create(update_item=update_c, variation=variation_a, quantity=3,
+                                              gross_price=None)
+        EbayItemVariationUpdateFactory.create(update_item=update_c, variation=variation_b, quantity=4,
+                                              gross_price=None)
+        # not listed on ebay (anymore)
+        update_d = EbayItemUpdateFactory.create(item=PublishedEbayItemFactory.create(external_id="2004"), quantity=1)
+
+        updates = list(EbayItemUpdateModel.objects.for_revision()
+                       .filter(id__in=[update_a.id, update_b.id, update_c.id, update_d.id]).order_by("id"))
+        # the statuses are built from the prefetched variations
+        with self.assertNumQueries(0):
+            for update in updates:
+                update.inventory_statuses
+
+        subject = InventoryStatusUpdateService(updates, user=self.user)
+        failed_updates = subject.update()
+
+        # five statuses in two calls instead of four ReviseFixedPriceItem calls
+        self.assertEqual(self.simulator.stats.calls_by_verb, {'ReviseInventoryStatus': 2})
+        self.assertEqual(failed_updates, [update_d])
+
+        for update in (update_a, update_b, update_c):
+            update = update.reload()
+            self.assertEqual(update.status, EbayItemUpdateStatus.SUCCEEDED)
+            self.assertEqual([a.success for a in update.attempts.all()], [True])
+            self.assertIn("<ReviseInventoryStatusRequest", update.attempts.first().request.body)
+
+        self.assertEqual(item_a.reload().quantity, 5)
+        self.assertEqual(item_b.reload().gross_price, D("2.50"))
+        self.assertEqual(variation_a.reload().quantity, 3)
+        self.assertEqual(variation_b.reload().quantity, 4)
+        self.assertEqual(self.simulator.items["2003"]["variations"][variation_b.sku], {"quantity": 4})
+
+        update_d = update_d.reload()
+        self.assertEqual(update_d.status, EbayItemUpdateStatus.FAILED)
+        self.assertEqual(update_d.status_details[0]["code"], EbaySimulator.ITEM_NOT_FOUND_ERROR_CODE)
+        self.assertEqual([a.success for a in update_d.attempts.all()], [False])
+
+    def test_failed_call(self):
+        update = EbayItemUpdateFactory.create(item=PublishedEbayItemFactory.create(external_id="2004"), quantity=1)
+
+        failed_updates = InventoryStatusUpdateService([update], user=self.user).update()
+
+        self.assertEqual(failed_updates, [update])
+        self.assertEqual(update.reload().status, EbayItemUpdateStatus.FAILED)
+        self.assertEqual(update.attempts.count(), 1)
+
+    def test_structural_updates_are_not_inventory_status_updates(self):
+        item = self.list_item(external_id="2005")
+        update = EbayItemUpdateFactory.create(item=item)
+        self.assertTrue(update.is_inventory_status_update)
+
+        EbayItemVariationUpdateFactory.create(update_item=update, is_deleted=True,
+                                              variation=EbayItemVariationFactory.create(item=item))
+        self.assertFalse(update.is_inventory_status_update)
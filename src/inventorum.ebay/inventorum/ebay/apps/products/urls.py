@@ -11,4 +11,7 @@ urlpatterns = patterns('',
     url(r'^(?P<inv_product_id>[0-9]+$)', resources.EbayProductResource.as_view(), name='categories'),
     url(r'^(?P<inv_product_id>[0-9]+)/publish$', resources.PublishResource.as_view(), name='publish'),
     url(r'^(?P<inv_product_id>[0-9]+)/unpublish$', resources.UnpublishResource.as_view(), name='unpublish'),
+    url(r'^publish$', resources.BulkPublishResource.as_view(), name='bulk_publish'),
+    url(r'^publish/jobs/(?P<job_id>[0-9]+)$', resources.PublishJobResource.as_view(), name='publish_job'),
+    url(r'^unpublish$', resources.BulkUnpublishResource.as_view(), name='bulk_unpublish'),
 )
@@ -2,6 +2,7 @@
 from __future__ import absolute_import, unicode_literals
 from collections import defaultdict
 from django.utils.translation import ugettext
+from inventorum.ebay.apps.categories.rules import get_category_specifics_rules
 from rest_framework import serializers
 
 
@@ -24,6 +25,8 @@ class CategorySpecificsValidator(object):
         self.specifics = specifics
         self.errors = []
 
+        self.rules = get_category_specifics_rules(category.id)
+
     def validate(self, raise_exception=False):
         self._validate_specific_values_if_max_values_are_ok()
         self._validate_specific_values_if_min_values_are_ok()
@@ -37,10 +40,9 @@ class CategorySpecificsValidator(object):
         for sv in self.specifics:
             specific_values_ids_count[sv.pk] += 1
 
-        required_ones = dict(self.category.specifics.required().values_list('id', 'min_values'))
-
         missing_ids = []
-        for specific_id, min_value in required_ones.iteritems():
+        for specific_id, rule in self.rules.required.iteritems():
+            min_value = rule.min_values
             send_value = specific_values_ids_count.get(specific_id, None)
             if not send_value or send_value < min_value:
                 missing_ids.append(specific_id)
@@ -55,10 +57,9 @@ class CategorySpecificsValidator(object):
         for sv in self.specifics:
             specific_values_ids_count[sv.pk] += 1
 
-        max_values = dict(self.category.specifics.required().values_list('id', 'max_values'))
-
         too_many_values_ids = []
-        for specific_id, max_value in max_values.iteritems():
+        for specific_id, rule in self.rules.required.iteritems():
+            max_value = rule.max_values
             send_value = specific_values_ids_count.get(specific_id, None)
             if send_value and send_value > max_value:
                 too_many_values_ids.append(specific_id)
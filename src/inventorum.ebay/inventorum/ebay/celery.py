@@ -4,7 +4,9 @@ import logging
 import os
 
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun
 from django.conf import settings
+from inventorum.ebay.lib.queues import stamp_published_at, record_queue_latency
 
 
 log = logging.getLogger(__name__)
@@ -17,3 +19,7 @@ app = Celery('ebay')
 
 app.config_from_object('django.conf:settings')
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+# measures the latency of every queue, see `inventorum.ebay.lib.queues`
+before_task_publish.connect(stamp_published_at)
+task_prerun.connect(record_queue_latency)
@@ -0,0 +1,150 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+log = logging.getLogger(__name__)
+
+
+class CacheStats(object):
+    COUNTERS = ('hits', 'misses', 'expired', 'invalidated', 'evicted')
+
+    def __init__(self):
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        """
+        return {counter: getattr(self, counter) for counter in self.COUNTERS}
+
+
+class CacheEntry(object):
+
+    def __init__(self, value, expires_at):
+        """
+        :type expires_at: float
+        """
+        self.value = value
+        self.expires_at = expires_at
+
+
+class ExpiringLRUCache(object):
+    """
+    Entries expiring after their ttl, the least recently used entries are evicted once `max_size` is reached. Base of
+    the process-wide caches, which guard it with their own lock as they have more state to guard along with it.
+
+    Every invalidation of a key starts a new generation of the key: values that were fetched before the invalidation
+    may be outdated and are not cached.
+
+    Counts hits, expired, invalidated and evicted entries in `stats`, misses are counted by the owning cache.
+    """
+
+    def __init__(self, max_size, clock=time.time, stats=None):
+        """
+        :param max_size: Maximum number of entries
+        :param stats: Stats of the owning cache, e.g. with further counters
+
+        :type max_size: int
+        :type stats: CacheStats | None
+        """
+        self.max_size = max_size
+        self.clock = clock
+        self.stats = stats or CacheStats()
+
+        self._entries = OrderedDict()
+        # key -> number of invalidations
+        self._generations = {}
+
+    def get(self, key, is_valid=None):
+        """
+        :param is_valid: Checks the cached value beyond its ttl, invalid values are dropped
+
+        :type is_valid: (object) -> bool
+        :return: The cached value or None if there is no valid one
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= self.clock():
+            self.stats.expired += 1
+            return None
+
+        if is_valid is not None and not is_valid(entry.value):
+            return None
+
+        # re-insert as most recently used
+        self._entries[key] = entry
+        self.stats.hits += 1
+        return entry.value
+
+    def set(self, key, value, ttl, generation=None):
+        """
+        :param generation: Generation of the key when the value was fetched, see `generation`
+
+        :type ttl: int | float
+        :type generation: int | None
+        :return: False if the value was not cached as the key was invalidated since the given generation
+        :rtype: bool
+        """
+        if generation is not None and generation != self.generation(key):
+            return False
+
+        self._entries.pop(key, None)
+        self._entries[key] = CacheEntry(value=value, expires_at=self.clock() + ttl)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evicted += 1
+        return True
+
+    def generation(self, key):
+        """
+        :rtype: int
+        """
+        return self._generations.get(key, 0)
+
+    def invalidate(self, key):
+        self._generations[key] = self.generation(key) + 1
+        if self._entries.pop(key, None) is not None:
+            self.stats.invalidated += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ProcessWideInstance(object):
+    """
+    Instance shared by all threads of the process, created on first use so that it is configured with the settings
+    at that time
+    """
+
+    def __init__(self, factory):
+        """
+        :type factory: () -> object
+        """
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def reset(self):
+        """
+        Drops the instance, the next `get` creates a new one with the current settings
+        """
+        with self._lock:
+            self._instance = None
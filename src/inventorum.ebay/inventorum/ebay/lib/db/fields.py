@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+import base64
 import logging
+import zlib
 
 from django.db import models
+from django.utils import six
 
 
 log = logging.getLogger(__name__)
@@ -12,3 +15,34 @@ class MoneyField(models.DecimalField):
 
     def __init__(self, max_digits=10, decimal_places=2, **kwargs):
         super(MoneyField, self).__init__(max_digits=max_digits, decimal_places=decimal_places, **kwargs)
+
+
+class CompressedTextField(six.with_metaclass(models.SubfieldBase, models.TextField)):
+    """
+    Text stored zlib compressed and base64 encoded, values that were stored uncompressed are read as they are
+    """
+    PREFIX = 'zlib:'
+
+    def __init__(self, compression_level=6, **kwargs):
+        self.compression_level = compression_level
+        super(CompressedTextField, self).__init__(**kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(CompressedTextField, self).deconstruct()
+        if self.compression_level != 6:
+            kwargs['compression_level'] = self.compression_level
+        return name, path, args, kwargs
+
+    def to_python(self, value):
+        if isinstance(value, six.string_types) and value.startswith(self.PREFIX):
+            compressed = base64.b64decode(value[len(self.PREFIX):])
+            return zlib.decompress(compressed).decode('utf-8')
+        return value
+
+    def get_prep_value(self, value):
+        value = super(CompressedTextField, self).get_prep_value(value)
+        if value is None:
+            return None
+
+        compressed = zlib.compress(six.text_type(value).encode('utf-8'), self.compression_level)
+        return self.PREFIX + base64.b64encode(compressed).decode('ascii')
@@ -1,15 +1,24 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
 
+import Queue
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from django.utils.datetime_safe import datetime
 from ebaysdk.exception import ConnectionError
 from ebaysdk.trading import Connection as TradingConnection
 
 from django.conf import settings
-from ebaysdk.parallel import Parallel
+from requests.exceptions import RequestException
 from rest_framework import serializers
+from inventorum.ebay.lib.ebay.cache import get_response_cache
 from inventorum.ebay.lib.ebay.data.errors import EbayError
+from inventorum.ebay.lib.ebay.metrics import EbayCallMetric, InstrumentedConnectionMixin, record_call_metrics
+from inventorum.ebay.lib.ebay.pool import get_session_pool
+from inventorum.ebay.lib.ebay.scheduler import get_call_scheduler, EbayCallPriority
+from inventorum.ebay.lib.ebay.streaming import EbayStreamingParser, EbayStreamedResponse
 from inventorum.ebay.lib.rest.serializers import POPOSerializer
 
 log = logging.getLogger(__name__)
@@ -76,8 +85,14 @@ class Ebay(object):
     api = None
     _token = None
     default_site_id = 77
+    # Priority of calls in the shared call budget, see `inventorum.ebay.lib.ebay.scheduler`
+    default_priority = EbayCallPriority.NORMAL
+    # Bytes read at once from streamed responses
+    stream_chunk_size = 64 * 1024
+
+    def __init__(self, token=None, default_site_id=None, connection_kwargs=None, priority=None):
+        self.priority = priority or self.default_priority
 
-    def __init__(self, token=None, default_site_id=None, connection_kwargs=None):
         connection_kwargs = connection_kwargs or {}
         if 'config_file' not in connection_kwargs:
             connection_kwargs.update(dict(config_file=None))
@@ -116,105 +131,398 @@ class Ebay(object):
     def site_id(self, new_value):
         self.api.config.set('siteid', new_value, force=True)
 
-    def execute(self, verb, data=None):
+    def execute(self, verb, data=None, stream_tag=None):
         """
         :param verb: Type of a API request
         :param data: Data that will be converted to XML and send to ebay
+        :param stream_tag: Name of a repeated element (e.g. `Category`), if given the response is parsed incrementally
+            and a generator of these elements is returned instead of the whole response
         :return: Response from ebay
 
         :type verb: str | unicode
         :type data: dict
-        :rtype: dict
+        :type stream_tag: unicode | None
+        :rtype: dict | collections.Iterable[dict]
         """
         self._append_additional_params_to_data(data)
+
+        if stream_tag is not None:
+            return self._execute_streaming(verb, data, stream_tag)
+
+        response_cache = get_response_cache()
+        token_value = self.api.config.get('token')
+        cached_response = response_cache.get(verb, data, self.site_id, token_value)
+        if cached_response is not None:
+            log.debug('Serving %s from response cache', verb)
+            return cached_response
+
+        with self._leased_session(verb) as session:
+            self.api.session = session
+            try:
+                response = self.api.execute(verb=verb, data=data)
+            finally:
+                self._record_call_metrics(verb, self.api)
+
+        execution = EbayResponse(response)
+        response_dict = execution.dict()
+
+        response_cache.observe(self.site_id, response_dict)
+        response_cache.set(verb, data, self.site_id, response_dict, token_value)
+
+        return response_dict
+
+    def _execute_streaming(self, verb, data, stream_tag):
+        """
+        Like `execute`, but the raw body is parsed while it is downloaded, so huge responses (e.g. the whole category
+        tree) never have to be held in memory. The call is only sent once the generator is iterated.
+
+        :rtype: collections.Iterable[dict]
+        """
+        with self._leased_session(verb) as session:
+            started_at = time.time()
+            self.api.build_request(verb, data, None)
+            build_time = time.time() - started_at
+
+            started_at = time.time()
+            response = session.send(self.api.request, stream=True, verify=True, proxies=self.api.proxies,
+                                    timeout=self.api.timeout, allow_redirects=True)
+            # network and parsing are interleaved, time spent waiting for elements outside is not measured
+            network_time = parse_time = 0.0
+            response_bytes = 0
+            try:
+                response.raise_for_status()
+
+                parser = EbayStreamingParser(stream_tag, getattr(self.api, 'base_list_nodes', None))
+                for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+                    network_time += time.time() - started_at
+                    response_bytes += len(chunk)
+
+                    started_at = time.time()
+                    elements = parser.feed(chunk)
+                    parse_time += time.time() - started_at
+
+                    for element in elements:
+                        yield element
+                    started_at = time.time()
+                network_time += time.time() - started_at
+
+                started_at = time.time()
+                elements = parser.close()
+                parse_time += time.time() - started_at
+
+                for element in elements:
+                    yield element
+            finally:
+                response.close()
+
+            record_call_metrics(verb, self.site_id, self.api.config.get('token'), {
+                EbayCallMetric.BUILD_TIME: build_time,
+                EbayCallMetric.NETWORK_TIME: network_time,
+                EbayCallMetric.RESPONSE_BYTES: response_bytes,
+                EbayCallMetric.PARSE_TIME: parse_time
+            })
+
+            if parser.failed:
+                raise ConnectionError('{}: streamed response failed'.format(verb),
+                                      EbayStreamedResponse(response, parser.response_dict))
+
+        get_response_cache().observe(self.site_id, parser.response_dict)
+
+    @contextmanager
+    def _leased_session(self, verb):
+        """
+        Waits for the call budget and leases a keep-alive session for exactly one call
+
+        :type verb: str | unicode
+        :rtype: requests.Session
+        """
+        call_scheduler = get_call_scheduler()
+        call_scheduler.acquire(settings.EBAY_APPID, self.api.config.get('token'), self.priority)
+
+        session_pool = get_session_pool()
+        lease = session_pool.lease(self.api.config.get('domain'), self.site_id)
         try:
-            response = self.api.execute(verb=verb, data=data)
+            yield lease.session
         except ConnectionError as e:
             log.error('Got ebay error: %s', e)
-            raise EbayConnectionException(e.message, e.response)
+            exception = EbayConnectionException(e.message, e.response)
+            if call_scheduler.is_throttling_error(exception.errors):
+                call_scheduler.report_throttled(settings.EBAY_APPID, self.api.config.get('token'))
+            raise exception
+        except RequestException:
+            lease.broken = True
+            raise
+        finally:
+            session_pool.release(lease)
+            log.debug('Executed %s with %s session (reuse ratio: %.2f)', verb,
+                      'reused' if lease.reused else 'new', session_pool.stats.reuse_ratio)
+
+    @contextmanager
+    def timed_deserialization(self, verb):
+        """
+        Measures the deserialization of a response into data objects, e.g.
+        `with self.timed_deserialization('GetOrders'): return GetOrdersResponseType.Deserializer(...).build(compiled=True)`
 
-        execution = EbayResponse(response)
+        :type verb: str | unicode
+        """
+        started_at = time.time()
+        yield
+        record_call_metrics(verb, self.site_id, self.api.config.get('token'),
+                            {EbayCallMetric.DESERIALIZATION_TIME: time.time() - started_at})
+
+    def _record_call_metrics(self, verb, api):
+        """
+        Records the values measured by an instrumented connection for its last call
 
-        return execution.dict()
+        :type verb: str | unicode
+        :type api: ebaysdk.connection.BaseConnection
+        """
+        call_metrics = getattr(api, 'call_metrics', None)
+        if call_metrics:
+            record_call_metrics(verb, self.site_id, self.api.config.get('token'), call_metrics)
 
     def _append_additional_params_to_data(self, data):
         pass
 
 
+class EbayTradingConnection(InstrumentedConnectionMixin, TradingConnection):
+    pass
+
+
 class EbayTrading(Ebay):
     # The newest version from Ebay Trading for 31 March 2015
     compatibility = 911
     version = 911
     timeout = 20
-    default_connection_cls = TradingConnection
+    default_connection_cls = EbayTradingConnection
 
-    def __init__(self, token=None, default_site_id=None, parallel=None):
+    def __init__(self, token=None, default_site_id=None, parallel=None, priority=None):
         connection_kwargs = dict(appid=settings.EBAY_APPID, devid=settings.EBAY_DEVID,
                                  certid=settings.EBAY_CERTID, domain=settings.EBAY_DOMAIN,
-                                 debug=settings.DEBUG, timeout=self.timeout,
+                                 https=settings.EBAY_HTTPS, debug=settings.DEBUG, timeout=self.timeout,
                                  compatibility=self.compatibility,
                                  version=self.version, parallel=parallel)
-        super(EbayTrading, self).__init__(token, default_site_id, connection_kwargs=connection_kwargs)
+        super(EbayTrading, self).__init__(token, default_site_id, connection_kwargs=connection_kwargs,
+                                          priority=priority)
 
     def _append_additional_params_to_data(self, data):
         if self._token:
             data['ErrorLanguage'] = self._token.error_language or "en_US"
 
 
+class EbayRetryPolicy(object):
+    """
+    Decides whether a failed call of `EbayParallel` is sent again: network errors, throttling and internal errors of
+    ebay are usually gone a moment later, errors in the request itself are not.
+    """
+    # http://developer.ebay.com/devzone/xml/docs/Reference/ebay/Errors/ErrorMessages.htm
+    RETRYABLE_ERROR_CODES = (518, 10007)
+
+    def __init__(self, max_attempts=1, backoff=1.0, retryable_error_codes=None):
+        """
+        :param max_attempts: Maximum number of times a call is sent, including the first one
+        :param backoff: Seconds waited before the first retry, doubled for every further retry
+
+        :type max_attempts: int
+        :type backoff: float
+        :type retryable_error_codes: collections.Iterable[int] | None
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.retryable_error_codes = tuple(retryable_error_codes or self.RETRYABLE_ERROR_CODES)
+
+    def should_retry(self, attempt, exception):
+        """
+        :type attempt: int
+        :type exception: Exception
+        :rtype: bool
+        """
+        if attempt >= self.max_attempts:
+            return False
+
+        if isinstance(exception, RequestException):
+            return True
+
+        if isinstance(exception, EbayConnectionException):
+            return any(e.code in self.retryable_error_codes for e in exception.errors or [])
+
+        return False
+
+    def delay(self, attempt):
+        """
+        :return: Seconds to wait before the call is sent again after the given attempt
+        :type attempt: int
+        :rtype: float
+        """
+        return self.backoff * 2 ** (attempt - 1)
+
+
+class EbayParallelResult(object):
+    """ Outcome of one call of `EbayParallel`, either the response of ebay or the reason the call failed """
+
+    def __init__(self, index, verb, response=None, exception=None, attempts=1):
+        """
+        :param index: Position of the call in the order the calls were queued
+
+        :type index: int
+        :type verb: unicode
+        :type response: dict | None
+        :type exception: Exception | None
+        :type attempts: int
+        """
+        self.index = index
+        self.verb = verb
+        self.response = response
+        self.exception = exception
+        self.attempts = attempts
+
+    @property
+    def succeeded(self):
+        return self.exception is None
+
+    @property
+    def errors(self):
+        """
+        :return: Errors ebay answered a failed call with, empty if the call succeeded or never reached ebay
+        :rtype: list[EbayError]
+        """
+        return getattr(self.exception, 'errors', None) or []
+
+    def dict(self):
+        """
+        :return: Response of the call, the exception is raised if the call failed
+        :rtype: dict
+        """
+        if self.exception is not None:
+            raise self.exception
+        return self.response
+
+
 class EbayParallel(EbayTrading):
-    executions = None
-    parallel = None
+    """
+    Sends any number of calls concurrently, with at most `max_in_flight` of them in flight at once:
+
+        parallel = EbayParallel(token)
+        for category_id in category_ids:
+            parallel.execute('GetCategoryFeatures', dict(CategoryID=category_id))
+
+        for result in parallel:
+            # results are yielded as the calls complete, `wait()` returns them in the order they were queued
+            ...
 
-    def __init__(self, *args, **kwargs):
-        self.executions = []
-        self.parallel = kwargs.get('parallel')
-        if not self.parallel:
-            self.parallel = Parallel()
-            kwargs['parallel'] = self.parallel
+    Every call is executed by its own `EbayTrading` connection, so it waits for the call budget, uses the session
+    pool and is measured like any other call.
+    """
 
-        self.parallel_api_constructor = lambda: EbayTrading(*args, **kwargs)
-        super(EbayParallel, self).__init__(*args, **kwargs)
+    def __init__(self, token=None, default_site_id=None, priority=None, max_in_flight=None, retry_policy=None):
+        """
+        :type max_in_flight: int | None
+        :type retry_policy: EbayRetryPolicy | None
+        """
+        super(EbayParallel, self).__init__(token, default_site_id, priority=priority)
 
-    def execute(self, verb, data=None):
+        self.max_in_flight = max_in_flight or settings.EBAY_PARALLEL_MAX_IN_FLIGHT
+        self.retry_policy = retry_policy or EbayRetryPolicy(**settings.EBAY_PARALLEL_RETRY_POLICY)
+        self._queued_calls = []
+
+    def execute(self, verb, data=None, timeout=None):
         """
-        Add to stack call to ebay api, to execute, you need to call `wait()`
+        Queues a call to the ebay api, it is sent once the results are iterated or `wait()` is called
         :param verb: Type of a API request
         :param data: Data that will be converted to XML and send to ebay
-        :return: Will be validated only after you call `wait()`
+        :param timeout: Seconds to wait for the response of this call, defaults to `timeout` of the class
+        :return: Index of the call in the results of `wait()`
 
         :type verb: str | unicode
         :type data: dict
-        :rtype: Connection
+        :type timeout: int | float | None
+        :rtype: int
         """
-        self._append_additional_params_to_data(data)
-        api = self.parallel_api_constructor().api
-        api.execute(verb=verb, data=data)
+        index = len(self._queued_calls)
+        self._queued_calls.append((index, verb, data if data is not None else {}, timeout or self.timeout))
+        return index
 
-        self.executions.append(api)
+    def __iter__(self):
+        """
+        Sends all queued calls and yields their results as they complete
+        :rtype: collections.Iterator[EbayParallelResult]
+        """
+        calls, self._queued_calls = self._queued_calls, []
+        if not calls:
+            return
+
+        pending = Queue.Queue()
+        for call in calls:
+            pending.put(call)
+
+        results = Queue.Queue()
+        stopped = threading.Event()
+
+        for _ in range(min(self.max_in_flight, len(calls))):
+            worker = threading.Thread(target=self._work, args=(pending, results, stopped))
+            worker.daemon = True
+            worker.start()
 
-        return api
+        try:
+            for _ in range(len(calls)):
+                yield results.get()
+        finally:
+            # the caller may stop iterating early, calls that were not sent yet are dropped then
+            stopped.set()
 
     def wait(self):
         """
-        Executes all requests to ebay api at once.
-        :return: List of EbayResponses
-        :rtype: [EbayResponse]
+        Sends all queued calls and waits until all of them completed
+        :return: Results in the order the calls were queued
+        :rtype: list[EbayParallelResult]
         """
-        self.parallel.wait(self.timeout)
-        return [EbayResponse(a.response) for a in self.executions]
+        return sorted(self, key=lambda result: result.index)
 
     def wait_and_validate(self):
         """
-        Executes all requests to ebay api at once and validates results.
+        Like `wait()`, but the exception of the first failed call is raised
         Throws EbayExceptions!
-        :return: List of EbayResponses
-        :rtype: [EbayResponse]
+        :rtype: list[EbayParallelResult]
         """
-        rt = self.wait()
+        results = self.wait()
+
+        failed = [result for result in results if not result.succeeded]
+        if failed:
+            log.error('%d of %d parallel calls failed, first error: %s', len(failed), len(results),
+                      failed[0].exception)
+            raise failed[0].exception
+
+        return results
 
-        if self.parallel.error():
-            err = self.parallel.error()
-            log.error('Got error when getting something in parallel: %s', err)
-            raise EbayConnectionException(err, None)
+    def _work(self, pending, results, stopped):
+        while not stopped.is_set():
+            try:
+                index, verb, data, timeout = pending.get_nowait()
+            except Queue.Empty:
+                return
+            results.put(self._execute_call(index, verb, data, timeout))
 
-        return rt
+    def _execute_call(self, index, verb, data, timeout):
+        """
+        :rtype: EbayParallelResult
+        """
+        ebay = EbayTrading(self.token, self.default_site_id, priority=self.priority)
+        ebay.site_id = self.site_id
+        ebay.api.timeout = timeout
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = ebay.execute(verb, data)
+                return EbayParallelResult(index, verb, response=response, attempts=attempt)
+            except (EbayConnectionException, RequestException) as e:
+                if not self.retry_policy.should_retry(attempt, e):
+                    return EbayParallelResult(index, verb, exception=e, attempts=attempt)
+
+                delay = self.retry_policy.delay(attempt)
+                log.warn('Parallel %s call failed (attempt %d), retrying in %.1fs: %s', verb, attempt, delay, e)
+                time.sleep(delay)
+            except Exception as e:
+                log.exception('Unexpected error in parallel %s call', verb)
+                return EbayParallelResult(index, verb, exception=e, attempts=attempt)
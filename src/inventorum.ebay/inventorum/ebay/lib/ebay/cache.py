@@ -0,0 +1,157 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from inventorum.ebay.lib.cache import CacheStats, ExpiringLRUCache, ProcessWideInstance
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayResponseCacheStats(CacheStats):
+    COUNTERS = CacheStats.COUNTERS + ('outdated',)
+
+
+class EbayResponseCache(object):
+    """
+    Process-wide read-through cache for idempotent ebay calls returning data that rarely changes (site details,
+    category features and specifics, user data).
+
+    Responses are cached per verb, normalized request and site id for the ttl of their verb, only verbs with a ttl
+    are cached at all. The least recently used entries are evicted once `max_size` is reached.
+
+    Every response carrying a `CategoryVersion` (e.g. `GetCategories`) updates the known category version of its
+    site, responses of category bound verbs that were cached for another version are not served anymore.
+    """
+
+    # Responses of these verbs depend on the user of the token, not only on the site
+    TOKEN_SCOPED_VERBS = ('GetUser',)
+    # Responses of these verbs describe the category tree and are outdated with every new `CategoryVersion`
+    CATEGORY_BOUND_VERBS = ('GetCategoryFeatures', 'GetCategorySpecifics')
+
+    def __init__(self, max_size, ttls, clock=time.time):
+        """
+        :param max_size: Maximum number of cached responses
+        :param ttls: Seconds a response is cached by verb
+
+        :type max_size: int
+        :type ttls: dict[unicode, int | float]
+        """
+        self.max_size = max_size
+        self.ttls = ttls
+
+        self.stats = EbayResponseCacheStats()
+
+        self._lock = threading.Lock()
+        # key -> (response, category version of the site when the response was cached)
+        self._entries = ExpiringLRUCache(max_size=max_size, clock=clock, stats=self.stats)
+        self._category_versions = {}
+
+    def is_cacheable(self, verb):
+        """
+        :type verb: unicode
+        :rtype: bool
+        """
+        return self.max_size > 0 and bool(self.ttls.get(verb))
+
+    def get(self, verb, data, site_id, token_value=None):
+        """
+        :type verb: unicode
+        :type data: dict | None
+        :type site_id: int
+        :type token_value: unicode | None
+        :return: Copy of the cached response or None if there is no valid one
+        :rtype: dict | None
+        """
+        if not self.is_cacheable(verb):
+            return None
+
+        def is_valid(entry):
+            response, category_version = entry
+            if verb in self.CATEGORY_BOUND_VERBS and \
+                    category_version != self._category_versions.get(site_id, category_version):
+                self.stats.outdated += 1
+                return False
+            return True
+
+        key = self._make_key(verb, data, site_id, token_value)
+        with self._lock:
+            entry = self._entries.get(key, is_valid=is_valid)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+        response, category_version = entry
+        return copy.deepcopy(response)
+
+    def set(self, verb, data, site_id, response, token_value=None):
+        """
+        :type verb: unicode
+        :type data: dict | None
+        :type site_id: int
+        :type response: dict
+        :type token_value: unicode | None
+        """
+        if not self.is_cacheable(verb):
+            return
+
+        key = self._make_key(verb, data, site_id, token_value)
+        with self._lock:
+            entry = (copy.deepcopy(response), self._category_versions.get(site_id))
+            self._entries.set(key, entry, self.ttls[verb])
+
+    def observe(self, site_id, response):
+        """
+        Takes the category version of any ebay response into account
+
+        :type site_id: int
+        :type response: dict
+        """
+        category_version = response.get('CategoryVersion') if isinstance(response, dict) else None
+        if category_version is None:
+            return
+
+        with self._lock:
+            known_version = self._category_versions.get(site_id)
+            if known_version != category_version:
+                if known_version is not None:
+                    log.info('Ebay category version of site %s changed from %s to %s',
+                             site_id, known_version, category_version)
+                self._category_versions[site_id] = category_version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._category_versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _make_key(self, verb, data, site_id, token_value):
+        normalized_request = json.dumps(data or {}, sort_keys=True, default=unicode)
+        token_hash = None
+        if verb in self.TOKEN_SCOPED_VERBS and token_value:
+            token_hash = hashlib.sha1(token_value.encode('utf-8')).hexdigest()
+        return verb, site_id, token_hash, normalized_request
+
+
+def _create_response_cache():
+    return EbayResponseCache(max_size=settings.EBAY_RESPONSE_CACHE_MAX_SIZE,
+                             ttls=settings.EBAY_RESPONSE_CACHE_TTLS)
+
+
+_response_cache = ProcessWideInstance(_create_response_cache)
+
+
+def get_response_cache():
+    """
+    :return: The process-wide response cache configured via the `EBAY_RESPONSE_CACHE_*` settings
+    :rtype: EbayResponseCache
+    """
+    return _response_cache.get()
@@ -6,12 +6,15 @@ from inventorum.ebay.lib.ebay import EbayTrading, EbayParallel
 from inventorum.ebay.lib.ebay.data.categories import EbayCategorySerializer, EbayCategory
 from inventorum.ebay.lib.ebay.data.categories.features import EbayFeature
 from inventorum.ebay.lib.ebay.data.categories.specifics import EbayCategorySpecifics
+from inventorum.ebay.lib.ebay.scheduler import EbayCallPriority
 
 
 log = logging.getLogger(__name__)
 
 
 class EbayCategories(EbayTrading):
+    # scraping must not use up the call budget needed for listings
+    default_priority = EbayCallPriority.LOW
     parallel_api = None
 
     def __init__(self, *args, **kwargs):
@@ -37,11 +40,17 @@ class EbayCategories(EbayTrading):
             data['LevelLimit'] = level_limit
 
         log.debug('Sending request to ebay categories: %s', data)
-        response = self.execute('GetCategories', data)
+        # It is so much data I dont want to store in memory here, thats why the response is streamed
+        for category in self.execute('GetCategories', data, stream_tag='Category'):
+            yield EbayCategory.create_from_data(category, compiled=True)
 
-        for category in response['CategoryArray']['Category']:
-            # It is so much data I dont want to store in memory here, thats why we return generator
-            yield EbayCategory.create_from_data(category)
+    def get_category_version(self):
+        """
+        Returns the version of the category tree of the site, without requesting the tree itself
+        :rtype: unicode | None
+        """
+        response = self.execute('GetCategories', dict(LevelLimit=1))
+        return response.get('CategoryVersion')
 
     def get_features_for_category(self, category_id):
         data = self.execute('GetCategoryFeatures', dict(
@@ -55,14 +64,24 @@ class EbayCategories(EbayTrading):
             # eBay returns just the requested feature settings for the specified category, regardless of the
             # site defaults.
         ))
-        return EbayFeature.create_from_data(data)
+        with self.timed_deserialization('GetCategoryFeatures'):
+            return EbayFeature.create_from_data(data)
 
     def get_features_for_categories(self, categories_ids):
         """
         Returns features per category
         :param categories_ids:
-        :return: List of feature per category
-        :rtype: [inventorum.ebay.lib.ebay.data.EbayFeature]
+        :return: Feature per category id
+        :rtype: dict[unicode, inventorum.ebay.lib.ebay.data.categories.features.EbayFeature]
+        """
+        return {feature.details.category_id: feature for feature in self.iter_features_for_categories(categories_ids)}
+
+    def iter_features_for_categories(self, categories_ids):
+        """
+        Requests the features of all categories concurrently and yields them as the responses arrive, so they can be
+        stored while the remaining calls are still in flight
+        :return: Generator of features, not in the order of the given ids
+        :rtype: collections.Iterable[inventorum.ebay.lib.ebay.data.categories.features.EbayFeature]
         """
         for category_id in categories_ids:
             self.parallel_api.execute('GetCategoryFeatures', dict(
@@ -71,21 +90,18 @@ class EbayCategories(EbayTrading):
                 CategoryID=category_id,
                 LevelLimit=7,
                 DetailLevel='ReturnAll',
-                FeatureID=['ListingDurations', 'PaymentMethods', 'ItemSpecificsEnabled']
+                FeatureID=['ListingDurations', 'PaymentMethods', 'ItemSpecificsEnabled', 'VariationsEnabled']
                 # If you input specific category features with FeatureID fields and set DetailLevel to ReturnAll,
                 # eBay returns just the requested feature settings for the specified category, regardless of the
                 # site defaults.
             ))
 
-        category_features = self.parallel_api.wait_and_validate()
-        features = {}
-        for i, response in enumerate(category_features):
-            data = response.response.dict()
-            feature = EbayFeature.create_from_data(data)
-            log.debug('Parsing %d category: %s', i, data)
-            features[feature.details.category_id] = feature
-
-        return features
+        for result in self.parallel_api:
+            data = result.dict()
+            with self.timed_deserialization('GetCategoryFeatures'):
+                feature = EbayFeature.create_from_data(data)
+            log.debug('Parsing %d category: %s', result.index, data)
+            yield feature
 
     def get_specifics_for_categories(self, categories_ids):
         """
@@ -94,15 +110,14 @@ class EbayCategories(EbayTrading):
         :return: List of specifics per category
         :rtype: dict[unicode, inventorum.ebay.lib.ebay.data.EbayFeature]
         """
-        response = self.execute('GetCategorySpecifics', dict(
+        category_specifics = self.execute('GetCategorySpecifics', dict(
             AllFeaturesForCategory=True,
             ViewAllNodes=True,
             CategoryID=categories_ids,
             LevelLimit=7,
             DetailLevel='ReturnAll',
-        ))
+        ), stream_tag='Recommendations')
 
-        category_specifics = response['Recommendations']
         specifics = {}
         for i, data in enumerate(category_specifics):
             specific = EbayCategorySpecifics.create_from_data(data)
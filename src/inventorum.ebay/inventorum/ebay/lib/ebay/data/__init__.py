@@ -5,6 +5,7 @@ from decimal import Decimal
 import re
 from django.utils.datetime_safe import datetime
 from inventorum.ebay.lib.rest.fields import MoneyField
+from inventorum.ebay.lib.rest.serializers import compile_deserializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -139,14 +140,21 @@ class EbayArrayField(serializers.Field):
         super(EbayArrayField, self).__init__(*args, **kwargs)
 
     def to_internal_value(self, data):
+        return [self.item_deserializer(data=data).build() for data in self._get_item_data(data)]
+
+    def compiled_to_internal_value(self, data):
+        """ Used instead of `to_internal_value` by compiled deserializers, builds the items compiled as well """
+        deserializer = compile_deserializer(self.item_deserializer)
+        return [deserializer.build(data) for data in self._get_item_data(data)]
+
+    def _get_item_data(self, data):
         if self.item_key not in data:
             raise ValidationError("item_key `%s` not found" % self.item_key)
 
         item_data = data[self.item_key]
         if isinstance(item_data, dict):
             item_data = [item_data]
-
-        return [self.item_deserializer(data=data).build() for data in item_data]
+        return item_data
 
 
 class EbayAmountField(MoneyField):
@@ -40,16 +40,18 @@ class EbayCategory(object):
         return not self.expired
 
     @classmethod
-    def create_from_data(cls, data):
+    def create_from_data(cls, data, compiled=False):
         """
         Create Ebay category from json data
         :param data:
+        :param compiled: Deserialize with the compiled fast path, e.g. for the whole category tree
         :return: EbayCategory
         :rtype: EbayCategory
         :type data: dict
+        :type compiled: bool
         """
         serializer = EbayCategorySerializer(data=data)
-        return serializer.build()
+        return serializer.build(compiled=compiled)
 
 
 class EbayCategorySerializer(POPOSerializer):
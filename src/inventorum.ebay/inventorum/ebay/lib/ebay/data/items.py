@@ -1,7 +1,8 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
 from collections import defaultdict
-from inventorum.ebay.lib.ebay.data import EbayParser
+from inventorum.ebay.lib.ebay.data import EbayParser, EbayListSerializer
+from inventorum.ebay.lib.ebay.data.errors import EbayError
 from inventorum.ebay.lib.rest.serializers import POPOSerializer
 from inventorum.ebay.lib.utils import int_or_none
 from rest_framework import fields
@@ -264,6 +265,89 @@ class EbayEndItemResponseDeserializer(POPOSerializer):
         model = EbayEndItemResponse
 
 
+class EbayEndItemResult(object):
+    """
+    Result of ending one listing with `EndItems`
+    """
+
+    def __init__(self, correlation_id, end_time=None, errors=None):
+        """
+        :param correlation_id: The `MessageID` of the request container, i.e. the item id
+        :type correlation_id: unicode
+        :type end_time: datetime.datetime | None
+        :type errors: list[EbayError]
+        """
+        self.correlation_id = correlation_id
+        self.end_time = end_time
+        self.errors = errors or []
+
+    @property
+    def is_ended(self):
+        return self.end_time is not None and not any(e.severity_code == 'Error' for e in self.errors)
+
+    @classmethod
+    def create_from_data(cls, data):
+        """
+        :rtype: EbayEndItemResult
+        """
+        result = EbayEndItemResultDeserializer(data=data).build()
+
+        errors = data.get('Errors') or []
+        if not isinstance(errors, list):
+            errors = [errors]
+        result.errors = [EbayError.create_from_data(e) for e in errors]
+
+        return result
+
+
+class EbayEndItemResultDeserializer(POPOSerializer):
+    CorrelationID = fields.CharField(source='correlation_id')
+    EndTime = fields.DateTimeField(source='end_time', required=False)
+
+    class Meta:
+        model = EbayEndItemResult
+
+
+class EbayEndItemsResponse(object):
+
+    def __init__(self, results=None, errors=None):
+        """
+        :param results: One result per ended listing, errors of single listings are reported in their result
+        :param errors: Errors and warnings of the whole call
+
+        :type results: list[EbayEndItemResult]
+        :type errors: list[EbayError]
+        """
+        self.results = results or []
+        self.errors = errors or []
+
+    def get_result(self, item_id):
+        """
+        :type item_id: unicode
+        :rtype: EbayEndItemResult | None
+        """
+        for result in self.results:
+            if result.correlation_id == item_id:
+                return result
+        return None
+
+    @classmethod
+    def create_from_data(cls, data):
+        """
+        :rtype: EbayEndItemsResponse
+        """
+        containers = data.get('EndItemResponseContainer') or []
+        if not isinstance(containers, list):
+            containers = [containers]
+
+        errors = data.get('Errors') or []
+        if not isinstance(errors, list):
+            errors = [errors]
+
+        return cls(results=[EbayEndItemResult.create_from_data(c) for c in containers],
+                   errors=[EbayError.create_from_data(e) for e in errors])
+
+
 class EbayReviseFixedPriceVariation(object):
     def __init__(self, original_variation, new_quantity=None, new_start_price=None, is_deleted=False):
         """
@@ -334,3 +418,99 @@ class EbayReviseFixedPriceItemResponse(object):
 
 class EbayReviseFixedPriceItemResponseDeserializer(POPOSerializer):
     ItemID = fields.CharField(source='item_id')
+
+
+class EbayInventoryStatus(object):
+    """
+    Quantity and/or price of a listing or of one variation (identified by its SKU) for `ReviseInventoryStatus`
+    http://developer.ebay.com/Devzone/xml/docs/Reference/ebay/types/InventoryStatusType.html
+    """
+
+    def __init__(self, item_id, sku=None, quantity=None, start_price=None):
+        """
+        :type item_id: unicode
+        :type sku: unicode | None
+        :type quantity: int | None
+        :type start_price: decimal.Decimal | None
+        """
+        self.item_id = item_id
+        self.sku = sku
+        self.quantity = int_or_none(quantity)
+        self.start_price = start_price
+
+    def matches(self, other):
+        """
+        :return: True if the other status belongs to the same listing or variation
+        :type other: EbayInventoryStatus
+        :rtype: bool
+        """
+        return self.item_id == other.item_id and (self.sku is None or self.sku == other.sku)
+
+    def dict(self):
+        data = {
+            'ItemID': self.item_id
+        }
+
+        if self.sku is not None:
+            data['SKU'] = self.sku
+
+        if self.quantity is not None:
+            data['Quantity'] = self.quantity
+
+        if self.start_price is not None:
+            data['StartPrice'] = EbayParser.encode_price(self.start_price)
+
+        return data
+
+
+class EbayInventoryStatusDeserializer(POPOSerializer):
+    ItemID = fields.CharField(source='item_id')
+    SKU = fields.CharField(source='sku', required=False)
+    Quantity = fields.IntegerField(source='quantity', required=False)
+
+    class Meta:
+        model = EbayInventoryStatus
+        list_serializer_class = EbayListSerializer
+
+
+class EbayReviseInventoryStatusResponse(object):
+
+    def __init__(self, inventory_statuses=None, errors=None):
+        """
+        :param inventory_statuses: Statuses of the listings and variations that have been revised
+        :param errors: Errors and warnings, e.g. for the statuses that could not be revised
+
+        :type inventory_statuses: list[EbayInventoryStatus]
+        :type errors: list[EbayError]
+        """
+        self.inventory_statuses = inventory_statuses or []
+        self.errors = errors or []
+
+    def is_revised(self, inventory_status):
+        """
+        :type inventory_status: EbayInventoryStatus
+        :rtype: bool
+        """
+        return any(inventory_status.matches(revised) for revised in self.inventory_statuses)
+
+    @classmethod
+    def create_from_data(cls, data):
+        """
+        :rtype: EbayReviseInventoryStatusResponse
+        """
+        serializer = EbayReviseInventoryStatusResponseDeserializer(data=data)
+        response = serializer.build()
+
+        errors = data.get('Errors') or []
+        if not isinstance(errors, list):
+            errors = [errors]
+        response.errors = [EbayError.create_from_data(e) for e in errors]
+
+        return response
+
+
+class EbayReviseInventoryStatusResponseDeserializer(POPOSerializer):
+    InventoryStatus = EbayInventoryStatusDeserializer(source='inventory_statuses', many=True, required=False)
+
+    class Meta:
+        model = EbayReviseInventoryStatusResponse
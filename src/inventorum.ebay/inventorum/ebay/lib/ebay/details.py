@@ -4,15 +4,18 @@ import logging
 
 from inventorum.ebay.lib.ebay import EbayTrading
 from inventorum.ebay.lib.ebay.data.shipping import EbayShippingService
+from inventorum.ebay.lib.ebay.scheduler import EbayCallPriority
 
 log = logging.getLogger(__name__)
 
 
 class EbayDetails(EbayTrading):
+    default_priority = EbayCallPriority.LOW
 
     def get_shipping_services(self):
         response = self._get_details("ShippingServiceDetails")
-        return EbayShippingService.create_from_data(response.get("ShippingServiceDetails", []))
+        with self.timed_deserialization("GeteBayDetails"):
+            return EbayShippingService.create_from_data(response.get("ShippingServiceDetails", []))
 
     def _get_details(self, detail_name):
         """
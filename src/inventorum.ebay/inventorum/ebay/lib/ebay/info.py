@@ -19,7 +19,8 @@ class EbayInfo(EbayTrading):
         if user_id is not None:
             data['UserID'] = user_id
         response = self.execute('GetUser', data)
-        return EbayUser.create_from_data(response['User'])
+        with self.timed_deserialization('GetUser'):
+            return EbayUser.create_from_data(response['User'])
 
     def get_site_defaults(self):
         response = self.execute('GetCategoryFeatures', dict(
@@ -28,4 +29,5 @@ class EbayInfo(EbayTrading):
             LevelLimit=7,
             DetailLevel='ReturnAll'
         ))
-        return EbayFeature.create_from_data(response)
+        with self.timed_deserialization('GetCategoryFeatures'):
+            return EbayFeature.create_from_data(response)
@@ -4,10 +4,15 @@ from inventorum.ebay.lib.ebay import Ebay
 from ebaysdk.inventorymanagement import Connection as InventoryManagementConnection
 from inventorum.ebay.lib.ebay.data.inventorymanagement import EbayAddLocationResponseDeserializer, \
     EbayAddDeleteInventoryResponseDeserializer, EbayDeleteInventoryLocationDeserializer
+from inventorum.ebay.lib.ebay.metrics import InstrumentedConnectionMixin
+
+
+class EbayInventoryManagementConnection(InstrumentedConnectionMixin, InventoryManagementConnection):
+    pass
 
 
 class EbayInventoryManagement(Ebay):
-    default_connection_cls = InventoryManagementConnection
+    default_connection_cls = EbayInventoryManagementConnection
 
     def add_location(self, location):
         """
@@ -15,7 +20,8 @@ class EbayInventoryManagement(Ebay):
         :rtype: EbayAddLocationResponse
         """
         response = self.execute('AddInventoryLocation', location.dict())
-        return EbayAddLocationResponseDeserializer(data=response).build()
+        with self.timed_deserialization('AddInventoryLocation'):
+            return EbayAddLocationResponseDeserializer(data=response).build()
 
     def add_inventory(self, sku, locations_availability):
         """
@@ -29,7 +35,8 @@ class EbayInventoryManagement(Ebay):
                 "Location": [l.dict() for l in locations_availability]
             }
         })
-        return EbayAddDeleteInventoryResponseDeserializer(data=response).build()
+        with self.timed_deserialization('AddInventory'):
+            return EbayAddDeleteInventoryResponseDeserializer(data=response).build()
 
     def delete_inventory(self, sku, delete_all, locations_ids=None):
         assert delete_all or locations_ids, "If you do not specify locations, you need to delete all"
@@ -42,7 +49,8 @@ class EbayInventoryManagement(Ebay):
                 'Location': [{'LocationID': location_id} for location_id in locations_ids]
             }
         })
-        return EbayAddDeleteInventoryResponseDeserializer(data=response).build()
+        with self.timed_deserialization('DeleteInventory'):
+            return EbayAddDeleteInventoryResponseDeserializer(data=response).build()
 
     def delete_location(self, location_id):
         """
@@ -52,4 +60,5 @@ class EbayInventoryManagement(Ebay):
         response = self.execute('DeleteInventoryLocation', {
             'LocationID': location_id
         })
-        return EbayDeleteInventoryLocationDeserializer(data=response).build()
\ No newline at end of file
+        with self.timed_deserialization('DeleteInventoryLocation'):
+            return EbayDeleteInventoryLocationDeserializer(data=response).build()
\ No newline at end of file
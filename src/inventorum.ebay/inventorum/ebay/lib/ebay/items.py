@@ -2,10 +2,14 @@
 from __future__ import absolute_import, unicode_literals
 from inventorum.ebay.lib.ebay import EbayTrading
 from inventorum.ebay.lib.ebay.data.items import EbayAddItemResponse, EbayUnpublishReasons, EbayEndItemResponse, \
-    EbayReviseFixedPriceItemResponse
+    EbayReviseFixedPriceItemResponse, EbayReviseInventoryStatusResponse, EbayEndItemsResponse
 
 
 class EbayItems(EbayTrading):
+    # http://developer.ebay.com/Devzone/xml/docs/Reference/ebay/ReviseInventoryStatus.html
+    MAX_INVENTORY_STATUSES_PER_CALL = 4
+    # http://developer.ebay.com/Devzone/xml/docs/Reference/ebay/EndItems.html
+    MAX_END_ITEMS_PER_CALL = 10
 
     def publish(self, item):
         """
@@ -14,7 +18,8 @@ class EbayItems(EbayTrading):
         :rtype: EbayAddItemResponse
         """
         response = self.execute('AddFixedPriceItem', item.dict())
-        return EbayAddItemResponse.create_from_data(response)
+        with self.timed_deserialization('AddFixedPriceItem'):
+            return EbayAddItemResponse.create_from_data(response)
 
     def unpublish(self, item_id, reason=EbayUnpublishReasons.NOT_AVAILABLE):
         """
@@ -26,7 +31,29 @@ class EbayItems(EbayTrading):
             'ItemID': item_id,
             'EndingReason': reason
         })
-        return EbayEndItemResponse.create_from_data(response)
+        with self.timed_deserialization('EndFixedPriceItem'):
+            return EbayEndItemResponse.create_from_data(response)
+
+    def end_items(self, item_ids, reason=EbayUnpublishReasons.NOT_AVAILABLE):
+        """
+        Ends up to ten listings with one call, the result of each listing is correlated by its item id
+
+        :type item_ids: list[unicode]
+        :type reason: unicode
+        :rtype: EbayEndItemsResponse
+        """
+        assert 0 < len(item_ids) <= self.MAX_END_ITEMS_PER_CALL, \
+            "EndItems accepts 1 to {} items".format(self.MAX_END_ITEMS_PER_CALL)
+
+        response = self.execute('EndItems', {
+            'EndItemRequestContainer': [{
+                'MessageID': item_id,
+                'ItemID': item_id,
+                'EndingReason': reason
+            } for item_id in item_ids]
+        })
+        with self.timed_deserialization('EndItems'):
+            return EbayEndItemsResponse.create_from_data(response)
 
     def revise_fixed_price_item(self, revise_fixed_price_item):
         """
@@ -34,4 +61,21 @@ class EbayItems(EbayTrading):
         :rtype: EbayReviseFixedPriceItemResponse
         """
         response = self.execute('ReviseFixedPriceItem', revise_fixed_price_item.dict())
-        return EbayReviseFixedPriceItemResponse.create_from_data(response)
+        with self.timed_deserialization('ReviseFixedPriceItem'):
+            return EbayReviseFixedPriceItemResponse.create_from_data(response)
+
+    def revise_inventory_status(self, inventory_statuses):
+        """
+        Revises quantities and prices of up to four listings or variations with one call
+
+        :type inventory_statuses: list[inventorum.ebay.lib.ebay.data.items.EbayInventoryStatus]
+        :rtype: EbayReviseInventoryStatusResponse
+        """
+        assert 0 < len(inventory_statuses) <= self.MAX_INVENTORY_STATUSES_PER_CALL, \
+            "ReviseInventoryStatus accepts 1 to {} inventory statuses".format(self.MAX_INVENTORY_STATUSES_PER_CALL)
+
+        response = self.execute('ReviseInventoryStatus', {
+            'InventoryStatus': [s.dict() for s in inventory_statuses]
+        })
+        with self.timed_deserialization('ReviseInventoryStatus'):
+            return EbayReviseInventoryStatusResponse.create_from_data(response)
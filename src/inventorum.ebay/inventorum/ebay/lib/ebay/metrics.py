@@ -0,0 +1,404 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from inventorum.ebay.lib.queues import EbayQueueMetric
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayCallMetric(object):
+    """ Measured values of one ebay api call """
+    BUILD_TIME = 'build_time'
+    NETWORK_TIME = 'network_time'
+    RESPONSE_BYTES = 'response_bytes'
+    PARSE_TIME = 'parse_time'
+    DESERIALIZATION_TIME = 'deserialization_time'
+
+    TIMINGS = (BUILD_TIME, NETWORK_TIME, PARSE_TIME, DESERIALIZATION_TIME)
+    ALL = (BUILD_TIME, NETWORK_TIME, RESPONSE_BYTES, PARSE_TIME, DESERIALIZATION_TIME)
+
+
+# Metrics measured in seconds, queue metrics are recorded with the queue as verb and without site and account
+TIMINGS = EbayCallMetric.TIMINGS + EbayQueueMetric.TIMINGS
+
+
+class EbayMetricsHistogram(object):
+    """
+    Mergeable histogram with exponential buckets, bucket `i` counts the values in (2^(i-1), 2^i]
+    """
+    MIN_BUCKET = -20
+    MAX_BUCKET = 40
+
+    def __init__(self, count=0, total=0.0, min=None, max=None, buckets=None):
+        self.count = count
+        self.total = total
+        self.min = min
+        self.max = max
+        self.buckets = buckets or {}
+
+    def add(self, value):
+        """
+        :type value: int | float
+        """
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        """
+        :type other: EbayMetricsHistogram
+        """
+        if not other.count:
+            return
+
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        for bucket, count in other.buckets.iteritems():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        """
+        :return: Upper bound of the bucket containing the given quantile, never more than the maximum
+        :type q: float
+        :rtype: float | None
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2.0 ** bucket, self.max)
+        return self.max
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'buckets': {unicode(bucket): count for bucket, count in self.buckets.iteritems()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :type data: dict
+        :rtype: EbayMetricsHistogram
+        """
+        return cls(count=data['count'], total=data['total'], min=data['min'], max=data['max'],
+                   buckets={int(bucket): count for bucket, count in data['buckets'].iteritems()})
+
+    def _bucket(self, value):
+        if value <= 0:
+            return self.MIN_BUCKET
+        bucket = int(math.ceil(math.log(value, 2)))
+        return max(self.MIN_BUCKET, min(self.MAX_BUCKET, bucket))
+
+
+class InMemoryMetricsSink(object):
+    """ Aggregates metrics in memory of the current process, only suitable for tests and single process setups """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, metric, value, verb, site_id, account):
+        """
+        :type metric: unicode
+        :type value: int | float
+        :type verb: unicode
+        :type site_id: int
+        :type account: unicode
+        """
+        key = (verb, site_id, account, metric)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = EbayMetricsHistogram()
+            histogram.add(value)
+
+    def histograms(self):
+        """
+        :return: Copy of the histograms by (verb, site_id, account, metric)
+        :rtype: dict[tuple, EbayMetricsHistogram]
+        """
+        with self._lock:
+            return {key: EbayMetricsHistogram.from_dict(histogram.as_dict())
+                    for key, histogram in self._histograms.iteritems()}
+
+    def aggregates(self):
+        """
+        :return: Summary per verb, site, account and metric
+        :rtype: list[dict]
+        """
+        rows = []
+        for (verb, site_id, account, metric), histogram in sorted(self.histograms().iteritems()):
+            rows.append({
+                'verb': verb,
+                'site_id': site_id,
+                'account': account,
+                'metric': metric,
+                'count': histogram.count,
+                'mean': histogram.mean,
+                'min': histogram.min,
+                'max': histogram.max,
+                'p50': histogram.quantile(0.5),
+                'p95': histogram.quantile(0.95)
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class FileMetricsSink(InMemoryMetricsSink):
+    """
+    Aggregates metrics of all worker processes of one host: every process aggregates in memory and merges its
+    histograms into an exclusively locked json file every `flush_interval` seconds.
+    """
+
+    def __init__(self, path, flush_interval=10, clock=time.time):
+        """
+        :type path: unicode
+        :type flush_interval: float
+        """
+        super(FileMetricsSink, self).__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._flushed_at = clock()
+
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # flock only serializes between processes, threads of one process additionally need a lock
+        self._file_lock = threading.Lock()
+
+    def record(self, metric, value, verb, site_id, account):
+        super(FileMetricsSink, self).record(metric, value, verb, site_id, account)
+
+        if self.clock() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """ Merges the histograms of this process into the file """
+        with self._lock:
+            pending, self._histograms = self._histograms, {}
+            self._flushed_at = self.clock()
+
+        if not pending:
+            return
+
+        try:
+            with self._stored_histograms() as stored:
+                for key, histogram in pending.iteritems():
+                    histogram.merge(stored.get(key, EbayMetricsHistogram()))
+                    stored[key] = histogram
+        except (IOError, OSError) as e:
+            log.warn('Could not write ebay call metrics to %s: %s', self.path, e)
+
+    def histograms(self):
+        self.flush()
+        with self._stored_histograms() as stored:
+            return stored
+
+    def reset(self):
+        super(FileMetricsSink, self).reset()
+        with self._stored_histograms() as stored:
+            stored.clear()
+
+    @contextmanager
+    def _stored_histograms(self):
+        """
+        Yields the histograms of the file by key, changes are written back when the block ends
+        :rtype: dict[tuple, EbayMetricsHistogram]
+        """
+        with self._file_lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    content = f.read()
+                    try:
+                        rows = json.loads(content) if content else []
+                    except ValueError:
+                        log.warn('Corrupted ebay call metrics file %s, starting from scratch', self.path)
+                        rows = []
+
+                    stored = {tuple(row['key']): EbayMetricsHistogram.from_dict(row['histogram']) for row in rows}
+                    yield stored
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps([{'key': key, 'histogram': histogram.as_dict()}
+                                        for key, histogram in stored.iteritems()]))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class StatsdMetricsSink(object):
+    """
+    Sends every value to statsd over UDP, timings as `ms` and sizes as histograms. Aggregates are kept by statsd.
+
+    With `tags` the site and account are sent as DogStatsD tags, otherwise the site is part of the metric name and the
+    account is dropped to keep the number of metrics small.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='inventorum.ebay', tags=False):
+        """
+        :type host: unicode
+        :type port: int
+        :type prefix: unicode
+        :type tags: bool
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags = tags
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def record(self, metric, value, verb, site_id, account):
+        if metric in TIMINGS:
+            line = '{}:{:.3f}|ms'.format(self._name(metric, verb, site_id), value * 1000.0)
+        else:
+            line = '{}:{}|h'.format(self._name(metric, verb, site_id), value)
+
+        if self.tags and site_id is not None:
+            line += '|#site_id:{},account:{}'.format(site_id, account)
+
+        try:
+            self._socket.sendto(line.encode('utf-8'), self.address)
+        except socket.error as e:
+            log.debug('Could not send ebay call metric to statsd: %s', e)
+
+    def aggregates(self):
+        return []
+
+    def reset(self):
+        pass
+
+    def _name(self, metric, verb, site_id):
+        if self.tags or site_id is None:
+            return '{}.{}.{}'.format(self.prefix, verb, metric)
+        return '{}.{}.site_{}.{}'.format(self.prefix, verb, site_id, metric)
+
+
+class InstrumentedConnectionMixin(object):
+    """
+    Measures the phases of ebaysdk connection calls: building the request (dict to xml), the network round trip
+    and parsing the response (xml to dict). The values of the last call are available as `call_metrics`.
+    """
+    call_metrics = None
+
+    def build_request(self, *args, **kwargs):
+        self.call_metrics = {}
+        with self._measure(EbayCallMetric.BUILD_TIME):
+            super(InstrumentedConnectionMixin, self).build_request(*args, **kwargs)
+
+    def execute_request(self):
+        if self.parallel:
+            # only queued here, the round trip is taken from the response once the parallel call is done
+            return super(InstrumentedConnectionMixin, self).execute_request()
+
+        with self._measure(EbayCallMetric.NETWORK_TIME):
+            super(InstrumentedConnectionMixin, self).execute_request()
+
+    def process_response(self, *args, **kwargs):
+        if self.parallel and getattr(self.response, 'elapsed', None) is not None:
+            self.call_metrics[EbayCallMetric.NETWORK_TIME] = self.response.elapsed.total_seconds()
+
+        content = getattr(self.response, 'content', None)
+        if content is not None:
+            self.call_metrics[EbayCallMetric.RESPONSE_BYTES] = len(content)
+
+        with self._measure(EbayCallMetric.PARSE_TIME):
+            super(InstrumentedConnectionMixin, self).process_response(*args, **kwargs)
+
+    @contextmanager
+    def _measure(self, metric):
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            self.call_metrics[metric] = time.time() - started_at
+
+
+def account_tag(token_value):
+    """
+    :return: Short, non-reversible identifier of the ebay account a token belongs to
+    :type token_value: unicode | None
+    :rtype: unicode
+    """
+    if not token_value:
+        return 'anonymous'
+    return hashlib.sha1(token_value.encode('utf-8')).hexdigest()[:10]
+
+
+def record_call_metrics(verb, site_id, token_value, values):
+    """
+    :param values: Measured values by `EbayCallMetric`, missing values are ignored
+
+    :type verb: unicode
+    :type site_id: int
+    :type token_value: unicode | None
+    :type values: dict[unicode, int | float | None]
+    """
+    sink = get_metrics_sink()
+    account = account_tag(token_value)
+    for metric, value in values.iteritems():
+        if value is not None:
+            sink.record(metric, value, verb, site_id, account)
+
+
+_metrics_sink = None
+_metrics_sink_lock = threading.Lock()
+
+
+def get_metrics_sink():
+    """
+    :return: The process-wide metrics sink configured via the `EBAY_METRICS_SINK*` settings
+    :rtype: InMemoryMetricsSink | FileMetricsSink | StatsdMetricsSink
+    """
+    global _metrics_sink
+
+    if _metrics_sink is None:
+        with _metrics_sink_lock:
+            if _metrics_sink is None:
+                sink_cls = import_string(settings.EBAY_METRICS_SINK)
+                _metrics_sink = sink_cls(**settings.EBAY_METRICS_SINK_OPTIONS)
+    return _metrics_sink
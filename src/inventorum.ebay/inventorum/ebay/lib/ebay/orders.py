@@ -19,7 +19,8 @@ class EbayOrders(EbayTrading):
         :rtype: inventorum.ebay.lib.ebay.data.responses.GetOrdersResponseType
         """
         response = self.execute("GetOrders", data)
-        return GetOrdersResponseType.Deserializer(data=response).build()
+        with self.timed_deserialization("GetOrders"):
+            return GetOrdersResponseType.Deserializer(data=response).build(compiled=True)
 
     def complete_sale(self, order_id, shipped, paid, shipment=None):
         """
@@ -0,0 +1,198 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+log = logging.getLogger(__name__)
+
+
+class EbaySessionPoolStats(object):
+    """ Counters of a session pool, used to see how many calls could reuse an already opened connection """
+
+    def __init__(self):
+        self.calls = 0
+        self.reused = 0
+        self.created = 0
+        self.evicted = 0
+        self.discarded = 0
+
+    @property
+    def reuse_ratio(self):
+        """
+        :return: Ratio of calls that were executed with an already established (keep-alive) session
+        :rtype: float
+        """
+        if not self.calls:
+            return 0.0
+        return float(self.reused) / self.calls
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'calls': self.calls,
+            'reused': self.reused,
+            'created': self.created,
+            'evicted': self.evicted,
+            'discarded': self.discarded,
+            'reuse_ratio': self.reuse_ratio
+        }
+
+
+class EbaySessionLease(object):
+    """ A session that was taken out of the pool for exactly one call """
+
+    def __init__(self, key, session, reused):
+        """
+        :type key: (unicode, int)
+        :type session: requests.Session
+        :type reused: bool
+        """
+        self.key = key
+        self.session = session
+        self.reused = reused
+        self.broken = False
+
+
+class EbaySessionPool(object):
+    """
+    Process-wide pool of keep-alive `requests.Session` objects per (domain, site_id).
+
+    ebaysdk creates a new session for every connection object, so every call to ebay pays a new TCP+TLS handshake.
+    Sessions are leased for a single call, so one session is never used by two threads at the same time.
+    """
+
+    def __init__(self, max_size, idle_timeout, clock=time.time):
+        """
+        :param max_size: Maximum number of idle sessions kept per (domain, site_id)
+        :param idle_timeout: Seconds after which an idle session is closed and dropped from the pool
+
+        :type max_size: int
+        :type idle_timeout: int | float
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+
+        self.stats = EbaySessionPoolStats()
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # key -> list of (session, last used timestamp), most recently used last
+        self._idle = defaultdict(list)
+        self._pid = os.getpid()
+
+    def lease(self, domain, site_id):
+        """
+        :type domain: unicode
+        :type site_id: int
+        :rtype: EbaySessionLease
+        """
+        key = (domain, site_id)
+
+        with self._lock:
+            self._check_fork()
+            self._evict_idle()
+            self.stats.calls += 1
+
+            idle_sessions = self._idle[key]
+            if idle_sessions:
+                session, _ = idle_sessions.pop()
+                self.stats.reused += 1
+                return EbaySessionLease(key, session, reused=True)
+
+            self.stats.created += 1
+
+        return EbaySessionLease(key, self._create_session(), reused=False)
+
+    def release(self, lease):
+        """
+        Gives the session back to the pool, broken sessions and sessions exceeding the pool size are closed.
+
+        :type lease: EbaySessionLease
+        """
+        with self._lock:
+            self._check_fork()
+            idle_sessions = self._idle[lease.key]
+
+            if lease.broken:
+                self.stats.discarded += 1
+            elif len(idle_sessions) < self.max_size:
+                idle_sessions.append((lease.session, self.clock()))
+                return
+            else:
+                self.stats.evicted += 1
+
+        lease.session.close()
+
+    def clear(self):
+        """ Closes all idle sessions """
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+
+        for sessions in idle.values():
+            for session, _ in sessions:
+                session.close()
+
+    def idle_count(self, domain, site_id):
+        """
+        :type domain: unicode
+        :type site_id: int
+        :rtype: int
+        """
+        return len(self._idle.get((domain, site_id), []))
+
+    def _evict_idle(self):
+        deadline = self.clock() - self.idle_timeout
+
+        for key, sessions in self._idle.items():
+            alive = [(s, last_used) for s, last_used in sessions if last_used >= deadline]
+            for session, last_used in sessions:
+                if last_used < deadline:
+                    self.stats.evicted += 1
+                    session.close()
+            self._idle[key] = alive
+
+    def _check_fork(self):
+        # Sockets must not be shared between celery's prefork children and their parent
+        if self._pid != os.getpid():
+            log.debug('Process was forked, dropping inherited ebay sessions')
+            self._reset()
+
+    def _create_session(self):
+        # Same retry behaviour as ebaysdk's own session, but only one connection since a session serves one call
+        session = Session()
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=3))
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=3))
+        return session
+
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool():
+    """
+    :return: The process-wide session pool, configured via `EBAY_SESSION_POOL_MAX_SIZE` and
+        `EBAY_SESSION_POOL_IDLE_TIMEOUT`
+    :rtype: EbaySessionPool
+    """
+    global _session_pool
+
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                _session_pool = EbaySessionPool(max_size=settings.EBAY_SESSION_POOL_MAX_SIZE,
+                                                idle_timeout=settings.EBAY_SESSION_POOL_IDLE_TIMEOUT)
+    return _session_pool
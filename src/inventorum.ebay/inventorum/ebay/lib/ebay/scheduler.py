@@ -0,0 +1,273 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayCallPriority(object):
+    """
+    Priority of an ebay api call, calls with lower priority have to leave a part of the budget for more important ones
+    """
+    HIGH = 'high'
+    NORMAL = 'normal'
+    LOW = 'low'
+
+    CHOICES = (
+        (HIGH, "High"),
+        (NORMAL, "Normal"),
+        (LOW, "Low"),
+    )
+
+
+class EbayCallBudgetExceeded(Exception):
+    pass
+
+
+class EbayCallBudget(object):
+    """ Token bucket configuration """
+
+    def __init__(self, rate, capacity):
+        """
+        :param rate: Calls per second the bucket is refilled with
+        :param capacity: Maximum number of calls that can be done in a burst
+
+        :type rate: float
+        :type capacity: float
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+
+
+class LocalCallBudgetStore(object):
+    """ Keeps bucket states in memory of the current process, only suitable for tests and single process setups """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields the bucket states by key, changes are visible to the next transaction
+        :rtype: dict[unicode, dict]
+        """
+        with self._lock:
+            yield self._states
+
+
+class FileLockCallBudgetStore(object):
+    """ Shares bucket states between all worker processes of one host through an exclusively locked json file """
+
+    def __init__(self, path):
+        """
+        :type path: unicode
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # flock only serializes between processes, threads of one process additionally need a lock
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields the bucket states by key, changes are written back when the transaction ends
+        :rtype: dict[unicode, dict]
+        """
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    content = f.read()
+                    try:
+                        states = json.loads(content) if content else {}
+                    except ValueError:
+                        log.warn('Corrupted ebay call budget file %s, starting with full budgets', self.path)
+                        states = {}
+
+                    yield states
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(states))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EbayCallScheduler(object):
+    """
+    Enforces token bucket budgets for ebay api calls per app and per token across all processes sharing the store.
+
+    Calls wait until all their budgets allow them. Calls with a lower priority may not drain a bucket below the
+    reserve of their priority, so e.g. category scraping cannot starve quantity updates. When ebay reports that a
+    call limit was reached, the rate of the affected buckets is halved and recovers slowly afterwards.
+    """
+
+    # http://developer.ebay.com/devzone/xml/docs/Reference/ebay/Errors/ErrorMessages.htm
+    THROTTLING_ERROR_CODES = (518,)
+
+    MIN_RATE_FACTOR = 0.05
+    THROTTLED_RATE_FACTOR = 0.5
+    # Share of the full rate that is recovered per second after being throttled
+    RATE_RECOVERY_PER_SECOND = 0.01
+
+    def __init__(self, store, app_budget, token_budget, priority_reserves, max_wait,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param priority_reserves: Share of the bucket capacity per priority that has to remain after a call
+        :param max_wait: Maximum seconds a call waits for its budget
+
+        :type store: LocalCallBudgetStore | FileLockCallBudgetStore
+        :type app_budget: EbayCallBudget
+        :type token_budget: EbayCallBudget
+        :type priority_reserves: dict[unicode, float]
+        :type max_wait: float
+        """
+        self.store = store
+        self.app_budget = app_budget
+        self.token_budget = token_budget
+        self.priority_reserves = priority_reserves
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+
+    def acquire(self, app_id, token_value, priority=EbayCallPriority.NORMAL):
+        """
+        Blocks until the call is allowed by the app and token budgets
+
+        :type app_id: unicode
+        :type token_value: unicode | None
+        :type priority: unicode
+
+        :raises EbayCallBudgetExceeded
+        """
+        buckets = self._buckets(app_id, token_value)
+        reserve = self.priority_reserves.get(priority, 0.0)
+        waited = 0.0
+
+        while True:
+            wait = self._try_consume(buckets, reserve)
+            if wait <= 0:
+                if waited:
+                    log.debug('Waited %.2fs for ebay call budget (priority: %s)', waited, priority)
+                return
+
+            if waited + wait > self.max_wait:
+                raise EbayCallBudgetExceeded('No ebay call budget available within {}s for priority `{}`'
+                                             .format(self.max_wait, priority))
+            self.sleep(wait)
+            waited += wait
+
+    def report_throttled(self, app_id, token_value):
+        """
+        Slows down the buckets of the given app and token after ebay refused a call because of its limits
+
+        :type app_id: unicode
+        :type token_value: unicode | None
+        """
+        log.warn('Ebay call limit reached, reducing call rate')
+
+        now = self.clock()
+        with self.store.transaction() as states:
+            for key, budget in self._buckets(app_id, token_value):
+                state = self._refilled_state(states.get(key), budget, now)
+                state['factor'] = max(self.MIN_RATE_FACTOR, state['factor'] * self.THROTTLED_RATE_FACTOR)
+                state['tokens'] = 0.0
+                states[key] = state
+
+    @classmethod
+    def is_throttling_error(cls, errors):
+        """
+        :type errors: list[inventorum.ebay.lib.ebay.data.errors.EbayError] | None
+        :rtype: bool
+        """
+        return any(e.code in cls.THROTTLING_ERROR_CODES for e in errors or [])
+
+    def _buckets(self, app_id, token_value):
+        buckets = [('app:{}'.format(app_id), self.app_budget)]
+        if token_value:
+            # do not persist tokens in plain text
+            token_hash = hashlib.sha1(token_value.encode('utf-8')).hexdigest()
+            buckets.append(('token:{}'.format(token_hash), self.token_budget))
+        return buckets
+
+    def _try_consume(self, buckets, reserve):
+        """
+        Consumes one call from all buckets or none of them
+
+        :return: Seconds to wait before the next attempt, 0 if the call was consumed
+        :rtype: float
+        """
+        now = self.clock()
+        with self.store.transaction() as states:
+            refilled = [(key, budget, self._refilled_state(states.get(key), budget, now))
+                        for key, budget in buckets]
+
+            wait = 0.0
+            for key, budget, state in refilled:
+                required = 1.0 + reserve * budget.capacity
+                if state['tokens'] < required:
+                    wait = max(wait, (required - state['tokens']) / (budget.rate * state['factor']))
+
+            for key, budget, state in refilled:
+                if not wait:
+                    state['tokens'] -= 1.0
+                states[key] = state
+
+        return wait
+
+    def _refilled_state(self, state, budget, now):
+        if state is None:
+            return {'tokens': budget.capacity, 'factor': 1.0, 'updated_at': now}
+
+        elapsed = max(0.0, now - state['updated_at'])
+        factor = state['factor']
+        tokens = min(budget.capacity, state['tokens'] + elapsed * budget.rate * factor)
+        factor = min(1.0, factor + elapsed * self.RATE_RECOVERY_PER_SECOND)
+        return {'tokens': tokens, 'factor': factor, 'updated_at': now}
+
+
+_call_scheduler = None
+_call_scheduler_lock = threading.Lock()
+
+
+def get_call_scheduler():
+    """
+    :return: The process-wide call scheduler configured via the `EBAY_CALL_SCHEDULER_*` settings
+    :rtype: EbayCallScheduler
+    """
+    global _call_scheduler
+
+    if _call_scheduler is None:
+        with _call_scheduler_lock:
+            if _call_scheduler is None:
+                store_cls = import_string(settings.EBAY_CALL_SCHEDULER_STORE)
+                _call_scheduler = EbayCallScheduler(
+                    store=store_cls(**settings.EBAY_CALL_SCHEDULER_STORE_OPTIONS),
+                    app_budget=EbayCallBudget(**settings.EBAY_CALL_SCHEDULER_APP_BUDGET),
+                    token_budget=EbayCallBudget(**settings.EBAY_CALL_SCHEDULER_TOKEN_BUDGET),
+                    priority_reserves=settings.EBAY_CALL_SCHEDULER_PRIORITY_RESERVES,
+                    max_wait=settings.EBAY_CALL_SCHEDULER_MAX_WAIT
+                )
+    return _call_scheduler
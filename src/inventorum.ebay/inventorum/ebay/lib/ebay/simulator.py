@@ -0,0 +1,518 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import itertools
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from lxml import etree
+
+
+log = logging.getLogger(__name__)
+
+
+NAMESPACE = 'urn:ebay:apis:eBLBaseComponents'
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+
+
+class EbaySimulatorConfig(object):
+    """ Behaviour of the simulated trading api """
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, throttle_rate=None, throttle_capacity=None,
+                 category_tree=(5, 4, 3), category_version='1', orders_per_call=0, seed=None):
+        """
+        :param latency: Seconds every call takes at least
+        :param latency_jitter: Maximum random seconds added to the latency
+        :param error_rate: Share of calls (0..1) that fail with an internal ebay error
+        :param throttle_rate: Calls per second per app before calls fail with ebay's call limit error (518),
+            None disables throttling
+        :param throttle_capacity: Burst of calls allowed above the throttle rate, defaults to the rate
+        :param category_tree: Number of children per level of the simulated category tree, starting with the roots
+        :param category_version: `CategoryVersion` returned with category calls
+        :param orders_per_call: Orders for listed items returned by every `GetOrders` call
+        :param seed: Seed of the random generator, to make error injection reproducible
+
+        :type latency: float
+        :type latency_jitter: float
+        :type error_rate: float
+        :type throttle_rate: float | None
+        :type throttle_capacity: float | None
+        :type category_tree: tuple[int]
+        :type category_version: unicode
+        :type orders_per_call: int
+        :type seed: int | None
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_capacity = throttle_capacity or throttle_rate
+        self.category_tree = tuple(category_tree)
+        self.category_version = category_version
+        self.orders_per_call = orders_per_call
+        self.seed = seed
+
+
+class EbaySimulatorCallError(Exception):
+
+    def __init__(self, code, message, classification='RequestError'):
+        super(EbaySimulatorCallError, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.classification = classification
+
+
+class EbaySimulatorStats(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.failed = 0
+        self.throttled = 0
+        self.calls_by_verb = {}
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'calls': self.calls,
+            'failed': self.failed,
+            'throttled': self.throttled,
+            'calls_by_verb': dict(self.calls_by_verb)
+        }
+
+
+class EbaySimulator(object):
+    """
+    WSGI application speaking the trading api xml protocol for the verbs this service uses, so throughput can be
+    measured without ebay. Listings are kept in memory of the process, categories are generated from the config.
+
+    Point `EBAY_DOMAIN` at it and disable `EBAY_HTTPS`, see `inventorum.ebay.scripts.ebay_simulator`.
+    """
+
+    # http://developer.ebay.com/devzone/xml/docs/Reference/ebay/Errors/ErrorMessages.htm
+    INTERNAL_ERROR_CODE = 10007
+    CALL_LIMIT_ERROR_CODE = 518
+    UNSUPPORTED_VERB_ERROR_CODE = 2
+    XML_PARSE_ERROR_CODE = 5
+    ITEM_NOT_FOUND_ERROR_CODE = 17
+    ITEM_ALREADY_ENDED_ERROR_CODE = 1047
+
+    def __init__(self, config=None, clock=time.time, sleep=time.sleep):
+        """
+        :type config: EbaySimulatorConfig | None
+        """
+        self.config = config or EbaySimulatorConfig()
+        self.clock = clock
+        self.sleep = sleep
+
+        self.stats = EbaySimulatorStats()
+        self.items = {}
+
+        self._random = random.Random(self.config.seed)
+        self._item_ids = itertools.count(110000000000)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._throttle_buckets = {}
+        self._categories = list(self._generate_categories())
+
+        self.handlers = {
+            'AddFixedPriceItem': self.add_fixed_price_item,
+            'ReviseFixedPriceItem': self.revise_fixed_price_item,
+            'ReviseInventoryStatus': self.revise_inventory_status,
+            'EndFixedPriceItem': self.end_fixed_price_item,
+            'EndItems': self.end_items,
+            'GetOrders': self.get_orders,
+            'GetCategories': self.get_categories,
+            'GetCategoryFeatures': self.get_category_features,
+            'GetCategorySpecifics': self.get_category_specifics,
+            'GeteBayDetails': self.get_ebay_details,
+            'CompleteSale': self.complete_sale,
+        }
+
+    def __call__(self, environ, start_response):
+        verb = environ.get('HTTP_X_EBAY_API_CALL_NAME')
+        app_id = environ.get('HTTP_X_EBAY_API_APP_NAME')
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = environ['wsgi.input'].read(length) if length else b''
+
+        response = self.handle(verb, app_id, body)
+
+        start_response(b'200 OK', [(b'Content-Type', b'text/xml; charset=utf-8'),
+                                   (b'Content-Length', str(len(response)))])
+        return [response]
+
+    def handle(self, verb, app_id, body):
+        """
+        :type verb: unicode
+        :type app_id: unicode | None
+        :type body: str
+        :return: Serialized xml response
+        :rtype: str
+        """
+        self._delay()
+
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.calls_by_verb[verb] = self.stats.calls_by_verb.get(verb, 0) + 1
+
+        try:
+            self._check_throttling(app_id)
+            if self.config.error_rate and self._random.random() < self.config.error_rate:
+                raise EbaySimulatorCallError(self.INTERNAL_ERROR_CODE, 'Internal error to the application.',
+                                             classification='SystemError')
+
+            handler = self.handlers.get(verb)
+            if handler is None:
+                raise EbaySimulatorCallError(self.UNSUPPORTED_VERB_ERROR_CODE,
+                                             'Unsupported API call `{}`.'.format(verb))
+
+            try:
+                request = etree.fromstring(body) if body else None
+            except etree.XMLSyntaxError as e:
+                raise EbaySimulatorCallError(self.XML_PARSE_ERROR_CODE, 'XML Parse error: {}'.format(e))
+            response = self._response(verb)
+            with self._lock:
+                handler(request, response)
+        except EbaySimulatorCallError as e:
+            with self._lock:
+                self.stats.failed += 1
+                if e.code == self.CALL_LIMIT_ERROR_CODE:
+                    self.stats.throttled += 1
+            response = self._failure(verb, e)
+
+        return etree.tostring(response, xml_declaration=True, encoding='utf-8')
+
+    # Verbs ###########################################################################################################
+
+    def add_fixed_price_item(self, request, response):
+        item = self._find(request, 'Item')
+        item_id = unicode(next(self._item_ids))
+        self.items[item_id] = {
+            'sku': self._text(item, 'SKU'),
+            'title': self._text(item, 'Title'),
+            'quantity': int(self._text(item, 'Quantity') or 0),
+            'price': self._text(item, 'StartPrice') or '1.00',
+            'active': True
+        }
+        self._sub(response, 'ItemID', item_id)
+        self._sub(response, 'StartTime', self._now())
+        self._sub(response, 'EndTime', self._now(timedelta(days=30)))
+        self._add_fees(response)
+
+    def revise_fixed_price_item(self, request, response):
+        item = self._find(request, 'Item')
+        listed_item = self._active_item(self._text(item, 'ItemID'))
+
+        for key, tag in (('title', 'Title'), ('price', 'StartPrice')):
+            value = self._text(item, tag)
+            if value is not None:
+                listed_item[key] = value
+        quantity = self._text(item, 'Quantity')
+        if quantity is not None:
+            listed_item['quantity'] = int(quantity)
+
+        self._sub(response, 'ItemID', self._text(item, 'ItemID'))
+        self._add_fees(response)
+
+    def revise_inventory_status(self, request, response):
+        statuses = request.findall('{%s}InventoryStatus' % NAMESPACE)
+        failed = 0
+
+        for status in statuses:
+            item_id = self._text(status, 'ItemID')
+            try:
+                listed_item = self._active_item(item_id)
+            except EbaySimulatorCallError as e:
+                # the other statuses of the call are still revised
+                failed += 1
+                self._add_error(response, e)
+                continue
+
+            sku = self._text(status, 'SKU')
+            quantity = self._text(status, 'Quantity')
+            price = self._text(status, 'StartPrice')
+            if sku is not None and sku != listed_item['sku']:
+                variation = listed_item.setdefault('variations', {}).setdefault(sku, {})
+            else:
+                variation = listed_item
+
+            if quantity is not None:
+                variation['quantity'] = int(quantity)
+            if price is not None:
+                variation['price'] = price
+
+            revised = self._sub(response, 'InventoryStatus')
+            self._sub(revised, 'ItemID', item_id)
+            self._sub(revised, 'SKU', sku or listed_item['sku'] or '')
+            self._sub(revised, 'Quantity', unicode(variation.get('quantity', 0)))
+            self._sub(revised, 'StartPrice', variation.get('price', listed_item['price']), currencyID='EUR')
+
+        if failed:
+            self._find(response, 'Ack').text = 'Failure' if failed == len(statuses) else 'Warning'
+        self._add_fees(response)
+
+    def end_fixed_price_item(self, request, response):
+        listed_item = self._active_item(self._text(request, 'ItemID'))
+        listed_item['active'] = False
+        self._sub(response, 'EndTime', self._now())
+
+    def end_items(self, request, response):
+        containers = request.findall('{%s}EndItemRequestContainer' % NAMESPACE)
+        failed = 0
+
+        for container in containers:
+            result = self._sub(response, 'EndItemResponseContainer')
+            self._sub(result, 'CorrelationID', self._text(container, 'MessageID'))
+            try:
+                listed_item = self._active_item(self._text(container, 'ItemID'))
+            except EbaySimulatorCallError as e:
+                # the other listings of the call are still ended
+                failed += 1
+                self._add_error(result, e)
+                continue
+
+            listed_item['active'] = False
+            self._sub(result, 'EndTime', self._now())
+
+        if failed:
+            self._find(response, 'Ack').text = 'Failure' if failed == len(containers) else 'PartialFailure'
+
+    def complete_sale(self, request, response):
+        pass
+
+    def get_orders(self, request, response):
+        active_items = [(item_id, item) for item_id, item in sorted(self.items.items()) if item['active']]
+        orders = [self._random.choice(active_items) for _ in range(self.config.orders_per_call)] \
+            if active_items else []
+
+        order_array = self._sub(response, 'OrderArray')
+        for item_id, item in orders:
+            self._add_order(order_array, item_id, item)
+
+        self._sub(response, 'HasMoreOrders', 'false')
+        pagination = self._sub(response, 'PaginationResult')
+        self._sub(pagination, 'TotalNumberOfPages', '1')
+        self._sub(pagination, 'TotalNumberOfEntries', unicode(len(orders)))
+        self._sub(response, 'OrdersPerPage', '100')
+        self._sub(response, 'PageNumber', '1')
+        self._sub(response, 'ReturnedOrderCountActual', unicode(len(orders)))
+
+    def get_categories(self, request, response):
+        self._sub(response, 'CategoryVersion', self.config.category_version)
+        self._sub(response, 'UpdateTime', '2015-01-01T00:00:00.000Z')
+
+        detail_level = self._text(request, 'DetailLevel')
+        if detail_level != 'ReturnAll':
+            # without detail level ebay only returns the version of the tree
+            return
+
+        level_limit = int(self._text(request, 'LevelLimit') or 0)
+        category_array = self._sub(response, 'CategoryArray')
+        count = 0
+        for category in self._categories:
+            if level_limit and category['level'] > level_limit:
+                continue
+            node = self._sub(category_array, 'Category')
+            self._sub(node, 'BestOfferEnabled', 'true')
+            self._sub(node, 'AutoPayEnabled', 'true')
+            self._sub(node, 'CategoryID', category['id'])
+            self._sub(node, 'CategoryLevel', unicode(category['level']))
+            self._sub(node, 'CategoryName', category['name'])
+            self._sub(node, 'CategoryParentID', category['parent_id'])
+            if category['leaf']:
+                self._sub(node, 'LeafCategory', 'true')
+            count += 1
+        self._sub(response, 'CategoryCount', unicode(count))
+
+    def get_category_features(self, request, response):
+        self._sub(response, 'CategoryVersion', self.config.category_version)
+        self._sub(response, 'UpdateTime', '2015-01-01T00:00:00.000Z')
+
+        category_id = self._text(request, 'CategoryID')
+        if category_id is not None:
+            category = self._sub(response, 'Category')
+            self._sub(category, 'CategoryID', category_id)
+            self._add_features(category)
+
+        site_defaults = self._sub(response, 'SiteDefaults')
+        self._add_features(site_defaults)
+
+        definitions = self._sub(response, 'FeatureDefinitions')
+        durations = self._sub(definitions, 'ListingDurations', Version='1')
+        duration_set = self._sub(durations, 'ListingDuration', durationSetID='1')
+        for duration in ('Days_5', 'Days_30', 'GTC'):
+            self._sub(duration_set, 'Duration', duration)
+
+    def get_category_specifics(self, request, response):
+        for category_id in request.findall('{%s}CategoryID' % NAMESPACE):
+            recommendations = self._sub(response, 'Recommendations')
+            self._sub(recommendations, 'CategoryID', category_id.text)
+
+            brand = self._sub(recommendations, 'NameRecommendation')
+            self._sub(brand, 'Name', 'Marke')
+            rules = self._sub(brand, 'ValidationRules')
+            self._sub(rules, 'ValueType', 'Text')
+            self._sub(rules, 'MinValues', '1')
+            self._sub(rules, 'MaxValues', '1')
+            self._sub(rules, 'SelectionMode', 'FreeText')
+            self._sub(rules, 'VariationSpecifics', 'Disabled')
+            for value in ('Markenlos', 'Inventorum'):
+                self._sub(self._sub(brand, 'ValueRecommendation'), 'Value', value)
+
+    def get_ebay_details(self, request, response):
+        for service, carrier in (('DE_DHLPaket', 'DHL'), ('DE_HermesPaket', 'Hermes'), ('DE_DPDPaket', 'DPD')):
+            details = self._sub(response, 'ShippingServiceDetails')
+            self._sub(details, 'Description', '{} Paket'.format(carrier))
+            self._sub(details, 'ShippingService', service)
+            self._sub(details, 'ShippingServiceID', unicode(next(self._ids)))
+            self._sub(details, 'ShippingTimeMax', '3')
+            self._sub(details, 'ShippingTimeMin', '1')
+            self._sub(details, 'ValidForSellingFlow', 'true')
+            self._sub(details, 'ShippingCarrier', carrier)
+            self._sub(details, 'UpdateTime', '2015-01-01T00:00:00.000Z')
+            self._sub(details, 'DetailVersion', '1')
+
+    # Helpers #########################################################################################################
+
+    def _delay(self):
+        latency = self.config.latency
+        if self.config.latency_jitter:
+            latency += self._random.uniform(0, self.config.latency_jitter)
+        if latency > 0:
+            self.sleep(latency)
+
+    def _check_throttling(self, app_id):
+        if not self.config.throttle_rate:
+            return
+
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._throttle_buckets.get(app_id, (self.config.throttle_capacity, now))
+            tokens = min(self.config.throttle_capacity, tokens + (now - updated_at) * self.config.throttle_rate)
+            if tokens < 1:
+                self._throttle_buckets[app_id] = (tokens, now)
+                raise EbaySimulatorCallError(self.CALL_LIMIT_ERROR_CODE, 'Call usage limit has been reached.')
+            self._throttle_buckets[app_id] = (tokens - 1, now)
+
+    def _generate_categories(self):
+        ids = itertools.count(1)
+        parents = [None]
+        for level, children_count in enumerate(self.config.category_tree, start=1):
+            leaf = level == len(self.config.category_tree)
+            next_parents = []
+            for parent in parents:
+                for i in range(children_count):
+                    category_id = unicode(next(ids))
+                    next_parents.append(category_id)
+                    yield {
+                        'id': category_id,
+                        # ebay references root categories as their own parents
+                        'parent_id': parent or category_id,
+                        'name': 'Category {}'.format(category_id),
+                        'level': level,
+                        'leaf': leaf
+                    }
+            parents = next_parents
+
+    def _active_item(self, item_id):
+        item = self.items.get(item_id)
+        if item is None:
+            raise EbaySimulatorCallError(self.ITEM_NOT_FOUND_ERROR_CODE,
+                                         'This item cannot be accessed because the listing has been deleted.')
+        if not item['active']:
+            raise EbaySimulatorCallError(self.ITEM_ALREADY_ENDED_ERROR_CODE, 'The auction has already been closed.')
+        return item
+
+    def _add_fees(self, response):
+        fee = self._sub(self._sub(response, 'Fees'), 'Fee')
+        self._sub(fee, 'Name', 'ListingFee')
+        self._sub(fee, 'Fee', '0.0', currencyID='EUR')
+
+    def _add_features(self, node):
+        for tag, value in (('ItemSpecificsEnabled', 'Enabled'), ('VariationsEnabled', 'true')):
+            self._sub(node, tag, value)
+        self._sub(node, 'ListingDuration', '1', type='FixedPriceItem')
+        for method in ('PayPal', 'MoneyXferAccepted'):
+            self._sub(node, 'PaymentMethod', method)
+
+    def _add_order(self, order_array, item_id, item):
+        order_id = unicode(next(self._ids))
+        now = self._now()
+
+        order = self._sub(order_array, 'Order')
+        self._sub(order, 'OrderID', '{}-{}'.format(item_id, order_id))
+        self._sub(order, 'OrderStatus', 'Completed')
+        checkout_status = self._sub(order, 'CheckoutStatus')
+        self._sub(checkout_status, 'Status', 'Complete')
+        self._sub(checkout_status, 'PaymentMethod', 'PayPal')
+        self._sub(checkout_status, 'eBayPaymentStatus', 'NoPaymentFailure')
+        for tag in ('AmountPaid', 'Total', 'Subtotal'):
+            self._sub(order, tag, item['price'], currencyID='EUR')
+        self._sub(order, 'PaidTime', now)
+
+        address = self._sub(order, 'ShippingAddress')
+        for tag, value in (('AddressID', order_id), ('Name', 'Max Mustermann'), ('Street1', 'Voltastr. 5'),
+                           ('Street2', ''), ('CityName', 'Berlin'), ('PostalCode', '13355'),
+                           ('StateOrProvince', ''), ('Country', 'DE'), ('CountryName', 'Deutschland')):
+            self._sub(address, tag, value)
+
+        shipping_service = self._sub(order, 'ShippingServiceSelected')
+        self._sub(shipping_service, 'ShippingService', 'DE_DHLPaket')
+        self._sub(shipping_service, 'ShippingServiceCost', '0.0', currencyID='EUR')
+
+        transaction = self._sub(self._sub(order, 'TransactionArray'), 'Transaction')
+        buyer = self._sub(transaction, 'Buyer')
+        self._sub(buyer, 'Email', 'buyer{}@example.com'.format(order_id))
+        self._sub(buyer, 'UserFirstName', 'Max')
+        self._sub(buyer, 'UserLastName', 'Mustermann')
+        transaction_item = self._sub(transaction, 'Item')
+        self._sub(transaction_item, 'ItemID', item_id)
+        self._sub(transaction_item, 'Title', item['title'] or 'Item {}'.format(item_id))
+        self._sub(transaction_item, 'SKU', item['sku'] or '')
+        self._sub(transaction, 'QuantityPurchased', '1')
+        self._sub(self._sub(transaction, 'Status'), 'CompleteStatus', 'Complete')
+        self._sub(transaction, 'TransactionID', order_id)
+        self._sub(transaction, 'TransactionPrice', item['price'], currencyID='EUR')
+
+    def _response(self, verb, ack='Success'):
+        response = etree.Element('{%s}%sResponse' % (NAMESPACE, verb), nsmap={None: NAMESPACE})
+        self._sub(response, 'Timestamp', self._now())
+        self._sub(response, 'Ack', ack)
+        self._sub(response, 'Version', '911')
+        self._sub(response, 'Build', 'E911_CORE_SIMULATOR')
+        return response
+
+    def _failure(self, verb, error):
+        response = self._response(verb, ack='Failure')
+        self._add_error(response, error)
+        return response
+
+    def _add_error(self, response, error):
+        errors = self._sub(response, 'Errors')
+        self._sub(errors, 'ShortMessage', error.message)
+        self._sub(errors, 'LongMessage', error.message)
+        self._sub(errors, 'ErrorCode', unicode(error.code))
+        self._sub(errors, 'SeverityCode', 'Error')
+        self._sub(errors, 'ErrorClassification', error.classification)
+
+    def _now(self, offset=timedelta()):
+        return (datetime.utcfromtimestamp(self.clock()) + offset).strftime(DATE_FORMAT)
+
+    @staticmethod
+    def _find(node, tag):
+        return node.find('{%s}%s' % (NAMESPACE, tag)) if node is not None else None
+
+    @classmethod
+    def _text(cls, node, tag):
+        child = cls._find(node, tag)
+        return child.text if child is not None else None
+
+    @staticmethod
+    def _sub(node, tag, text=None, **attributes):
+        element = etree.SubElement(node, '{%s}%s' % (NAMESPACE, tag), **attributes)
+        if text is not None:
+            element.text = text
+        return element
@@ -0,0 +1,162 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+from collections import defaultdict
+
+from lxml import etree
+
+
+log = logging.getLogger(__name__)
+
+
+def _local_name(element):
+    # remove xmlns from nodes, the same as ebaysdk does
+    return etree.QName(element).localname
+
+
+def _element_to_dict(element, path, list_nodes):
+    """
+    Converts an element into the same structure ebaysdk's `Response.dict()` would build for it
+
+    :param path: Lowercased dotted path of the element, used to force list nodes
+    :type element: lxml.etree._Element
+    :type path: unicode
+    :type list_nodes: set[unicode]
+    """
+    children = [c for c in element if isinstance(c.tag, basestring)]
+    value = {} if element.attrib else None
+
+    if children:
+        grouped = defaultdict(list)
+        for child in children:
+            name = _local_name(child)
+            grouped[name].append(_element_to_dict(child, '%s.%s' % (path, name.lower()), list_nodes))
+
+        value = {}
+        for name, values in grouped.iteritems():
+            if len(values) == 1 and '%s.%s' % (path, name.lower()) not in list_nodes:
+                value[name] = values[0]
+            else:
+                value[name] = values
+
+    if element.attrib:
+        value.update(('_' + k, v) for k, v in element.attrib.items())
+
+    if element.text:
+        text = element.text.strip()
+        if children or element.attrib:
+            if text:
+                value['value'] = text
+        else:
+            value = text
+
+    return value
+
+
+class EbayStreamingParser(object):
+    """
+    Incremental parser for trading api responses, that returns repeated elements (e.g. `Category`) as soon as they
+    were parsed and drops them from the tree afterwards, so memory stays flat regardless of the response size.
+
+    All other direct children of the response (`Ack`, `Errors`, `CategoryVersion`, ...) are collected in
+    `response_dict`.
+    """
+
+    def __init__(self, tag, list_nodes=None):
+        """
+        :param tag: Local name of the repeated element to stream, e.g. `Category`
+        :param list_nodes: ebaysdk list nodes, which are always returned as list
+
+        :type tag: unicode
+        :type list_nodes: list[unicode] | None
+        """
+        self.tag = tag
+        self.list_nodes = set(n.lower() for n in list_nodes or [])
+        self.response_dict = {}
+
+        self._parser = etree.XMLPullParser(events=('start', 'end'))
+        self._path = []
+        self._item_containers = set()
+
+    @property
+    def ack(self):
+        return self.response_dict.get('Ack')
+
+    @property
+    def failed(self):
+        return self.ack == 'Failure'
+
+    def feed(self, chunk):
+        """
+        :type chunk: str
+        :return: Elements that were completed with this chunk
+        :rtype: list[dict]
+        """
+        self._parser.feed(chunk)
+        return self._read_events()
+
+    def close(self):
+        """
+        :return: Remaining elements
+        :rtype: list[dict]
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        items = []
+
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._path.append(_local_name(element))
+                continue
+
+            name = self._path[-1]
+            depth = len(self._path) - 1
+
+            # elements with the same name nested in a streamed element are part of it
+            if name == self.tag and self._path.count(self.tag) == 1:
+                items.append(_element_to_dict(element, '.'.join(self._path).lower(), self.list_nodes))
+                self._item_containers.add('.'.join(self._path[:-1]))
+                self._release(element)
+            elif depth == 1 and '.'.join(self._path) not in self._item_containers:
+                self._add_to_response(name, _element_to_dict(element, '.'.join(self._path).lower(),
+                                                             self.list_nodes))
+                self._release(element)
+
+            self._path.pop()
+
+        return items
+
+    def _add_to_response(self, name, value):
+        if name not in self.response_dict:
+            self.response_dict[name] = value
+        elif isinstance(self.response_dict[name], list):
+            self.response_dict[name].append(value)
+        else:
+            self.response_dict[name] = [self.response_dict[name], value]
+
+    def _release(self, element):
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+class EbayStreamedResponse(object):
+    """
+    Response of a streamed call, behaves like the ebaysdk response for everything that is not streamed
+    """
+
+    def __init__(self, response, response_dict):
+        """
+        :type response: requests.Response
+        :type response_dict: dict
+        """
+        self.response = response
+        self._dict = response_dict
+
+    def dict(self):
+        return self._dict
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
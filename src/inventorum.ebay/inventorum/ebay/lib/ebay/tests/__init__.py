@@ -1,5 +1,11 @@
+import threading
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+from django.test.utils import override_settings
 from ebaysdk.trading import Connection
 from inventorum.ebay.lib.ebay import EbayTrading
+from inventorum.ebay.lib.ebay.scheduler import EbayCallScheduler
+from inventorum.ebay.lib.ebay.simulator import EbaySimulator
 from inventorum.ebay.tests.testcases import UnitTestCase
 from inventorum.ebay.tests.utils import PatchMixin
 from mock import patch, Mock
@@ -36,10 +42,40 @@ class EbayClassTestCase(UnitTestCase, PatchMixin):
         self.execute_mock.dict.return_value = {}
         self.instance_mock.execute.return_value = self.execute_mock
 
-        self.class_parallel_mock = self.patch('inventorum.ebay.lib.ebay.Parallel', spec=True)
-        self.parallel_mock = self.class_parallel_mock.return_value
-        self.parallel_mock.error.return_value = False
-
     def tearDown(self):
         EbayTrading.default_connection_cls = self.original_class
-        super(EbayClassTestCase, self).tearDown()
\ No newline at end of file
+        super(EbayClassTestCase, self).tearDown()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EbaySimulatorTestMixin(PatchMixin):
+    """ Serves an `EbaySimulator` in a background thread and points all ebay calls of the test at it """
+
+    def start_simulator(self, config=None):
+        """
+        :type config: inventorum.ebay.lib.ebay.simulator.EbaySimulatorConfig | None
+        :rtype: EbaySimulator
+        """
+        simulator = EbaySimulator(config)
+
+        server = make_server('127.0.0.1', 0, simulator, handler_class=QuietRequestHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        # the simulator's throttling is tested, not the call budgets of the client
+        self.patch('inventorum.ebay.lib.ebay.get_call_scheduler', return_value=Mock(spec=EbayCallScheduler))
+
+        settings_override = override_settings(EBAY_DOMAIN='127.0.0.1:{}'.format(server.server_port),
+                                              EBAY_HTTPS=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        return simulator
@@ -17,7 +17,7 @@ class TestEbayBaseClass(EbayClassTestCase):
         self.connection_mock.assert_called_once_with(
             appid=settings.EBAY_APPID, devid=settings.EBAY_DEVID,
             certid=settings.EBAY_CERTID, domain=settings.EBAY_DOMAIN,
-            debug=settings.DEBUG, timeout=20, config_file=None,
+            https=settings.EBAY_HTTPS, debug=settings.DEBUG, timeout=20, config_file=None,
             compatibility=911, version=911, parallel=None)
 
         self.assertEqual(self.config.values['token'], None)
@@ -0,0 +1,171 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import os
+import shutil
+import socket
+import tempfile
+from datetime import timedelta
+
+from inventorum.ebay.lib.ebay import EbayTrading
+from inventorum.ebay.lib.ebay.metrics import EbayMetricsHistogram, InMemoryMetricsSink, FileMetricsSink, \
+    StatsdMetricsSink, EbayCallMetric, InstrumentedConnectionMixin, account_tag
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from inventorum.ebay.lib.queues import EbayQueueMetric
+from inventorum.ebay.tests.testcases import UnitTestCase
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class FakeConnection(object):
+    parallel = None
+    response = None
+
+    def build_request(self, verb, data, verb_attrs):
+        pass
+
+    def execute_request(self):
+        self.response = Mock(content=b'<GetUserResponse/>', elapsed=timedelta(seconds=0.25))
+
+    def process_response(self):
+        pass
+
+
+class InstrumentedFakeConnection(InstrumentedConnectionMixin, FakeConnection):
+    pass
+
+
+class TestEbayMetricsHistogram(UnitTestCase):
+
+    def test_aggregates(self):
+        histogram = EbayMetricsHistogram()
+        for value in (0.1, 0.2, 0.3, 5.0):
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.mean, 1.4)
+        self.assertEqual(histogram.min, 0.1)
+        self.assertEqual(histogram.max, 5.0)
+        self.assertEqual(histogram.quantile(0.5), 0.25)
+        self.assertEqual(histogram.quantile(0.95), 5.0)
+
+    def test_merge_and_serialization(self):
+        first, second = EbayMetricsHistogram(), EbayMetricsHistogram()
+        first.add(1)
+        second.add(1000)
+
+        first.merge(EbayMetricsHistogram.from_dict(second.as_dict()))
+
+        self.assertEqual(first.count, 2)
+        self.assertEqual(first.total, 1001)
+        self.assertEqual(first.max, 1000)
+        self.assertEqual(first.buckets, {0: 1, 10: 1})
+
+
+class TestEbayMetricsSinks(UnitTestCase):
+
+    def test_in_memory_sink(self):
+        sink = InMemoryMetricsSink()
+        sink.record(EbayCallMetric.NETWORK_TIME, 0.5, 'GetOrders', 77, 'abc')
+        sink.record(EbayCallMetric.NETWORK_TIME, 1.5, 'GetOrders', 77, 'abc')
+        sink.record(EbayCallMetric.NETWORK_TIME, 1.0, 'GetOrders', 16, 'abc')
+
+        rows = sink.aggregates()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['site_id'], 77)
+        self.assertEqual(rows[1]['count'], 2)
+        self.assertEqual(rows[1]['mean'], 1.0)
+
+        sink.reset()
+        self.assertEqual(sink.aggregates(), [])
+
+    def test_file_sink_merges_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'metrics', 'ebay_call_metrics.json')
+
+        first = FileMetricsSink(path, flush_interval=60)
+        second = FileMetricsSink(path, flush_interval=60)
+
+        first.record(EbayCallMetric.RESPONSE_BYTES, 100, 'GetOrders', 77, 'abc')
+        second.record(EbayCallMetric.RESPONSE_BYTES, 300, 'GetOrders', 77, 'abc')
+        first.flush()
+
+        rows = second.aggregates()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['count'], 2)
+        self.assertEqual(rows[0]['mean'], 200)
+
+        first.reset()
+        self.assertEqual(second.aggregates(), [])
+
+    def test_statsd_sink(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1)
+        self.addCleanup(server.close)
+
+        sink = StatsdMetricsSink(port=server.getsockname()[1], prefix='ebay')
+        sink.record(EbayCallMetric.PARSE_TIME, 0.0125, 'GetOrders', 77, 'abc')
+        self.assertEqual(server.recv(1024), b'ebay.GetOrders.site_77.parse_time:12.500|ms')
+
+        sink = StatsdMetricsSink(port=server.getsockname()[1], prefix='ebay', tags=True)
+        sink.record(EbayCallMetric.RESPONSE_BYTES, 2048, 'GetOrders', 77, 'abc')
+        self.assertEqual(server.recv(1024), b'ebay.GetOrders.response_bytes:2048|h|#site_id:77,account:abc')
+
+        # queue metrics are recorded without site and account
+        sink.record(EbayQueueMetric.LATENCY, 1.5, 'ebay_stock', None, None)
+        self.assertEqual(server.recv(1024), b'ebay.ebay_stock.queue_latency:1500.000|ms')
+
+
+class TestInstrumentedConnection(UnitTestCase):
+
+    def test_measures_call_phases(self):
+        connection = InstrumentedFakeConnection()
+        connection.build_request('GetUser', {}, None)
+        connection.execute_request()
+        connection.process_response()
+
+        self.assertEqual(sorted(connection.call_metrics.keys()), ['build_time', 'network_time', 'parse_time',
+                                                                  'response_bytes'])
+        self.assertEqual(connection.call_metrics[EbayCallMetric.RESPONSE_BYTES], 18)
+
+    def test_parallel_network_time_is_taken_from_response(self):
+        connection = InstrumentedFakeConnection()
+        connection.parallel = Mock()
+        connection.build_request('GetUser', {}, None)
+        connection.execute_request()
+        connection.process_response()
+
+        self.assertEqual(connection.call_metrics[EbayCallMetric.NETWORK_TIME], 0.25)
+
+
+class TestEbayExecuteRecordsMetrics(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayExecuteRecordsMetrics, self).setUp()
+
+        self.sink = InMemoryMetricsSink()
+        self.patch('inventorum.ebay.lib.ebay.metrics.get_metrics_sink', return_value=self.sink)
+
+    def test_execute(self):
+        self.instance_mock.call_metrics = {EbayCallMetric.BUILD_TIME: 0.001, EbayCallMetric.NETWORK_TIME: 0.2,
+                                           EbayCallMetric.RESPONSE_BYTES: 512, EbayCallMetric.PARSE_TIME: 0.01}
+
+        ebay = EbayTrading(None)
+        ebay.execute('GetUser', {})
+        with ebay.timed_deserialization('GetUser'):
+            pass
+
+        rows = self.sink.aggregates()
+        self.assertEqual([row['metric'] for row in rows], ['build_time', 'deserialization_time', 'network_time',
+                                                           'parse_time', 'response_bytes'])
+        self.assertTrue(all(row['verb'] == 'GetUser' and row['site_id'] == 77 and row['account'] == 'anonymous'
+                            for row in rows))
+
+    def test_account_tag(self):
+        self.assertEqual(account_tag(None), 'anonymous')
+        self.assertEqual(len(account_tag('token')), 10)
+        self.assertNotEqual(account_tag('token'), account_tag('other token'))
@@ -0,0 +1,165 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import os
+import shutil
+import tempfile
+
+from ebaysdk.exception import ConnectionError
+from inventorum.ebay.lib.ebay import EbayTrading, EbayConnectionException
+from inventorum.ebay.lib.ebay.scheduler import EbayCallScheduler, EbayCallBudget, LocalCallBudgetStore, \
+    FileLockCallBudgetStore, EbayCallPriority, EbayCallBudgetExceeded
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import FakeClock
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbayCallScheduler(UnitTestCase):
+
+    def setUp(self):
+        super(TestEbayCallScheduler, self).setUp()
+
+        self.clock = FakeClock()
+        self.subject = self.make_scheduler(LocalCallBudgetStore())
+
+    def make_scheduler(self, store):
+        return EbayCallScheduler(store=store,
+                                 app_budget=EbayCallBudget(rate=10, capacity=10),
+                                 token_budget=EbayCallBudget(rate=2, capacity=4),
+                                 priority_reserves={
+                                     EbayCallPriority.HIGH: 0.0,
+                                     EbayCallPriority.NORMAL: 0.0,
+                                     EbayCallPriority.LOW: 0.5
+                                 },
+                                 max_wait=10,
+                                 clock=self.clock.time,
+                                 sleep=self.clock.sleep)
+
+    def test_bursts_within_capacity_do_not_wait(self):
+        for _ in range(4):
+            self.subject.acquire("app", "token")
+
+        self.assertEqual(self.clock.slept, [])
+
+    def test_waits_for_token_budget(self):
+        for _ in range(5):
+            self.subject.acquire("app", "token")
+
+        # token bucket is refilled with 2 calls per second
+        self.assertEqual(self.clock.slept, [0.5])
+
+    def test_tokens_have_separate_budgets(self):
+        for _ in range(4):
+            self.subject.acquire("app", "token")
+            self.subject.acquire("app", "other token")
+
+        self.assertEqual(self.clock.slept, [])
+
+        # but share the app budget
+        for _ in range(3):
+            self.subject.acquire("app", "third token")
+        self.assertEqual(self.clock.slept, [0.1])
+
+    def test_low_priority_leaves_reserve_for_high_priority(self):
+        self.subject.acquire("app", "token", EbayCallPriority.LOW)
+        self.subject.acquire("app", "token", EbayCallPriority.LOW)
+        self.assertEqual(self.clock.slept, [])
+
+        # 2 calls left, but low priority calls must leave 2 for others
+        self.subject.acquire("app", "token", EbayCallPriority.HIGH)
+        self.subject.acquire("app", "token", EbayCallPriority.HIGH)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_low_priority_waits_for_reserve(self):
+        self.subject.acquire("app", "token", EbayCallPriority.LOW)
+        self.subject.acquire("app", "token", EbayCallPriority.LOW)
+        self.subject.acquire("app", "token", EbayCallPriority.LOW)
+
+        self.assertEqual(self.clock.slept, [0.5])
+
+    def test_gives_up_after_max_wait(self):
+        for _ in range(4):
+            self.subject.acquire("app", "token")
+
+        self.subject.max_wait = 0.1
+        with self.assertRaises(EbayCallBudgetExceeded):
+            self.subject.acquire("app", "token")
+
+    def test_throttling_slows_down_and_recovers(self):
+        self.subject.report_throttled("app", "token")
+
+        # bucket is empty and refilled with half of the rate
+        self.subject.acquire("app", "token")
+        self.assertEqual(self.clock.slept, [1.0])
+
+        # rate recovers over time
+        self.clock.now += 1000
+        self.clock.slept = []
+        for _ in range(5):
+            self.subject.acquire("app", "token")
+        self.assertEqual(self.clock.slept, [0.5])
+
+    def test_is_throttling_error(self):
+        self.assertTrue(EbayCallScheduler.is_throttling_error([Mock(code=1), Mock(code=518)]))
+        self.assertFalse(EbayCallScheduler.is_throttling_error([Mock(code=1)]))
+        self.assertFalse(EbayCallScheduler.is_throttling_error(None))
+
+    def test_file_lock_store_shares_budgets(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "budgets", "budgets.json")
+
+        # two schedulers with separate stores on the same file behave like two worker processes
+        first = self.make_scheduler(FileLockCallBudgetStore(path))
+        second = self.make_scheduler(FileLockCallBudgetStore(path))
+
+        first.acquire("app", "token")
+        first.acquire("app", "token")
+        second.acquire("app", "token")
+        second.acquire("app", "token")
+        self.assertEqual(self.clock.slept, [])
+
+        second.acquire("app", "token")
+        self.assertEqual(self.clock.slept, [0.5])
+
+
+class TestEbayExecuteWithCallScheduler(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayExecuteWithCallScheduler, self).setUp()
+
+        self.scheduler = Mock(spec=EbayCallScheduler)
+        self.scheduler.is_throttling_error.side_effect = EbayCallScheduler.is_throttling_error
+        self.patch('inventorum.ebay.lib.ebay.get_call_scheduler', return_value=self.scheduler)
+
+    def test_acquires_budget_with_priority(self):
+        ebay = EbayTrading(None, priority=EbayCallPriority.HIGH)
+        ebay.execute('Test', {})
+
+        self.assertEqual(self.scheduler.acquire.call_count, 1)
+        self.assertEqual(self.scheduler.acquire.call_args[0][2], EbayCallPriority.HIGH)
+
+    def test_default_priority(self):
+        ebay = EbayTrading(None)
+        ebay.execute('Test', {})
+
+        self.assertEqual(self.scheduler.acquire.call_args[0][2], EbayCallPriority.NORMAL)
+
+    def test_reports_throttling(self):
+        error_response = Mock()
+        error_response.dict.return_value = {'Errors': {'ErrorCode': '518',
+                                                       'ErrorClassification': 'RequestError',
+                                                       'LongMessage': 'Call usage limit has been reached.',
+                                                       'SeverityCode': 'Error',
+                                                       'ShortMessage': 'Call usage limit has been reached.'}}
+        self.instance_mock.execute.side_effect = ConnectionError("test", error_response)
+
+        ebay = EbayTrading(None)
+        with self.assertRaises(EbayConnectionException):
+            ebay.execute('Test', {})
+
+        self.assertEqual(self.scheduler.report_throttled.call_count, 1)
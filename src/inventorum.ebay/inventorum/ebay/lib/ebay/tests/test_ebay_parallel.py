@@ -0,0 +1,124 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import threading
+import time
+
+from ebaysdk.exception import ConnectionError
+from inventorum.ebay.lib.ebay import EbayParallel, EbayRetryPolicy, EbayConnectionException
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from mock import Mock
+from requests.exceptions import Timeout
+
+
+log = logging.getLogger(__name__)
+
+
+def ebay_failure(code):
+    response = Mock()
+    response.dict.return_value = {'Errors': {'ErrorCode': code, 'ErrorClassification': 'RequestError',
+                                             'LongMessage': 'Failed', 'SeverityCode': 'Error',
+                                             'ShortMessage': 'Failed'}}
+    return ConnectionError('Failed', response)
+
+
+class TestEbayParallel(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayParallel, self).setUp()
+
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = {}
+
+        self.instance_mock.execute.side_effect = self._execute
+
+    def _execute(self, verb, data):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(data.get('Delay', 0.01))
+
+            failures = self.failures.get(data['Index'])
+            if failures:
+                raise failures.pop(0)
+
+            response = Mock()
+            response.dict.return_value = {'Ack': 'Success', 'Index': data['Index']}
+            return response
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def test_bounded_concurrency_and_submission_order(self):
+        parallel = EbayParallel(None, max_in_flight=3)
+        for index in range(10):
+            self.assertEqual(parallel.execute('GetItem', {'Index': index, 'Delay': 0.001 * (10 - index)}), index)
+
+        results = parallel.wait()
+
+        self.assertEqual([r.index for r in results], range(10))
+        self.assertEqual([r.dict()['Index'] for r in results], range(10))
+        self.assertTrue(all(r.succeeded and r.attempts == 1 for r in results))
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertGreater(self.max_in_flight, 1)
+
+        # queued calls are sent only once
+        self.assertEqual(parallel.wait(), [])
+        self.assertEqual(self.instance_mock.execute.call_count, 10)
+
+    def test_iteration_yields_results_as_they_complete(self):
+        parallel = EbayParallel(None, max_in_flight=2)
+        parallel.execute('GetItem', {'Index': 0, 'Delay': 0.2})
+        parallel.execute('GetItem', {'Index': 1, 'Delay': 0.0})
+
+        self.assertEqual([result.index for result in parallel], [1, 0])
+
+    def test_retries_and_per_call_errors(self):
+        self.failures = {
+            0: [ebay_failure(10007), Timeout('timed out')],
+            1: [ebay_failure(37)]
+        }
+
+        parallel = EbayParallel(None, retry_policy=EbayRetryPolicy(max_attempts=3, backoff=0))
+        parallel.execute('GetItem', {'Index': 0})
+        parallel.execute('GetItem', {'Index': 1})
+        parallel.execute('GetItem', {'Index': 2})
+
+        retried, failed, succeeded = parallel.wait()
+
+        self.assertTrue(retried.succeeded)
+        self.assertEqual(retried.attempts, 3)
+
+        self.assertFalse(failed.succeeded)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual([e.code for e in failed.errors], [37])
+        self.assertRaises(EbayConnectionException, failed.dict)
+
+        self.assertEqual(succeeded.errors, [])
+
+        self.failures = {1: [ebay_failure(37)]}
+        parallel.execute('GetItem', {'Index': 0})
+        parallel.execute('GetItem', {'Index': 1})
+        with self.assertRaises(EbayConnectionException) as e:
+            parallel.wait_and_validate()
+        self.assertEqual(e.exception.errors[0].code, 37)
+
+    def test_per_call_timeout(self):
+        parallel = EbayParallel(None)
+        parallel.execute('GetItem', {'Index': 0}, timeout=3)
+        parallel.wait()
+
+        self.assertEqual(self.instance_mock.timeout, 3)
+
+    def test_retry_policy(self):
+        policy = EbayRetryPolicy(max_attempts=2, backoff=0.5)
+
+        self.assertTrue(policy.should_retry(1, Timeout()))
+        self.assertFalse(policy.should_retry(2, Timeout()))
+        self.assertFalse(policy.should_retry(1, ValueError()))
+        self.assertEqual(policy.delay(1), 0.5)
+        self.assertEqual(policy.delay(3), 2.0)
@@ -0,0 +1,125 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from inventorum.ebay.lib.ebay import EbayTrading
+from inventorum.ebay.lib.ebay.cache import EbayResponseCache
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import FakeClock
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbayResponseCache(UnitTestCase):
+
+    def setUp(self):
+        super(TestEbayResponseCache, self).setUp()
+
+        self.clock = FakeClock()
+        self.subject = EbayResponseCache(max_size=2, ttls={'GeteBayDetails': 60,
+                                                           'GetCategoryFeatures': 60,
+                                                           'GetUser': 60}, clock=self.clock)
+
+    def test_caches_by_verb_request_and_site(self):
+        self.subject.set('GeteBayDetails', {'DetailName': 'ShippingServiceDetails'}, 77, {'Ack': 'Success'})
+
+        self.assertEqual(self.subject.get('GeteBayDetails', {'DetailName': 'ShippingServiceDetails'}, 77),
+                         {'Ack': 'Success'})
+        self.assertIsNone(self.subject.get('GeteBayDetails', {'DetailName': 'ShippingServiceDetails'}, 16))
+        self.assertIsNone(self.subject.get('GeteBayDetails', {'DetailName': 'ReturnPolicyDetails'}, 77))
+
+        self.assertEqual(self.subject.stats.hits, 1)
+        self.assertEqual(self.subject.stats.misses, 2)
+
+    def test_returns_copies(self):
+        self.subject.set('GeteBayDetails', {}, 77, {'Details': ['a']})
+
+        self.subject.get('GeteBayDetails', {}, 77)['Details'].append('b')
+        self.assertEqual(self.subject.get('GeteBayDetails', {}, 77), {'Details': ['a']})
+
+    def test_only_verbs_with_ttl_are_cached(self):
+        self.assertFalse(self.subject.is_cacheable('AddFixedPriceItem'))
+
+        self.subject.set('AddFixedPriceItem', {}, 77, {'ItemID': '1'})
+        self.assertIsNone(self.subject.get('AddFixedPriceItem', {}, 77))
+        self.assertEqual(len(self.subject), 0)
+
+    def test_entries_expire(self):
+        self.subject.set('GeteBayDetails', {}, 77, {'Ack': 'Success'})
+
+        self.clock.now += 61
+        self.assertIsNone(self.subject.get('GeteBayDetails', {}, 77))
+        self.assertEqual(self.subject.stats.expired, 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.subject.set('GeteBayDetails', {'DetailName': 'a'}, 77, {'name': 'a'})
+        self.subject.set('GeteBayDetails', {'DetailName': 'b'}, 77, {'name': 'b'})
+        self.subject.get('GeteBayDetails', {'DetailName': 'a'}, 77)
+
+        self.subject.set('GeteBayDetails', {'DetailName': 'c'}, 77, {'name': 'c'})
+
+        self.assertIsNone(self.subject.get('GeteBayDetails', {'DetailName': 'b'}, 77))
+        self.assertIsNotNone(self.subject.get('GeteBayDetails', {'DetailName': 'a'}, 77))
+        self.assertIsNotNone(self.subject.get('GeteBayDetails', {'DetailName': 'c'}, 77))
+        self.assertEqual(self.subject.stats.evicted, 1)
+
+    def test_user_responses_are_scoped_by_token(self):
+        self.subject.set('GetUser', {}, 77, {'User': 'first'}, token_value='first token')
+
+        self.assertIsNone(self.subject.get('GetUser', {}, 77, token_value='second token'))
+        self.assertEqual(self.subject.get('GetUser', {}, 77, token_value='first token'), {'User': 'first'})
+
+    def test_new_category_version_outdates_category_bound_responses(self):
+        self.subject.observe(77, {'CategoryVersion': '113'})
+        self.subject.set('GetCategoryFeatures', {}, 77, {'CategoryVersion': '113'})
+        self.subject.set('GeteBayDetails', {}, 77, {'Ack': 'Success'})
+
+        self.subject.observe(77, {'CategoryVersion': '113'})
+        self.assertIsNotNone(self.subject.get('GetCategoryFeatures', {}, 77))
+
+        # other sites are not affected
+        self.subject.observe(16, {'CategoryVersion': '114'})
+        self.assertIsNotNone(self.subject.get('GetCategoryFeatures', {}, 77))
+
+        self.subject.observe(77, {'CategoryVersion': '114'})
+        self.assertIsNone(self.subject.get('GetCategoryFeatures', {}, 77))
+        self.assertIsNotNone(self.subject.get('GeteBayDetails', {}, 77))
+        self.assertEqual(self.subject.stats.outdated, 1)
+
+
+class TestEbayExecuteWithResponseCache(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayExecuteWithResponseCache, self).setUp()
+
+        self.cache = EbayResponseCache(max_size=10, ttls={'GetCategoryFeatures': 60})
+        self.patch('inventorum.ebay.lib.ebay.get_response_cache', return_value=self.cache)
+
+        self.execute_mock.dict.return_value = {'CategoryVersion': '113', 'Category': {'CategoryID': '1'}}
+
+    def test_repeated_calls_are_served_from_cache(self):
+        first = EbayTrading(None).execute('GetCategoryFeatures', {'CategoryID': '1'})
+        second = EbayTrading(None).execute('GetCategoryFeatures', {'CategoryID': '1'})
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.instance_mock.execute.call_count, 1)
+
+        EbayTrading(None).execute('GetCategoryFeatures', {'CategoryID': '2'})
+        self.assertEqual(self.instance_mock.execute.call_count, 2)
+
+    def test_other_verbs_are_not_cached(self):
+        EbayTrading(None).execute('ReviseFixedPriceItem', {})
+        EbayTrading(None).execute('ReviseFixedPriceItem', {})
+
+        self.assertEqual(self.instance_mock.execute.call_count, 2)
+
+    def test_changed_category_version_refetches(self):
+        EbayTrading(None).execute('GetCategoryFeatures', {'CategoryID': '1'})
+
+        self.execute_mock.dict.return_value = {'CategoryVersion': '114'}
+        EbayTrading(None).execute('GetCategories', {})
+
+        EbayTrading(None).execute('GetCategoryFeatures', {'CategoryID': '1'})
+        self.assertEqual(self.instance_mock.execute.call_count, 3)
@@ -0,0 +1,120 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from ebaysdk.exception import ConnectionError
+from inventorum.ebay.lib.ebay import EbayTrading, EbayConnectionException
+from inventorum.ebay.lib.ebay.pool import EbaySessionPool
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import FakeClock
+from mock import Mock
+from requests.exceptions import Timeout
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbaySessionPool(UnitTestCase):
+
+    def setUp(self):
+        super(TestEbaySessionPool, self).setUp()
+
+        self.clock = FakeClock()
+        self.subject = EbaySessionPool(max_size=2, idle_timeout=60, clock=self.clock)
+
+    def test_reuses_released_sessions_per_domain_and_site(self):
+        first = self.subject.lease("api.ebay.com", 77)
+        self.assertFalse(first.reused)
+        self.subject.release(first)
+
+        second = self.subject.lease("api.ebay.com", 77)
+        self.assertTrue(second.reused)
+        self.assertIs(second.session, first.session)
+        self.subject.release(second)
+
+        other_site = self.subject.lease("api.ebay.com", 16)
+        self.assertFalse(other_site.reused)
+        self.assertIsNot(other_site.session, first.session)
+
+        self.assertEqual(self.subject.stats.as_dict(), {
+            'calls': 3,
+            'reused': 1,
+            'created': 2,
+            'evicted': 0,
+            'discarded': 0,
+            'reuse_ratio': 1.0 / 3
+        })
+
+    def test_concurrent_leases_get_separate_sessions(self):
+        first = self.subject.lease("api.ebay.com", 77)
+        second = self.subject.lease("api.ebay.com", 77)
+
+        self.assertIsNot(first.session, second.session)
+
+    def test_pool_size_is_bounded(self):
+        leases = [self.subject.lease("api.ebay.com", 77) for _ in range(3)]
+        for lease in leases:
+            self.subject.release(lease)
+
+        self.assertEqual(self.subject.idle_count("api.ebay.com", 77), 2)
+        self.assertEqual(self.subject.stats.evicted, 1)
+
+    def test_idle_sessions_are_evicted(self):
+        lease = self.subject.lease("api.ebay.com", 77)
+        self.subject.release(lease)
+
+        self.clock.now += 61
+
+        next_lease = self.subject.lease("api.ebay.com", 77)
+        self.assertFalse(next_lease.reused)
+        self.assertEqual(self.subject.stats.evicted, 1)
+
+    def test_broken_sessions_are_not_reused(self):
+        lease = self.subject.lease("api.ebay.com", 77)
+        lease.broken = True
+        self.subject.release(lease)
+
+        self.assertEqual(self.subject.idle_count("api.ebay.com", 77), 0)
+        self.assertEqual(self.subject.stats.discarded, 1)
+
+
+class TestEbayExecuteWithSessionPool(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayExecuteWithSessionPool, self).setUp()
+
+        self.pool = EbaySessionPool(max_size=2, idle_timeout=60)
+        self.patch('inventorum.ebay.lib.ebay.get_session_pool', return_value=self.pool)
+
+    def test_consecutive_calls_share_session(self):
+        ebay = EbayTrading(None)
+        ebay.execute('Test', {})
+        first_session = self.instance_mock.session
+
+        other_ebay = EbayTrading(None)
+        other_ebay.execute('Test', {})
+
+        self.assertIs(self.instance_mock.session, first_session)
+        self.assertEqual(self.pool.stats.reused, 1)
+
+    def test_session_is_returned_after_ebay_errors(self):
+        error_response = Mock()
+        error_response.dict.return_value = {'Errors': []}
+        self.instance_mock.execute.side_effect = ConnectionError("test", error_response)
+
+        ebay = EbayTrading(None)
+        with self.assertRaises(EbayConnectionException):
+            ebay.execute('Test', {})
+
+        self.assertEqual(self.pool.idle_count(None, 77), 1)
+
+    def test_session_is_discarded_after_network_errors(self):
+        self.instance_mock.execute.side_effect = Timeout()
+
+        ebay = EbayTrading(None)
+        with self.assertRaises(Timeout):
+            ebay.execute('Test', {})
+
+        self.assertEqual(self.pool.idle_count(None, 77), 0)
+        self.assertEqual(self.pool.stats.discarded, 1)
@@ -0,0 +1,156 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from inventorum.ebay.lib.ebay import EbayTrading, EbayConnectionException
+from inventorum.ebay.lib.ebay.categories import EbayCategories
+from inventorum.ebay.lib.ebay.data.items import EbayInventoryStatus
+from inventorum.ebay.lib.ebay.data.categories import EbayCategorySerializer
+from inventorum.ebay.lib.ebay.data.responses import GetOrdersResponseType
+from inventorum.ebay.lib.ebay.items import EbayItems
+from inventorum.ebay.lib.ebay.simulator import EbaySimulator, EbaySimulatorConfig, NAMESPACE
+from inventorum.ebay.lib.ebay.tests import EbaySimulatorTestMixin
+from inventorum.ebay.tests.testcases import UnitTestCase
+from inventorum.ebay.tests.utils import CompiledDeserializerParityMixin
+from lxml import etree
+
+
+log = logging.getLogger(__name__)
+
+
+class TestEbaySimulator(UnitTestCase, EbaySimulatorTestMixin, CompiledDeserializerParityMixin):
+
+    def setUp(self):
+        super(TestEbaySimulator, self).setUp()
+        self.simulator = self.start_simulator(EbaySimulatorConfig(category_tree=(2, 3), orders_per_call=2, seed=1))
+
+    def test_listing_lifecycle(self):
+        ebay = EbayTrading(None)
+
+        response = ebay.execute('AddFixedPriceItem', {'Item': {'Title': 'Test', 'SKU': 'invdev_1', 'Quantity': 3,
+                                                                'StartPrice': '1.99'}})
+        item_id = response['ItemID']
+        self.assertEqual(self.simulator.items[item_id]['quantity'], 3)
+
+        ebay.execute('ReviseFixedPriceItem', {'Item': {'ItemID': item_id, 'Quantity': 1}})
+        self.assertEqual(self.simulator.items[item_id]['quantity'], 1)
+
+        orders = GetOrdersResponseType.Deserializer(data=ebay.execute('GetOrders', {})).build()
+        self.assertEqual(len(orders.orders), 2)
+        self.assertEqual(orders.orders[0].transactions[0].item.item_id, item_id)
+
+        ebay.execute('EndFixedPriceItem', {'ItemID': item_id, 'EndingReason': 'NotAvailable'})
+        with self.assertRaises(EbayConnectionException) as e:
+            ebay.execute('EndFixedPriceItem', {'ItemID': item_id, 'EndingReason': 'NotAvailable'})
+        self.assertEqual(e.exception.errors[0].code, EbaySimulator.ITEM_ALREADY_ENDED_ERROR_CODE)
+
+        self.assertEqual(self.simulator.stats.calls, 5)
+        self.assertEqual(self.simulator.stats.failed, 1)
+
+    def test_category_calls(self):
+        ebay = EbayCategories(None)
+
+        categories = list(ebay.get_categories())
+        self.assertEqual(len(categories), 2 + 2 * 3)
+        self.assertEqual(categories[0].parent_id, None)
+        self.assertEqual(len([c for c in categories if c.leaf]), 6)
+        self.assertEqual(ebay.get_category_version(), '1')
+
+        feature = ebay.get_features_for_category('3')
+        self.assertEqual(feature.details.category_id, '3')
+        self.assertTrue(feature.details.item_specifics_enabled)
+
+        features = ebay.get_features_for_categories(['3', '4', '5'])
+        self.assertEqual(sorted(features.keys()), ['3', '4', '5'])
+
+        specifics = ebay.get_specifics_for_categories(['3', '4'])
+        self.assertEqual(sorted(specifics.keys()), ['3', '4'])
+        self.assertEqual(specifics['3'].name_recommendations[0].name, 'Marke')
+
+    def test_compiled_deserialization_parity(self):
+        ebay = EbayTrading(None)
+        for sku in ('invdev_1', 'invdev_2'):
+            ebay.execute('AddFixedPriceItem', {'Item': {'Title': 'Test', 'SKU': sku, 'Quantity': 3,
+                                                        'StartPrice': '1.99'}})
+
+        orders = self.assertCompiledParity(GetOrdersResponseType.Deserializer, ebay.execute('GetOrders', {}))
+        self.assertEqual(len(orders.orders), 2)
+
+        no_orders = self.assertCompiledParity(GetOrdersResponseType.Deserializer, {
+            'OrderArray': None, 'PaginationResult': {'TotalNumberOfEntries': '0', 'TotalNumberOfPages': '0'},
+            'PageNumber': '1'
+        })
+        self.assertEqual(no_orders.orders, [])
+
+        categories = ebay.execute('GetCategories', {'DetailLevel': 'ReturnAll'})['CategoryArray']['Category']
+        for category in categories:
+            self.assertCompiledParity(EbayCategorySerializer, category)
+
+    def test_injected_errors_and_throttling(self):
+        self.simulator.config.error_rate = 1.0
+        with self.assertRaises(EbayConnectionException) as e:
+            EbayTrading(None).execute('GeteBayDetails', {})
+        self.assertEqual(e.exception.errors[0].code, EbaySimulator.INTERNAL_ERROR_CODE)
+
+        self.simulator.config.error_rate = 0.0
+        self.simulator.config.throttle_rate = 0.001
+        self.simulator.config.throttle_capacity = 1
+
+        EbayTrading(None).execute('GeteBayDetails', {})
+        with self.assertRaises(EbayConnectionException) as e:
+            EbayTrading(None).execute('GeteBayDetails', {})
+        self.assertEqual(e.exception.errors[0].code, EbaySimulator.CALL_LIMIT_ERROR_CODE)
+        self.assertEqual(self.simulator.stats.throttled, 1)
+
+    def test_malformed_request(self):
+        response = etree.fromstring(self.simulator.handle('GeteBayDetails', None, b'<GeteBayDetailsRequest><'))
+
+        self.assertEqual(response.findtext('{%s}Ack' % NAMESPACE), 'Failure')
+        self.assertEqual(response.findtext('{%s}Errors/{%s}ErrorCode' % (NAMESPACE, NAMESPACE)),
+                         unicode(EbaySimulator.XML_PARSE_ERROR_CODE))
+        self.assertEqual(self.simulator.stats.failed, 1)
+
+    def test_revise_inventory_status(self):
+        ebay = EbayItems(None)
+        item_id = ebay.execute('AddFixedPriceItem', {'Item': {'Title': 'Test', 'SKU': 'invdev_1', 'Quantity': 3,
+                                                              'StartPrice': '1.99'}})['ItemID']
+
+        response = ebay.revise_inventory_status([
+            EbayInventoryStatus(item_id=item_id, quantity=5),
+            EbayInventoryStatus(item_id=item_id, sku='invdev_2', quantity=1, start_price='2.5'),
+            EbayInventoryStatus(item_id='1', quantity=1)
+        ])
+
+        self.assertTrue(response.is_revised(EbayInventoryStatus(item_id=item_id)))
+        self.assertTrue(response.is_revised(EbayInventoryStatus(item_id=item_id, sku='invdev_2')))
+        self.assertFalse(response.is_revised(EbayInventoryStatus(item_id='1')))
+        self.assertEqual([e.code for e in response.errors], [EbaySimulator.ITEM_NOT_FOUND_ERROR_CODE])
+
+        self.assertEqual(self.simulator.items[item_id]['quantity'], 5)
+        self.assertEqual(self.simulator.items[item_id]['variations']['invdev_2'], {'quantity': 1, 'price': '2.50'})
+
+        with self.assertRaises(EbayConnectionException):
+            ebay.revise_inventory_status([EbayInventoryStatus(item_id='1', quantity=1)])
+
+    def test_end_items(self):
+        ebay = EbayItems(None)
+        item_ids = [ebay.execute('AddFixedPriceItem', {'Item': {'Title': 'Test', 'SKU': 'invdev_{}'.format(i),
+                                                                'Quantity': 1, 'StartPrice': '1.99'}})['ItemID']
+                    for i in range(2)]
+        ebay.unpublish(item_ids[1])
+
+        response = ebay.end_items(item_ids + ['1'])
+
+        self.assertEqual([r.correlation_id for r in response.results], item_ids + ['1'])
+        self.assertTrue(response.get_result(item_ids[0]).is_ended)
+        self.assertIsNotNone(response.get_result(item_ids[0]).end_time)
+        self.assertEqual([e.code for e in response.get_result(item_ids[1]).errors],
+                         [EbaySimulator.ITEM_ALREADY_ENDED_ERROR_CODE])
+        self.assertFalse(response.get_result('1').is_ended)
+        self.assertEqual(response.errors, [])
+
+        self.assertFalse(self.simulator.items[item_ids[0]]['active'])
+
+        # the listings of one call fail one by one, even if all of them fail
+        response = ebay.end_items(item_ids)
+        self.assertFalse(any(r.is_ended for r in response.results))
@@ -0,0 +1,196 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from inventorum.ebay.lib.ebay import EbayTrading, EbayConnectionException
+from inventorum.ebay.lib.ebay.categories import EbayCategories
+from inventorum.ebay.lib.ebay.data.categories import EbayCategory
+from inventorum.ebay.lib.ebay.pool import EbaySessionLease
+from inventorum.ebay.lib.ebay.streaming import EbayStreamingParser
+from inventorum.ebay.lib.ebay.tests import EbayClassTestCase
+from inventorum.ebay.tests.testcases import UnitTestCase
+from mock import Mock
+
+
+log = logging.getLogger(__name__)
+
+
+CATEGORIES_RESPONSE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<GetCategoriesResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Timestamp>2015-05-06T10:00:00.000Z</Timestamp>
+  <Ack>Success</Ack>
+  <Version>911</Version>
+  <CategoryArray>
+    <Category>
+      <BestOfferEnabled>true</BestOfferEnabled>
+      <AutoPayEnabled>true</AutoPayEnabled>
+      <CategoryID>353</CategoryID>
+      <CategoryLevel>1</CategoryLevel>
+      <CategoryName>Antiquit\xc3\xa4ten &amp; Kunst</CategoryName>
+      <CategoryParentID>353</CategoryParentID>
+    </Category>
+    <Category>
+      <CategoryID>37903</CategoryID>
+      <CategoryLevel>2</CategoryLevel>
+      <CategoryName>Antiquarische B\xc3\xbccher</CategoryName>
+      <CategoryParentID>353</CategoryParentID>
+      <LeafCategory>true</LeafCategory>
+    </Category>
+  </CategoryArray>
+  <CategoryCount>2</CategoryCount>
+  <CategoryVersion>113</CategoryVersion>
+</GetCategoriesResponse>
+"""
+
+FAILURE_RESPONSE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<GetCategoriesResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Ack>Failure</Ack>
+  <Errors>
+    <ShortMessage>Call usage limit has been reached.</ShortMessage>
+    <LongMessage>Call usage limit has been reached.</LongMessage>
+    <ErrorCode>518</ErrorCode>
+    <SeverityCode>Error</SeverityCode>
+    <ErrorClassification>RequestError</ErrorClassification>
+  </Errors>
+</GetCategoriesResponse>
+"""
+
+
+def chunked(content, size):
+    return [content[i:i + size] for i in range(0, len(content), size)]
+
+
+class TestEbayStreamingParser(UnitTestCase):
+
+    def parse(self, content, tag, list_nodes=None, chunk_size=7):
+        parser = EbayStreamingParser(tag, list_nodes)
+        items = []
+        for chunk in chunked(content, chunk_size):
+            items.extend(parser.feed(chunk))
+        items.extend(parser.close())
+        return parser, items
+
+    def test_streams_repeated_elements(self):
+        parser, categories = self.parse(CATEGORIES_RESPONSE, 'Category')
+
+        self.assertEqual(len(categories), 2)
+        self.assertEqual(categories[0], {
+            'BestOfferEnabled': 'true',
+            'AutoPayEnabled': 'true',
+            'CategoryID': '353',
+            'CategoryLevel': '1',
+            'CategoryName': 'Antiquit\xe4ten & Kunst',
+            'CategoryParentID': '353'
+        })
+        self.assertEqual(categories[1]['CategoryName'], 'Antiquarische B\xfccher')
+
+        self.assertEqual(parser.ack, 'Success')
+        self.assertFalse(parser.failed)
+        self.assertEqual(parser.response_dict, {
+            'Timestamp': '2015-05-06T10:00:00.000Z',
+            'Ack': 'Success',
+            'Version': '911',
+            'CategoryCount': '2',
+            'CategoryVersion': '113'
+        })
+
+    def test_elements_are_yielded_as_soon_as_they_are_complete(self):
+        parser = EbayStreamingParser('Category')
+        first_category_end = CATEGORIES_RESPONSE.index(b'</Category>') + len(b'</Category>')
+
+        self.assertEqual(len(parser.feed(CATEGORIES_RESPONSE[:first_category_end])), 1)
+        self.assertEqual(len(parser.feed(CATEGORIES_RESPONSE[first_category_end:])), 1)
+        self.assertEqual(parser.close(), [])
+
+    def test_list_nodes_and_attributes(self):
+        content = b"""<GetCategorySpecificsResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+          <Ack>Warning</Ack>
+          <Errors><ShortMessage>First</ShortMessage></Errors>
+          <Errors><ShortMessage>Second</ShortMessage></Errors>
+          <Recommendations>
+            <CategoryID>1</CategoryID>
+            <NameRecommendation><Name>Marke</Name></NameRecommendation>
+            <Fee currencyID="EUR">1.0</Fee>
+          </Recommendations>
+          <Recommendations>
+            <CategoryID>2</CategoryID>
+          </Recommendations>
+        </GetCategorySpecificsResponse>"""
+
+        list_nodes = ['GetCategorySpecificsResponse.Recommendations.NameRecommendation']
+        parser, recommendations = self.parse(content, 'Recommendations', list_nodes)
+
+        self.assertEqual(recommendations, [
+            {'CategoryID': '1',
+             'NameRecommendation': [{'Name': 'Marke'}],
+             'Fee': {'_currencyID': 'EUR', 'value': '1.0'}},
+            {'CategoryID': '2'}
+        ])
+        self.assertEqual(parser.response_dict['Errors'], [{'ShortMessage': 'First'}, {'ShortMessage': 'Second'}])
+
+    def test_failure(self):
+        parser, categories = self.parse(FAILURE_RESPONSE, 'Category')
+
+        self.assertEqual(categories, [])
+        self.assertTrue(parser.failed)
+        self.assertEqual(parser.response_dict['Errors']['ErrorCode'], '518')
+
+
+class TestEbayStreamingExecute(EbayClassTestCase):
+
+    def setUp(self):
+        super(TestEbayStreamingExecute, self).setUp()
+
+        self.instance_mock.proxies = {}
+        self.instance_mock.timeout = 20
+        self.instance_mock.request = Mock()
+
+        self.response = Mock()
+        self.session = Mock()
+        self.session.send.return_value = self.response
+
+        self.pool = Mock()
+        self.pool.stats.reuse_ratio = 0.0
+        self.pool.lease.return_value = EbaySessionLease((None, 77), self.session, reused=False)
+        self.patch('inventorum.ebay.lib.ebay.get_session_pool', return_value=self.pool)
+
+    def respond_with(self, content):
+        self.response.iter_content.return_value = chunked(content, 16)
+
+    def test_call_is_sent_lazily_and_streamed(self):
+        self.respond_with(CATEGORIES_RESPONSE)
+
+        categories = EbayCategories(None).get_categories()
+        self.assertFalse(self.session.send.called)
+
+        categories = list(categories)
+        self.assertEqual(len(categories), 2)
+        self.assertIsInstance(categories[0], EbayCategory)
+        self.assertEqual(categories[0].category_id, '353')
+        self.assertEqual(categories[0].parent_id, None)
+        self.assertEqual(categories[1].leaf, True)
+
+        self.assertEqual(self.instance_mock.build_request.call_args[0][0], 'GetCategories')
+        self.assertTrue(self.session.send.call_args[1]['stream'])
+        self.assertTrue(self.response.close.called)
+        self.pool.release.assert_called_once_with(self.pool.lease.return_value)
+
+    def test_failure_raises_ebay_connection_exception(self):
+        self.respond_with(FAILURE_RESPONSE)
+
+        ebay = EbayTrading(None)
+        with self.assertRaises(EbayConnectionException) as e:
+            list(ebay.execute('GetCategories', {}, stream_tag='Category'))
+
+        self.assertEqual(e.exception.errors[0].code, 518)
+        self.assertTrue(self.pool.release.called)
+
+    def test_stopping_early_returns_session(self):
+        self.respond_with(CATEGORIES_RESPONSE)
+
+        categories = EbayCategories(None).get_categories()
+        next(categories)
+        categories.close()
+
+        self.assertTrue(self.response.close.called)
+        self.assertTrue(self.pool.release.called)
@@ -0,0 +1,111 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+import time
+from collections import OrderedDict
+
+
+log = logging.getLogger(__name__)
+
+
+class EbayTaskQueue(object):
+    """ Celery queues per work class, every queue is served by its own worker program, see `CELERY_ROUTES` """
+    DEFAULT = 'celery'
+    # publishing and unpublishing triggered by merchants
+    PUBLISH = 'ebay_publish'
+    # quantity revisions, ordered by `EbayTaskPriority`
+    STOCK = 'ebay_stock'
+    # price and structural revisions and deletions of the core api sync
+    UPDATES = 'ebay_updates'
+    ORDERS = 'ebay_orders'
+
+    ALL = (DEFAULT, PUBLISH, STOCK, UPDATES, ORDERS)
+
+
+class EbayTaskPriority(object):
+    """ Priorities of tasks in the `EbayTaskQueue.STOCK` queue, tasks with a higher priority are consumed first """
+    NORMAL = 0
+    SOLD_OUT = 9
+
+    MAX = SOLD_OUT
+
+
+class EbayQueueMetric(object):
+    """ Measured values per queue, recorded in the ebay metrics sink with the queue as verb """
+    # seconds between publishing and starting a task
+    LATENCY = 'queue_latency'
+    # waiting messages
+    DEPTH = 'queue_depth'
+
+    TIMINGS = (LATENCY,)
+
+
+PUBLISHED_AT_HEADER = 'ebay_published_at'
+
+
+def stamp_published_at(body=None, headers=None, **kwargs):
+    """
+    `before_task_publish` handler, adds the publishing time to the message headers. Tasks with an eta are not stamped,
+    waiting for the eta is not queue latency.
+    """
+    if headers is None or (body or {}).get('eta'):
+        return
+    headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+def record_queue_latency(task=None, **kwargs):
+    """
+    `task_prerun` handler, records the seconds between publishing and starting the task for its queue. The clocks of
+    publishing and consuming hosts are compared, eager tasks are never measured.
+    """
+    request = task.request
+    published_at = (request.headers or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is None:
+        return
+
+    queue = (request.delivery_info or {}).get('routing_key') or EbayTaskQueue.DEFAULT
+    record_queue_metrics(queue, {EbayQueueMetric.LATENCY: max(0.0, time.time() - published_at)})
+
+
+def record_queue_metrics(queue, values):
+    """
+    :param values: Measured values by `EbayQueueMetric`
+
+    :type queue: unicode
+    :type values: dict[unicode, int | float]
+    """
+    from inventorum.ebay.lib.ebay.metrics import get_metrics_sink
+
+    sink = get_metrics_sink()
+    for metric, value in values.iteritems():
+        sink.record(metric, value, verb=queue, site_id=None, account=None)
+
+
+def get_queue_depths(app, queues=EbayTaskQueue.ALL):
+    """
+    :return: Number of waiting messages and consumers per queue as reported by the broker, queues are declared if they
+        do not exist yet
+    :type app: celery.Celery
+    :type queues: collections.Iterable[unicode]
+    :rtype: collections.OrderedDict[unicode, (int, int)]
+    """
+    depths = OrderedDict()
+    with app.connection() as connection:
+        channel = connection.default_channel
+        for name in queues:
+            _, message_count, consumer_count = app.amqp.queues[name].bind(channel).queue_declare()
+            depths[name] = (message_count, consumer_count)
+    return depths
+
+
+def record_queue_depths(app):
+    """
+    Samples the depth of all queues into the metrics sink
+
+    :type app: celery.Celery
+    :rtype: collections.OrderedDict[unicode, (int, int)]
+    """
+    depths = get_queue_depths(app)
+    for queue, (message_count, _) in depths.iteritems():
+        record_queue_metrics(queue, {EbayQueueMetric.DEPTH: message_count})
+    return depths
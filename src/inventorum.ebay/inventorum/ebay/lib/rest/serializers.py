@@ -1,9 +1,12 @@
 # encoding: utf-8
 from __future__ import absolute_import, unicode_literals
 import logging
-from django.core.exceptions import ValidationError
+import threading
+from collections import OrderedDict
 
+from django.core.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework.fields import empty, set_value, SkipField
 
 
 log = logging.getLogger(__name__)
@@ -12,7 +15,14 @@ log = logging.getLogger(__name__)
 class POPOListSerializer(serializers.ListSerializer):
     """ List serializer for Plain Old Python Objects (POPO) """
 
-    def build(self):
+    def build(self, compiled=False):
+        """
+        :param compiled: Deserialize with the compiled fast path of the child serializer, see `compile_deserializer`
+        :type compiled: bool
+        """
+        if compiled and _can_build_compiled(self):
+            return compile_deserializer(type(self.child)).build(self.initial_data, many=True)
+
         if not hasattr(self, "_errors"):
             self.is_valid(raise_exception=True)
 
@@ -35,6 +45,8 @@ class POPOSerializer(serializers.Serializer):
 
         ModelClass = self.Meta.model
 
+        self.process_validated_data(validated_data)
+
         for original_name, field in self.fields.iteritems():
             name = field.source
             if name in validated_data:
@@ -56,7 +68,23 @@ class POPOSerializer(serializers.Serializer):
 
         return instance
 
-    def build(self):
+    def process_validated_data(self, validated_data):
+        """
+        Hook to adjust the validated data in place before the POPO (and its nested POPOs) are created. Override this
+        instead of `create`, which is bypassed by the compiled deserializers.
+
+        :type validated_data: dict | collections.OrderedDict
+        """
+        pass
+
+    def build(self, compiled=False):
+        """
+        :param compiled: Deserialize with the compiled fast path of this serializer, see `compile_deserializer`
+        :type compiled: bool
+        """
+        if compiled and _can_build_compiled(self):
+            return compile_deserializer(type(self)).build(self.initial_data)
+
         if not hasattr(self, "_errors"):
             self.is_valid(raise_exception=True)
 
@@ -74,3 +102,332 @@ class POPOSerializer(serializers.Serializer):
             return None
 
         return data
+
+
+# Compiled deserialization ##############################################################################################
+
+def _overrides(cls, base, name):
+    return getattr(cls, name).__func__ is not getattr(base, name).__func__
+
+
+def _can_build_compiled(serializer):
+    """
+    Compiled deserializers share one template serializer per class, serializers with a context or an instance are
+    always built by rest framework
+    """
+    return (hasattr(serializer, "initial_data") and not hasattr(serializer, "_errors") and not serializer.context and
+            not serializer.partial and serializer.instance is None)
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def _compile_char_field(field):
+    to_internal_value = field.to_internal_value
+    trim_whitespace = field.trim_whitespace
+
+    def convert(value):
+        if type(value) is unicode:
+            return value.strip() if trim_whitespace else value
+        return to_internal_value(value)
+    return convert
+
+
+def _compile_integer_field(field):
+    to_internal_value = field.to_internal_value
+
+    def convert(value):
+        if type(value) in (int, long):
+            return value
+        return to_internal_value(value)
+    return convert
+
+
+def _compile_boolean_field(field):
+    to_internal_value = field.to_internal_value
+
+    def convert(value):
+        if value is True or value is False:
+            return value
+        return to_internal_value(value)
+    return convert
+
+
+# Inlined happy paths of the most common fields, everything else goes through `to_internal_value` of the field
+FAST_FIELD_CONVERTERS = {
+    serializers.CharField: _compile_char_field,
+    serializers.IntegerField: _compile_integer_field,
+    serializers.BooleanField: _compile_boolean_field
+}
+
+
+def _compile_field(field):
+    """
+    :type field: rest_framework.fields.Field
+    :return: Function that turns the primitive value of the field into the validated value like `run_validation`
+    :rtype: (object) -> object
+    """
+    cls = type(field)
+    run_validation = field.run_validation
+
+    if field.validators or _overrides(cls, serializers.Field, "validate_empty_values") or \
+            (_overrides(cls, serializers.Field, "run_validation") and
+             _overrides(cls, serializers.CharField, "run_validation")):
+        return run_validation
+
+    if hasattr(field, "compiled_to_internal_value"):
+        to_internal_value = field.compiled_to_internal_value
+    elif cls in FAST_FIELD_CONVERTERS:
+        to_internal_value = FAST_FIELD_CONVERTERS[cls](field)
+    else:
+        to_internal_value = field.to_internal_value
+
+    check_blank = isinstance(field, serializers.CharField)
+
+    def convert(value):
+        # empty values, `None` and blank strings are rare and keep the exact semantics of the field
+        if value is empty or value is None or (check_blank and value == ""):
+            return run_validation(value)
+        return to_internal_value(value)
+    return convert
+
+
+def _compile_nested(serializer, node):
+    """
+    :type serializer: POPOSerializer
+    :type node: CompiledPOPONode
+    """
+    run_validation = serializer.run_validation
+    if node.custom_validation:
+        return run_validation
+
+    validate = node.validate
+
+    def convert(value):
+        if type(value) in (dict, OrderedDict):
+            return validate(value)
+        return run_validation(value)
+    return convert
+
+
+def _compile_list(list_serializer, convert_item):
+    """
+    :type list_serializer: rest_framework.serializers.ListSerializer
+    :type convert_item: (object) -> object
+    """
+    cls = type(list_serializer)
+    run_validation = list_serializer.run_validation
+
+    if list_serializer.validators or any(_overrides(cls, serializers.ListSerializer, name)
+                                         for name in ("run_validation", "to_internal_value", "validate_empty_values",
+                                                      "validate", "get_value")):
+        return run_validation
+
+    def convert(value):
+        if type(value) is list:
+            return [convert_item(item) for item in value]
+        return run_validation(value)
+    return convert
+
+
+class CompiledPOPONode(object):
+    """
+    Validation and creation plan of one (nested) `POPOSerializer`, precomputed from its bound fields
+    """
+
+    def __init__(self, serializer):
+        """
+        :type serializer: POPOSerializer
+        """
+        cls = type(serializer)
+
+        self.model = getattr(getattr(serializer, "Meta", None), "model", None)
+        if self.model is None:
+            raise NotCompilable("{} has no `Meta.model`".format(cls.__name__))
+        if _overrides(cls, POPOSerializer, "create"):
+            raise NotCompilable("{} overrides `create()`".format(cls.__name__))
+
+        self.process_validated_data = serializer.process_validated_data \
+            if _overrides(cls, POPOSerializer, "process_validated_data") else None
+        self.run_validators = serializer.run_validators if serializer.validators else None
+        self.validate_data = serializer.validate if _overrides(cls, serializers.Serializer, "validate") else None
+
+        # serializers that customize the validation itself are validated by rest framework, but still created here
+        self.custom_validation = any(_overrides(cls, serializers.Serializer, name)
+                                     for name in ("run_validation", "to_internal_value", "validate_empty_values"))
+
+        # (field name, get_value or None, convert, validate method or None, source or None, source attrs)
+        self.fields = []
+        # (source, node, many) of nested POPOs
+        self.nested = []
+
+        for field in serializer.fields.values():
+            if isinstance(field, POPOSerializer):
+                nested_node = CompiledPOPONode(field)
+                self.nested.append((field.source, nested_node, False))
+                convert = _compile_nested(field, nested_node)
+            elif isinstance(field, serializers.ListSerializer) and isinstance(field.child, POPOSerializer):
+                nested_node = CompiledPOPONode(field.child)
+                self.nested.append((field.source, nested_node, True))
+                convert = _compile_list(field, _compile_nested(field.child, nested_node))
+            else:
+                convert = _compile_field(field)
+
+            if field.read_only and field.default is empty:
+                continue
+
+            base = serializers.ListSerializer if isinstance(field, serializers.ListSerializer) else \
+                serializers.Serializer if isinstance(field, serializers.Serializer) else serializers.Field
+            get_value = field.get_value if _overrides(type(field), base, "get_value") else None
+            validate_method = getattr(serializer, "validate_" + field.field_name, None)
+            source = field.source_attrs[0] if len(field.source_attrs) == 1 else None
+
+            self.fields.append((field.field_name, get_value, convert, validate_method, source, field.source_attrs))
+
+    def validate(self, data):
+        """
+        Equivalent of `Serializer.run_validation` for non-empty dicts
+        :type data: dict
+        :rtype: collections.OrderedDict
+        """
+        validated_data = OrderedDict()
+        for field_name, get_value, convert, validate_method, source, source_attrs in self.fields:
+            value = data.get(field_name, empty) if get_value is None else get_value(data)
+            try:
+                value = convert(value)
+                if validate_method is not None:
+                    value = validate_method(value)
+            except SkipField:
+                continue
+
+            if source is not None:
+                validated_data[source] = value
+            else:
+                set_value(validated_data, source_attrs, value)
+
+        if self.run_validators is not None:
+            self.run_validators(validated_data)
+        if self.validate_data is not None:
+            validated_data = self.validate_data(validated_data)
+            assert validated_data is not None, ".validate() should return the validated data"
+        return validated_data
+
+    def create(self, validated_data, original_data):
+        """
+        Equivalent of `POPOSerializer.create`
+        :type validated_data: dict
+        :param original_data: Data passed to the root serializer
+        """
+        if self.process_validated_data is not None:
+            self.process_validated_data(validated_data)
+
+        for source, node, many in self.nested:
+            if source in validated_data:
+                if many:
+                    validated_data[source] = [node.create(item, original_data) for item in validated_data[source]]
+                else:
+                    validated_data[source] = node.create(validated_data[source], original_data)
+
+        instance = self.model(**validated_data)
+        setattr(instance, POPOSerializer.ORIGINAL_DATA_ATTR, original_data)
+        return instance
+
+
+class CompiledPOPODeserializer(object):
+    """
+    Fast path for deserializing data into POPOs with a `POPOSerializer` declaration.
+
+    The fields of the serializer are compiled once into plain dict lookups and type checks for the common cases (e.g.
+    an unicode for a `CharField`), all other values are handed to the fields themselves, so the validation stays the
+    same as with rest framework. Custom `validate_<field>` and `validate` methods, validators and
+    `process_validated_data` are called as usual.
+
+    The fast path only knows how to build valid data: as soon as it raises, the data is built once more by rest
+    framework, which raises the exact same errors as without compilation.
+
+    Serializers overriding `create` cannot be compiled and are always built by rest framework.
+    """
+
+    def __init__(self, serializer_class):
+        """
+        :type serializer_class: type
+        """
+        self.serializer_class = serializer_class
+        self._lock = threading.Lock()
+        # many -> (convert, node) or None if not compilable
+        self._plans = {}
+
+    def build(self, data, many=False, fallback=True):
+        """
+        :param fallback: Build with rest framework if the compiled path raises, only disabled for parity tests
+        :type many: bool
+        :type fallback: bool
+        """
+        plan = self._get_plan(many)
+        if plan is None:
+            return self._build_with_rest_framework(data, many)
+
+        convert, node = plan
+        try:
+            validated_data = convert(data)
+            if many:
+                return [node.create(item, data) for item in validated_data]
+            return node.create(validated_data, data)
+        except Exception as e:
+            if not fallback:
+                raise
+            log.debug("Compiled deserialization with %s failed (%s), falling back to rest framework",
+                      self.serializer_class.__name__, e)
+            return self._build_with_rest_framework(data, many)
+
+    @property
+    def compilable(self):
+        return self._get_plan(many=False) is not None
+
+    def _build_with_rest_framework(self, data, many):
+        serializer = self.serializer_class(data=data, many=many)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _get_plan(self, many):
+        if many not in self._plans:
+            with self._lock:
+                if many not in self._plans:
+                    self._plans[many] = self._compile(many)
+        return self._plans[many]
+
+    def _compile(self, many):
+        try:
+            if many:
+                template = self.serializer_class(many=True)
+                if _overrides(type(template), serializers.ListSerializer, "create"):
+                    raise NotCompilable("{} overrides `create()`".format(type(template).__name__))
+                node = CompiledPOPONode(template.child)
+                return _compile_list(template, _compile_nested(template.child, node)), node
+
+            template = self.serializer_class()
+            node = CompiledPOPONode(template)
+            return _compile_nested(template, node), node
+        except NotCompilable as e:
+            log.info("Cannot compile %s: %s", self.serializer_class.__name__, e)
+            return None
+
+
+_compiled_deserializers = {}
+_compiled_deserializers_lock = threading.Lock()
+
+
+def compile_deserializer(serializer_class):
+    """
+    :type serializer_class: type
+    :return: The process-wide compiled deserializer of the given `POPOSerializer` class
+    :rtype: CompiledPOPODeserializer
+    """
+    compiled = _compiled_deserializers.get(serializer_class)
+    if compiled is None:
+        with _compiled_deserializers_lock:
+            compiled = _compiled_deserializers.get(serializer_class)
+            if compiled is None:
+                compiled = _compiled_deserializers[serializer_class] = CompiledPOPODeserializer(serializer_class)
+    return compiled
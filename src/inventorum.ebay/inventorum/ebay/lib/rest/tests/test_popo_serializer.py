@@ -8,7 +8,8 @@ from datetime import date
 from unittest.case import TestCase
 from django.core.exceptions import ValidationError
 
-from inventorum.ebay.lib.rest.serializers import POPOSerializer
+from inventorum.ebay.lib.rest.serializers import POPOSerializer, compile_deserializer
+from inventorum.ebay.tests.utils import CompiledDeserializerParityMixin
 
 from rest_framework import serializers
 
@@ -89,12 +90,44 @@ class _OrderItemSerializer(POPOSerializer):
 
 class _OrderSerializer(POPOSerializer):
 
-    class Meta:
+    class Meta(POPOSerializer.Meta):
         model = _Order
 
     items = _OrderItemSerializer(many=True)
 
 
+class _ValidatingOrderItemSerializer(_OrderItemSerializer):
+    sku = serializers.CharField(source="product_id", max_length=10)
+    product_id = serializers.IntegerField(required=False, min_value=1)
+    quantity = serializers.IntegerField(default=1)
+    in_stock = serializers.BooleanField(required=False, write_only=True)
+
+    def validate_sku(self, value):
+        return value.upper()
+
+    def validate(self, data):
+        data.pop("in_stock", None)
+        return data
+
+    def process_validated_data(self, validated_data):
+        validated_data["price"] = validated_data["price"] * validated_data["quantity"]
+
+
+class _ValidatingOrderSerializer(POPOSerializer):
+
+    class Meta:
+        model = _Order
+
+    items = _ValidatingOrderItemSerializer(many=True, allow_null=True)
+
+
+class _CustomerSerializerWithCustomCreate(_CustomerSerializer):
+
+    def create(self, validated_data):
+        validated_data["last_name"] = validated_data["last_name"].upper()
+        return super(_CustomerSerializerWithCustomCreate, self).create(validated_data)
+
+
 # Specs ####################################################################################
 
 class TestPOPOSerializer(TestCase):
@@ -247,3 +280,95 @@ class TestPOPOSerializer(TestCase):
         serializer = _CustomerSerializerWithUndefinedSerializerAttributes(data=data)
         with self.assertRaises(ValidationError):
             serializer.build()
+
+
+class TestCompiledPOPODeserializer(TestCase, CompiledDeserializerParityMixin):
+
+    def test_parity_of_valid_data(self):
+        self.assertCompiledParity(_CustomerSerializer, {"first_name": " John ", "last_name": "Wayne"})
+        customer = self.assertCompiledParity(_CustomerSerializer, {
+            "first_name": "John",
+            "last_name": "Wayne",
+            "BirthDay": "2015-04-01",
+            "address": {"street": "Voltastraße 5", "zip_code": 1337, "city": "Berlin"}
+        })
+        self.assertEqual(customer.birthday, date(2015, 4, 1))
+        self.assertEqual(customer.foo_address.zip_code, "1337")
+
+        order = self.assertCompiledParity(_OrderSerializer, {"items": [
+            {"product_id": 23, "price": "0.49", "quantity": 1},
+            {"product_id": "42", "price": 100, "quantity": "4.0"}
+        ]})
+        self.assertEqual([item.product_id for item in order.items], [23, 42])
+        self.assertEqual(order.items[1].quantity, 4)
+
+        orders = self.assertCompiledParity(_OrderSerializer, [{"items": []}, {"items": []}], many=True)
+        self.assertEqual(len(orders), 2)
+
+    def test_parity_of_hooks_and_validators(self):
+        order = self.assertCompiledParity(_ValidatingOrderSerializer, {"items": [
+            {"sku": "ab-1", "price": "2.50", "quantity": 2, "in_stock": "true"},
+            {"sku": "ab-2", "price": "1.00"}
+        ]})
+        self.assertEqual([item.product_id for item in order.items], ["AB-1", "AB-2"])
+        self.assertEqual([item.price for item in order.items], [D("5.00"), D("1.00")])
+
+        self.assertCompiledParity(_ValidatingOrderSerializer, {"items": None})
+
+    def test_parity_of_invalid_data(self):
+        invalid_customers = [
+            None,
+            [],
+            {"first_name": "John"},
+            {"first_name": "", "last_name": "Wayne"},
+            {"first_name": None, "last_name": "Wayne"},
+            {"first_name": "John", "last_name": "Wayne", "BirthDay": "yesterday"},
+            {"first_name": "John", "last_name": "Wayne", "address": "Voltastraße 5"},
+            {"first_name": "John", "last_name": "Wayne", "address": {"street": "Voltastraße 5"}},
+        ]
+        for data in invalid_customers:
+            self.assertIsNone(self.assertCompiledParity(_CustomerSerializer, data), data)
+
+        invalid_orders = [
+            {"items": {"product_id": 1}},
+            {"items": [{"product_id": 1, "price": "1.001", "quantity": 1}]},
+            {"items": [{"product_id": True, "price": "1", "quantity": 1}, None]},
+        ]
+        for data in invalid_orders:
+            self.assertIsNone(self.assertCompiledParity(_OrderSerializer, data), data)
+
+        self.assertIsNone(self.assertCompiledParity(_ValidatingOrderSerializer, {"items": [
+            {"sku": "this-is-too-long", "price": "1.00"}
+        ]}))
+        self.assertIsNone(self.assertCompiledParity(_ValidatingOrderSerializer, {"items": [
+            {"sku": "ab-1", "product_id": 0, "price": "1.00"}
+        ]}))
+
+        # model does not accept the attribute
+        self.assertIsNone(self.assertCompiledParity(_CustomerSerializerWithUndefinedPOPOAttributes, {
+            "first_name": "John", "last_name": "Wayne", "undefined_popo_attribute": 1
+        }))
+
+    def test_original_data_is_preserved(self):
+        data = {"items": [{"product_id": 23, "price": "0.49", "quantity": 1}]}
+        order = compile_deserializer(_OrderSerializer).build(data)
+
+        self.assertIs(POPOSerializer.extract_original_data(order), data)
+        self.assertIs(POPOSerializer.extract_original_data(order.items[0]), data)
+
+    def test_build_compiled(self):
+        data = {"first_name": "John", "last_name": "Wayne"}
+        self.assertEqual(_CustomerSerializer(data=data).build(compiled=True).first_name, "John")
+        self.assertEqual(len(_OrderSerializer(data=[{"items": []}], many=True).build(compiled=True)), 1)
+
+        with self.assertRaises(serializers.ValidationError) as e:
+            _CustomerSerializer(data={"first_name": "John"}).build(compiled=True)
+        self.assertEqual(e.exception.detail, {"last_name": ["This field is required."]})
+
+    def test_custom_create_is_not_compiled(self):
+        deserializer = compile_deserializer(_CustomerSerializerWithCustomCreate)
+        self.assertFalse(deserializer.compilable)
+
+        customer = _CustomerSerializerWithCustomCreate(data={"first_name": "John", "last_name": "Wayne"}) \
+            .build(compiled=True)
+        self.assertEqual(customer.last_name, "WAYNE")
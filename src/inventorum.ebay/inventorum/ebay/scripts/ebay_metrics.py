@@ -0,0 +1,84 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+import plac
+from inventorum.util.paste import boostrap_from_config
+
+
+log = logging.getLogger(__name__)
+
+
+def _format_value(metric, value):
+    from inventorum.ebay.lib.ebay.metrics import TIMINGS
+    from inventorum.ebay.lib.queues import EbayQueueMetric
+
+    if value is None:
+        return '-'
+    if metric in TIMINGS:
+        return '{:.1f}ms'.format(value * 1000.0)
+    if metric == EbayQueueMetric.DEPTH:
+        return '{:.0f}'.format(value)
+    return '{:.0f}B'.format(value)
+
+
+def _dump_queue_depths():
+    from inventorum.ebay.celery import app
+    from inventorum.ebay.lib.queues import record_queue_depths
+
+    print('\t'.join(('queue', 'messages', 'consumers')))
+    for queue, (message_count, consumer_count) in record_queue_depths(app).iteritems():
+        print('\t'.join(unicode(value) for value in (queue, message_count, consumer_count)))
+    print('')
+
+
+def _dump_suppressed_calls():
+    from inventorum.ebay.apps.fingerprints.services import get_suppressed_counts
+
+    print('\t'.join(('target', 'suppressed')))
+    for target, count in sorted(get_suppressed_counts().iteritems()):
+        print('\t'.join(unicode(value) for value in (target, count)))
+    print('')
+
+
+def _dump_metrics(verb, reset):
+    from inventorum.ebay.lib.ebay.metrics import get_metrics_sink
+
+    sink = get_metrics_sink()
+    rows = [row for row in sink.aggregates() if verb is None or row['verb'] == verb]
+    if not rows:
+        print('No ebay call metrics recorded by {}'.format(sink.__class__.__name__))
+
+    columns = ('verb', 'site_id', 'account', 'metric', 'count', 'mean', 'p50', 'p95', 'max')
+    print('\t'.join(columns))
+    for row in rows:
+        values = [row['verb'], row['site_id'], row['account'], row['metric'], row['count']]
+        values += [_format_value(row['metric'], row[column]) for column in ('mean', 'p50', 'p95', 'max')]
+        print('\t'.join(unicode(value) for value in values))
+
+    if reset:
+        sink.reset()
+
+
+def run():
+    @plac.annotations(
+        config_file=plac.Annotation("paster config file", "positional", None, str),
+        verb=plac.Annotation("only dump metrics of this verb, e.g. GetOrders", "option", "v", str),
+        reset=plac.Annotation("reset the aggregates after dumping them", "flag", "r"),
+        queues=plac.Annotation("sample the depth of the celery queues first", "flag", "q"),
+        suppressed=plac.Annotation("dump the number of redundant calls that were not sent first", "flag", "s")
+    )
+    def _run(config_file, verb=None, reset=False, queues=False, suppressed=False):
+        """
+        Dumps the aggregated ebay call metrics (build, network, parse and deserialization times, response sizes)
+        per verb, site and account of the configured `EBAY_METRICS_SINK`, as well as the latency and depth of the
+        celery queues with the queue as verb
+        """
+        boostrap_from_config(config_file)
+        if queues:
+            _dump_queue_depths()
+        if suppressed:
+            _dump_suppressed_calls()
+        _dump_metrics(verb, reset)
+
+    plac.call(_run, eager=False)
@@ -0,0 +1,45 @@
+# encoding: utf-8
+from __future__ import absolute_import, unicode_literals
+import logging
+
+import plac
+from inventorum.ebay.lib.ebay.simulator import EbaySimulator, EbaySimulatorConfig
+
+
+log = logging.getLogger(__name__)
+
+
+def run():
+    @plac.annotations(
+        host=plac.Annotation("interface to listen on", "option", "H", str),
+        port=plac.Annotation("port to listen on", "option", "p", int),
+        threads=plac.Annotation("number of worker threads", "option", "t", int),
+        latency=plac.Annotation("seconds every call takes at least", "option", "l", float),
+        latency_jitter=plac.Annotation("maximum random seconds added to the latency", "option", "j", float),
+        error_rate=plac.Annotation("share of calls failing with an internal error (0..1)", "option", "e", float),
+        throttle_rate=plac.Annotation("calls per second per app before calls are throttled", "option", "r", float),
+        throttle_capacity=plac.Annotation("burst of calls above the throttle rate", "option", "b", float),
+        category_tree=plac.Annotation("children per level of the category tree, e.g. 20,10,10", "option", "c", str),
+        orders_per_call=plac.Annotation("orders returned by every GetOrders call", "option", "o", int),
+        seed=plac.Annotation("seed for reproducible error injection", "option", "s", int),
+    )
+    def _run(host="127.0.0.1", port=8765, threads=16, latency=0.0, latency_jitter=0.0, error_rate=0.0,
+             throttle_rate=None, throttle_capacity=None, category_tree="5,4,3", orders_per_call=0, seed=None):
+        """
+        Local stand-in for the ebay trading api, to run load tests without ebay.
+
+        Point the service at it by setting `EBAY_DOMAIN = "<host>:<port>"` and `EBAY_HTTPS = false` in the ini file.
+        """
+        from waitress import serve
+
+        logging.basicConfig(level=logging.INFO)
+
+        config = EbaySimulatorConfig(latency=latency, latency_jitter=latency_jitter, error_rate=error_rate,
+                                     throttle_rate=throttle_rate, throttle_capacity=throttle_capacity,
+                                     category_tree=[int(c) for c in category_tree.split(',')],
+                                     orders_per_call=orders_per_call, seed=seed)
+
+        log.info('Simulating the ebay trading api on %s:%s', host, port)
+        serve(EbaySimulator(config), host=host, port=port, threads=threads)
+
+    plac.call(_run)
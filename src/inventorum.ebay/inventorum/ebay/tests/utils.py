@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+import copy
 from decimal import Decimal
 import logging
+
 import mock
+from django.core.exceptions import ValidationError as DjangoValidationError
+from inventorum.ebay.lib.rest.serializers import compile_deserializer
+from rest_framework.exceptions import ValidationError
 
 
 log = logging.getLogger(__name__)
@@ -28,3 +33,69 @@ class AssertionMixin(object):
         first = Decimal(str(first))
         second = Decimal(str(second))
         self.assertEqual(first, second, msg)
+
+
+class FakeClock(object):
+    """ Clock that only moves when a test advances it, its sleep advances the time instead of waiting """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def popo_state(value):
+    """
+    :return: Comparable representation of (lists of, dicts of) POPOs including the classes of all nested POPOs
+    """
+    if isinstance(value, (list, tuple)):
+        return [popo_state(item) for item in value]
+    if isinstance(value, dict):
+        return {key: popo_state(item) for key, item in value.iteritems()}
+    if hasattr(value, '__dict__'):
+        return type(value), popo_state(vars(value))
+    return value
+
+
+class CompiledDeserializerParityMixin(object):
+
+    def assertCompiledParity(self, serializer_class, data, many=False):
+        """
+        Asserts that the compiled deserializer of the given `POPOSerializer` class builds the same POPOs as rest
+        framework without falling back, and that it rejects the same data with the same errors.
+
+        :return: The built POPO(s), None if the data is invalid
+        """
+        deserializer = compile_deserializer(serializer_class)
+        self.assertTrue(deserializer.compilable, '{} cannot be compiled'.format(serializer_class.__name__))
+
+        serializer = serializer_class(data=copy.deepcopy(data), many=many)
+        try:
+            serializer.is_valid(raise_exception=True)
+            expected = serializer.save()
+        except (ValidationError, DjangoValidationError) as e:
+            with self.assertRaises(Exception):
+                deserializer.build(copy.deepcopy(data), many=many, fallback=False)
+
+            with self.assertRaises(type(e)) as context:
+                deserializer.build(copy.deepcopy(data), many=many)
+            self.assertEqual(self._get_error_detail(context.exception), self._get_error_detail(e))
+            return None
+
+        built = deserializer.build(copy.deepcopy(data), many=many, fallback=False)
+        self.assertEqual(popo_state(built), popo_state(expected))
+        return built
+
+    def _get_error_detail(self, error):
+        if isinstance(error, ValidationError):
+            return error.detail
+        return error.messages
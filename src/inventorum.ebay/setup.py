@@ -11,6 +11,8 @@ ebay_main = inventorum.util.paste:make_wsgi_application
 
 [console_scripts]
 celery = inventorum.ebay.scripts.celery:run
+ebay_metrics = inventorum.ebay.scripts.ebay_metrics:run
+ebay_simulator = inventorum.ebay.scripts.ebay_simulator:run
 provisioning/provision_db = inventorum.ebay.scripts.provisioning:provision_db
 provisioning/provision_rabbitmq = inventorum.ebay.scripts.provisioning:provision_rabbitmq
 manage = inventorum.util.paste:manage